@@ -2,7 +2,67 @@
 from __future__ import annotations
 
 import json
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from app.chart.payload import (
+    columns_payload, encode_bars, encode_indicators, indicators_payload, indicators_since, merge_indicator_deltas,
+)
+from app.chart.latency import FeedLatency
+from app.config import BRIDGE_FORMAT, BRIDGE_FRAME_MS, FEED_LATENCY, INITIAL_HISTORY_BARS, LAZY_HISTORY_CHUNK
+
+_LAT_PENDING_MAX = 64   # échantillons émis sans écho (page pas prête, rechargée): on oublie les plus vieux
+
+class FrameOutbox:
+    """
+    Mises à jour live d'une frame: une bougie par time (la dernière version gagne),
+    deltas d'indicateurs fusionnés en un seul, toggles fusionnés, qualité par time.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.bars: dict[int, dict] = {}
+        self.ind: dict | None = None
+        self.toggles: dict = {}
+        self.quality: dict[int, dict] = {}
+        self.lat: tuple[int, dict] | None = None   # (seq, horodatages) de la bougie la plus récente
+        self.items = 0
+
+    def __bool__(self) -> bool:
+        return self.items > 0
+
+    def add_bar(self, bar: dict, lat: tuple[int, dict] | None = None):
+        self.bars[int(bar["time"])] = bar
+        if lat is not None:
+            self.lat = lat
+        self.items += 1
+
+    def add_indicators(self, delta: dict):
+        self.ind = delta if self.ind is None else merge_indicator_deltas(self.ind, delta)
+        self.items += 1
+
+    def add_toggles(self, flags: dict):
+        self.toggles.update(flags)
+        self.items += 1
+
+    def add_quality(self, point: dict):
+        if point.get("time"):
+            self.quality[int(point["time"])] = point
+            self.items += 1
+
+    def message(self) -> dict:
+        msg: dict = {}
+        if self.toggles:
+            msg["toggles"] = self.toggles
+        if self.bars:
+            msg["bars"] = [self.bars[t] for t in sorted(self.bars)]
+        if self.ind is not None:
+            msg["ind"] = self.ind
+        if self.quality:
+            msg["quality"] = [self.quality[t] for t in sorted(self.quality)]
+        return msg
 
 
 class ChartBridge(QObject):
@@ -14,57 +74,221 @@ class ChartBridge(QObject):
     Côté JS, on se connecte à:
       bridge.seriesLoaded.connect(fn)
       bridge.barUpdated.connect(fn)
+      bridge.barsPatched.connect(fn)
+      bridge.barsPrepended.connect(fn)
+      bridge.olderFailed.connect(fn)
       bridge.indicatorsLoaded.connect(fn)
       bridge.indicatorUpdated.connect(fn)
       bridge.indicatorToggle.connect(fn)
+      bridge.qualityLoaded.connect(fn)
+      bridge.qualityUpdated.connect(fn)
+      bridge.frameBatch.connect(fn)
+      bridge.lodWindow.connect(fn)
       bridge.showLoading.connect(fn)
       bridge.hideLoading.connect(fn)
+
+    Indicateurs versionnés: chaque indicatorsLoaded porte une version "v", chaque delta
+    (indicatorUpdated / frameBatch.ind) {"v", "base", "from", séries, markers} remplace côté JS
+    les points de time >= from. Si base ne correspond pas à la version du chart, le JS ignore
+    le delta et appelle requestIndicatorResync() → envoi complet.
+
+    Latence (FEED_LATENCY): une bougie live horodatée reçoit un numéro "lat" (frameBatch.lat ou
+    barUpdated.lat) ; chart.html le renvoie par latencyEcho(seq, apply_ms, render_ms) à la frame
+    suivante → self.latency (FeedLatency, cf. app/chart/latency.py).
+
+    Outbox (frame_ms > 0): bougie courante, points d'indicateurs, qualité et toggles ne partent
+    pas un par un mais dans un seul frameBatch par frame, appliqué d'un bloc côté JS. Les
+    envois lourds (historique, patch, indicateurs complets) vident d'abord l'outbox: l'ordre
+    des messages est conservé.
     """
 
     # ----- Signaux écoutés par chart.html -----
-    seriesLoaded = pyqtSignal(str)       # JSON list[bar]
+    seriesLoaded = pyqtSignal(str)       # JSON list[bar] ou colonnes (BRIDGE_FORMAT, cf. payload.py)
     barUpdated = pyqtSignal(str)         # JSON bar
-    indicatorsLoaded = pyqtSignal(str)   # JSON dict
-    indicatorUpdated = pyqtSignal(str)   # JSON dict
+    barsPatched = pyqtSignal(str)        # JSON list[bar] (plage à remplacer: backfill)
+    barsPrepended = pyqtSignal(str)      # barres plus anciennes (même format que seriesLoaded) ; vide = début
+    olderFailed = pyqtSignal()           # tranche plus ancienne indisponible (erreur): nouvel essai plus tard
+    indicatorsLoaded = pyqtSignal(str)   # JSON dict (lignes en colonnes selon BRIDGE_FORMAT)
+    indicatorUpdated = pyqtSignal(str)   # JSON delta {"v", "base", "from", "ema20", "rsi14", "macd", "markers"}
     indicatorToggle = pyqtSignal(str)    # JSON dict (toggles)
+    qualityLoaded = pyqtSignal(str)      # JSON dict de colonnes (qualité du flux par barre)
+    qualityUpdated = pyqtSignal(str)     # JSON point qualité d'une barre
+    frameBatch = pyqtSignal(str)         # JSON {"toggles", "bars", "ind", "quality"}: tout ce qu'une frame a produit
+    lodWindow = pyqtSignal(str)          # JSON {"level", "reset", "end", "last", "tf", "bars", "ind"}: fenêtre décimée
 
     showLoading = pyqtSignal()
     hideLoading = pyqtSignal()
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, fmt: str = BRIDGE_FORMAT, initial_bars: int = INITIAL_HISTORY_BARS,
+                 frame_ms: int = BRIDGE_FRAME_MS):
         super().__init__(parent)
+        self.fmt = fmt
+        self.initial_bars = initial_bars
+        self.first_time = 0   # plus ancienne bougie chargée dans le chart (bord du chargement progressif)
+        self.ind_version = 0  # version des indicateurs côté chart (envoi complet ou delta)
+
+        self.frame_ms = frame_ms
+        self._outbox = FrameOutbox()
+        self._frame_timer: QTimer | None = None
+        self.frames_sent = 0      # frameBatch émis
+        self.items_batched = 0    # mises à jour regroupées dedans (ratio = messages économisés)
+
+        self.latency: FeedLatency | None = FeedLatency() if FEED_LATENCY else None
+        self._lat_seq = 0
+        self._lat_pending: dict[int, dict] = {}   # seq → horodatages, en attente de l'écho JS
 
     # ---------- API Python (helpers) ----------
-    @pyqtSlot(list)
+    @pyqtSlot(object)
     def send_bars_batch(self, bars: list):
-        """Emet le batch initial d'un coup (seriesLoaded)."""
-        payload = json.dumps(bars, separators=(",", ":"))
+        """Emet le batch initial (seriesLoaded): les initial_bars dernières, le passé vient à la demande."""
+        self.flush_frame()
+        if self.initial_bars > 0 and len(bars) > self.initial_bars:
+            bars = bars[-self.initial_bars:]
+        self.first_time = int(bars[0]["time"]) if bars else 0
+        payload = encode_bars(bars, self.fmt)
         self.seriesLoaded.emit(payload)
 
     @pyqtSlot(dict)
-    def send_bar_update(self, bar: dict):
-        """Emet un update (barUpdated)."""
+    def send_bar_update(self, bar: dict, stamps: dict | None = None):
+        """
+        Emet un update (barUpdated), ou le met dans la frame en cours.
+        stamps: horodatages tick → GUI de cette bougie (mesure de latence), None sinon.
+        """
+        lat = self._next_lat(stamps)
+        if self.frame_ms > 0:
+            self._outbox.add_bar(bar, lat)
+            self._arm_frame()
+            return
+        if lat is not None:
+            bar = dict(bar, lat=self._sent_lat(lat))
         payload = json.dumps(bar, separators=(",", ":"))
         self.barUpdated.emit(payload)
 
+    @pyqtSlot(object)
+    def send_bars_patch(self, bars: list):
+        """Emet une plage de barres corrigées (barsPatched), fusionnée en un seul setData côté JS."""
+        self.flush_frame()
+        payload = json.dumps(bars, separators=(",", ":"))
+        self.barsPatched.emit(payload)
+
+    @pyqtSlot(object)
+    def send_bars_prepend(self, bars: list):
+        """Emet des barres antérieures à la première chargée (barsPrepended)."""
+        self.flush_frame()
+        if bars:
+            self.first_time = min(self.first_time or int(bars[0]["time"]), int(bars[0]["time"]))
+        self.barsPrepended.emit(encode_bars(bars, self.fmt))
+
+    @pyqtSlot()
+    def send_older_failed(self):
+        """La tranche demandée n'a pas pu être lue (olderFailed): le JS libère la requête sans marquer le début."""
+        self.flush_frame()
+        self.olderFailed.emit()
+
     @pyqtSlot(dict)
     def send_indicators_all(self, indicators: dict):
-        """Emet tout le paquet d'indicateurs (indicatorsLoaded)."""
-        payload = json.dumps(indicators or {}, separators=(",", ":"))
-        self.indicatorsLoaded.emit(payload)
+        """Emet le paquet d'indicateurs (indicatorsLoaded), limité aux bougies chargées: nouvelle version."""
+        self.flush_frame()
+        self.ind_version += 1
+        ind = dict(indicators_since(indicators, self.first_time) or {}, v=self.ind_version)
+        self.indicatorsLoaded.emit(encode_indicators(ind, self.fmt))
 
-    @pyqtSlot(dict)
-    def send_indicator_update(self, patch: dict):
-        """Emet un patch indicateur (indicatorUpdated)."""
-        payload = json.dumps(patch or {}, separators=(",", ":"))
+    @pyqtSlot(int, dict)
+    def send_indicator_delta(self, since: int, series: dict):
+        """
+        Emet les points d'indicateurs de time >= since (indicatorUpdated, ou fusionnés dans la
+        frame en cours): series = IndicatorEngine.series_for_chart(since).
+        """
+        since = max(int(since), self.first_time)
+        delta = dict(indicators_since(series, since))
+        delta.update({"v": self.ind_version + 1, "base": self.ind_version, "from": since})
+        self.ind_version += 1
+        if self.frame_ms > 0:
+            self._outbox.add_indicators(delta)
+            self._arm_frame()
+            return
+        payload = json.dumps(delta, separators=(",", ":"))
         self.indicatorUpdated.emit(payload)
 
     @pyqtSlot(dict)
     def send_indicator_toggle(self, toggles: dict):
-        """Emet des toggles d'affichage (indicatorToggle)."""
+        """Emet des toggles d'affichage (indicatorToggle), ou les fusionne dans la frame en cours."""
+        if self.frame_ms > 0:
+            self._outbox.add_toggles(toggles or {})
+            self._arm_frame()
+            return
         payload = json.dumps(toggles or {}, separators=(",", ":"))
         self.indicatorToggle.emit(payload)
 
+    @pyqtSlot(object)
+    def send_quality_all(self, cols: dict):
+        """Emet la série qualité complète, en colonnes (qualityLoaded)."""
+        self.flush_frame()
+        payload = json.dumps(cols or {}, separators=(",", ":"))
+        self.qualityLoaded.emit(payload)
+
+    @pyqtSlot(dict)
+    def send_quality_update(self, point: dict):
+        """Emet la qualité de la barre courante (qualityUpdated), ou la met dans la frame en cours."""
+        if self.frame_ms > 0:
+            self._outbox.add_quality(point or {})
+            self._arm_frame()
+            return
+        payload = json.dumps(point or {}, separators=(",", ":"))
+        self.qualityUpdated.emit(payload)
+
+    def send_lod_window(self, level: int, cols: dict, indicators: dict, reset: bool, end: bool,
+                        last: int, tf_seconds: int):
+        """
+        Fenêtre d'un historique long au niveau de détail demandé (lodWindow): remplace bougies et
+        indicateurs du chart d'un coup ; reset = premier affichage (vue calée sur la fin).
+        """
+        self.flush_frame()
+        self.first_time = int(cols["time"][0]) if len(cols["time"]) else 0
+        self.ind_version += 1
+        msg = {"level": level, "reset": reset, "end": end, "last": last, "tf": tf_seconds,
+               "bars": columns_payload(cols, self.fmt),
+               "ind": indicators_payload(dict(indicators, v=self.ind_version), self.fmt)}
+        self.lodWindow.emit(json.dumps(msg, separators=(",", ":")))
+
+    @pyqtSlot()
+    def flush_frame(self):
+        """Envoie la frame en cours (un seul frameBatch), s'il y a quelque chose dedans."""
+        if self._frame_timer is not None:
+            self._frame_timer.stop()
+        if not self._outbox:
+            return
+        msg = self._outbox.message()
+        if self._outbox.lat is not None:
+            msg["lat"] = self._sent_lat(self._outbox.lat)
+        self.items_batched += self._outbox.items
+        self._outbox.clear()
+        self.frames_sent += 1
+        self.frameBatch.emit(json.dumps(msg, separators=(",", ":")))
+
+    def _arm_frame(self):
+        if self._frame_timer is None:
+            self._frame_timer = QTimer(self)
+            self._frame_timer.setSingleShot(True)
+            self._frame_timer.timeout.connect(self.flush_frame)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start(self.frame_ms)
+
+    def _next_lat(self, stamps: dict | None) -> tuple[int, dict] | None:
+        if stamps is None or self.latency is None:
+            return None
+        self._lat_seq += 1
+        return self._lat_seq, stamps
+
+    def _sent_lat(self, lat: tuple[int, dict]) -> int:
+        """Horodatage "emit" juste avant l'envoi ; le numéro attend son écho."""
+        seq, stamps = lat
+        stamps["emit"] = time.perf_counter()
+        self._lat_pending[seq] = stamps
+        if len(self._lat_pending) > _LAT_PENDING_MAX:
+            del self._lat_pending[next(iter(self._lat_pending))]
+        return seq
+
     @pyqtSlot()
     def show_loader(self):
         self.showLoading.emit()
@@ -74,7 +298,37 @@ class ChartBridge(QObject):
         self.hideLoading.emit()
 
     # ---------- API depuis JS -> Python (optionnel) ----------
-    # chart.html appelle: bridge.notifyIndicatorClose('rsi'/'macd') si tu le veux.
+    # chart.html appelle bridge.requestOlder(time) quand la vue approche du bord gauche.
+    olderRequested = pyqtSignal(int, int)   # before (time de la 1re bougie du chart), nb de barres
+
+    @pyqtSlot(int)
+    def requestOlder(self, before: int):
+        self.olderRequested.emit(before, LAZY_HISTORY_CHUNK)
+
+    # chart.html (historique long, cf. lodWindow) signale la plage visible et sa largeur en pixels.
+    viewportChanged = pyqtSignal(int, int, int)   # time de début, time de fin, largeur px
+
+    @pyqtSlot(int, int, int)
+    def setViewport(self, t_from: int, t_to: int, width_px: int):
+        self.viewportChanged.emit(t_from, t_to, width_px)
+
+    # chart.html renvoie le numéro "lat" d'une bougie à la frame qui suit son application.
+    @pyqtSlot(int, float, float)
+    def latencyEcho(self, seq: int, apply_ms: float, render_ms: float):
+        stamps = self._lat_pending.pop(seq, None)
+        if stamps is None or self.latency is None:
+            return
+        stamps["echo"] = time.perf_counter()
+        self.latency.add_echo(stamps, apply_ms, render_ms)
+
+    # chart.html appelle bridge.requestIndicatorResync() sur un trou de version des deltas.
+    indicatorResyncRequested = pyqtSignal()
+
+    @pyqtSlot()
+    def requestIndicatorResync(self):
+        self.indicatorResyncRequested.emit()
+
+    # chart.html appelle: bridge.notifyIndicatorClose('rsi'/'macd'/'quality') si tu le veux.
     indicatorClosed = pyqtSignal(str)
 
     @pyqtSlot(str)
@@ -40,20 +40,42 @@ class ChartView(QWebEngineView):
         """Batch initial → JS (seriesLoaded)"""
         self.bridge.send_bars_batch(bars)
 
-    def update_bar(self, bar: dict):
-        """Mise à jour live → JS (barUpdated)"""
-        self.bridge.send_bar_update(bar)
+    def update_bar(self, bar: dict, stamps: dict | None = None):
+        """Mise à jour live → JS (barUpdated) ; stamps: horodatages de latence du tick"""
+        self.bridge.send_bar_update(bar, stamps)
+
+    def patch_series(self, bars: list[dict]):
+        """Plage de barres corrigées (backfill) → JS (barsPatched)"""
+        self.bridge.send_bars_patch(bars)
+
+    def prepend_series(self, bars: list[dict]):
+        """Barres plus anciennes (chargement progressif) → JS (barsPrepended)"""
+        self.bridge.send_bars_prepend(bars)
+
+    def older_failed(self):
+        """Tranche plus ancienne indisponible (appel MT5 échoué) → JS (olderFailed), sans marquer le début"""
+        self.bridge.send_older_failed()
+
+    def load_window(self, level: int, cols: dict, indicators: dict, reset: bool, end: bool, last: int,
+                    tf_seconds: int):
+        """Fenêtre décimée d'un historique long (bougies + indicateurs) → JS (lodWindow)"""
+        self.bridge.send_lod_window(level, cols, indicators or {}, reset, end, last, tf_seconds)
 
     def load_indicators(self, indicators: dict):
         """Envoi complet des indicateurs → JS (indicatorsLoaded)"""
         self.bridge.send_indicators_all(indicators or {})
 
-    def update_indicator_points(self, patch: dict):
-        """
-        Mise à jour incrémentale d'indicateurs (points/markers) → JS (indicatorUpdated).
-        Si ton patch est déjà structuré côté Engine (ex: {"markers": {...}}), forward tel quel.
-        """
-        self.bridge.send_indicator_update(patch or {})
+    def update_indicators(self, since: int, series: dict):
+        """Delta d'indicateurs (points/markers de time >= since) → JS (indicatorUpdated)"""
+        self.bridge.send_indicator_delta(since, series or {})
+
+    def load_quality(self, cols: dict):
+        """Qualité du flux par barre, série complète en colonnes → JS (qualityLoaded)"""
+        self.bridge.send_quality_all(cols or {})
+
+    def update_quality(self, point: dict):
+        """Qualité de la barre courante → JS (qualityUpdated)"""
+        self.bridge.send_quality_update(point or {})
 
     def set_indicator_visibility(self, flags: dict):
         """Toggles d’affichage → JS (indicatorToggle)"""
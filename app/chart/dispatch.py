@@ -0,0 +1,166 @@
+# app/chart/dispatch.py
+from __future__ import annotations
+
+import time
+
+from PyQt6.QtCore import QObject, pyqtSlot
+
+from app.chart.latency import LAT_KEY
+from app.chart.lod import LodPyramid
+from app.config import LOD_MIN_BARS, LOD_PX_PER_BAR
+from app.indicators.ta import IndicatorEngine
+
+_DEFAULT_PX = 1920   # largeur supposée du chart tant que chart.html n'a rien signalé
+
+
+class ChartDispatcher(QObject):
+    """
+    Chemin unique worker → chart: bougies et indicateurs passent ici et nulle part ailleurs
+    (l'historique n'est encodé et envoyé qu'une fois).
+
+    Indicateurs: envoi complet seulement au chargement, au chargement progressif (les séries
+    s'étendent à gauche) et sur demande de resynchro du JS ; sinon deltas versionnés
+    series_for_chart(since) — la barre courante après un tick, la fin de série à partir du
+    début d'un patch (l'EMA/MACD/RSI d'après ont bougé).
+
+    Historique long (≥ LOD_MIN_BARS): pyramide LOD, le chart ne reçoit qu'une fenêtre
+    (lodWindow) autour de la plage visible qu'il signale (viewportChanged), au niveau de
+    détail qui tient dans sa largeur ; pleine résolution seulement en zoom serré.
+
+    Bougie live horodatée par le worker (bar["_lat"]): l'arrivée dans le thread GUI est notée
+    ici, puis les horodatages suivent la bougie jusqu'au bridge (latence tick → pixel).
+    """
+
+    def __init__(self, chart, indic: IndicatorEngine | None = None, parent=None,
+                 lod_min_bars: int = LOD_MIN_BARS, px_per_bar: float = LOD_PX_PER_BAR):
+        super().__init__(parent)
+        self.chart = chart
+        self.indic = indic or IndicatorEngine()
+        self.full_sent = 0
+        self.deltas_sent = 0
+        self.windows_sent = 0
+
+        self.lod_min_bars = lod_min_bars
+        self.px_per_bar = px_per_bar
+        self.lod: LodPyramid | None = None
+        self._win = (0, 0, 0)           # (niveau, b0, b1) de la fenêtre affichée
+        self._view = (0, 0, _DEFAULT_PX)  # dernière vue signalée (t_from, t_to, px)
+
+        chart.bridge.indicatorResyncRequested.connect(self.resync_indicators)
+        chart.bridge.viewportChanged.connect(self.on_viewport)
+
+    @pyqtSlot(object)
+    def on_history(self, bars: list):
+        self.indic.set_history(bars)
+        if self.lod_min_bars > 0 and len(bars) >= self.lod_min_bars:
+            self.lod = LodPyramid(bars)
+            n = self.lod.n
+            shown = min(n, self.chart.bridge.initial_bars or n)
+            self._view = (int(bars[n - shown]["time"]), self.lod.last_time, _DEFAULT_PX)
+            self._send_window(n - shown, n, _DEFAULT_PX, reset=True)
+            return
+        self.lod = None
+        self.chart.load_series(bars)
+        self._send_full()
+
+    @pyqtSlot(dict)
+    def on_bar(self, bar: dict):
+        stamps = bar.pop(LAT_KEY, None)
+        if stamps is not None:
+            stamps["gui"] = time.perf_counter()
+        if self.lod is not None:
+            self._on_bar_lod(bar, stamps)
+            return
+        self.chart.update_bar(bar, stamps)
+        if self.indic.on_bar(bar):   # {} tant que l'historique n'est pas chargé
+            self._send_delta(int(bar["time"]))
+
+    @pyqtSlot(object)
+    def on_patch(self, patch: list):
+        if self.lod is not None:
+            if patch:
+                self.indic.merge_history(patch)
+                self.lod = LodPyramid(self.indic.bars)
+                self._resend_view()
+            return
+        self.chart.patch_series(patch)
+        if patch:
+            self.indic.merge_history(patch)
+            self._send_delta(min(int(b["time"]) for b in patch))
+
+    @pyqtSlot(object)
+    def on_older(self, bars: list | None):
+        if self.lod is not None:
+            return   # la pyramide couvre déjà tout l'historique chargé
+        if bars is None:
+            self.chart.older_failed()   # lecture MT5 échouée: le chart retentera
+            return
+        self.chart.prepend_series(bars)
+        if bars:
+            self.indic.prepend_history(bars)
+            self._send_full()
+
+    @pyqtSlot()
+    def resync_indicators(self):
+        if self.lod is not None:
+            self._resend_view()
+            return
+        self._send_full()
+
+    @pyqtSlot(int, int, int)
+    def on_viewport(self, t_from: int, t_to: int, width_px: int):
+        if self.lod is None:
+            return
+        self._view = (t_from, t_to, width_px)
+        i0, i1 = self.lod.index_range(t_from, t_to)
+        level, b0, b1 = self._win
+        max_bars = width_px / self.px_per_bar
+        if self.lod.level_for(i1 - i0, max_bars, current=level) == level and self.lod.covers(level, b0, b1, i0, i1):
+            return
+        self._send_window(i0, i1, width_px)
+
+    # ---------- interne ----------
+
+    def _send_full(self):
+        self.chart.load_indicators(self.indic.series_for_chart())
+        self.full_sent += 1
+
+    def _send_delta(self, since: int):
+        self.chart.update_indicators(since, self.indic.series_for_chart(since))
+        self.deltas_sent += 1
+
+    def _send_window(self, i0: int, i1: int, width_px: int, reset: bool = False):
+        lod = self.lod
+        level = lod.level_for(i1 - i0, width_px / self.px_per_bar, current=None if reset else self._win[0])
+        b0, b1 = lod.window(level, i0, i1)
+        cols = lod.columns(level, b0, b1)
+        ind = self.indic.series_at(lod.last_indices(level, b0, b1).tolist(), cols["time"].tolist())
+        self.chart.load_window(level, cols, ind, reset, b1 >= lod.size(level), lod.last_time, lod.tf_seconds())
+        self._win = (level, b0, b1)
+        self.windows_sent += 1
+
+    def _resend_view(self):
+        t_from, t_to, px = self._view
+        self._send_window(*self.lod.index_range(t_from, t_to), px)
+
+    def _on_bar_lod(self, bar: dict, stamps: dict | None = None):
+        level, b0, b1 = self._win
+        at_end = b1 >= self.lod.size(level)
+        if not self.indic.on_bar(bar):
+            return
+        i = self.lod.update(bar)
+        if i < 0:   # barre plus ancienne que la dernière: rare, on reconstruit
+            self.lod = LodPyramid(self.indic.bars)
+            self._resend_view()
+            return
+        if not at_end:
+            return   # l'utilisateur regarde le passé: rien à redessiner
+        b = i >> level
+        self._win = (level, b0, max(b1, b + 1))
+        pt = self.lod.bar(level, b)
+        self.chart.update_bar(pt, stamps)
+        self._send_delta_at(i, pt["time"])
+
+    def _send_delta_at(self, i: int, t: int):
+        self.chart.update_indicators(t, self.indic.series_at([i], [t]))
+        self.deltas_sent += 1
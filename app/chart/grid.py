@@ -0,0 +1,179 @@
+# app/chart/grid.py
+"""
+Grille multi-charts (2×2, 3×3…): toutes les panes sont alimentées par la DataSource du chart
+principal, via ses subscriptions (symbole, timeframe) — un seul thread worker, une seule
+connexion MT5, un seul cycle de poll partagé — et rendues par une seule page (grid.html dans
+un GridView): une instance lightweight-charts par pane, un seul process de rendu.
+
+GridHub fait le fan-out des signaux sub* du worker vers les panes qui affichent le couple
+(deux panes peuvent montrer le même), avec un IndicatorEngine par pane, et tient les
+subscriptions à jour: couple qui apparaît → subscribe (l'historique sort du cache du worker
+s'il y est), couple qui n'est plus affiché → unsubscribe.
+"""
+from __future__ import annotations
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from app.config import GRID_PANE_BARS
+from app.indicators.ta import IndicatorEngine
+
+
+class _Pane:
+    __slots__ = ("id", "symbol", "tf", "indic", "loaded")
+
+    def __init__(self, pane_id: int, symbol: str, tf: str):
+        self.id = pane_id
+        self.symbol = symbol
+        self.tf = tf
+        self.indic = IndicatorEngine()
+        self.loaded = False
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.symbol, self.tf
+
+
+def default_pairs(n: int, symbols: list[str], tfs: list[str], symbol: str, tf: str) -> list[tuple[str, str]]:
+    """n couples pour une grille neuve: le couple courant d'abord, puis les autres symboles, puis le timeframe suivant."""
+    syms = [symbol] + [s for s in symbols if s != symbol]
+    k = tfs.index(tf) if tf in tfs else 0
+    return [(syms[i % len(syms)], tfs[(k + i // len(syms)) % len(tfs)]) for i in range(n)]
+
+
+class GridHub(QObject):
+    subscribeRequested = pyqtSignal(str, str)     # → source.subscribe
+    unsubscribeRequested = pyqtSignal(str, str)   # → source.unsubscribe
+    pairActivated = pyqtSignal(str, str)          # double-clic sur une pane: à ouvrir dans le chart principal
+
+    def __init__(self, bridge, symbols: list[str], tfs: list[str], pane_bars: int = GRID_PANE_BARS, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.symbols = list(symbols)
+        self.tfs = list(tfs)
+        self.pane_bars = pane_bars
+        self.rows = self.cols = 0
+        self.panes: list[_Pane] = []
+        self._by_key: dict[tuple[str, str], list[_Pane]] = {}
+        self._pairs: list[tuple[str, str]] = []   # choix des panes, gardés d'un layout à l'autre
+
+        bridge.layoutRequested.connect(self._resend_all)
+        bridge.paneResyncRequested.connect(self._resend_pane)
+        bridge.paneChangeRequested.connect(self.set_pane)
+        bridge.paneActivated.connect(self._on_activated)
+
+    def connect_source(self, source):
+        source.subHistoryReady.connect(self.on_sub_history)
+        source.subBarReady.connect(self.on_sub_bar)
+        source.subHistoryPatch.connect(self.on_sub_patch)
+        self.subscribeRequested.connect(source.subscribe, Qt.ConnectionType.QueuedConnection)
+        self.unsubscribeRequested.connect(source.unsubscribe, Qt.ConnectionType.QueuedConnection)
+
+    # ---------- layout ----------
+
+    def set_layout(self, rows: int, cols: int, symbol: str, tf: str):
+        """Grille rows×cols ; les panes existantes gardent leur couple, les nouvelles prennent les suivants."""
+        n = rows * cols
+        if len(self._pairs) < n:
+            taken = set(self._pairs)
+            extra = [p for p in default_pairs(n + len(self._pairs), self.symbols, self.tfs, symbol, tf)
+                     if p not in taken]
+            self._pairs += extra[:n - len(self._pairs)]
+        self.rows, self.cols = rows, cols
+        self._apply(self._pairs[:n])
+
+    def set_pane(self, pane: int, symbol: str, tf: str):
+        if not 0 <= pane < len(self.panes) or (symbol, tf) == self.panes[pane].key:
+            return
+        self._pairs[pane] = (symbol, tf)
+        self._apply(self._pairs[:len(self.panes)])
+
+    def clear(self):
+        """Grille masquée: plus aucune subscription tenue par les panes."""
+        self.rows = self.cols = 0
+        self._apply([])
+
+    def _apply(self, pairs: list[tuple[str, str]]):
+        old = {p.id: p for p in self.panes}
+        before = set(self._by_key)
+        self.panes = []
+        for i, (sym, tf) in enumerate(pairs):
+            p = old.get(i)
+            self.panes.append(p if p is not None and p.key == (sym, tf) else _Pane(i, sym, tf))
+        self._by_key = {}
+        for p in self.panes:
+            self._by_key.setdefault(p.key, []).append(p)
+
+        for key in before - set(self._by_key):
+            self.unsubscribeRequested.emit(*key)
+        # grid.html garde le chart des panes dont le couple n'a pas changé: rien à leur renvoyer
+        self._send_layout()
+        for key, panes in self._by_key.items():
+            src = next((p for p in panes if p.loaded), None)
+            if src is not None:
+                # couple déjà affiché par une autre pane: on part de ses barres, sans aller-retour worker
+                for p in panes:
+                    if not p.loaded:
+                        p.indic.set_history(src.indic.bars)
+                        p.loaded = True
+                        self._send_pane(p)
+            elif key not in before or any(not p.loaded for p in panes):
+                # déjà suivi par le worker → il renvoie l'historique en mémoire tout de suite
+                self.subscribeRequested.emit(*key)
+
+    # ---------- slots (signaux du worker) ----------
+
+    @pyqtSlot(str, str, object)
+    def on_sub_history(self, symbol: str, tf: str, bars: list):
+        for p in self._by_key.get((symbol, tf), ()):
+            p.indic.set_history(bars[-self.pane_bars:] if self.pane_bars > 0 else bars)
+            p.loaded = True
+            self._send_pane(p)
+
+    @pyqtSlot(str, str, dict)
+    def on_sub_bar(self, symbol: str, tf: str, bar: dict):
+        for p in self._by_key.get((symbol, tf), ()):
+            if not p.loaded or not p.indic.on_bar(bar):
+                continue
+            t = int(bar["time"])
+            self.bridge.send_pane_bar(p.id, bar, t, p.indic.series_for_chart(t))
+            self._trim(p)
+
+    @pyqtSlot(str, str, object)
+    def on_sub_patch(self, symbol: str, tf: str, patch: list):
+        for p in self._by_key.get((symbol, tf), ()):
+            if p.loaded and patch:
+                p.indic.merge_history(patch)
+                self._send_pane(p)   # plage passée réécrite: rechargement de la pane (rare)
+
+    # ---------- interne ----------
+
+    def _send_layout(self):
+        self.bridge.send_layout(self.rows, self.cols,
+                                [{"id": p.id, "symbol": p.symbol, "tf": p.tf} for p in self.panes],
+                                self.symbols, self.tfs)
+
+    def _send_pane(self, p: _Pane):
+        self.bridge.send_pane(p.id, p.symbol, p.tf, p.indic.bars, p.indic.series_for_chart())
+
+    def _trim(self, p: _Pane):
+        """Une pane ne garde que pane_bars barres: on recoupe (et recharge) quand elle a doublé."""
+        if self.pane_bars > 0 and len(p.indic.bars) >= 2 * self.pane_bars:
+            p.indic.set_history(p.indic.bars[-self.pane_bars:])
+            self._send_pane(p)
+
+    @pyqtSlot()
+    def _resend_all(self):
+        self._send_layout()
+        for p in self.panes:
+            if p.loaded:
+                self._send_pane(p)
+
+    @pyqtSlot(int)
+    def _resend_pane(self, pane: int):
+        if 0 <= pane < len(self.panes) and self.panes[pane].loaded:
+            self._send_pane(self.panes[pane])
+
+    @pyqtSlot(int)
+    def _on_activated(self, pane: int):
+        if 0 <= pane < len(self.panes):
+            self.pairActivated.emit(*self.panes[pane].key)
@@ -0,0 +1,120 @@
+# app/chart/grid_bridge.py
+from __future__ import annotations
+
+import json
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from app.chart.chart_bridge import FrameOutbox
+from app.chart.payload import bars_payload, indicators_payload, indicators_since
+from app.config import BRIDGE_FORMAT, BRIDGE_FRAME_MS
+
+_SEP = (",", ":")
+
+
+class GridBridge(QObject):
+    """
+    Bridge Qt <-> grid.html (QWebChannel): une seule page, une instance lightweight-charts par pane.
+    Côté JS, on se connecte à:
+      bridge.layoutChanged.connect(fn)   {"rows", "cols", "panes": [{"id", "symbol", "tf"}], "symbols", "tfs"}
+      bridge.paneLoaded.connect(fn)      {"pane", "symbol", "tf", "bars", "ind"}: (re)chargement d'une pane
+      bridge.frameBatch.connect(fn)      {"panes": {id: {"bars", "ind"}}}: tout ce qu'une frame a produit
+
+    Comme ChartBridge: indicateurs versionnés par pane (delta {"v", "base", "from", ema20, rsi14}),
+    et une FrameOutbox par pane vidées ensemble → un seul message par frame pour toute la grille.
+    """
+
+    layoutChanged = pyqtSignal(str)
+    paneLoaded = pyqtSignal(str)
+    frameBatch = pyqtSignal(str)
+
+    def __init__(self, parent=None, fmt: str = BRIDGE_FORMAT, frame_ms: int = BRIDGE_FRAME_MS):
+        super().__init__(parent)
+        self.fmt = fmt
+        self.frame_ms = frame_ms
+        self._versions: dict[int, int] = {}
+        self._outboxes: dict[int, FrameOutbox] = {}
+        self._frame_timer: QTimer | None = None
+        self.frames_sent = 0
+
+    # ---------- API Python ----------
+
+    def send_layout(self, rows: int, cols: int, panes: list[dict], symbols: list[str], tfs: list[str]):
+        self._outboxes = {p["id"]: self._outboxes.get(p["id"]) or FrameOutbox() for p in panes}
+        self.layoutChanged.emit(json.dumps({"rows": rows, "cols": cols, "panes": panes,
+                                            "symbols": symbols, "tfs": tfs}, separators=_SEP))
+
+    def send_pane(self, pane: int, symbol: str, tf: str, bars: list, series: dict):
+        """Bougies + EMA/RSI complets d'une pane: nouvelle version, sa frame en attente est périmée."""
+        box = self._outboxes.get(pane)
+        if box is not None:
+            box.clear()
+        v = self._versions[pane] = self._versions.get(pane, 0) + 1
+        ind = {"ema20": series.get("ema20"), "rsi14": series.get("rsi14"), "v": v}
+        msg = {"pane": pane, "symbol": symbol, "tf": tf, "bars": bars_payload(bars, self.fmt),
+               "ind": indicators_payload(ind, self.fmt)}
+        self.paneLoaded.emit(json.dumps(msg, separators=_SEP))
+
+    def send_pane_bar(self, pane: int, bar: dict, since: int, series: dict):
+        """Bougie courante + points EMA/RSI de time >= since, dans la frame en cours."""
+        box = self._outboxes.get(pane)
+        if box is None:
+            return
+        base = self._versions.get(pane, 0)
+        delta = dict(indicators_since({"ema20": series.get("ema20"), "rsi14": series.get("rsi14")}, since))
+        delta.update({"v": base + 1, "base": base, "from": since})
+        self._versions[pane] = base + 1
+        box.add_bar(bar)
+        box.add_indicators(delta)
+        self._arm_frame()
+
+    @pyqtSlot()
+    def flush_frame(self):
+        if self._frame_timer is not None:
+            self._frame_timer.stop()
+        panes = {}
+        for pane, box in self._outboxes.items():
+            if box:
+                msg = box.message()
+                panes[pane] = {"bars": msg.get("bars", []), "ind": msg.get("ind")}
+                box.clear()
+        if not panes:
+            return
+        self.frames_sent += 1
+        self.frameBatch.emit(json.dumps({"panes": panes}, separators=_SEP))
+
+    def _arm_frame(self):
+        if self.frame_ms <= 0:
+            self.flush_frame()
+            return
+        if self._frame_timer is None:
+            self._frame_timer = QTimer(self)
+            self._frame_timer.setSingleShot(True)
+            self._frame_timer.timeout.connect(self.flush_frame)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start(self.frame_ms)
+
+    # ---------- API depuis JS -> Python ----------
+    # page (re)chargée: grid.html redemande le layout et le contenu de toutes les panes
+    layoutRequested = pyqtSignal()
+    # trou de version des deltas d'une pane → renvoi complet de cette pane
+    paneResyncRequested = pyqtSignal(int)
+    # menus symbole/timeframe de l'en-tête d'une pane
+    paneChangeRequested = pyqtSignal(int, str, str)
+    # double-clic sur l'en-tête: ouvrir ce couple dans le chart principal
+    paneActivated = pyqtSignal(int)
+
+    @pyqtSlot()
+    def requestLayout(self):
+        self.layoutRequested.emit()
+
+    @pyqtSlot(int)
+    def requestPane(self, pane: int):
+        self.paneResyncRequested.emit(pane)
+
+    @pyqtSlot(int, str, str)
+    def setPane(self, pane: int, symbol: str, tf: str):
+        self.paneChangeRequested.emit(pane, symbol, tf)
+
+    @pyqtSlot(int)
+    def activatePane(self, pane: int):
+        self.paneActivated.emit(pane)
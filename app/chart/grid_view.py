@@ -0,0 +1,26 @@
+# app/chart/grid_view.py
+from __future__ import annotations
+
+import os
+from PyQt6.QtCore import QUrl, QFileInfo
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWebChannel import QWebChannel
+
+from app.chart.grid_bridge import GridBridge
+
+
+class GridView(QWebEngineView):
+    """
+    WebView unique de la grille: charge grid.html (toutes les panes dans la même page)
+    et expose un GridBridge via QWebChannel sous le nom 'bridge'.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bridge = GridBridge(self)
+        self.channel = QWebChannel(self.page())
+        self.channel.registerObject("bridge", self.bridge)
+        self.page().setWebChannel(self.channel)
+
+        html_path = os.path.join(os.path.dirname(__file__), "grid.html")
+        self.load(QUrl.fromLocalFile(QFileInfo(html_path).absoluteFilePath()))
@@ -0,0 +1,47 @@
+# app/chart/latency.py
+"""
+Latence tick → pixel du chart principal.
+
+Horodatages perf_counter (s, horloge monotone commune à tous les threads du process),
+portés par la bougie live dans bar["_lat"]:
+  recv : ticks reçus de MT5 (symbol_info_tick / copy_ticks_from / ring du process feed)
+  agg  : sortie des agrégateurs (bougie courante à jour)
+  gui  : signal barReady délivré dans le thread GUI (ChartDispatcher.on_bar)
+  emit : message parti vers chart.html (frameBatch / barUpdated)
+  echo : retour de bridge.latencyEcho(seq, apply_ms, render_ms)
+
+Le JS (autre process, autre horloge) renvoie des durées: apply = réception du message →
+séries mises à jour, render = mise à jour → callback requestAnimationFrame (frame suivante).
+Le transport Qt → page n'est pas mesurable directement: on l'estime à la moitié de
+l'aller-retour emit → echo, durées JS déduites.
+"""
+from __future__ import annotations
+
+from app.trading.latency import StageLatencies
+
+LAT_KEY = "_lat"   # clé des horodatages dans le dict de la bougie (retirée avant encodage)
+
+
+class FeedLatency(StageLatencies):
+    """p50/p95/p99 glissants par étape, du tick reçu au pixel peint."""
+
+    #   agg   : recv → agg   (filtrage + agrégation dans le worker)
+    #   queue : agg → gui    (coalescence BAR_EMIT_INTERVAL_MS + file d'événements Qt)
+    #   gui   : gui → emit   (indicateurs incrémentaux + attente de la frame du bridge)
+    #   web   : emit → JS    (QWebChannel, estimé)
+    #   apply : JS, application du message
+    #   render: JS, jusqu'à la frame suivante
+    #   total : recv → render
+    STAGES = ("agg", "queue", "gui", "web", "apply", "render", "total")
+    SPANS = {"agg": ("recv", "agg"), "queue": ("agg", "gui"), "gui": ("gui", "emit")}
+
+    def add_echo(self, stamps: dict, apply_ms: float, render_ms: float):
+        """Échantillon complet: horodatages Python + durées renvoyées par chart.html."""
+        self.add(stamps)
+        apply_ms, render_ms = max(0.0, apply_ms), max(0.0, render_ms)
+        web = max(0.0, ((stamps["echo"] - stamps["emit"]) * 1000.0 - apply_ms - render_ms) / 2.0)
+        self.hist["web"].add(web)
+        self.hist["apply"].add(apply_ms)
+        self.hist["render"].add(render_ms)
+        if stamps.get("recv") is not None:
+            self.hist["total"].add((stamps["emit"] - stamps["recv"]) * 1000.0 + web + apply_ms + render_ms)
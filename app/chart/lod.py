@@ -0,0 +1,153 @@
+# app/chart/lod.py
+"""
+Niveaux de détail (LOD) pour les historiques très longs.
+
+Pyramide construite une fois par série: niveau 0 = barres brutes, niveau L = paquets de 2^L
+barres consécutives (reduce_columns: open du premier, high max, low min, close du dernier) →
+les extrêmes de prix restent visibles à toutes les résolutions. Les paquets sont alignés sur
+l'index (le paquet b du niveau L couvre les barres [b·2^L, (b+1)·2^L)), chaque niveau se
+déduit du précédent deux barres par deux, et un tick ne met à jour qu'un paquet par niveau.
+
+Le chart ne reçoit jamais qu'une fenêtre: la plage visible ± un écran, au niveau le plus
+fin qui tient dans la largeur en pixels.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from app.data.resample import reduce_columns
+
+FIELDS = ("time", "open", "high", "low", "close", "volume")
+TOP_BARS = 256   # on arrête la pyramide quand un niveau tient en si peu de barres
+
+
+def _columns(bars: list[dict]) -> dict:
+    cols = getattr(bars, "columns", None)
+    if cols is not None:
+        return cols   # ColumnBars: _Level recopie dans ses propres tableaux
+    n = len(bars)
+    cols = {"time": np.fromiter((int(b["time"]) for b in bars), dtype=np.int64, count=n)}
+    for f in FIELDS[1:]:
+        cols[f] = np.fromiter((float(b.get(f) or 0.0) for b in bars), dtype=np.float64, count=n)
+    return cols
+
+
+class _Level:
+    """Colonnes d'un niveau avec de la marge en fin de tableau (les ticks ajoutent des barres)."""
+
+    __slots__ = ("cols", "n")
+
+    def __init__(self, cols: dict):
+        self.n = len(cols["time"])
+        cap = max(64, self.n + self.n // 8)
+        self.cols = {}
+        for f in FIELDS:
+            a = np.zeros(cap, dtype=np.int64 if f == "time" else np.float64)
+            a[:self.n] = cols[f]
+            self.cols[f] = a
+
+    def view(self, a: int, b: int) -> dict:
+        return {f: c[a:b] for f, c in self.cols.items()}
+
+    def put(self, k: int, values: tuple):
+        if k == self.n:
+            if k == len(self.cols["time"]):
+                self.cols = {f: np.concatenate((c, np.zeros_like(c[:max(64, k // 4)]))) for f, c in self.cols.items()}
+            self.n += 1
+        for f, v in zip(FIELDS, values):
+            self.cols[f][k] = v
+
+
+class LodPyramid:
+    def __init__(self, bars: list[dict], top_bars: int = TOP_BARS):
+        self.levels: list[_Level] = [_Level(_columns(bars))]
+        while self.levels[-1].n > top_bars:
+            prev = self.levels[-1]
+            self.levels.append(_Level(reduce_columns(prev.view(0, prev.n), np.arange(0, prev.n, 2))))
+
+    @property
+    def n(self) -> int:
+        return self.levels[0].n
+
+    def size(self, level: int) -> int:
+        return self.levels[level].n
+
+    @property
+    def last_time(self) -> int:
+        return int(self.levels[0].cols["time"][self.n - 1]) if self.n else 0
+
+    def tf_seconds(self) -> int:
+        """Pas des barres brutes (plus petit écart des dernières barres)."""
+        t = self.levels[0].cols["time"][max(0, self.n - 100):self.n]
+        d = np.diff(t)
+        d = d[d > 0]
+        return int(d.min()) if len(d) else 60
+
+    # ---------- mise à jour live ----------
+
+    def update(self, bar: dict) -> int:
+        """Barre courante (même time) ou nouvelle barre → index niveau 0 ; -1 si plus ancienne."""
+        l0 = self.levels[0]
+        t = int(bar["time"])
+        i = l0.n
+        if l0.n and t <= int(l0.cols["time"][l0.n - 1]):
+            if t < int(l0.cols["time"][l0.n - 1]):
+                return -1
+            i = l0.n - 1
+        l0.put(i, (t,) + tuple(float(bar.get(f) or 0.0) for f in FIELDS[1:]))
+        for level in range(1, len(self.levels)):
+            prev, b = self.levels[level - 1], i >> level
+            c0, c1 = 2 * b, min(2 * b + 2, prev.n)
+            pc = prev.cols
+            self.levels[level].put(b, (pc["time"][c0], pc["open"][c0], pc["high"][c0:c1].max(),
+                                       pc["low"][c0:c1].min(), pc["close"][c1 - 1], pc["volume"][c0:c1].sum()))
+        return i
+
+    # ---------- fenêtres ----------
+
+    def index_range(self, t_from: int, t_to: int) -> tuple[int, int]:
+        """Plage [i0, i1) des barres brutes dont le time est dans [t_from, t_to]."""
+        t = self.levels[0].cols["time"][:self.n]
+        i0 = int(np.searchsorted(t, t_from, side="left"))
+        i1 = int(np.searchsorted(t, t_to, side="right"))
+        return min(i0, max(0, self.n - 1)), max(i1, min(i0 + 1, self.n))
+
+    def level_for(self, n_visible: int, max_bars: float, current: int | None = None) -> int:
+        """
+        Niveau le plus fin où la plage visible tient en max_bars bougies. Le niveau courant est
+        gardé tant qu'il tient et n'est pas devenu trop grossier (hystérésis: pas d'aller-retour
+        entre deux niveaux quand le zoom tombe pile sur la frontière).
+        """
+        max_bars = max(1.0, max_bars)
+        if current is not None and current < len(self.levels):
+            k = -(-n_visible >> current)
+            if k <= max_bars and (current == 0 or k > max_bars / 4):
+                return current
+        level = 0
+        while level < len(self.levels) - 1 and -(-n_visible >> level) > max_bars:
+            level += 1
+        return level
+
+    def window(self, level: int, i0: int, i1: int) -> tuple[int, int]:
+        """Paquets [b0, b1) du niveau couvrant la plage visible [i0, i1) ± sa largeur de chaque côté."""
+        span = max(1, i1 - i0)
+        a, b = max(0, i0 - span), min(self.n, i1 + span)
+        return a >> level, min(self.size(level), ((b - 1) >> level) + 1)
+
+    def covers(self, level: int, b0: int, b1: int, i0: int, i1: int) -> bool:
+        """La fenêtre [b0, b1) contient-elle [i0, i1) avec un quart de vue de marge (sauf aux bouts) ?"""
+        a0, a1 = b0 << level, min(self.n, b1 << level)
+        margin = (i1 - i0) // 4
+        return (a0 == 0 or i0 - margin >= a0) and (a1 >= self.n or i1 + margin <= a1)
+
+    def columns(self, level: int, b0: int, b1: int) -> dict:
+        return self.levels[level].view(b0, b1)
+
+    def last_indices(self, level: int, b0: int, b1: int) -> np.ndarray:
+        """Index niveau 0 de la dernière barre de chaque paquet (là où on échantillonne les indicateurs)."""
+        return np.minimum((np.arange(b0, b1, dtype=np.int64) + 1) << level, self.n) - 1
+
+    def bar(self, level: int, b: int) -> dict:
+        c = self.levels[level].cols
+        return {"time": int(c["time"][b]), "open": float(c["open"][b]), "high": float(c["high"][b]),
+                "low": float(c["low"][b]), "close": float(c["close"][b]), "volume": float(c["volume"][b])}
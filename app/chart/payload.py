@@ -0,0 +1,226 @@
+# app/chart/payload.py
+"""
+Encodage des gros envois Python → chart.html (seriesLoaded, indicatorsLoaded),
+et fusion des deltas d'indicateurs regroupés dans une même frame.
+
+  - "json":    format historique, une liste de dicts (clés répétées à chaque barre)
+  - "columns": un tableau par champ {"fmt": "columns", "n", "time": [...], "open": [...], ...}
+  - "b64":     idem mais chaque colonne = buffer little-endian en base64
+               (time: Uint32, prix/volume: Float64) → décodé côté JS en typed arrays
+
+Les valeurs manquantes des indicateurs ne sont pas transmises (chaque ligne garde ses
+propres temps, comme series_for_chart). Les markers restent en JSON (quelques centaines).
+
+Bench: python -m app.chart.payload [n_barres]
+  (décodage mesuré côté Python, et côté JS avec le decodeBars de chart.html si node est installé)
+"""
+from __future__ import annotations
+
+import base64
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+import numpy as np
+
+FORMATS = ("json", "columns", "b64")
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+_SEP = (",", ":")
+
+
+def _b64(a: np.ndarray) -> str:
+    return base64.b64encode(a.tobytes()).decode("ascii")
+
+
+def _col(values: np.ndarray, fmt: str, dtype: str):
+    return _b64(values.astype(dtype, copy=False)) if fmt == "b64" else values.tolist()
+
+
+def encode_bars(bars: list[dict], fmt: str = "b64") -> str:
+    """list[bar] → chaîne JSON pour seriesLoaded, dans le format demandé."""
+    return json.dumps(bars_payload(bars, fmt), separators=_SEP)
+
+
+def bars_payload(bars: list[dict], fmt: str = "b64"):
+    """list[bar] ou ColumnBars → objet JSON-able (à imbriquer dans un message plus large, ex. grille)."""
+    cols = getattr(bars, "columns", None)
+    if cols is not None:
+        return columns_payload(cols, fmt)   # déjà en colonnes: aucun passage par les dicts
+    if fmt not in ("columns", "b64"):
+        return bars
+    n = len(bars)
+    cols = {"time": np.fromiter((b["time"] for b in bars), dtype=np.int64, count=n)}
+    for f in BAR_FIELDS:
+        cols[f] = np.fromiter((b.get(f) or 0.0 for b in bars), dtype=np.float64, count=n)
+    return columns_payload(cols, fmt)
+
+
+def columns_payload(cols: dict, fmt: str = "b64"):
+    """Colonnes numpy (time + OHLCV) → objet JSON-able au format demandé (même décodage JS)."""
+    if fmt not in ("columns", "b64"):
+        return [{"time": t, **dict(zip(BAR_FIELDS, v))}
+                for t, *v in zip(cols["time"].tolist(), *(cols[f].tolist() for f in BAR_FIELDS))]
+    out: dict = {"fmt": fmt, "n": len(cols["time"]), "time": _col(cols["time"], fmt, "<u4")}
+    for f in BAR_FIELDS:
+        out[f] = _col(cols[f], fmt, "<f8")
+    return out
+
+
+def _line(points: list[dict], fmt: str) -> dict:
+    n = len(points)
+    t = np.fromiter((p["time"] for p in points), dtype=np.int64, count=n)
+    v = np.fromiter((p["value"] for p in points), dtype=np.float64, count=n)
+    return {"time": _col(t, fmt, "<u4"), "value": _col(v, fmt, "<f8")}
+
+
+def encode_indicators(ind: dict, fmt: str = "b64") -> str:
+    """Sortie de IndicatorEngine.series_for_chart() → chaîne JSON pour indicatorsLoaded."""
+    return json.dumps(indicators_payload(ind, fmt), separators=_SEP)
+
+
+def indicators_payload(ind: dict, fmt: str = "b64") -> dict:
+    ind = ind or {}
+    if fmt not in ("columns", "b64"):
+        return ind
+    out: dict = {"fmt": fmt, "markers": ind.get("markers") or {}}
+    if "v" in ind:
+        out["v"] = ind["v"]
+    for key in ("ema20", "rsi14"):
+        if ind.get(key) is not None:
+            out[key] = _line(ind[key], fmt)
+    macd = ind.get("macd") or {}
+    # la couleur de l'histogramme se déduit du signe côté JS
+    out["macd"] = {k: _line(macd[k], fmt) for k in ("line", "signal", "hist") if macd.get(k) is not None}
+    return out
+
+
+def indicators_since(ind: dict, t0: int) -> dict:
+    """
+    series_for_chart() restreint aux points de time >= t0: une série qui déborde à gauche
+    des bougies chargées étendrait l'échelle de temps du chart (chargement progressif).
+    """
+    if not ind or not t0:
+        return ind
+
+    def cut(points):
+        return points[bisect_left(points, t0, key=lambda p: p["time"]):] if points else points
+
+    out = dict(ind)
+    for key in ("ema20", "rsi14"):
+        out[key] = cut(ind.get(key))
+    out["macd"] = {k: cut(v) for k, v in (ind.get("macd") or {}).items()}
+    out["markers"] = {k: cut(v) for k, v in (ind.get("markers") or {}).items()}
+    return out
+
+
+def _before(items: list | None, t0: int) -> list:
+    return items[:bisect_left(items, t0, key=lambda p: p["time"])] if items else []
+
+
+def merge_indicator_deltas(a: dict, b: dict) -> dict:
+    """
+    Deux deltas consécutifs (a puis b) → un seul, même règle que chart.html: tout ce qui est
+    >= b["from"] vient de b, le reste de a. Version de départ de a, version d'arrivée de b.
+    """
+    t0 = b["from"]
+    out: dict = {"v": b["v"], "base": a["base"], "from": min(a["from"], t0)}
+    for key in ("ema20", "rsi14"):
+        out[key] = _before(a.get(key), t0) + (b.get(key) or [])
+    am, bm = a.get("macd") or {}, b.get("macd") or {}
+    out["macd"] = {k: _before(am.get(k), t0) + (bm.get(k) or []) for k in ("line", "signal", "hist")}
+    am, bm = a.get("markers") or {}, b.get("markers") or {}
+    out["markers"] = {k: _before(am.get(k), t0) + (bm.get(k) or []) for k in ("trendRider", "volBreakout")}
+    return out
+
+
+# ---------- bench ----------
+
+def _decode_py(payload: str) -> int:
+    """Décodage équivalent côté Python (JSON.parse + typed arrays) pour comparer les formats."""
+    d = json.loads(payload)
+    if isinstance(d, list):
+        return len(d)
+    if d["fmt"] == "b64":
+        cols = {"time": np.frombuffer(base64.b64decode(d["time"]), dtype="<u4")}
+        for f in BAR_FIELDS:
+            cols[f] = np.frombuffer(base64.b64decode(d[f]), dtype="<f8")
+        return len(cols["time"])
+    return len(d["time"])
+
+
+_JS_BENCH = """
+const fs = require('fs');
+%s
+const [repeat, ...files] = process.argv.slice(2);
+const out = [];
+for (const f of files) {
+  const s = fs.readFileSync(f, 'utf8');
+  let best = Infinity;
+  for (let k = 0; k < +repeat; k++) {
+    const a = performance.now(); decodeBars(JSON.parse(s)); best = Math.min(best, performance.now() - a);
+  }
+  out.push(best);
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def _decode_js(payloads: list[str], repeat: int) -> list[float] | None:
+    """
+    Meilleur temps (ms) de JSON.parse + decodeBars sous node, avec le code extrait de chart.html
+    (toBar → decodeBars). None si node est absent ou si le décodeur n'est pas retrouvé.
+    """
+    node = shutil.which("node")
+    html = (Path(__file__).with_name("chart.html")).read_text(encoding="utf-8")
+    a, b = html.find("function toBar("), html.find("function decodeLine(")
+    if not node or a < 0 or b < a:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i, payload in enumerate(payloads):
+            f = Path(tmp) / f"p{i}.json"
+            f.write_text(payload, encoding="utf-8")
+            files.append(str(f))
+        script = Path(tmp) / "bench.js"
+        script.write_text(_JS_BENCH % html[a:b], encoding="utf-8")
+        try:
+            res = subprocess.run([node, str(script), str(repeat), *files],
+                                 capture_output=True, text=True, timeout=300, check=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ bench JS: {e}", file=sys.stderr)
+            return None
+    return json.loads(res.stdout)
+
+
+def _bench(n: int = 50_000, repeat: int = 5):
+    rng = np.random.default_rng(1)
+    close = 1.08 + np.cumsum(rng.normal(0, 1e-4, n))
+    t0 = 1_700_000_000
+    bars = [{"time": t0 + 60 * i, "open": round(float(c), 5), "high": round(float(c) + 2e-4, 5),
+             "low": round(float(c) - 2e-4, 5), "close": round(float(c) + 1e-4, 5), "volume": float(i % 97)}
+            for i, c in enumerate(close)]
+    rows = []
+    for fmt in FORMATS:
+        enc, dec = [], []
+        for _ in range(repeat):
+            a = time.perf_counter(); payload = encode_bars(bars, fmt); b = time.perf_counter()
+            _decode_py(payload); c = time.perf_counter()
+            enc.append(b - a); dec.append(c - b)
+        rows.append((fmt, payload, min(enc) * 1e3, min(dec) * 1e3))
+    js = _decode_js([r[1] for r in rows], repeat) or [None] * len(rows)
+
+    print(f"{n} barres, meilleur de {repeat}")
+    print(f"{'format':<8} {'taille':>10} {'encode':>10} {'decode py':>10} {'decode js':>10}")
+    for (fmt, payload, enc_ms, py_ms), js_ms in zip(rows, js):
+        js_txt = f"{js_ms:7.1f} ms" if js_ms is not None else f"{'-':>10}"
+        print(f"{fmt:<8} {len(payload) / 1e6:8.2f} Mo {enc_ms:7.1f} ms {py_ms:7.1f} ms {js_txt}")
+
+
+if __name__ == "__main__":
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -7,6 +7,7 @@ from PyQt6.QtCore import QObject, pyqtSlot, QTimer
 
 from .chat_panel import ChatPanel
 from .chat_service_groq import GroqChatService
+from app.data.resample import merge_bars
 
 
 def _last(seq, n):
@@ -43,6 +44,32 @@ def compute_features(bars: List[Dict[str, float]]) -> Dict[str, Any]:
     }
 
 
+def compute_feed_quality(points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Résumé de la qualité du flux sur les dernières barres live (spread, ticks, rejets)."""
+    if not points:
+        return {"note": "no_live_data"}
+    spreads = [p["spread_avg"] for p in points if p.get("spread_avg") is not None]
+    maxes = [p["spread_max"] for p in points if p.get("spread_max") is not None]
+    ticks = sum(p.get("ticks", 0) for p in points)
+    spikes = sum(p.get("spikes", 0) for p in points)
+    late = sum(p.get("late", 0) for p in points)
+    out = {
+        "bars": len(points),
+        "ticks_per_bar": ticks / len(points),
+        "spikes_rejected": spikes,
+        "late_rejected": late,
+        "reject_ratio": (spikes + late) / max(1, ticks + spikes + late),
+    }
+    if spreads:
+        out["spread_avg"] = mean(spreads)
+        out["spread_max"] = max(maxes) if maxes else None
+        out["spread_last"] = spreads[-1]
+        # dégradation: spread des 10 dernières barres vs. moyenne de la fenêtre
+        recent = spreads[-10:]
+        out["spread_recent_vs_avg"] = mean(recent) / out["spread_avg"] if out["spread_avg"] else None
+    return out
+
+
 class ChatController(QObject):
     """Relie le worker marché et le panneau de chat + envoie au LLM Groq.
        Ajoute un espacement visuel entre les blocs Q/R sans modifier le ChatPanel."""
@@ -61,17 +88,37 @@ class ChatController(QObject):
 
         self._watchdog: QTimer | None = None
         self._ind_snapshot: Dict[str, Any] | None = None  # snapshot indicateurs courant
+        self._quality: Dict[int, Dict[str, Any]] = {}      # time → qualité du flux (live)
 
     # --- Alimenté par DataWorker/MainWindow ---
-    @pyqtSlot(list)
+    @pyqtSlot(object)
     def on_history(self, bars: list[dict]):
         self._bars.clear()
-        self._bars.extend(bars)
+        self._bars.extend(bars[-self._bars.maxlen:])   # seules les dernières sont gardées: pas d'itération du reste
 
     @pyqtSlot(dict)
     def on_bar(self, bar: dict):
         self._bars.append(bar)
 
+    @pyqtSlot(object)
+    def on_history_patch(self, patch: list[dict]):
+        merged = merge_bars(list(self._bars), patch)
+        self._bars.clear()
+        self._bars.extend(merged)
+
+    @pyqtSlot(object)
+    def on_quality(self, cols: dict):
+        t = cols.get("time") or []
+        keys = ("spread_min", "spread_avg", "spread_max", "ticks", "spikes", "late")
+        self._quality = {t[i]: {"time": t[i], **{k: cols[k][i] for k in keys}} for i in range(len(t))}
+
+    @pyqtSlot(dict)
+    def on_quality_point(self, point: dict):
+        self._quality[point["time"]] = point
+        if len(self._quality) > 6000:   # élagage par paquets (pas de tri à chaque barre)
+            for k in sorted(self._quality)[:-5000]:
+                del self._quality[k]
+
     def set_params(self, symbol: str, timeframe: str):
         self.symbol = symbol
         self.timeframe = timeframe
@@ -94,6 +141,7 @@ class ChatController(QObject):
             "timeframe": self.timeframe,
             "features": features,
             "indicators": (self._ind_snapshot or {}),
+            "feed_quality": compute_feed_quality([self._quality[k] for k in sorted(self._quality)[-200:]]),
             "recent_bars": [
                 {"time": b["time"], "open": b["open"], "high": b["high"], "low": b["low"], "close": b["close"]}
                 for b in recent
@@ -102,7 +150,9 @@ class ChatController(QObject):
         sys_prompt = (
             "You are a neutral market-structure explainer embedded in a desktop chart app. "
             "Do not give investment advice or trade instructions. "
-            "Explain what price action and indicators suggest (momentum, trend, overbought/oversold, divergence) succinctly."
+            "Explain what price action and indicators suggest (momentum, trend, overbought/oversold, divergence) succinctly. "
+            "feed_quality describes the broker feed (spread, ticks per bar, rejected spikes/late ticks): "
+            "mention it when spreads widen or rejections rise."
         )
         messages = [
             {"role": "system", "content": sys_prompt},
@@ -20,15 +20,151 @@ FIRST_LOAD_TIMEOUT_MS: int = int(os.getenv("FIRST_LOAD_TIMEOUT_MS", "2500"))
 #  MT5 / Data source
 # =========================
 
+# Source de données du chart:
+#  - "mt5"  : DataWorker (terminal MT5 ou simulateur, cf. MT5_BACKEND)
+#  - "file" : FileDataSource, historiques Parquet/CSV hors-ligne dans DATA_DIR
+DATA_SOURCE: str = os.getenv("DATA_SOURCE", "mt5").strip().lower()
+DATA_DIR: str = os.getenv("DATA_DIR", "data")
+FILE_CHUNK_ROWS: int = int(os.getenv("FILE_CHUNK_ROWS", "500000"))   # lignes par bloc lu
+FILE_MAX_BARS: int = int(os.getenv("FILE_MAX_BARS", "500000"))       # barres gardées (queue), 0 = tout
+
 # Chemin MT5 (laisse vide pour auto-détection ; sinon renseigne via .env)
 MT5_PATH: str = os.getenv("MT5_PATH", r"C:\Program Files\MetaTrader 5\terminal64.exe")
 
+# Backend de données:
+#  - "mt5" : vrai terminal MetaTrader5 (Windows)
+#  - "sim" : app/data/mt5_sim.py, marché synthétique (Linux, headless, benchs à débit contrôlé)
+MT5_BACKEND: str = os.getenv("MT5_BACKEND", "mt5").strip().lower()
+
+# Générateur du simulateur (GBM + ticks Poisson)
+SIM_TICK_RATE: float = float(os.getenv("SIM_TICK_RATE", "5"))          # ticks/s par symbole
+SIM_VOLATILITY: float = float(os.getenv("SIM_VOLATILITY", "0.10"))     # volatilité annualisée
+SIM_SPIKE_PROB: float = float(os.getenv("SIM_SPIKE_PROB", "0.001"))    # proba qu'un tick soit aberrant
+SIM_GAP_PROB: float = float(os.getenv("SIM_GAP_PROB", "0.0005"))       # proba/s de démarrer un trou de cotation
+SIM_GAP_MAX_SEC: float = float(os.getenv("SIM_GAP_MAX_SEC", "120"))    # durée max d'un trou
+SIM_HISTORY_DAYS: int = int(os.getenv("SIM_HISTORY_DAYS", "90"))       # profondeur de l'historique M1 synthétique
+SIM_WEEKENDS: bool = os.getenv("SIM_WEEKENDS", "1") not in ("0", "false", "False")
+SIM_SEED: int = int(os.getenv("SIM_SEED", "42"))
+SIM_ORDER_LATENCY_MS: float = float(os.getenv("SIM_ORDER_LATENCY_MS", "25"))  # aller-retour serveur d'un order_send
+SIM_BALANCE: float = float(os.getenv("SIM_BALANCE", "10000"))         # solde du compte simulé
+SIM_LEVERAGE: int = int(os.getenv("SIM_LEVERAGE", "100"))
+
+# Emplacement du flux de ticks:
+#  - "inproc"  : le DataWorker poll MT5 lui-même (même process que la GUI)
+#  - "process" : un process feed dédié poll MT5 et publie ticks + M1 dans des ring buffers
+#                en mémoire partagée ; le DataWorker (et tout autre consommateur) les lit
+FEED_MODE: str = os.getenv("FEED_MODE", "inproc").strip().lower()
+FEED_RING_TICKS: int = int(os.getenv("FEED_RING_TICKS", "262144"))   # capacité (enregistrements) du ring de ticks
+FEED_RING_BARS: int = int(os.getenv("FEED_RING_BARS", "65536"))      # capacité du ring de barres M1
+FEED_RING_POLL_MS: int = int(os.getenv("FEED_RING_POLL_MS", "10"))   # lecture du ring côté DataWorker
+
 # Symbole & timeframe par défaut (si ton UI ne les fournit pas encore)
 DEFAULT_SYMBOL: str = os.getenv("DEFAULT_SYMBOL", "EURUSD")
 DEFAULT_TIMEFRAME: str = os.getenv("DEFAULT_TIMEFRAME", "M5")  # M1, M5, M15, M30, H1, etc.
 
-# Nombre d'historiques à tenter pour le premier chargement (si dispo)
+# Barres envoyées au chart au premier affichage (~un écran) ; le reste de l'historique
+# arrive par tranches de LAZY_HISTORY_CHUNK quand on fait défiler vers la gauche (0 = tout d'un coup)
 INITIAL_HISTORY_BARS: int = int(os.getenv("INITIAL_HISTORY_BARS", "300"))
+LAZY_HISTORY_CHUNK: int = int(os.getenv("LAZY_HISTORY_CHUNK", "1000"))
+
+# Capture des ticks :
+#  - "ticks"    : on draine TOUS les ticks depuis le dernier time_msc vu (copy_ticks_from)
+#  - "snapshot" : ancien mode, un symbol_info_tick toutes les 100 ms (perd les ticks intermédiaires)
+TICK_CAPTURE_MODE: str = os.getenv("TICK_CAPTURE_MODE", "ticks").strip().lower()
+
+# Nombre max de ticks lus par appel copy_ticks_from (le reste est repris au poll suivant)
+TICK_BATCH_MAX: int = int(os.getenv("TICK_BATCH_MAX", "5000"))
+
+# À partir de ce nombre de ticks dans un batch (rattrapage après veille, backfill...),
+# on passe par le resampler vectorisé (numpy) au lieu de la boucle tick par tick
+BULK_RESAMPLE_MIN_TICKS: int = int(os.getenv("BULK_RESAMPLE_MIN_TICKS", "256"))
+
+# Coalescence des mises à jour de la bougie courante: au plus une émission par (symbole, tf)
+# et par intervalle (~1 frame). Les clôtures partent toujours, dans l'ordre. 0 = désactivé.
+BAR_EMIT_INTERVAL_MS: int = int(os.getenv("BAR_EMIT_INTERVAL_MS", "33"))
+
+# Ordonnanceur de polls adaptatif (intervalle calé sur le débit de ticks observé)
+POLL_MIN_MS: int = int(os.getenv("POLL_MIN_MS", "20"))            # plancher (pics de news)
+POLL_MAX_MS: int = int(os.getenv("POLL_MAX_MS", "500"))           # plafond symbole actif mais calme
+POLL_DORMANT_MS: int = int(os.getenv("POLL_DORMANT_MS", "5000"))  # hors session: simple sonde
+POLL_BUDGET_PER_SEC: float = float(os.getenv("POLL_BUDGET_PER_SEC", "200"))  # appels MT5/s, tous symboles
+POLL_TARGET_TICKS: float = float(os.getenv("POLL_TARGET_TICKS", "1.0"))      # ticks visés par poll
+SESSION_STALE_SEC: float = float(os.getenv("SESSION_STALE_SEC", "300"))      # sans tick → considéré fermé
+FEED_METRICS_INTERVAL_MS: int = int(os.getenv("FEED_METRICS_INTERVAL_MS", "2000"))
+
+# Carnet d'ordres (DOM) via market_book_add/get: symbole du chart + symboles demandés.
+# Lecture cadencée à BOOK_POLL_MS, plafonnée à BOOK_BUDGET_MS par cycle (round-robin
+# entre symboles) pour ne jamais affamer la boucle de ticks. BOOK_DEPTH = niveaux par côté.
+BOOK_ENABLED: bool = os.getenv("BOOK_ENABLED", "1") not in ("0", "false", "False")
+BOOK_DEPTH: int = int(os.getenv("BOOK_DEPTH", "10"))
+BOOK_POLL_MS: int = int(os.getenv("BOOK_POLL_MS", "50"))
+BOOK_BUDGET_MS: float = float(os.getenv("BOOK_BUDGET_MS", "4"))
+
+# Ticket d'ordres (order_check/order_send sur un thread d'exécution dédié).
+# Désactivé par défaut sur un vrai terminal: un clic = un ordre réel.
+TRADING_ENABLED: bool = os.getenv("TRADING_ENABLED", "1" if MT5_BACKEND == "sim" else "0") not in ("0", "false", "False")
+ORDER_DEFAULT_VOLUME: float = float(os.getenv("ORDER_DEFAULT_VOLUME", "0.10"))
+ORDER_DEVIATION_POINTS: int = int(os.getenv("ORDER_DEVIATION_POINTS", "10"))  # glissement toléré (market)
+ORDER_MAGIC: int = int(os.getenv("ORDER_MAGIC", "250040"))
+ORDER_DEDUP_MS: int = int(os.getenv("ORDER_DEDUP_MS", "400"))   # même ordre re-cliqué dans ce délai → ignoré
+ORDER_QUEUE_MAX: int = int(os.getenv("ORDER_QUEUE_MAX", "16"))  # ordres en attente max (au-delà: refus)
+ORDER_PRECHECK: bool = os.getenv("ORDER_PRECHECK", "1") not in ("0", "false", "False")  # order_check avant send
+
+# Suivi positions/ordres/compte (positions_get, orders_get, account_info sur le thread du worker):
+# snapshot toutes les PORTFOLIO_POLL_MS (0 = désactivé), diffé par ticket ; le P&L latent est
+# recalculé localement à partir des ticks du flux et émis au plus toutes les PORTFOLIO_PNL_MS.
+PORTFOLIO_POLL_MS: int = int(os.getenv("PORTFOLIO_POLL_MS", "1000"))
+PORTFOLIO_PNL_MS: int = int(os.getenv("PORTFOLIO_PNL_MS", "100"))
+
+# Cache LRU des historiques (symbole, timeframe) dans le worker + prefetch en temps mort
+HISTORY_CACHE_MAX_ENTRIES: int = int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "24"))
+HISTORY_CACHE_MAX_BARS: int = int(os.getenv("HISTORY_CACHE_MAX_BARS", "100000"))
+PREFETCH_INTERVAL_MS: int = int(os.getenv("PREFETCH_INTERVAL_MS", "1500"))  # 0 = pas de prefetch
+
+# Décalage (s) appliqué avant l'alignement des bougies H4/D1 (minuit broker).
+# 0 pour MT5: ses timestamps sont déjà en heure serveur. Utile pour des sources en vrai UTC.
+BROKER_TZ_OFFSET_SEC: int = int(os.getenv("BROKER_TZ_OFFSET_SEC", "0"))
+
+# Debounce des combos symbole/timeframe (l'historique sort du cache, plus besoin d'attendre 400 ms)
+PARAMS_DEBOUNCE_MS: int = int(os.getenv("PARAMS_DEBOUNCE_MS", "120"))
+
+# Format des gros envois vers chart.html (historique, indicateurs): "json" (liste de dicts),
+# "columns" (un tableau par champ, ~2x plus petit) ou "b64" (buffers typés base64, le plus rapide)
+BRIDGE_FORMAT: str = os.getenv("BRIDGE_FORMAT", "b64").strip().lower()
+# Messages live vers chart.html (bougie, points d'indicateurs, qualité, toggles) regroupés
+# en un seul frameBatch par frame d'affichage (0 = un message par mise à jour, ancien comportement)
+BRIDGE_FRAME_MS: int = int(os.getenv("BRIDGE_FRAME_MS", "16"))
+# Historiques très longs (≥ LOD_MIN_BARS barres, 0 = jamais): le chart ne reçoit qu'une fenêtre
+# autour de la vue, décimée (pyramide min/max OHLC) pour ~LOD_PX_PER_BAR pixels par bougie
+LOD_MIN_BARS: int = int(os.getenv("LOD_MIN_BARS", "20000"))
+LOD_PX_PER_BAR: float = float(os.getenv("LOD_PX_PER_BAR", "2"))
+# Latence tick → pixel du chart (horodatages réception / agrégation / GUI / bridge / rendu JS):
+# percentiles par étape dans l'onglet "Latence", export JSON dans FEED_LATENCY_FILE
+FEED_LATENCY: bool = os.getenv("FEED_LATENCY", "1") not in ("0", "false", "False")
+FEED_LATENCY_FILE: str = os.getenv("FEED_LATENCY_FILE", "logs/feed_latency.json")
+FEED_LATENCY_DUMP_ON_EXIT: bool = os.getenv("FEED_LATENCY_DUMP_ON_EXIT", "0") not in ("0", "false", "False")
+# Grille multi-charts (2×2, 3×3): une seule page web pour toutes les panes, alimentées par les
+# subscriptions du même worker ; chaque pane garde GRID_PANE_BARS barres (bougies + EMA/RSI)
+GRID_PANE_BARS: int = int(os.getenv("GRID_PANE_BARS", "1500"))
+# Watchlist (onglet du panneau latéral): bid/ask, spread, variation du jour et RSI D1 par symbole.
+# Les symboles sans subscription sont pollés par le même ordonnanceur que le flux (symbol_info_tick,
+# budget partagé) ; les cotations partent vers l'UI en un seul lot toutes les WATCHLIST_EMIT_MS.
+WATCHLIST_SYMBOLS: list[str] = [s.strip() for s in os.getenv(
+    "WATCHLIST_SYMBOLS",
+    "EURUSD,GBPUSD,USDJPY,USDCAD,AUDUSD,USDCHF,NZDUSD,EURJPY,EURGBP,EURCHF,GBPJPY,AUDJPY,XAUUSD",
+).split(",") if s.strip()]
+WATCHLIST_EMIT_MS: int = int(os.getenv("WATCHLIST_EMIT_MS", "250"))
+WATCHLIST_DAILY_REFRESH_SEC: float = float(os.getenv("WATCHLIST_DAILY_REFRESH_SEC", "900"))  # relecture des D1
+
+# =========================
+#  Mode headless (python main.py --headless)
+# =========================
+
+# Sortie du daemon: "-" = stdout, sinon dossier de fichiers tournants (feed.log, feed.log.1, ...)
+HEADLESS_OUT: str = os.getenv("HEADLESS_OUT", "-")
+HEADLESS_FORMAT: str = os.getenv("HEADLESS_FORMAT", "line").strip().lower()   # "line" ou "jsonl"
+HEADLESS_ROTATE_MB: float = float(os.getenv("HEADLESS_ROTATE_MB", "50"))       # taille max d'un fichier
+HEADLESS_BACKUPS: int = int(os.getenv("HEADLESS_BACKUPS", "10"))               # fichiers tournants gardés
 
 # =========================
 #  Logs
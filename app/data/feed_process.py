@@ -0,0 +1,266 @@
+# app/data/feed_process.py
+"""
+Feed MT5 dans un process séparé (FEED_MODE=process).
+
+L'API MT5 est bloquante et par process: ici elle ne partage plus le GIL avec WebEngine,
+la GUI et les indicateurs. Le process feed draine les ticks (copy_ticks_from, même curseur
+au msc que le DataWorker), les publie dans un ShmRing de ticks, agrège des M1 publiées dans
+un ShmRing de barres, et renvoie ses métriques d'ordonnanceur par une Queue.
+
+Côté GUI, FeedProcess crée les segments (et les libère), lance le process et lui passe les
+symboles à suivre ; le DataWorker lit le ring de ticks à la place de ses polls MT5.
+Un autre consommateur s'attache avec attach_reader(nom) (voir FeedProcess.ring_names).
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.config import (
+    FEED_RING_TICKS, FEED_RING_BARS,
+    TICK_BATCH_MAX, BULK_RESAMPLE_MIN_TICKS, BROKER_TZ_OFFSET_SEC,
+    POLL_MIN_MS, POLL_MAX_MS, POLL_DORMANT_MS, POLL_BUDGET_PER_SEC, POLL_TARGET_TICKS,
+    SESSION_STALE_SEC, FEED_METRICS_INTERVAL_MS,
+)
+
+from .shm_ring import ShmRing, RingReader, TICK_RECORD, BAR_RECORD
+
+SESSION_REFRESH_SEC = 60
+IDLE_SLEEP_MAX_SEC = 0.05     # réactivité aux commandes / à l'arrêt quand tout dort
+
+
+def copy_fresh_ticks(MT5, feed, batch_max: int):
+    """
+    Ticks postérieurs au curseur du feed (last_tick_msc + last_msc_seen), curseur avancé.
+    copy_ticks_from travaille à la seconde → on relit la seconde entamée et on filtre au msc.
+    Si plus de batch_max ticks partagent cette seconde, le lot ne contient que des ticks déjà
+    vus: on relit avec un count doublé jusqu'à dépasser le curseur (sinon il resterait bloqué).
+    Retourne (ticks frais ou None, lot tronqué). Partagé avec DataWorker._poll_ticks_batch.
+    """
+    since = datetime.fromtimestamp(feed.last_tick_msc // 1000, tz=timezone.utc)
+    count = batch_max
+    while True:
+        got = MT5.copy_ticks_from(feed.symbol, since, count, MT5.COPY_TICKS_ALL)
+        if got is None or len(got) == 0:
+            return None, False
+        full = len(got) >= count
+        # Ticks déjà consommés: ceux avant le curseur + les `seen` premiers à la même milliseconde
+        msc = got["time_msc"].astype("int64")
+        old = feed.last_tick_msc
+        lo = int(msc.searchsorted(old, "left"))
+        hi = int(msc.searchsorted(old, "right"))
+        start = min(lo + feed.last_msc_seen, hi)
+        if start < len(got) or not full:
+            break
+        count *= 2
+    rows = got[start:]
+    if not len(rows):
+        return None, full
+    new_last = int(msc[-1])
+    same = len(rows) - int(msc[start:].searchsorted(new_last, "left"))
+    feed.last_msc_seen = same + (feed.last_msc_seen if new_last == old else 0)
+    feed.last_tick_msc = new_last
+    return rows, full
+
+
+class FeedProcess:
+    """Handle côté GUI: segments partagés, process feed, commandes, métriques."""
+
+    def __init__(self):
+        tag = f"mt5feed_{os.getpid()}_{int(time.time() * 1000) % 100000}"
+        self.ticks = ShmRing.create(f"{tag}_t", TICK_RECORD, FEED_RING_TICKS)
+        self.bars = ShmRing.create(f"{tag}_b", BAR_RECORD, FEED_RING_BARS)
+        ctx = mp.get_context("spawn")
+        self._cmds = ctx.Queue()
+        self._metrics = ctx.Queue()
+        self._stop = ctx.Event()
+        self._proc = ctx.Process(
+            target=run_feed, name="mt5-feed", daemon=True,
+            args=(self.ticks.name, self.bars.name, self._cmds, self._metrics, self._stop),
+        )
+        self._last_metrics: dict = {}
+
+    @property
+    def ring_names(self) -> dict:
+        return {"ticks": self.ticks.name, "bars": self.bars.name}
+
+    def start(self):
+        self._proc.start()
+        print(f"✅ Feed process pid={self._proc.pid} rings={self.ring_names}")
+
+    def is_alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def add_symbol(self, symbol: str):
+        self._cmds.put(("add", symbol))
+
+    def remove_symbol(self, symbol: str):
+        self._cmds.put(("remove", symbol))
+
+    def metrics(self) -> dict:
+        """Dernières métriques publiées par le process (ordonnanceur + ring)."""
+        try:
+            while True:
+                self._last_metrics = self._metrics.get_nowait()
+        except queue.Empty:
+            pass
+        return dict(self._last_metrics)
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._proc.is_alive():
+            self._proc.join(timeout)
+        if self._proc.is_alive():
+            print("⚠️ feed process ne répond pas → terminate")
+            self._proc.terminate()
+            self._proc.join(1.0)
+        for q in (self._cmds, self._metrics):
+            q.cancel_join_thread()
+            q.close()
+        self.ticks.close()
+        self.bars.close()
+
+
+def attach_reader(name: str, dtype=TICK_RECORD, from_start: bool = False) -> RingReader:
+    """Lecteur d'un ring publié par un FeedProcess (autre process: backtest, alertes, screener...)."""
+    return RingReader(ShmRing.attach(name, dtype), from_start=from_start)
+
+
+# ---------------------------------------------------------------------------
+#  Process feed (spawn: tout est importé ici, rien n'est hérité du GUI)
+# ---------------------------------------------------------------------------
+
+def _import_mt5():
+    from app.data.mt5_api import MT5
+    return MT5
+
+
+class _Cursor:
+    """Curseur time_msc d'un symbole + agrégateur M1 publié dans le ring de barres."""
+
+    def __init__(self, symbol: str):
+        from .subscription import SymbolFeed
+        self.feed = SymbolFeed(symbol, BROKER_TZ_OFFSET_SEC)
+        self.feed.mtf.add("M1", 60)
+        self.session_checked_at = 0.0
+
+
+def run_feed(tick_name: str, bar_name: str, cmds, metrics_q, stop):
+    from app.config import MT5_PATH
+    from .resample import tick_prices, tick_spreads
+    from .scheduler import PollScheduler
+
+    MT5 = _import_mt5()
+    if not (MT5.initialize() or MT5.initialize(path=MT5_PATH)):
+        print("❌ MT5 init failed (feed process):", MT5.last_error())
+        return
+    print("✅ MT5 initialized (feed process)")
+
+    ticks_ring = ShmRing.attach(tick_name, TICK_RECORD)
+    bars_ring = ShmRing.attach(bar_name, BAR_RECORD)
+    sched = PollScheduler(
+        min_ms=POLL_MIN_MS, max_ms=POLL_MAX_MS, dormant_ms=POLL_DORMANT_MS,
+        budget_per_sec=POLL_BUDGET_PER_SEC, target_ticks=POLL_TARGET_TICKS,
+        stale_sec=SESSION_STALE_SEC,
+    )
+    cursors: dict[str, _Cursor] = {}
+    metrics_at = time.monotonic()
+    published = 0
+
+    def publish_ticks(sym: str, rows) -> None:
+        out = np.zeros(len(rows), dtype=TICK_RECORD)
+        out["sym"] = ticks_ring.symbol_id(sym)
+        for f in ("time_msc", "bid", "ask", "last", "volume", "flags"):
+            out[f] = rows[f]
+        ticks_ring.publish(out)
+
+    def publish_bars(cur: _Cursor, closed: dict) -> None:
+        bars = [(b, 1) for b in closed.get("M1", [])]
+        now_bar = cur.feed.mtf.aggs["M1"].current()
+        if now_bar is not None:
+            bars.append((now_bar, 0))
+        if not bars:
+            return
+        out = np.zeros(len(bars), dtype=BAR_RECORD)
+        out["sym"] = bars_ring.symbol_id(cur.feed.symbol)
+        out["closed"] = [c for _, c in bars]
+        for f in ("time", "open", "high", "low", "close", "volume"):
+            out[f] = [getattr(b, f) for b, _ in bars]
+        bars_ring.publish(out)
+
+    def poll(cur: _Cursor) -> tuple[int, bool]:
+        """Même drainage que DataWorker._poll_ticks_batch. Retourne (nouveaux ticks, batch plein)."""
+        feed = cur.feed
+        full = False
+        if not feed.last_tick_msc:
+            tick = MT5.symbol_info_tick(feed.symbol)
+            if not tick:
+                return 0, False
+            feed.last_tick_msc = int(getattr(tick, "time_msc", 0) or int(tick.time) * 1000)
+            feed.last_msc_seen = 1
+            row = np.zeros(1, dtype=TICK_RECORD)
+            row["time_msc"], row["bid"], row["ask"] = feed.last_tick_msc, tick.bid, tick.ask
+            row["last"], row["volume"] = tick.last, float(getattr(tick, "volume", 0) or 0)
+            row["flags"] = int(getattr(tick, "flags", 0) or 0)
+            rows = row
+        else:
+            rows, full = copy_fresh_ticks(MT5, feed, TICK_BATCH_MAX)
+            if rows is None:
+                return 0, full
+
+        publish_ticks(feed.symbol, rows)
+        closed: dict = {}
+        feed.ingest(*tick_prices(rows), tick_spreads(rows), closed, bulk_min=BULK_RESAMPLE_MIN_TICKS)
+        publish_bars(cur, closed)
+        return len(rows), full
+
+    try:
+        while not stop.is_set():
+            # commandes du GUI
+            try:
+                while True:
+                    op, sym = cmds.get_nowait()
+                    if op == "add" and sym not in cursors:
+                        MT5.symbol_select(sym, True)
+                        cursors[sym] = _Cursor(sym)
+                        sched.add(sym)
+                    elif op == "remove" and sym in cursors:
+                        del cursors[sym]
+                        sched.remove(sym)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for sym in sched.due(now):
+                cur = cursors.get(sym)
+                if cur is None:
+                    continue
+                if now - cur.session_checked_at >= SESSION_REFRESH_SEC:
+                    cur.session_checked_at = now
+                    info = MT5.symbol_info(sym)
+                    if info is not None:
+                        disabled = getattr(MT5, "SYMBOL_TRADE_MODE_DISABLED", 0)
+                        sched.set_session(sym, int(getattr(info, "trade_mode", -1)) != disabled)
+                n, backlog = poll(cur)
+                published += n
+                sched.observe(sym, n, backlog=backlog)
+
+            if FEED_METRICS_INTERVAL_MS > 0 and (now - metrics_at) * 1000.0 >= FEED_METRICS_INTERVAL_MS:
+                metrics_at = now
+                m = sched.metrics()
+                m.update({"ring_seq": ticks_ring.commit_seq, "ring_published": published})
+                published = 0
+                metrics_q.put(m)
+
+            delay = sched.next_delay_ms() / 1000.0 if cursors else IDLE_SLEEP_MAX_SEC
+            stop.wait(min(delay, IDLE_SLEEP_MAX_SEC))
+    finally:
+        ticks_ring.close()
+        bars_ring.close()
+        MT5.shutdown()
+        print("🛑 Feed process stopped")
@@ -0,0 +1,258 @@
+# app/data/file_source.py
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import pyqtSlot
+
+from app.config import DATA_DIR, FILE_CHUNK_ROWS, FILE_MAX_BARS, BROKER_TZ_OFFSET_SEC
+
+from .history_cache import HistoryCache
+from .resample import ColumnBars, derive_columns
+from .source import DataSource, bars_before
+
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+_EXTENSIONS = (".parquet", ".csv")
+
+# Noms de colonnes reconnus (en minuscules, sans "<>" des exports MT5)
+_ALIASES = {
+    "time": ("time", "timestamp", "datetime", "date_time", "date"),
+    "open": ("open", "o"),
+    "high": ("high", "h"),
+    "low": ("low", "l"),
+    "close": ("close", "c"),
+    "volume": ("volume", "tick_volume", "tickvol", "vol", "real_volume"),
+}
+
+# Debug console
+DEBUG = True
+def _dbg(*a):
+    if DEBUG:
+        print(*a)
+
+
+def _norm(name: str) -> str:
+    return str(name).strip().strip("<>").lower()
+
+
+def _map_columns(names: list[str]) -> dict[str, list[str]]:
+    """Colonnes physiques à lire pour chaque champ OHLCV (time peut venir de DATE + TIME séparés)."""
+    by_norm = {_norm(n): n for n in names}
+    out: dict[str, list[str]] = {}
+    if "date" in by_norm and "time" in by_norm:
+        out["time"] = [by_norm["date"], by_norm["time"]]   # export MT5: <DATE>\t<TIME>
+    for field, aliases in _ALIASES.items():
+        if field in out:
+            continue
+        for a in aliases:
+            if a in by_norm:
+                out[field] = [by_norm[a]]
+                break
+    missing = [f for f in ("time", "open", "high", "low", "close") if f not in out]
+    if missing:
+        raise ValueError(f"colonnes manquantes: {missing} (trouvées: {names})")
+    return out
+
+
+def _epoch_seconds(frame: pd.DataFrame, cols: list[str]) -> np.ndarray:
+    """Colonne(s) de temps → epoch secondes int64 (numérique s/ms/µs/ns, datetime, ou texte)."""
+    s = frame[cols[0]]
+    if len(cols) == 2:
+        s = s.astype(str) + " " + frame[cols[1]].astype(str)
+    elif pd.api.types.is_numeric_dtype(s):
+        t = s.to_numpy(dtype=np.int64)
+        big = int(np.abs(t).max()) if len(t) else 0
+        if big >= 10**17:     # ns (≥ 1973 en ns)
+            return t // 1_000_000_000
+        if big >= 10**14:     # µs
+            return t // 1_000_000
+        if big > 10**11:      # ms
+            return t // 1000
+        return t
+    dt = pd.to_datetime(s, utc=True)
+    return ((dt - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def _chunk_to_columns(frame: pd.DataFrame, mapping: dict[str, list[str]]) -> dict:
+    cols = {"time": _epoch_seconds(frame, mapping["time"])}
+    for f in ("open", "high", "low", "close"):
+        cols[f] = frame[mapping[f][0]].to_numpy(dtype=np.float64)
+    vol = mapping.get("volume")
+    cols["volume"] = frame[vol[0]].to_numpy(dtype=np.float64) if vol else np.zeros(len(frame))
+    return cols
+
+
+def _iter_csv(path: Path, chunk_rows: int) -> Iterator[tuple[pd.DataFrame, dict]]:
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as fh:
+        header = fh.readline()
+    sep = max(("\t", ";", ","), key=header.count)
+    names = [n for n in header.rstrip("\r\n").split(sep)]
+    mapping = _map_columns(names)
+    usecols = sorted({c for cs in mapping.values() for c in cs})
+    for chunk in pd.read_csv(path, sep=sep, usecols=usecols, chunksize=chunk_rows):
+        yield chunk, mapping
+
+
+def _iter_parquet(path: Path, chunk_rows: int) -> Iterator[tuple[pd.DataFrame, dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("lecture Parquet: installe pyarrow (pip install pyarrow)") from e
+    pf = pq.ParquetFile(path)
+    mapping = _map_columns(pf.schema_arrow.names)
+    usecols = sorted({c for cs in mapping.values() for c in cs})
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=usecols):
+        yield batch.to_pandas(), mapping
+
+
+def load_ohlc_file(path: Path, tf_seconds: int, max_bars: int = 0,
+                   chunk_rows: int = 500_000, align_offset: int = 0) -> tuple[dict, int]:
+    """
+    Lit un fichier OHLC(V) par blocs, sans charger les colonnes inutiles, et l'agrège
+    au timeframe demandé bloc par bloc (mémoire bornée même sur des années de M1).
+    Retourne (colonnes numpy triées, nb de lignes lues).
+    """
+    reader = _iter_parquet if path.suffix.lower() == ".parquet" else _iter_csv
+    parts: list[dict] = []
+    rows = 0
+    for frame, mapping in reader(path, chunk_rows):
+        rows += len(frame)
+        cols = _chunk_to_columns(frame, mapping)
+        if not len(cols["time"]):
+            continue
+        order = np.argsort(cols["time"], kind="stable")
+        if np.any(order != np.arange(len(order))):
+            cols = {k: v[order] for k, v in cols.items()}
+        parts.append(derive_columns(cols, tf_seconds, align_offset))
+        if max_bars and len(parts) > 1:
+            # on ne garde que la queue (la dernière barre peut se prolonger dans le bloc suivant)
+            merged = derive_columns({k: np.concatenate([p[k] for p in parts]) for k in parts[0]},
+                                    tf_seconds, align_offset)
+            parts = [{k: v[-max_bars:] for k, v in merged.items()}]
+
+    if not parts:
+        empty = {k: np.empty(0, dtype=np.int64 if k == "time" else np.float64)
+                 for k in ("time", "open", "high", "low", "close", "volume")}
+        return empty, rows
+
+    cols = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    if np.any(np.diff(cols["time"]) < 0):
+        order = np.argsort(cols["time"], kind="stable")
+        cols = {k: v[order] for k, v in cols.items()}
+    # recolle les slots coupés entre blocs (l'agrégation OHLCV est associative)
+    cols = derive_columns(cols, tf_seconds, align_offset)
+    if max_bars:
+        cols = {k: v[-max_bars:] for k, v in cols.items()}
+    return cols, rows
+
+
+class FileDataSource(DataSource):
+    """
+    Source hors-ligne: historiques OHLC(V) en Parquet ou CSV dans DATA_DIR.
+
+    Fichiers cherchés pour (symbole, tf), dans l'ordre:
+      SYMBOLE_TF.parquet / .csv, puis le timeframe plus fin le plus proche
+      (SYMBOLE_M1.csv → H1 agrégé localement), puis SYMBOLE.parquet / .csv.
+    Colonnes reconnues: time|timestamp|datetime (ou DATE + TIME des exports MT5),
+    open, high, low, close, volume|tick_volume (optionnel).
+
+    Le fichier est lu par blocs dans le thread de la source, agrégé en numpy,
+    puis émis en un seul historyReady, comme un historique MT5 — mais en colonnes (ColumnBars,
+    lecture seule, partagé avec le cache): pas un dict par ligne au chargement. Pas de flux live.
+    """
+
+    def __init__(self, symbol: str, timeframe: str, depth: int = 5000, data_dir: str | None = None):
+        super().__init__(symbol, timeframe, depth)
+        self.data_dir = Path(data_dir or DATA_DIR)
+        self._cache = HistoryCache(max_entries=8, max_bars=4 * FILE_MAX_BARS if FILE_MAX_BARS else 2_000_000)
+        self._running = False
+
+    # ---------- lifecycle ----------
+
+    @pyqtSlot()
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        print(f"✅ File source [{self.data_dir}] [{self.symbol} {self.tf}]")
+        bars = self._load(self.symbol, self.tf)
+        if bars is not None:
+            self.historyReady.emit(bars)
+
+    @pyqtSlot()
+    def shutdown(self):
+        self._running = False
+        self.finished.emit()
+
+    # ---------- commandes UI ----------
+
+    @pyqtSlot(str, str)
+    def set_params(self, symbol: str, timeframe: str):
+        if symbol == self.symbol and timeframe == self.tf:
+            return
+        self.symbol, self.tf = symbol, timeframe
+        bars = self._load(symbol, timeframe)
+        if bars is not None:
+            self.historyReady.emit(bars)
+        print(f"🔁 Params applied → {self.symbol} {self.tf}")
+
+    @pyqtSlot(str, str)
+    def subscribe(self, symbol: str, timeframe: str):
+        bars = self._load(symbol, timeframe)
+        if bars is not None:
+            self.subHistoryReady.emit(symbol, timeframe, bars)
+
+    @pyqtSlot(str, str, int, int)
+    def request_older(self, symbol: str, timeframe: str, before: int, count: int):
+        """Tout le fichier est déjà en mémoire: la tranche sort du cache."""
+        bars = self._cache.peek((symbol, timeframe)) or []
+        self.olderBarsReady.emit(symbol, timeframe, bars_before(bars, before, count))
+
+    # ---------- interne ----------
+
+    def _find_file(self, symbol: str, tf: str) -> Optional[Path]:
+        tf_sec = TF_SECONDS[tf]
+        finer = sorted((s, name) for name, s in TF_SECONDS.items() if s <= tf_sec and tf_sec % s == 0)
+        for _, name in reversed(finer):                 # tf exact d'abord, puis du plus proche au plus fin
+            for ext in _EXTENSIONS:
+                p = self.data_dir / f"{symbol}_{name}{ext}"
+                if p.is_file():
+                    return p
+        for ext in _EXTENSIONS:
+            p = self.data_dir / f"{symbol}{ext}"
+            if p.is_file():
+                return p
+        return None
+
+    def _load(self, symbol: str, tf: str) -> Optional[ColumnBars | list]:
+        if tf not in TF_SECONDS:
+            print(f"⚠️ timeframe inconnu: {tf}")
+            return None
+        cached = self._cache.get((symbol, tf))
+        if cached is not None:
+            return cached   # ColumnBars: lecture seule, partagée sans copie
+
+        path = self._find_file(symbol, tf)
+        if path is None:
+            print(f"⚠️ aucun fichier pour {symbol} {tf} dans {self.data_dir}")
+            return []
+
+        t0 = time.perf_counter()
+        try:
+            cols, rows = load_ohlc_file(path, TF_SECONDS[tf], FILE_MAX_BARS,
+                                        FILE_CHUNK_ROWS, BROKER_TZ_OFFSET_SEC)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"❌ lecture {path.name} impossible:", e)
+            return []
+        bars = ColumnBars(cols)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+
+        self._cache.put((symbol, tf), bars)
+        _dbg(f"📂 {symbol} {tf} ← {path.name}: {rows} lignes → {len(bars)} bars en {load_ms:.0f} ms")
+        self.metricsReady.emit({"source": "file", "file": path.name, "rows": rows,
+                                "bars": len(bars), "load_ms": round(load_ms, 1)})
+        return bars
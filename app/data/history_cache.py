@@ -0,0 +1,61 @@
+# app/data/history_cache.py
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class HistoryCache:
+    """
+    LRU en mémoire des historiques récents, clé (symbole, timeframe).
+    Bornée en nombre d'entrées ET en nombre total de barres (la plus ancienne sort en premier).
+    Les listes stockées peuvent être celles des subscriptions live: elles restent à jour
+    tant que la subscription existe, le cache ne fait qu'en garder la référence.
+    """
+
+    def __init__(self, max_entries: int = 24, max_bars: int = 100_000):
+        self.max_entries = max_entries
+        self.max_bars = max_bars
+        self._data: "OrderedDict[tuple[str, str], list[dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: tuple[str, str]) -> Optional[list[dict]]:
+        bars = self._data.get(key)
+        if bars is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return bars
+
+    def peek(self, key: tuple[str, str]) -> Optional[list[dict]]:
+        """Lecture sans toucher à l'ordre LRU ni aux compteurs (prefetch, dérivations)."""
+        return self._data.get(key)
+
+    def put(self, key: tuple[str, str], bars: list[dict]):
+        if not bars:
+            return
+        self._data[key] = bars
+        self._data.move_to_end(key)
+        self._evict()
+
+    def pop(self, key: tuple[str, str]):
+        self._data.pop(key, None)
+
+    def total_bars(self) -> int:
+        return sum(len(b) for b in self._data.values())
+
+    def _evict(self):
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        total = self.total_bars()
+        while total > self.max_bars and len(self._data) > 1:
+            _, bars = self._data.popitem(last=False)
+            total -= len(bars)
@@ -0,0 +1,81 @@
+# app/data/history_executor.py
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+PRIORITY_HIGH = 0     # historique du chart (couple principal)
+PRIORITY_NORMAL = 1   # autres subscriptions, deltas, backfills
+PRIORITY_LOW = 2      # prefetch en temps mort
+
+
+class HistoryExecutor(QObject):
+    """
+    Exécuteur des appels MT5 bloquants (copy_rates_*) dans son propre QThread,
+    pour que la boucle de poll des ticks ne gèle jamais pendant un gros historique.
+
+    Protocole:
+      - submit(fn, priority) depuis le thread du worker → job_id
+      - fn() s'exécute ici, un job à la fois, le plus prioritaire d'abord
+      - jobDone(job_id, résultat, exception) revient au worker (connexion queued)
+    Les fonctions soumises ne doivent PAS toucher à l'état du worker (lecture seule).
+    """
+
+    jobDone = pyqtSignal(int, object, object)   # job_id, résultat, exception | None
+    _wake = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._queue: list[tuple[int, int, Callable[[], object]]] = []
+        self._ids = itertools.count(1)
+        self._wake.connect(self._drain)
+
+        # stats (lues par le worker pour metricsReady)
+        self.jobs_run = 0
+        self.busy_ms = 0.0
+        self.max_ms = 0.0
+
+    def submit(self, fn: Callable[[], object], priority: int = PRIORITY_NORMAL) -> int:
+        job_id = next(self._ids)
+        with self._lock:
+            heapq.heappush(self._queue, (priority, job_id, fn))
+        self._wake.emit()
+        return job_id
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def cancel_all(self):
+        with self._lock:
+            self._queue.clear()
+
+    def take_stats(self) -> dict:
+        out = {"history_jobs": self.jobs_run, "history_busy_ms": round(self.busy_ms, 1),
+               "history_max_ms": round(self.max_ms, 1), "history_queue": self.pending()}
+        self.jobs_run = 0
+        self.busy_ms = self.max_ms = 0.0
+        return out
+
+    @pyqtSlot()
+    def _drain(self):
+        with self._lock:
+            if not self._queue:
+                return
+            _, job_id, fn = heapq.heappop(self._queue)
+        t0 = time.perf_counter()
+        try:
+            result, error = fn(), None
+        except Exception as e:   # remonté au worker, jamais avalé ici
+            result, error = None, e
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.jobs_run += 1
+        self.busy_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.jobDone.emit(job_id, result, error)
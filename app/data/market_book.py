@@ -0,0 +1,89 @@
+# app/data/market_book.py
+from __future__ import annotations
+
+import numpy as np
+
+# Types MT5 (BookInfo.type): carnet limite + ordres au marché
+_SELL_TYPES = (1, 3)   # BOOK_TYPE_SELL, BOOK_TYPE_SELL_MARKET
+_BUY_TYPES = (2, 4)    # BOOK_TYPE_BUY, BOOK_TYPE_BUY_MARKET
+
+BID, ASK = 0, 1
+
+
+def book_levels(entries, depth: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    market_book_get → (prix, volumes) de forme (2, depth): ligne BID puis ASK,
+    niveau 0 = meilleur prix. Niveaux absents = NaN (tableaux de taille fixe).
+    """
+    px = np.full((2, depth), np.nan)
+    vol = np.full((2, depth), np.nan)
+    if not entries:
+        return px, vol
+    arr = np.array([(e.type, e.price, e.volume_dbl or e.volume) for e in entries], dtype=np.float64)
+    for side, types, descending in ((BID, _BUY_TYPES, True), (ASK, _SELL_TYPES, False)):
+        rows = arr[np.isin(arr[:, 0], types)]
+        if not len(rows):
+            continue
+        order = np.argsort(-rows[:, 1] if descending else rows[:, 1], kind="stable")[:depth]
+        px[side, :len(order)] = rows[order, 1]
+        vol[side, :len(order)] = rows[order, 2]
+    return px, vol
+
+
+def _changed(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a != b) & ~(np.isnan(a) & np.isnan(b))
+
+
+class BookTracker:
+    """
+    Carnet d'un symbole: dernier état (numpy, taille fixe) + diff vers le précédent.
+    Seuls les niveaux modifiés partent vers l'UI: [side, niveau, prix|None, volume|None].
+    """
+
+    def __init__(self, symbol: str, depth: int):
+        self.symbol = symbol
+        self.depth = depth
+        self.px = np.full((2, depth), np.nan)
+        self.vol = np.full((2, depth), np.nan)
+        self.seq = 0
+        self.full_sent = False
+        self.available = True
+        # compteurs depuis le dernier take_stats()
+        self.reads = 0
+        self.updates = 0
+        self.levels_sent = 0
+
+    def update(self, entries) -> dict | None:
+        """Nouvel état brut MT5 → message diff (None si rien n'a changé)."""
+        self.reads += 1
+        px, vol = book_levels(entries, self.depth)
+        if self.full_sent:
+            side, lvl = np.nonzero(_changed(px, self.px) | _changed(vol, self.vol))
+            if not len(side):
+                return None
+        else:
+            side, lvl = np.indices((2, self.depth)).reshape(2, -1)
+        self.px, self.vol = px, vol
+        self.seq += 1
+        full = not self.full_sent
+        self.full_sent = True
+
+        p = px[side, lvl]
+        v = vol[side, lvl]
+        levels = [
+            [s, i, None if a != a else a, None if b != b else b]   # NaN → None (JSON)
+            for s, i, a, b in zip(side.tolist(), lvl.tolist(), p.tolist(), v.tolist())
+        ]
+        self.updates += 1
+        self.levels_sent += len(levels)
+        return {"symbol": self.symbol, "seq": self.seq, "full": full, "depth": self.depth, "levels": levels}
+
+    def take_stats(self) -> dict:
+        out = {"reads": self.reads, "updates": self.updates, "levels_sent": self.levels_sent}
+        self.reads = self.updates = self.levels_sent = 0
+        return out
+
+    def unavailable(self) -> dict:
+        self.available = False
+        return {"symbol": self.symbol, "seq": self.seq, "full": True, "depth": self.depth,
+                "levels": [], "available": False}
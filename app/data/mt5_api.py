@@ -0,0 +1,47 @@
+# app/data/mt5_api.py
+"""
+Backend MetaTrader5 unique du process, partagé par tous les threads qui parlent au terminal:
+DataWorker (ticks, carnet, positions), HistoryExecutor (copy_rates_*) et OrderExecutor
+(initialize, order_check/order_send).
+
+Le module MetaTrader5 pilote un seul terminal par process et ses appels ne sont pas faits
+pour être concurrents: chaque fonction passe par un même RLock (un appel à la fois, dans
+l'ordre d'arrivée). mt5_sim sérialise déjà ses fonctions avec son propre verrou (@_locked),
+exposé ici sous le même nom.
+"""
+from __future__ import annotations
+
+import threading
+
+from app.config import MT5_BACKEND
+
+
+class _LockedModule:
+    """Proxy d'un module: fonctions enveloppées par le verrou (à la première lecture), constantes telles quelles."""
+
+    def __init__(self, module, lock):
+        self._module = module
+        self._lock = lock
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._module, name)
+        if callable(attr) and not isinstance(attr, type):
+            fn, lock = attr, self._lock
+
+            def call(*a, **kw):
+                with lock:
+                    return fn(*a, **kw)
+
+            call.__name__, call.__doc__ = fn.__name__, fn.__doc__
+            attr = call
+        setattr(self, name, attr)   # lectures suivantes sans __getattr__
+        return attr
+
+
+if MT5_BACKEND == "sim":
+    from . import mt5_sim as MT5
+    MT5_LOCK = MT5._lock
+else:
+    import MetaTrader5 as _mt5
+    MT5_LOCK = threading.RLock()
+    MT5 = _LockedModule(_mt5, MT5_LOCK)
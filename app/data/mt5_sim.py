@@ -0,0 +1,854 @@
+# app/data/mt5_sim.py
+"""
+Stand-in local du module MetaTrader5 (Windows only) pour faire tourner le chemin de données
+sous Linux, en headless, et pour charger le DataWorker à débit contrôlé.
+
+Implémente le sous-ensemble utilisé par l'app:
+  initialize, shutdown, last_error, symbol_select, symbol_info, symbol_info_tick,
+  copy_rates_range, copy_rates_from, copy_rates_from_pos, copy_ticks_from, copy_ticks_range,
+  market_book_add, market_book_get, market_book_release,
+  order_check, order_send, positions_get, positions_total, orders_get, orders_total, account_info
+
+Compte simulé (hedging): ordres au marché exécutés au bid/ask courant après
+SIM_ORDER_LATENCY_MS (hors verrou, comme l'aller-retour serveur), ordres limit
+gardés en attente et exécutés quand le prix les traverse.
+
+Derrière: un générateur de marché GBM par symbole (ticks Poisson au débit configuré),
+avec trous de cotation (gaps), ticks aberrants (spikes) et fermeture du week-end.
+Sélection via MT5_BACKEND=sim (app/config.py) ; réglages SIM_* ou configure().
+"""
+from __future__ import annotations
+
+import fnmatch
+import math
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.config import (
+    SIM_TICK_RATE, SIM_VOLATILITY, SIM_SPIKE_PROB, SIM_GAP_PROB, SIM_GAP_MAX_SEC,
+    SIM_HISTORY_DAYS, SIM_WEEKENDS, SIM_SEED,
+    SIM_ORDER_LATENCY_MS, SIM_BALANCE, SIM_LEVERAGE,
+)
+
+# ---------------------------
+#  Constantes (valeurs MT5)
+# ---------------------------
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+_TF_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400,
+}
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+TICK_FLAG_BID = 2
+TICK_FLAG_ASK = 4
+TICK_FLAG_LAST = 8
+TICK_FLAG_VOLUME = 16
+
+BOOK_TYPE_SELL = 1
+BOOK_TYPE_BUY = 2
+BOOK_TYPE_SELL_MARKET = 3
+BOOK_TYPE_BUY_MARKET = 4
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_FULL = 4
+
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_REMOVE = 8
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+ORDER_TIME_GTC = 0
+
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+
+ORDER_STATE_PLACED = 1
+ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_INVALID_FILL = 10030
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_NO_CONNECTION = -10001
+
+TICK_DTYPE = np.dtype([
+    ("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+    ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8"),
+])
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+BookInfo = namedtuple("BookInfo", "type price volume volume_dbl")
+OrderCheckResult = namedtuple(
+    "OrderCheckResult", "retcode balance equity profit margin margin_free margin_level comment request")
+OrderSendResult = namedtuple(
+    "OrderSendResult", "retcode deal order volume price bid ask comment request_id retcode_external request")
+TradePosition = namedtuple(
+    "TradePosition",
+    "ticket time time_msc time_update time_update_msc type magic identifier reason volume price_open "
+    "sl tp price_current swap profit symbol comment external_id",
+)
+TradeOrder = namedtuple(
+    "TradeOrder",
+    "ticket time_setup time_setup_msc time_done time_done_msc time_expiration type type_time type_filling "
+    "state magic position_id position_by_id reason volume_initial volume_current price_open sl tp "
+    "price_current price_stoplimit symbol comment external_id",
+)
+AccountInfo = namedtuple(
+    "AccountInfo",
+    "login trade_mode leverage limit_orders margin_so_mode trade_allowed trade_expert margin_mode "
+    "currency_digits fifo_close balance credit profit equity margin margin_free margin_level "
+    "margin_so_call margin_so_so margin_initial margin_maintenance assets liabilities "
+    "commission_blocked name server currency company",
+)
+SymbolInfo = namedtuple(
+    "SymbolInfo",
+    "name select visible trade_mode time digits point spread bid ask "
+    "trade_contract_size trade_tick_size trade_tick_value volume_min volume_max volume_step "
+    "filling_mode currency_base currency_profit description",
+)
+
+# Prix d'ancrage des symboles de la toolbar (les autres partent de 100)
+_BASE_PRICES = {
+    "EURUSD": 1.0850, "GBPUSD": 1.2700, "USDJPY": 150.00, "USDCAD": 1.3600, "AUDUSD": 0.6600,
+    "USDCHF": 0.8800, "NZDUSD": 0.6100, "EURJPY": 162.00, "XAUUSD": 2350.0,
+}
+
+_SECONDS_PER_YEAR = 365.0 * 86400.0
+_TICK_KEEP = 500_000          # ticks live gardés en mémoire par symbole
+_BOOK_LEVELS = 10             # niveaux par côté du carnet simulé
+_BOOK_CHURN = 0.3             # part des niveaux dont le volume change entre deux lectures
+
+_config = {
+    "tick_rate": SIM_TICK_RATE,
+    "volatility": SIM_VOLATILITY,
+    "spike_prob": SIM_SPIKE_PROB,
+    "gap_prob": SIM_GAP_PROB,
+    "gap_max_sec": SIM_GAP_MAX_SEC,
+    "history_days": SIM_HISTORY_DAYS,
+    "weekends": SIM_WEEKENDS,
+    "seed": SIM_SEED,
+    "order_latency_ms": SIM_ORDER_LATENCY_MS,
+    "balance": SIM_BALANCE,
+    "leverage": SIM_LEVERAGE,
+}
+
+_initialized = False
+_last_error = (RES_S_OK, "Success")
+_markets: dict[str, "_Market"] = {}
+_selected: set[str] = set()
+_books: set[str] = set()
+# Compte simulé: positions ouvertes et ordres en attente par ticket
+_account = {"balance": SIM_BALANCE}
+_positions: dict[int, dict] = {}
+_orders: dict[int, dict] = {}
+_tickets = [1_000_000]
+# Le worker (ticks) et le HistoryExecutor (copy_rates_*) appellent en parallèle, comme avec le vrai terminal
+_lock = threading.RLock()
+
+
+def _locked(fn):
+    def wrapper(*a, **kw):
+        with _lock:
+            return fn(*a, **kw)
+    wrapper.__name__, wrapper.__doc__ = fn.__name__, fn.__doc__
+    return wrapper
+
+
+@_locked
+def configure(**kw):
+    """Règle le générateur (tick_rate, volatility, spike_prob, gap_prob, gap_max_sec,
+    history_days, weekends, seed) et le compte (order_latency_ms, balance, leverage).
+    Les marchés déjà créés et le compte sont réinitialisés."""
+    for k, v in kw.items():
+        if k not in _config:
+            raise KeyError(f"mt5_sim: paramètre inconnu {k}")
+        _config[k] = v
+    _markets.clear()
+    _positions.clear()
+    _orders.clear()
+    _account["balance"] = float(_config["balance"])
+
+
+def _now() -> float:
+    return time.time()
+
+
+def _to_epoch(d) -> int:
+    if isinstance(d, datetime):
+        if d.tzinfo is None:
+            d = d.replace(tzinfo=timezone.utc)
+        return int(d.timestamp())
+    return int(d)
+
+
+def _market_closed(ts) -> np.ndarray:
+    """Forex: fermé du vendredi 22:00 au dimanche 22:00 (UTC)."""
+    ts = np.asarray(ts, dtype=np.int64)
+    dow = ((ts // 86400) + 3) % 7          # 0 = lundi (1970-01-01 était un jeudi)
+    hour = (ts % 86400) // 3600
+    return (dow == 5) | ((dow == 4) & (hour >= 22)) | ((dow == 6) & (hour < 22))
+
+
+class _Market:
+    """Générateur GBM d'un symbole: historique M1 synthétique + ticks live générés à la demande."""
+
+    def __init__(self, symbol: str):
+        cfg = _config
+        self.symbol = symbol
+        self.rng = np.random.default_rng((zlib.crc32(symbol.encode()) + int(cfg["seed"])) & 0xFFFFFFFF)
+        base = _BASE_PRICES.get(symbol, 100.0)
+        self.digits = 3 if base >= 20 else 5
+        self.point = 10.0 ** -self.digits
+        self.spread_pts = 12 if self.digits == 5 else 15
+        self.sigma_s = float(cfg["volatility"]) / math.sqrt(_SECONDS_PER_YEAR)
+
+        self.t0 = int(_now())
+        self.price = base
+        self.gap_until = 0.0
+        self.last_gen = float(self.t0)
+
+        self.ticks = np.empty(0, dtype=TICK_DTYPE)
+        self.m1 = self._make_history(base)
+        self.book_vol = np.round(self.rng.lognormal(0.5, 0.8, (2, _BOOK_LEVELS)), 2)
+
+    # ---------- historique ----------
+
+    def _make_history(self, anchor: float) -> np.ndarray:
+        days = int(_config["history_days"])
+        end = (self.t0 // 60) * 60
+        times = np.arange(end - days * 86400, end, 60, dtype=np.int64)
+        if _config["weekends"]:
+            times = times[~_market_closed(times)]
+        n = len(times)
+        out = np.zeros(n, dtype=RATES_DTYPE)
+        if n == 0:
+            return out
+        s = self.sigma_s * math.sqrt(60.0)
+        rets = self.rng.normal(-0.5 * s * s, s, n)
+        # marche arrière: la dernière clôture retombe sur le prix d'ancrage
+        log_close = math.log(anchor) - np.concatenate((np.cumsum(rets[::-1])[::-1][1:], [0.0]))
+        close = np.exp(log_close)
+        open_ = np.concatenate(([close[0] * math.exp(-rets[0])], close[:-1]))
+        wick = np.abs(self.rng.normal(0.0, s * 0.5, (2, n)))
+        out["time"] = times
+        out["open"] = np.round(open_, self.digits)
+        out["close"] = np.round(close, self.digits)
+        out["high"] = np.round(np.maximum(open_, close) * np.exp(wick[0]), self.digits)
+        out["low"] = np.round(np.minimum(open_, close) * np.exp(-wick[1]), self.digits)
+        out["tick_volume"] = self.rng.poisson(max(1.0, float(_config["tick_rate"]) * 60.0), n)
+        out["spread"] = self.spread_pts
+        return out
+
+    # ---------- ticks live ----------
+
+    def advance(self, now: float | None = None):
+        """Génère les ticks entre la dernière génération et maintenant (processus de Poisson)."""
+        now = _now() if now is None else now
+        t_from, t_to = self.last_gen, now
+        if t_to <= t_from:
+            return
+        self.last_gen = t_to
+        rate = float(_config["tick_rate"])
+        if rate <= 0:
+            return
+
+        # trou de cotation éventuel
+        if self.gap_until > t_from:
+            t_from = min(t_to, self.gap_until)
+        dt = t_to - t_from
+        if dt <= 0:
+            return
+        p_gap = 1.0 - (1.0 - float(_config["gap_prob"])) ** dt
+        gap_start = None
+        if self.rng.random() < p_gap:
+            gap_start = t_from + self.rng.random() * dt
+            self.gap_until = gap_start + self.rng.random() * float(_config["gap_max_sec"])
+
+        n = int(self.rng.poisson(rate * dt))
+        if n == 0:
+            return
+        ts = np.sort(self.rng.uniform(t_from, t_to, n))
+        if gap_start is not None:
+            ts = ts[(ts < gap_start) | (ts >= self.gap_until)]
+        if _config["weekends"]:
+            ts = ts[~_market_closed(ts.astype(np.int64))]
+        n = len(ts)
+        if n == 0:
+            return
+
+        # GBM sur le bid
+        dts = np.diff(np.concatenate(([t_from], ts)))
+        z = self.rng.standard_normal(n)
+        log_p = math.log(self.price) + np.cumsum(-0.5 * self.sigma_s ** 2 * dts + self.sigma_s * np.sqrt(dts) * z)
+        bid = np.exp(log_p)
+        self.price = float(bid[-1])
+
+        # spikes: ticks isolés aberrants (la trajectoire n'est pas affectée)
+        spikes = self.rng.random(n) < float(_config["spike_prob"])
+        if spikes.any():
+            bid = bid.copy()
+            bid[spikes] *= 1.0 + self.rng.choice([-1.0, 1.0], int(spikes.sum())) * self.rng.uniform(0.06, 0.2, int(spikes.sum()))
+
+        spread = self.spread_pts + self.rng.integers(0, 4, n)
+        new = np.zeros(n, dtype=TICK_DTYPE)
+        msc = (ts * 1000.0).astype(np.int64)
+        new["time_msc"] = msc
+        new["time"] = msc // 1000
+        new["bid"] = np.round(bid, self.digits)
+        new["ask"] = np.round(bid + spread * self.point, self.digits)
+        new["flags"] = TICK_FLAG_BID | TICK_FLAG_ASK
+
+        self.ticks = np.concatenate((self.ticks, new))
+        if len(self.ticks) > _TICK_KEEP:
+            self.ticks = self.ticks[-_TICK_KEEP:]
+        self._fold_into_m1(new)
+
+    def _fold_into_m1(self, ticks: np.ndarray):
+        """Met à jour les barres M1 avec les nouveaux ticks (bid)."""
+        slots = (ticks["time"] // 60) * 60
+        price = ticks["bid"]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(slots)) + 1))
+        ends = np.concatenate((starts[1:], [len(ticks)]))
+        rows = np.zeros(len(starts), dtype=RATES_DTYPE)
+        rows["time"] = slots[starts]
+        rows["open"] = price[starts]
+        rows["high"] = np.maximum.reduceat(price, starts)
+        rows["low"] = np.minimum.reduceat(price, starts)
+        rows["close"] = price[ends - 1]
+        rows["tick_volume"] = ends - starts
+        rows["spread"] = self.spread_pts
+
+        if len(self.m1) and self.m1["time"][-1] == rows["time"][0]:
+            last = self.m1[-1]
+            last["high"] = max(last["high"], rows["high"][0])
+            last["low"] = min(last["low"], rows["low"][0])
+            last["close"] = rows["close"][0]
+            last["tick_volume"] += rows["tick_volume"][0]
+            rows = rows[1:]
+        if len(rows):
+            self.m1 = np.concatenate((self.m1, rows))
+
+    def last_tick(self):
+        if len(self.ticks):
+            return self.ticks[-1]
+        # pas encore de tick live: on expose la dernière clôture
+        t = np.zeros(1, dtype=TICK_DTYPE)[0]
+        ts = int(self.m1["time"][-1]) + 59 if len(self.m1) else self.t0
+        t["time"], t["time_msc"] = ts, ts * 1000
+        t["bid"] = self.price
+        t["ask"] = round(self.price + self.spread_pts * self.point, self.digits)
+        t["flags"] = TICK_FLAG_BID | TICK_FLAG_ASK
+        return t
+
+    def book(self) -> tuple:
+        """Carnet autour du dernier bid/ask: volumes persistants, une part renouvelée à chaque lecture."""
+        t = self.last_tick()
+        churn = self.rng.random(self.book_vol.shape) < _BOOK_CHURN
+        self.book_vol[churn] = np.round(self.rng.lognormal(0.5, 0.8, int(churn.sum())), 2)
+        k = np.arange(_BOOK_LEVELS)
+        asks = np.round(float(t["ask"]) + k * self.point, self.digits)
+        bids = np.round(float(t["bid"]) - k * self.point, self.digits)
+        # ordre MT5: prix décroissants, vendeurs (asks) d'abord
+        out = [BookInfo(BOOK_TYPE_SELL, float(p), int(max(1, v)), float(v))
+               for p, v in zip(asks[::-1].tolist(), self.book_vol[1][::-1].tolist())]
+        out += [BookInfo(BOOK_TYPE_BUY, float(p), int(max(1, v)), float(v))
+                for p, v in zip(bids.tolist(), self.book_vol[0].tolist())]
+        return tuple(out)
+
+    # ---------- barres ----------
+
+    def rates(self, tf_sec: int) -> np.ndarray:
+        """Barres d'un timeframe quelconque, agrégées depuis le M1."""
+        m1 = self.m1
+        if tf_sec == 60 or len(m1) == 0:
+            return m1
+        slots = (m1["time"] // tf_sec) * tf_sec
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(slots)) + 1))
+        ends = np.concatenate((starts[1:], [len(m1)]))
+        out = np.zeros(len(starts), dtype=RATES_DTYPE)
+        out["time"] = slots[starts]
+        out["open"] = m1["open"][starts]
+        out["high"] = np.maximum.reduceat(m1["high"], starts)
+        out["low"] = np.minimum.reduceat(m1["low"], starts)
+        out["close"] = m1["close"][ends - 1]
+        out["tick_volume"] = np.add.reduceat(m1["tick_volume"], starts)
+        out["spread"] = self.spread_pts
+        return out
+
+
+# ---------------------------
+#  API façon MetaTrader5
+# ---------------------------
+
+def _fail(code: int, msg: str):
+    global _last_error
+    _last_error = (code, msg)
+    return None
+
+
+def _ok():
+    global _last_error
+    _last_error = (RES_S_OK, "Success")
+
+
+def _market(symbol: str) -> "_Market | None":
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    m = _markets.get(symbol)
+    if m is None:
+        m = _markets[symbol] = _Market(symbol)
+    m.advance()
+    if _orders:
+        _fill_pending(m)
+    _ok()
+    return m
+
+
+@_locked
+def initialize(path: str | None = None, **kwargs) -> bool:
+    global _initialized
+    _initialized = True
+    _ok()
+    return True
+
+
+@_locked
+def shutdown():
+    global _initialized
+    _initialized = False
+    _books.clear()
+    return True
+
+
+def last_error():
+    return _last_error
+
+
+@_locked
+def symbol_select(symbol: str, enable: bool = True) -> bool:
+    if not _initialized:
+        _fail(RES_E_NO_CONNECTION, "No IPC connection")
+        return False
+    (_selected.add if enable else _selected.discard)(symbol)
+    _ok()
+    return True
+
+
+@_locked
+def symbol_info_tick(symbol: str):
+    m = _market(symbol)
+    if m is None:
+        return None
+    t = m.last_tick()
+    return Tick(int(t["time"]), float(t["bid"]), float(t["ask"]), float(t["last"]), int(t["volume"]),
+                int(t["time_msc"]), int(t["flags"]), float(t["volume_real"]))
+
+
+@_locked
+def symbol_info(symbol: str):
+    m = _market(symbol)
+    if m is None:
+        return None
+    t = m.last_tick()
+    closed = bool(_config["weekends"]) and bool(_market_closed([int(_now())])[0])
+    return SymbolInfo(
+        name=symbol, select=symbol in _selected, visible=symbol in _selected,
+        trade_mode=SYMBOL_TRADE_MODE_DISABLED if closed else SYMBOL_TRADE_MODE_FULL,
+        time=int(t["time"]), digits=m.digits, point=m.point, spread=m.spread_pts,
+        bid=float(t["bid"]), ask=float(t["ask"]),
+        trade_contract_size=100_000.0, trade_tick_size=m.point,
+        trade_tick_value=1.0 if m.digits == 5 else 0.67,
+        volume_min=0.01, volume_max=100.0, volume_step=0.01,
+        filling_mode=SYMBOL_FILLING_FOK | SYMBOL_FILLING_IOC,
+        currency_base=symbol[:3], currency_profit=symbol[3:6] or "USD", description=f"{symbol} (sim)",
+    )
+
+
+@_locked
+def copy_rates_range(symbol: str, timeframe: int, date_from, date_to):
+    m = _market(symbol)
+    if m is None:
+        return None
+    tf_sec = _TF_SECONDS.get(timeframe)
+    if tf_sec is None:
+        return _fail(RES_E_INVALID_PARAMS, "Invalid timeframe")
+    r = m.rates(tf_sec)
+    a, b = _to_epoch(date_from), _to_epoch(date_to)
+    return r[np.searchsorted(r["time"], a, "left"):np.searchsorted(r["time"], b, "right")].copy()
+
+
+@_locked
+def copy_rates_from(symbol: str, timeframe: int, date_from, count: int):
+    m = _market(symbol)
+    if m is None:
+        return None
+    tf_sec = _TF_SECONDS.get(timeframe)
+    if tf_sec is None:
+        return _fail(RES_E_INVALID_PARAMS, "Invalid timeframe")
+    r = m.rates(tf_sec)
+    end = np.searchsorted(r["time"], _to_epoch(date_from), "right")
+    return r[max(0, end - int(count)):end].copy()
+
+
+@_locked
+def copy_rates_from_pos(symbol: str, timeframe: int, start_pos: int, count: int):
+    m = _market(symbol)
+    if m is None:
+        return None
+    tf_sec = _TF_SECONDS.get(timeframe)
+    if tf_sec is None:
+        return _fail(RES_E_INVALID_PARAMS, "Invalid timeframe")
+    r = m.rates(tf_sec)
+    end = len(r) - int(start_pos)
+    return r[max(0, end - int(count)):max(0, end)].copy()
+
+
+@_locked
+def copy_ticks_from(symbol: str, date_from, count: int, flags: int = COPY_TICKS_ALL):
+    m = _market(symbol)
+    if m is None:
+        return None
+    t = m.ticks
+    start = np.searchsorted(t["time"], _to_epoch(date_from), "left")
+    return t[start:start + int(count)].copy()
+
+
+@_locked
+def copy_ticks_range(symbol: str, date_from, date_to, flags: int = COPY_TICKS_ALL):
+    m = _market(symbol)
+    if m is None:
+        return None
+    t = m.ticks
+    a, b = _to_epoch(date_from), _to_epoch(date_to)
+    return t[np.searchsorted(t["time"], a, "left"):np.searchsorted(t["time"], b, "left")].copy()
+
+
+@_locked
+def market_book_add(symbol: str) -> bool:
+    if _market(symbol) is None:
+        return False
+    _books.add(symbol)
+    return True
+
+
+@_locked
+def market_book_get(symbol: str):
+    if symbol not in _books:
+        return _fail(RES_E_NOT_FOUND, "Market book not subscribed")
+    m = _market(symbol)
+    if m is None:
+        return None
+    return m.book()
+
+
+@_locked
+def market_book_release(symbol: str) -> bool:
+    _books.discard(symbol)
+    _ok()
+    return True
+
+
+# ---------------------------
+#  Trading (compte simulé)
+# ---------------------------
+
+def _next_ticket() -> int:
+    _tickets[0] += 1
+    return _tickets[0]
+
+
+def _margin(symbol: str, volume: float, price: float) -> float:
+    """Marge en devise du compte (USD): nominal / levier, converti si la cotation n'est pas en USD."""
+    nominal = volume * 100_000.0
+    if symbol[:3] != "USD":
+        nominal *= price
+    return nominal / max(1, int(_config["leverage"]))
+
+
+def _profit(p: dict, bid: float, ask: float) -> float:
+    """P&L latent d'une position, en USD (paire XXXUSD directe, sinon convertie au prix courant)."""
+    close = bid if p["type"] == POSITION_TYPE_BUY else ask
+    sign = 1.0 if p["type"] == POSITION_TYPE_BUY else -1.0
+    pl = sign * (close - p["price_open"]) * p["volume"] * 100_000.0
+    return pl / close if p["symbol"][3:6] != "USD" else pl
+
+
+def _account_state() -> dict:
+    profit = margin = 0.0
+    for p in _positions.values():
+        m = _markets.get(p["symbol"])
+        if m is None:
+            continue
+        t = m.last_tick()
+        profit += _profit(p, float(t["bid"]), float(t["ask"]))
+        margin += _margin(p["symbol"], p["volume"], p["price_open"])
+    balance = _account["balance"]
+    equity = balance + profit
+    return {"balance": balance, "equity": equity, "profit": profit, "margin": margin,
+            "margin_free": equity - margin, "margin_level": equity / margin * 100.0 if margin else 0.0}
+
+
+def _open_position(m: "_Market", order_type: int, volume: float, price: float, request: dict) -> int:
+    ticket = _next_ticket()
+    _positions[ticket] = {
+        "ticket": ticket, "symbol": m.symbol, "type": order_type % 2, "volume": volume,
+        "price_open": price, "time_msc": int(_now() * 1000), "magic": int(request.get("magic", 0)),
+        "comment": str(request.get("comment", "")), "sl": float(request.get("sl", 0.0)),
+        "tp": float(request.get("tp", 0.0)),
+    }
+    return ticket
+
+
+def _close_position(p: dict, volume: float, price: float):
+    """Clôture (partielle) au prix d'exécution: le P&L réalisé passe dans le solde."""
+    _account["balance"] += _profit(dict(p, volume=volume), price, price)
+    p["volume"] = round(p["volume"] - volume, 2)
+    if p["volume"] <= 0:
+        del _positions[p["ticket"]]
+
+
+def _fill_pending(m: "_Market"):
+    """Ordres limit du symbole traversés par le dernier bid/ask → positions."""
+    t = m.last_tick()
+    bid, ask = float(t["bid"]), float(t["ask"])
+    for ticket, o in list(_orders.items()):
+        if o["symbol"] != m.symbol:
+            continue
+        if (o["type"] == ORDER_TYPE_BUY_LIMIT and ask <= o["price"]) or \
+           (o["type"] == ORDER_TYPE_SELL_LIMIT and bid >= o["price"]):
+            del _orders[ticket]
+            _open_position(m, o["type"], o["volume"], o["price"], o)
+
+
+def _check(request: dict):
+    """Validation commune order_check/order_send → (retcode, commentaire, marché, prix d'exécution)."""
+    action = request.get("action")
+    if action == TRADE_ACTION_REMOVE:
+        if int(request.get("order", 0)) not in _orders:
+            return TRADE_RETCODE_INVALID, "Invalid order", None, 0.0
+        return 0, "Done", None, 0.0
+    symbol = request.get("symbol", "")
+    m = _market(symbol)
+    if m is None:
+        return TRADE_RETCODE_INVALID, "Invalid symbol", None, 0.0
+    if bool(_config["weekends"]) and bool(_market_closed([int(_now())])[0]):
+        return TRADE_RETCODE_MARKET_CLOSED, "Market closed", m, 0.0
+    volume = float(request.get("volume", 0.0))
+    if volume < 0.01 or volume > 100.0 or abs(round(volume / 0.01) * 0.01 - volume) > 1e-9:
+        return TRADE_RETCODE_INVALID_VOLUME, "Invalid volume", m, 0.0
+    otype = request.get("type")
+    t = m.last_tick()
+    bid, ask = float(t["bid"]), float(t["ask"])
+    if action == TRADE_ACTION_DEAL:
+        if otype not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return TRADE_RETCODE_INVALID, "Invalid order type", m, 0.0
+        if request.get("type_filling", ORDER_FILLING_FOK) not in (ORDER_FILLING_FOK, ORDER_FILLING_IOC):
+            return TRADE_RETCODE_INVALID_FILL, "Unsupported filling mode", m, 0.0
+        px = ask if otype == ORDER_TYPE_BUY else bid
+        asked = float(request.get("price", 0.0) or 0.0)
+        dev = int(request.get("deviation", 0)) * m.point
+        if asked and abs(px - asked) > dev + m.point / 2:
+            return TRADE_RETCODE_REQUOTE, "Requote", m, px
+        pos = _positions.get(int(request.get("position", 0)))
+        if pos is not None:
+            if pos["symbol"] != symbol or pos["type"] == otype or volume > pos["volume"] + 1e-9:
+                return TRADE_RETCODE_INVALID, "Invalid close request", m, px
+            return 0, "Done", m, px
+    elif action == TRADE_ACTION_PENDING:
+        if otype not in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT):
+            return TRADE_RETCODE_INVALID, "Invalid order type", m, 0.0
+        px = float(request.get("price", 0.0) or 0.0)
+        if px <= 0 or (otype == ORDER_TYPE_BUY_LIMIT and px >= ask) or \
+           (otype == ORDER_TYPE_SELL_LIMIT and px <= bid):
+            return TRADE_RETCODE_INVALID_PRICE, "Invalid price", m, px
+    else:
+        return TRADE_RETCODE_INVALID, "Invalid action", m, 0.0
+    if _margin(symbol, volume, px) > _account_state()["margin_free"]:
+        return TRADE_RETCODE_NO_MONEY, "No money", m, px
+    return 0, "Done", m, px
+
+
+@_locked
+def order_check(request: dict):
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    code, comment, m, px = _check(request)
+    acc = _account_state()
+    margin = _margin(request.get("symbol", ""), float(request.get("volume", 0.0)), px) if m is not None else 0.0
+    _ok()
+    return OrderCheckResult(code, acc["balance"], acc["equity"], acc["profit"], acc["margin"] + margin,
+                            acc["margin_free"] - margin, acc["margin_level"], comment, request)
+
+
+def order_send(request: dict):
+    """Aller-retour serveur simulé (sans verrou: les autres threads continuent), puis exécution."""
+    delay = float(_config["order_latency_ms"]) / 1000.0
+    if delay > 0:
+        time.sleep(delay)
+    with _lock:
+        return _order_send(request)
+
+
+def _order_send(request: dict):
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    code, comment, m, px = _check(request)
+    t = m.last_tick() if m is not None else None
+    bid, ask = (float(t["bid"]), float(t["ask"])) if t is not None else (0.0, 0.0)
+    deal = order = 0
+    volume = float(request.get("volume", 0.0))
+    if code == 0:
+        action = request["action"]
+        if action == TRADE_ACTION_REMOVE:
+            order = int(request["order"])
+            del _orders[order]
+            code = TRADE_RETCODE_DONE
+        elif action == TRADE_ACTION_PENDING:
+            order = _next_ticket()
+            _orders[order] = {
+                "ticket": order, "symbol": m.symbol, "type": request["type"], "volume": volume,
+                "price": px, "time_msc": int(_now() * 1000), "magic": int(request.get("magic", 0)),
+                "comment": str(request.get("comment", "")),
+            }
+            code = TRADE_RETCODE_DONE
+        else:
+            order, deal = _next_ticket(), _next_ticket()
+            pos = _positions.get(int(request.get("position", 0)))
+            if pos is not None:
+                _close_position(pos, volume, px)
+            else:
+                _open_position(m, request["type"], volume, px, request)
+            code = TRADE_RETCODE_DONE
+        comment = "Request executed"
+    _ok()
+    return OrderSendResult(code, deal, order, volume if code == TRADE_RETCODE_DONE else 0.0, px, bid, ask,
+                           comment, _next_ticket(), 0, request)
+
+
+def _refresh_prices():
+    """Fait avancer les marchés des positions/ordres (prix courants, exécution des limit)."""
+    for sym in {p["symbol"] for p in _positions.values()} | {o["symbol"] for o in _orders.values()}:
+        _market(sym)
+
+
+def _position_tuple(p: dict) -> TradePosition:
+    t = _markets[p["symbol"]].last_tick()
+    bid, ask = float(t["bid"]), float(t["ask"])
+    ts = p["time_msc"] // 1000
+    return TradePosition(
+        p["ticket"], ts, p["time_msc"], ts, p["time_msc"], p["type"], p["magic"], p["ticket"], 0,
+        p["volume"], p["price_open"], p["sl"], p["tp"], bid if p["type"] == POSITION_TYPE_BUY else ask,
+        0.0, round(_profit(p, bid, ask), 2), p["symbol"], p["comment"], "",
+    )
+
+
+def _order_tuple(o: dict) -> TradeOrder:
+    t = _markets[o["symbol"]].last_tick()
+    cur = float(t["ask"]) if o["type"] == ORDER_TYPE_BUY_LIMIT else float(t["bid"])
+    ts = o["time_msc"] // 1000
+    return TradeOrder(
+        o["ticket"], ts, o["time_msc"], 0, 0, 0, o["type"], ORDER_TIME_GTC, ORDER_FILLING_RETURN,
+        ORDER_STATE_PLACED, o["magic"], 0, 0, 0, o["volume"], o["volume"], o["price"], 0.0, 0.0,
+        cur, 0.0, o["symbol"], o["comment"], "",
+    )
+
+
+def _select(rows: dict, symbol=None, group=None, ticket=None) -> list[dict]:
+    out = list(rows.values())
+    if ticket is not None:
+        out = [r for r in out if r["ticket"] == int(ticket)]
+    elif symbol is not None:
+        out = [r for r in out if r["symbol"] == symbol]
+    elif group is not None:
+        pats = [g.strip() for g in group.split(",") if g.strip()]
+        out = [r for r in out if any(fnmatch.fnmatchcase(r["symbol"], g) for g in pats)]
+    return out
+
+
+@_locked
+def positions_get(symbol: str | None = None, group: str | None = None, ticket: int | None = None):
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    _refresh_prices()
+    _ok()
+    return tuple(_position_tuple(p) for p in _select(_positions, symbol, group, ticket))
+
+
+@_locked
+def positions_total() -> int:
+    return len(_positions)
+
+
+@_locked
+def orders_get(symbol: str | None = None, group: str | None = None, ticket: int | None = None):
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    _refresh_prices()
+    _ok()
+    return tuple(_order_tuple(o) for o in _select(_orders, symbol, group, ticket))
+
+
+@_locked
+def orders_total() -> int:
+    return len(_orders)
+
+
+@_locked
+def account_info():
+    if not _initialized:
+        return _fail(RES_E_NO_CONNECTION, "No IPC connection")
+    _refresh_prices()
+    a = _account_state()
+    _ok()
+    return AccountInfo(
+        login=5_000_001, trade_mode=0, leverage=int(_config["leverage"]), limit_orders=200, margin_so_mode=0,
+        trade_allowed=True, trade_expert=True, margin_mode=ACCOUNT_MARGIN_MODE_RETAIL_HEDGING,
+        currency_digits=2, fifo_close=False, balance=round(a["balance"], 2), credit=0.0,
+        profit=round(a["profit"], 2), equity=round(a["equity"], 2), margin=round(a["margin"], 2),
+        margin_free=round(a["margin_free"], 2), margin_level=round(a["margin_level"], 2),
+        margin_so_call=50.0, margin_so_so=30.0, margin_initial=0.0, margin_maintenance=0.0,
+        assets=0.0, liabilities=0.0, commission_blocked=0.0, name="Sim", server="Sim-Demo",
+        currency="USD", company="mt5_sim",
+    )
@@ -1,15 +1,40 @@
 # app/data/mt5_source.py
 from __future__ import annotations
 
+import time
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 
-import MetaTrader5 as MT5
+import numpy as np
 import pandas as pd
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
+from PyQt6.QtCore import pyqtSlot, QThread, QTimer
+
+from app.config import (
+    FEED_MODE, FEED_RING_POLL_MS,
+    TICK_BATCH_MAX, TICK_CAPTURE_MODE,
+    POLL_MIN_MS, POLL_MAX_MS, POLL_DORMANT_MS, POLL_BUDGET_PER_SEC, POLL_TARGET_TICKS,
+    SESSION_STALE_SEC, FEED_METRICS_INTERVAL_MS,
+    HISTORY_CACHE_MAX_ENTRIES, HISTORY_CACHE_MAX_BARS, PREFETCH_INTERVAL_MS,
+    BROKER_TZ_OFFSET_SEC, BULK_RESAMPLE_MIN_TICKS, BAR_EMIT_INTERVAL_MS,
+    BOOK_ENABLED, BOOK_DEPTH, BOOK_POLL_MS, BOOK_BUDGET_MS,
+    PORTFOLIO_POLL_MS, PORTFOLIO_PNL_MS, FEED_LATENCY,
+    WATCHLIST_EMIT_MS, WATCHLIST_DAILY_REFRESH_SEC,
+)
 
 from .models import Bar
-from .resample import CandleAggregator
+from .feed_process import FeedProcess, copy_fresh_ticks
+from .history_cache import HistoryCache
+from .market_book import BookTracker
+from .portfolio import PortfolioTracker
+from .history_executor import HistoryExecutor, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from .mt5_api import MT5, MT5_LOCK
+from .resample import DEAL_FLAGS, derive_bars, tick_prices, tick_quotes, tick_spreads
+from .scheduler import PollScheduler
+from .shm_ring import RingReader
+from .source import DataSource, bars_before
+from .subscription import Subscription, SymbolFeed
+from .watchlist import QuoteBoard, DAILY_BARS
 
 # ---------------------------
 #  Constantes & Config MT5
@@ -18,9 +43,13 @@ from .resample import CandleAggregator
 TIMEFRAMES = {
     "M1": MT5.TIMEFRAME_M1,
     "M5": MT5.TIMEFRAME_M5,
+    "M15": MT5.TIMEFRAME_M15,
     "M30": MT5.TIMEFRAME_M30,
+    "H1": MT5.TIMEFRAME_H1,
+    "H4": MT5.TIMEFRAME_H4,
+    "D1": MT5.TIMEFRAME_D1,
 }
-TF_SECONDS = {"M1": 60, "M5": 300, "M30": 1800}
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
 
 MT5_PATH = r"C:\Program Files\MetaTrader 5\terminal64.exe"
 
@@ -44,8 +73,28 @@ MIN_BARS = 50
 FIRST_LOAD_MIN_BARS = 120      # seuil confortable pour l'échelle initiale
 FIRST_LOAD_TIMEOUT_MS = 2500   # délai max d'attente avant d'envoyer quand même
 
+# ---------------------------------------
+#  Session / audit (ordonnanceur adaptatif)
+# ---------------------------------------
+SESSION_REFRESH_SEC = 60       # relecture de symbol_info (trade_mode)
+MISSED_AUDIT_SEC = 5           # mode snapshot: recompte des ticks réels via copy_ticks_range
+
+# ---------------------------------------
+#  Cache historique / prefetch
+# ---------------------------------------
+HISTORY_DELTA_MAX_UPDATES = 50 # au-delà, le delta est renvoyé comme un historique complet
+WATCHLIST_DAILY_BATCH = 10     # symboles par job D1 de la watchlist (un aller-retour exécuteur)
+PREFETCH_IDLE_MIN_MS = 30      # on ne prefetch que si le prochain poll est à plus de 30 ms
 
-class DataWorker(QObject):
+# ---------------------------------------
+#  Backfill des trous du flux live
+# ---------------------------------------
+BACKFILL_DELAY_MS = 400        # laisse le serveur publier les barres avant de les demander
+BACKFILL_MAX_RETRIES = 3       # copy_rates_range en échec (None) → nouvel essai, délai doublé
+STALL_POLL_SEC = 10            # mode snapshot: plus long sans symbol_info_tick abouti = ticks perdus (worker bloqué, déconnexion)
+
+
+class DataWorker(DataSource):
     """
     Worker MT5:
       - historyReady(list[dict]): premier batch (setData côté chart)
@@ -55,29 +104,130 @@ class DataWorker(QObject):
       - Buffer "first-load only": on accumule jusqu'à FIRST_LOAD_MIN_BARS
         ou jusqu'au FIRST_LOAD_TIMEOUT_MS puis on envoie une seule fois.
       - Ensuite, flux normal sans latence (emit direct).
+      - Multi-subscriptions: un seul worker suit plusieurs (symbole, timeframe).
+        Chaque subscription a son agrégateur + son historique ; tous les symboles
+        sont pollés dans le même cycle timer (un aller-retour MT5 par symbole).
+        Les émissions taggées (subHistoryReady/subBarReady) couvrent toutes les
+        subscriptions ; historyReady/barReady restent réservés au couple "principal"
+        (celui du chart, piloté par set_params).
+      - Poll adaptatif (PollScheduler): intervalle par symbole calé sur le débit
+        de ticks, mise en sommeil hors session, budget d'appels MT5 partagé.
+        metricsReady(dict) publie le débit effectif et les ticks manqués estimés.
+      - Cache LRU des historiques (symbole, timeframe) + prefetch en temps mort
+        (autres timeframes du symbole courant, autres symboles de la toolbar).
+        Un hit cache est émis tout de suite, seul le delta est ensuite rapatrié.
+      - Multi-timeframe: un MultiTimeframeAggregator par symbole met à jour tous
+        les timeframes suivis avec les mêmes ticks ; l'historique d'un timeframe
+        supérieur est dérivé localement d'un timeframe inférieur déjà en mémoire.
+      - Appels MT5 bloquants (historiques, deltas, backfills, prefetch) dans un
+        HistoryExecutor sur son propre QThread: la boucle de poll ne gèle jamais.
+        Handoff: la subscription passe en "loading", ses ticks sont bufferisés,
+        puis l'historique reçu seed l'agrégateur et le buffer est rejoué.
+      - FEED_MODE=process: les ticks viennent d'un process feed dédié (FeedProcess)
+        via un ring buffer en mémoire partagée ; plus aucun poll MT5 dans ce process,
+        seuls les historiques passent encore par l'API (HistoryExecutor).
+      - Backfill des trous: un saut de slots dans le flux live (veille, reconnexion,
+        ticks perdus) est comblé hors du cycle de poll par copy_rates_range, fusionné
+        dans l'historique et envoyé en un seul historyPatch.
+      - Qualité du flux par barre (Subscription.quality): spread min/moy/max,
+        ticks acceptés, rejets spike/late ; qualityReady/qualityUpdated pour le couple principal.
+      - Carnet d'ordres (DOM): market_book_add/get pour le symbole du chart (+ book_subscribe),
+        diffé niveau par niveau (BookTracker) → bookUpdated ; timer séparé, budget
+        BOOK_BUDGET_MS par cycle en round-robin pour ne pas retarder _poll_tick.
+      - Positions/ordres/compte: snapshot MT5 toutes les PORTFOLIO_POLL_MS, diffé par ticket
+        (positionsChanged/ordersChanged/accountChanged, rien si identique) ; le P&L latent est
+        recalculé depuis les ticks déjà reçus (pnlUpdated), sans appel MT5 supplémentaire.
+      - Watchlist (set_watchlist): les symboles déjà suivis sont cotés par leurs ticks, les autres
+        par un symbol_info_tick dans le même cycle de poll (même ordonnanceur, même budget) ;
+        D1 lus dans l'exécuteur (variation du jour, RSI) ; quotesUpdated part en un seul lot
+        par WATCHLIST_EMIT_MS avec les seuls symboles qui ont bougé.
+      - Émission coalescée: la bougie courante d'un couple part au plus une fois
+        par BAR_EMIT_INTERVAL_MS (la dernière version gagne) ; les clôtures
+        sont émises tout de suite, dans l'ordre, jamais fusionnées.
     """
 
-    historyReady = pyqtSignal(list)   # list[dict]
-    barReady     = pyqtSignal(dict)   # dict
-    finished     = pyqtSignal()       # signal d’arrêt propre
+    # Signaux: voir DataSource (metricsReady = métriques de l'ordonnanceur)
 
-    def __init__(self, symbol: str, timeframe: str, depth: int = 5000):
-        super().__init__()
-        self.symbol = symbol
-        self.tf     = timeframe
-        self.depth  = depth
+    def __init__(self, symbol: str, timeframe: str, depth: int = 5000, *,
+                 book: bool = BOOK_ENABLED, portfolio: bool = PORTFOLIO_POLL_MS > 0,
+                 watchlist: bool = True):
+        super().__init__(symbol, timeframe, depth)
+
+        # Services annexes (carnet du chart, positions/compte, watchlist): coupés par le
+        # mode headless qui ne lit que les barres
+        self._book_on = book
+        self._portfolio_on = portfolio
+        self._watchlist_on = watchlist
 
         self.days_back = 60
         self._running  = False
 
         self._tick_timer: QTimer | None = None
-        self._agg = CandleAggregator(TF_SECONDS[self.tf])
-        self._last_tick_time = 0
+        self._metrics_timer: QTimer | None = None
+        self._sched = PollScheduler(
+            min_ms=POLL_MIN_MS, max_ms=POLL_MAX_MS, dormant_ms=POLL_DORMANT_MS,
+            budget_per_sec=POLL_BUDGET_PER_SEC, target_ticks=POLL_TARGET_TICKS,
+            stale_sec=SESSION_STALE_SEC,
+        )
 
-        self._history_retry = 0
-        self._max_history_retries = 6
+        self._cache = HistoryCache(HISTORY_CACHE_MAX_ENTRIES, HISTORY_CACHE_MAX_BARS)
+        self._prefetch_symbols: list[str] = []
+        self._prefetch_tfs: list[str] = []
+        self._prefetch_queue: list[tuple[str, str]] = []
+        self._prefetch_timer: QTimer | None = None
+
+        # symbol -> SymbolFeed (chaque feed porte ses subscriptions par timeframe)
+        self._feeds: dict[str, SymbolFeed] = {}
+        # Subscriptions demandées explicitement (watchlist, autres charts...) :
+        # elles survivent à un changement du couple principal.
+        self._explicit: set[tuple[str, str]] = set()
+
+        # Bougie courante en attente par (symbole, tf) → émise au prochain flush
+        self._pending_bars: dict[tuple[str, str], tuple[Subscription, dict]] = {}
+        self._emit_timer: QTimer | None = None
+        self._bars_emitted = 0
+        # Latence tick → pixel (FEED_LATENCY): (recv, agg) du dernier tick par subscription
+        self._stamps: tuple[float, float] | None = None
+        self._lat: dict[tuple[str, str], tuple[float, float]] = {}
+        self._bars_coalesced = 0
+
+        # Trous du flux live à combler: {"key", "from", "to", "tries"}
+        self._gap_jobs: list[dict] = []
+        self._backfill_timer: QTimer | None = None
+        self._gaps_filled = 0
+
+        # Appels MT5 bloquants → thread dédié ; job_id → callback (thread du worker)
+        self._executor: HistoryExecutor | None = None
+        self._hist_thread: QThread | None = None
+        self._jobs: dict[int, Callable[[object], None]] = {}
+        self._prefetch_busy = False
+
+        # FEED_MODE=process: process feed + curseur de lecture du ring de ticks
+        self._feed_proc: FeedProcess | None = None
+        self._ring: RingReader | None = None
+
+        # Carnets suivis: symbol -> BookTracker ; _book_explicit survit au changement de symbole
+        self._books: dict[str, BookTracker] = {}
+        self._book_explicit: set[str] = set()
+        self._book_timer: QTimer | None = None
+        self._book_rr = 0            # prochain symbole lu (round-robin sous budget)
+        self._book_ms = 0.0          # temps passé dans les lectures depuis la dernière métrique
+        self._book_deferred = 0      # lectures reportées au cycle suivant (budget épuisé)
+
+        # Positions/ordres/compte + P&L latent recalculé à chaque tick
+        self._portfolio = PortfolioTracker()
+        self._portfolio_timer: QTimer | None = None
+        self._pnl_timer: QTimer | None = None
+        self._tick_specs: dict[str, tuple[float, float]] = {}   # symbole → (tick_value, tick_size)
+        self._tick_specs_at = 0.0
+        self._portfolio_ms = 0.0
+
+        # Watchlist: cotations + état D1 ; symboles sans subscription pollés par _poll_quote
+        self._quotes = QuoteBoard()
+        self._quotes_timer: QTimer | None = None
+        self._daily_busy = False
 
-        self._seed_bar: dict | None = None
+        self._max_history_retries = 6
         self._debug_tick_count = 0
 
         # -------- First-load only --------
@@ -101,10 +251,10 @@ class DataWorker(QObject):
             self.finished.emit()
             return
 
-        self._ensure_symbol_selected(self.symbol)
         print(f"✅ MT5 initialized (worker) [{self.symbol} {self.tf}]")
-
-        self._history_retry = 0
+        self._start_executor()
+        if FEED_MODE == "process":
+            self._start_feed_process()
 
         # Démarre le timer "first-load only" (sécurité anti-blocage)
         if not self._first_load_done and FIRST_LOAD_TIMEOUT_MS > 0:
@@ -113,13 +263,51 @@ class DataWorker(QObject):
             self._first_timer.timeout.connect(self._flush_first_load_due_to_timeout)
             self._first_timer.start(FIRST_LOAD_TIMEOUT_MS)
 
-        self._load_history()
+        self._add_subscription(self.symbol, self.tf)
+        for sym, tf in sorted(self._explicit):
+            self._add_subscription(sym, tf)
         self.start_stream()
+        if self._book_on:
+            self._book_add(self.symbol)
+        for sym in sorted(self._book_explicit):
+            self._book_add(sym)
+        if self._portfolio_on:
+            self._portfolio_timer = QTimer(self)
+            self._portfolio_timer.setInterval(PORTFOLIO_POLL_MS)
+            self._portfolio_timer.timeout.connect(self._poll_portfolio)
+            self._portfolio_timer.start()
+            self._pnl_timer = QTimer(self)
+            self._pnl_timer.setInterval(max(1, PORTFOLIO_PNL_MS))
+            self._pnl_timer.timeout.connect(self._flush_pnl)
+            self._pnl_timer.start()
+            QTimer.singleShot(0, self._poll_portfolio)
+        self._watch_start()
+
+        if PREFETCH_INTERVAL_MS > 0:
+            self._prefetch_timer = QTimer(self)
+            self._prefetch_timer.setInterval(PREFETCH_INTERVAL_MS)
+            self._prefetch_timer.timeout.connect(self._prefetch_step)
+            self._prefetch_timer.start()
+        self._plan_prefetch()
 
     @pyqtSlot()
     def shutdown(self):
         """Arrêt propre demandé par l’UI (QueuedConnection)."""
         self.stop_stream()
+        if self._prefetch_timer:
+            self._prefetch_timer.stop()
+            self._prefetch_timer = None
+        for sym in list(self._books):
+            self._book_release(sym)
+        for t in (self._portfolio_timer, self._pnl_timer):
+            if t:
+                t.stop()
+        self._portfolio_timer = self._pnl_timer = None
+        if self._quotes_timer:
+            self._quotes_timer.stop()
+            self._quotes_timer = None
+        self._stop_executor()
+        self._stop_feed_process()
         MT5.shutdown()
         self._running = False
         self.finished.emit()
@@ -132,46 +320,481 @@ class DataWorker(QObject):
         if symbol == self.symbol and timeframe == self.tf:
             return
 
-        self.stop_stream()
-
+        old = (self.symbol, self.tf)
         self.symbol = symbol
         self.tf     = timeframe
-        self._ensure_symbol_selected(self.symbol)
 
-        self._last_tick_time = 0
-        self._history_retry  = 0
+        sub = self._get_sub(symbol, timeframe)
+        if sub is not None and sub.history:
+            # Déjà suivi (watchlist, autre chart...) → historique live dispo immédiatement
+            self._emit_history(sub, list(sub.history))
+        else:
+            # IMPORTANT: on ne réactive pas le "first-load only" ici.
+            # Il ne sert qu'au tout premier rendu de la session.
+            self._add_subscription(symbol, timeframe)
+
+        if old not in self._explicit:
+            self._remove_subscription(*old)
+        if self._book_on and symbol != old[0]:
+            if old[0] not in self._book_explicit:
+                self._book_release(old[0])
+            self._book_add(symbol)
 
-        # IMPORTANT: on ne réactive pas le "first-load only" ici.
-        # Il ne sert qu'au tout premier rendu de la session.
-        self._load_history()
         self.start_stream()
+        self._plan_prefetch()
         print(f"🔁 Params applied → {self.symbol} {self.tf}")
 
+    @pyqtSlot(list, list)
+    def set_prefetch_universe(self, symbols: list, timeframes: list):
+        """Symboles/timeframes de la toolbar: candidats au prefetch en temps mort."""
+        self._prefetch_symbols = [s for s in symbols if s]
+        self._prefetch_tfs = [t for t in timeframes if t in TF_SECONDS]
+        if self._running:
+            self._plan_prefetch()
+
+    @pyqtSlot(str, str)
+    def subscribe(self, symbol: str, timeframe: str):
+        """Ajoute une subscription (symbole, timeframe) au cycle de poll partagé."""
+        if timeframe not in TF_SECONDS:
+            print(f"⚠️ subscribe: timeframe inconnu {timeframe}")
+            return
+        self._explicit.add((symbol, timeframe))
+        if not self._running:
+            return  # sera créée au start()
+        sub = self._get_sub(symbol, timeframe)
+        if sub is not None and sub.history:
+            self.subHistoryReady.emit(symbol, timeframe, list(sub.history))
+        elif sub is None:
+            self._add_subscription(symbol, timeframe)
+
+    @pyqtSlot(str, str)
+    def unsubscribe(self, symbol: str, timeframe: str):
+        self._explicit.discard((symbol, timeframe))
+        if (symbol, timeframe) != (self.symbol, self.tf):
+            self._remove_subscription(symbol, timeframe)
+
+    @pyqtSlot(str, str, int, int)
+    def request_older(self, symbol: str, timeframe: str, before: int, count: int):
+        """
+        Tranche de barres antérieures à `before` (le chart approche de son bord gauche):
+        servie depuis l'historique en mémoire (subscription ou cache) tant qu'il en reste,
+        sinon demandée à MT5 dans l'exécuteur et ajoutée en tête de l'historique.
+        """
+        sub = self._get_sub(symbol, timeframe)
+        src = sub.history if sub is not None and sub.history else self._cache.peek((symbol, timeframe))
+        chunk = bars_before(src or [], before, count)
+        if chunk or timeframe not in TF_SECONDS or self._executor is None:
+            self.olderBarsReady.emit(symbol, timeframe, chunk)
+            return
+        self._submit(lambda: self._fetch_older(symbol, timeframe, before, count),
+                     lambda res: self._on_older(symbol, timeframe, before, res), PRIORITY_NORMAL)
+
+    @pyqtSlot(str)
+    def book_subscribe(self, symbol: str):
+        """Carnet d'un symbole supplémentaire (en plus de celui du chart)."""
+        self._book_explicit.add(symbol)
+        if self._running:
+            self._book_add(symbol)
+
+    @pyqtSlot(str)
+    def book_unsubscribe(self, symbol: str):
+        self._book_explicit.discard(symbol)
+        if not (self._book_on and symbol == self.symbol):
+            self._book_release(symbol)
+
+    @pyqtSlot(list)
+    def set_watchlist(self, symbols: list):
+        """Symboles de la watchlist: cotés par leur flux s'ils sont suivis, sinon pollés (symbol_info_tick)."""
+        if not self._watchlist_on:
+            return
+        added, removed = self._quotes.set_symbols([str(s) for s in symbols])
+        if not self._running:
+            return  # ajoutés au cycle de poll au start()
+        for sym in removed:
+            self._watch_release(sym)
+        self._watch_start(added)
+
     @pyqtSlot()
     def start_stream(self):
         if self._tick_timer:
             return
 
-        self._agg = CandleAggregator(TF_SECONDS[self.tf])
-        if self._seed_bar:
-            # Seed l’agrégateur avec la dernière barre (fermée ou stub courante)
-            self._agg.seed(self._seed_bar)
-            _dbg(f"[SEED] agg.slot={self._agg.slot} (from last history bar)")
-            self._seed_bar = None
-
-        self._last_tick_time = 0
         self._debug_tick_count = 0
 
+        # Single-shot ré-armé à chaque cycle avec le délai calculé par l'ordonnanceur
+        # (ou lecture du ring à intervalle fixe si le feed tourne dans son process)
         self._tick_timer = QTimer(self)
-        self._tick_timer.setInterval(100)  # 100ms: réactif sans spammer
-        self._tick_timer.timeout.connect(self._poll_tick)
-        self._tick_timer.start()
+        self._tick_timer.setSingleShot(True)
+        self._tick_timer.timeout.connect(self._poll_ring if self._ring else self._poll_tick)
+        self._tick_timer.start(0)
+
+        if FEED_METRICS_INTERVAL_MS > 0 and not self._metrics_timer:
+            self._metrics_timer = QTimer(self)
+            self._metrics_timer.setInterval(FEED_METRICS_INTERVAL_MS)
+            self._metrics_timer.timeout.connect(self._emit_metrics)
+            self._metrics_timer.start()
 
     def stop_stream(self):
+        self._flush_pending_bars()
+        if self._emit_timer:
+            self._emit_timer.stop()
+        if self._backfill_timer:
+            self._backfill_timer.stop()
         if self._tick_timer:
             self._tick_timer.stop()
             self._tick_timer.deleteLater()
             self._tick_timer = None
+        if self._metrics_timer:
+            self._metrics_timer.stop()
+            self._metrics_timer.deleteLater()
+            self._metrics_timer = None
+
+    # ---------- exécuteur d'historique ----------
+
+    def _start_executor(self):
+        self._hist_thread = QThread(self)
+        self._executor = HistoryExecutor()
+        self._executor.moveToThread(self._hist_thread)
+        self._hist_thread.finished.connect(self._executor.deleteLater)
+        self._executor.jobDone.connect(self._on_job_done)
+        self._hist_thread.start()
+
+    def _stop_executor(self):
+        if self._executor:
+            self._executor.cancel_all()
+        if self._hist_thread:
+            self._hist_thread.quit()
+            self._hist_thread.wait(5000)   # laisse finir l'appel MT5 en cours
+        self._executor = None
+        self._hist_thread = None
+        self._jobs.clear()
+
+    def _submit(self, fn: Callable[[], object], on_done: Callable[[object], None], priority: int = PRIORITY_NORMAL):
+        """fn() tourne dans le thread de l'exécuteur ; on_done(résultat) revient ici."""
+        if self._executor is None:
+            return
+        self._jobs[self._executor.submit(fn, priority)] = on_done
+
+    @pyqtSlot(int, object, object)
+    def _on_job_done(self, job_id: int, result: object, error: object):
+        on_done = self._jobs.pop(job_id, None)
+        if on_done is None or not self._running:
+            return
+        if error is not None:
+            print(f"❌ job historique #{job_id}:", error)
+            result = None
+        on_done(result)
+
+    # ---------- process feed (FEED_MODE=process) ----------
+
+    def _start_feed_process(self):
+        try:
+            self._feed_proc = FeedProcess()
+            self._feed_proc.start()
+        except (OSError, ValueError) as e:
+            print("❌ process feed indisponible, repli sur le poll local:", e)
+            if self._feed_proc:
+                self._feed_proc.close()
+            self._feed_proc = None
+            return
+        self._ring = RingReader(self._feed_proc.ticks)
+        for sym in self._feeds:
+            self._feed_proc.add_symbol(sym)
+
+    def _stop_feed_process(self):
+        self._ring = None
+        if self._feed_proc:
+            self._feed_proc.close()
+            self._feed_proc = None
+
+    def _emit_metrics(self):
+        if self._feed_proc is not None:
+            # l'ordonnanceur tourne dans le process feed ; on y ajoute l'état du ring côté lecteur
+            m = self._feed_proc.metrics()
+            m.update({"feed_mode": "process", "feed_alive": self._feed_proc.is_alive(),
+                      "ring_lag": self._ring.lag(), "ring_lost": self._ring.lost})
+        else:
+            m = self._sched.metrics()
+        if self._executor is not None:
+            m.update(self._executor.take_stats())
+        m["bars_emitted"] = self._bars_emitted
+        m["bars_coalesced"] = self._bars_coalesced
+        m["gaps_filled"] = self._gaps_filled
+        self._bars_emitted = self._bars_coalesced = self._gaps_filled = 0
+        if self._books:
+            stats = [b.take_stats() for b in self._books.values()]
+            m["book_symbols"] = len(self._books)
+            m["book_reads"] = sum(st["reads"] for st in stats)
+            m["book_updates"] = sum(st["updates"] for st in stats)
+            m["book_levels_sent"] = sum(st["levels_sent"] for st in stats)
+            m["book_ms"] = round(self._book_ms, 2)
+            m["book_deferred"] = self._book_deferred
+            self._book_ms = 0.0
+            self._book_deferred = 0
+        if self._portfolio_timer is not None:
+            m["positions"] = len(self._portfolio._pos)
+            m["portfolio_ms"] = round(self._portfolio_ms, 2)
+            self._portfolio_ms = 0.0
+        self.metricsReady.emit(m)
+
+    # ---------- carnet d'ordres (DOM) ----------
+
+    def _book_add(self, symbol: str):
+        tracker = self._books.get(symbol)
+        if tracker is not None:
+            # déjà suivi (book_subscribe): l'UI qui arrive repart d'un état complet
+            if tracker.available:
+                tracker.full_sent = False
+            else:
+                self.bookUpdated.emit(tracker.unavailable())
+            return
+        tracker = BookTracker(symbol, BOOK_DEPTH)
+        self._books[symbol] = tracker
+        self._ensure_symbol_selected(symbol)
+        if not MT5.market_book_add(symbol):
+            # pas de carnet chez ce broker / sur ce symbole: on le dit une fois à l'UI
+            _dbg(f"📕 market_book_add({symbol}) refusé:", MT5.last_error())
+            self.bookUpdated.emit(tracker.unavailable())
+            return
+        if self._book_timer is None:
+            self._book_timer = QTimer(self)
+            self._book_timer.setInterval(max(1, BOOK_POLL_MS))
+            self._book_timer.timeout.connect(self._poll_books)
+            self._book_timer.start()
+
+    def _book_release(self, symbol: str):
+        tracker = self._books.pop(symbol, None)
+        if tracker is None:
+            return
+        if tracker.available:
+            MT5.market_book_release(symbol)
+        if not any(b.available for b in self._books.values()) and self._book_timer:
+            self._book_timer.stop()
+            self._book_timer.deleteLater()
+            self._book_timer = None
+
+    def _poll_books(self):
+        """
+        Une lecture market_book_get par symbole, au plus BOOK_BUDGET_MS par cycle:
+        les symboles restants passent au cycle suivant (round-robin), la boucle
+        de ticks (même thread) n'attend donc jamais plus que ce budget.
+        """
+        syms = [s for s, b in self._books.items() if b.available]
+        if not syms:
+            return
+        t0 = time.perf_counter()
+        n = len(syms)
+        start = self._book_rr % n
+        done = 0
+        for k in range(n):
+            sym = syms[(start + k) % n]
+            entries = MT5.market_book_get(sym)
+            done += 1
+            if entries is not None:
+                msg = self._books[sym].update(entries)
+                if msg is not None:
+                    self.bookUpdated.emit(msg)
+            if (time.perf_counter() - t0) * 1000.0 >= BOOK_BUDGET_MS:
+                break
+        self._book_rr = start + done
+        self._book_deferred += n - done
+        self._book_ms += (time.perf_counter() - t0) * 1000.0
+
+    # ---------- positions / ordres / compte ----------
+
+    def _poll_portfolio(self):
+        """Snapshot positions/ordres/compte → diffs par ticket ; aucune émission si rien n'a bougé."""
+        if not self._running:
+            return
+        t0 = time.perf_counter()
+        positions = MT5.positions_get()
+        orders = MT5.orders_get()
+        account = MT5.account_info()
+        if positions is not None:
+            self._refresh_tick_specs({p.symbol for p in positions})
+            diff = self._portfolio.sync_positions(positions, self._tick_specs, set(self._feeds))
+            if diff is not None:
+                self.positionsChanged.emit(diff)
+        if orders is not None:
+            diff = self._portfolio.sync_orders(orders)
+            if diff is not None:
+                self.ordersChanged.emit(diff)
+        acc = self._portfolio.sync_account(account)
+        if acc is not None:
+            self.accountChanged.emit(acc)
+        self._portfolio_ms += (time.perf_counter() - t0) * 1000.0
+
+    def _refresh_tick_specs(self, symbols: set[str]):
+        """tick_value/tick_size des symboles en position: nouveaux tout de suite, les autres toutes les minutes."""
+        now = time.monotonic()
+        stale = now - self._tick_specs_at >= SESSION_REFRESH_SEC
+        todo = symbols if stale else symbols - set(self._tick_specs)
+        for sym in todo:
+            info = MT5.symbol_info(sym)
+            if info is not None:
+                self._tick_specs[sym] = (float(info.trade_tick_value), float(info.trade_tick_size))
+        if stale:
+            self._tick_specs_at = now
+            self._tick_specs = {s: v for s, v in self._tick_specs.items() if s in symbols}
+
+    def _flush_pnl(self):
+        upd = self._portfolio.reprice()
+        if upd is not None:
+            self.pnlUpdated.emit(upd)
+
+    # ---------- watchlist ----------
+
+    def _watch_start(self, symbols: list[str] | None = None):
+        for sym in self._quotes.symbols() if symbols is None else symbols:
+            self._watch_add(sym)
+        if self._quotes_timer is None and len(self._quotes) and WATCHLIST_EMIT_MS > 0:
+            self._quotes_timer = QTimer(self)
+            self._quotes_timer.setInterval(WATCHLIST_EMIT_MS)
+            self._quotes_timer.timeout.connect(self._flush_quotes)
+            self._quotes_timer.start()
+
+    def _watch_add(self, symbol: str):
+        if symbol in self._feeds:
+            return  # déjà coté par les ticks de ses subscriptions
+        self._ensure_symbol_selected(symbol)
+        if self._feed_proc:
+            self._feed_proc.add_symbol(symbol)
+        else:
+            self._sched.add(symbol)
+
+    def _watch_release(self, symbol: str):
+        if symbol in self._feeds:
+            return  # le flux continue pour ses subscriptions
+        if self._feed_proc:
+            self._feed_proc.remove_symbol(symbol)
+        else:
+            self._sched.remove(symbol)
+
+    def _poll_quote(self, symbol: str) -> int:
+        """Symbole de la watchlist sans subscription: un symbol_info_tick, rien d'autre."""
+        return self._quotes.mark_tick(symbol, MT5.symbol_info_tick(symbol))
+
+    def _mark_last(self, symbol: str, times: np.ndarray, bids: np.ndarray, asks: np.ndarray,
+                   keep: np.ndarray | None = None):
+        """
+        Bid/ask réels du dernier tick qui a les deux (> 0) → P&L latent + watchlist.
+        keep: ticks acceptés par le spike guard du flux (un tick rejeté ne marque rien).
+        """
+        ok = (bids > 0) & (asks > 0)
+        if keep is not None:
+            ok &= keep
+        idx = np.flatnonzero(ok)
+        if not len(idx):
+            return
+        i = int(idx[-1])
+        bid, ask = float(bids[i]), float(asks[i])
+        self._portfolio.mark(symbol, bid, ask)
+        self._quotes.mark(symbol, bid, ask, int(times[i]))
+
+    def _flush_quotes(self):
+        """Un seul quotesUpdated par cycle (symboles qui ont bougé), puis l'état D1 à compléter."""
+        rows = self._quotes.take()
+        if rows:
+            self.quotesUpdated.emit(rows)
+        if self._daily_busy or self._executor is None:
+            return
+        due = self._quotes.daily_due(time.monotonic(), WATCHLIST_DAILY_REFRESH_SEC)[:WATCHLIST_DAILY_BATCH]
+        if due:
+            self._daily_busy = True
+            self._submit(lambda: self._fetch_daily(due), self._on_daily, PRIORITY_LOW)
+
+    @staticmethod
+    def _fetch_daily(symbols: list[str]) -> dict[str, tuple[list[float], float]]:
+        """(Thread de l'exécuteur) clôtures D1 + point de chaque symbole (listes vides si MT5 ne répond pas)."""
+        out = {}
+        for sym in symbols:
+            rates = MT5.copy_rates_from_pos(sym, MT5.TIMEFRAME_D1, 0, DAILY_BARS)
+            info = MT5.symbol_info(sym)
+            closes = [float(c) for c in rates["close"]] if rates is not None and len(rates) else []
+            out[sym] = (closes, float(info.point) if info is not None else 0.0)
+        return out
+
+    def _on_daily(self, daily: Optional[dict[str, tuple[list[float], float]]]):
+        self._daily_busy = False
+        if not daily:
+            return
+        now = time.monotonic()
+        for sym, (closes, point) in daily.items():
+            self._quotes.set_daily(sym, closes, point, now)
+
+    # ---------- prefetch ----------
+
+    def _plan_prefetch(self):
+        """Autres timeframes du symbole courant d'abord, puis autres symboles au timeframe courant."""
+        queue = [(self.symbol, tf) for tf in self._prefetch_tfs if tf != self.tf]
+        queue += [(sym, self.tf) for sym in self._prefetch_symbols if sym != self.symbol]
+        # pas plus que le cache ne peut garder: au-delà, le prefetch évincerait ses propres entrées
+        self._prefetch_queue = [k for k in queue if k not in self._cache][:max(0, self._cache.max_entries - 1)]
+
+    def _prefetch_step(self):
+        """Une seule requête MT5 par passage, et seulement si la boucle de ticks a du mou."""
+        if not self._running or not self._prefetch_queue or self._prefetch_busy:
+            return
+        if self._sched.next_delay_ms() < PREFETCH_IDLE_MIN_MS:
+            return
+        while self._prefetch_queue:
+            symbol, tf = self._prefetch_queue.pop(0)
+            if (symbol, tf) in self._cache or self._get_sub(symbol, tf) is not None:
+                continue
+            if self._derivation_source(symbol, tf) is not None:
+                continue  # sera dérivé localement, pas d'I/O
+            if symbol not in self._feeds:
+                self._ensure_symbol_selected(symbol)
+            self._prefetch_busy = True
+            self._submit(lambda: self._fetch_history(symbol, tf),
+                         lambda bars: self._on_prefetched(symbol, tf, bars), PRIORITY_LOW)
+            return
+
+    def _on_prefetched(self, symbol: str, tf: str, bars: Optional[list[dict]]):
+        self._prefetch_busy = False
+        if bars and (symbol, tf) not in self._cache and self._get_sub(symbol, tf) is None:
+            self._cache.put((symbol, tf), bars)
+            _dbg(f"🗄️ prefetch {symbol} {tf}: {len(bars)} bars (cache={len(self._cache)})")
+
+    # ---------- subscriptions ----------
+
+    def _get_sub(self, symbol: str, tf: str) -> Optional[Subscription]:
+        feed = self._feeds.get(symbol)
+        return feed.subs.get(tf) if feed else None
+
+    def _add_subscription(self, symbol: str, tf: str) -> Subscription:
+        sub = self._get_sub(symbol, tf)
+        if sub is not None:
+            return sub
+        feed = self._feeds.get(symbol)
+        if feed is None:
+            self._ensure_symbol_selected(symbol)
+            feed = self._feeds[symbol] = SymbolFeed(symbol, BROKER_TZ_OFFSET_SEC)
+            self._sched.add(symbol)
+            if self._feed_proc:
+                self._feed_proc.add_symbol(symbol)
+        sub = feed.add(tf, TF_SECONDS[tf], max_bars=self.depth)
+        self._load_history(symbol, tf)
+        return sub
+
+    def _remove_subscription(self, symbol: str, tf: str):
+        feed = self._feeds.get(symbol)
+        if not feed:
+            return
+        sub = feed.remove(tf)
+        if sub is not None and sub.history:
+            # garde l'historique live au chaud pour un retour instantané
+            self._cache.put(sub.key, sub.history)
+        if not feed.subs:
+            del self._feeds[symbol]
+            if self._quotes.has(symbol):
+                return  # reste dans le cycle de poll pour la watchlist (_poll_quote)
+            self._sched.remove(symbol)
+            if self._feed_proc:
+                self._feed_proc.remove_symbol(symbol)
+
+    def _is_primary(self, sub: Subscription) -> bool:
+        return sub.symbol == self.symbol and sub.tf == self.tf
 
     # ---------- interne ----------
 
@@ -179,37 +802,85 @@ class DataWorker(QObject):
         if not MT5.symbol_select(symbol, True):
             print(f"⚠️ symbol_select({symbol}) a échoué:", MT5.last_error())
 
-    def _latest_tick(self) -> Optional[dict]:
-        t = MT5.symbol_info_tick(self.symbol)
+    def _latest_tick(self, symbol: str) -> Optional[dict]:
+        t = MT5.symbol_info_tick(symbol)
         if not t:
             return None
         price = t.last if t.last else ((t.bid or 0) + (t.ask or 0)) / 2.0
         return {"time": int(t.time), "price": float(price)}
 
-    def _load_history(self):
-        """Récupère l’historique, ajoute un stub live si nécessaire, seed l’agg."""
-        tf_sec = TF_SECONDS[self.tf]
-
-        # Slot courant basé sur le tick s’il existe, sinon sur l’horloge
-        tick = self._latest_tick()
+    def _current_slot(self, symbol: str, tf: str) -> tuple[int, Optional[dict]]:
+        """Slot courant basé sur le tick s’il existe, sinon sur l’horloge."""
+        tf_sec = TF_SECONDS[tf]
+        tick = self._latest_tick(symbol)
         if tick:
-            current_slot = (tick["time"] // tf_sec) * tf_sec
+            return (tick["time"] // tf_sec) * tf_sec, tick
+        now = int(datetime.now(timezone.utc).timestamp())
+        return (now // tf_sec) * tf_sec, None
+
+    @staticmethod
+    def _rates_to_bars(rates) -> list[dict]:
+        """numpy rates MT5 → list[dict] (Bar)."""
+        if rates is None or len(rates) == 0:
+            return []
+        df = pd.DataFrame(rates)
+        vol_col = (
+            "real_volume"
+            if "real_volume" in df.columns
+            else ("tick_volume" if "tick_volume" in df.columns else None)
+        )
+
+        bars: list[dict] = []
+        for r in df.itertuples(index=False):
+            bars.append(
+                Bar(
+                    time=int(getattr(r, "time")),
+                    open=float(getattr(r, "open")),
+                    high=float(getattr(r, "high")),
+                    low=float(getattr(r, "low")),
+                    close=float(getattr(r, "close")),
+                    volume=float(getattr(r, vol_col)) if vol_col and hasattr(r, vol_col) else 0.0,
+                ).model_dump()
+            )
+        return bars
+
+    @staticmethod
+    def _append_stub(bars: list[dict], tick: Optional[dict], current_slot: int):
+        """Stub si le tick est déjà dans le slot suivant."""
+        if not bars or not tick:
+            return
+        last_time = bars[-1]["time"]
+        if current_slot > last_time:
+            p = tick["price"]
+            bars.append(
+                Bar(
+                    time=current_slot, open=p, high=p, low=p, close=p, volume=0.0
+                ).model_dump()
+            )
+            _dbg(f"[HIST] last={last_time}, tick_slot={current_slot} → add stub")
         else:
-            now = int(datetime.now(timezone.utc).timestamp())
-            current_slot = (now // tf_sec) * tf_sec
+            _dbg(f"[HIST] last={last_time}, tick_slot={current_slot}")
+
+    def _fetch_history(self, symbol: str, tf: str) -> list[dict]:
+        """
+        Téléchargement MT5 complet (days_back / depth) + stub live. Liste vide si indisponible.
+        Tourne dans le thread du HistoryExecutor: lecture seule de l'état du worker.
+        """
+        tf_sec = TF_SECONDS[tf]
+        current_slot, tick = self._current_slot(symbol, tf)
 
         # 1) tentative par date (rapide quand le serveur est OK)
         utc = timezone.utc
         end = datetime.fromtimestamp(current_slot, tz=utc)
         start = end - timedelta(days=self.days_back)
-        rates = MT5.copy_rates_range(self.symbol, TIMEFRAMES[self.tf], start, end)
+        rates = MT5.copy_rates_range(symbol, TIMEFRAMES[tf], start, end)
 
         # 2) si vide → fallback direct (nombre estimé de barres sur days_back)
         if rates is None or len(rates) == 0:
-            print(f"⚠️ copy_rates_range vide ({self.symbol} {self.tf}, {self.days_back}j). Fallback depth={self.depth}")
+            print(f"⚠️ copy_rates_range vide ({symbol} {tf}, {self.days_back}j). Fallback depth={self.depth}")
             est_needed = int(self.days_back * 86400 // tf_sec) + 500  # marge
             need = max(200, min(self.depth, est_needed))
-            rates = MT5.copy_rates_from_pos(self.symbol, TIMEFRAMES[self.tf], 0, need)
+            rates = MT5.copy_rates_from_pos(symbol, TIMEFRAMES[tf], 0, need)
 
         # 3) si pas vide mais TROP ANCIEN → re-fetch les N DERNIÈRES barres
         if rates is not None and len(rates) > 0:
@@ -221,73 +892,195 @@ class DataWorker(QObject):
                 last_time = int(df_tmp.iloc[-1]["time"])
 
             if current_slot - last_time > 3 * tf_sec:
-                print(f"⚠️ Historique trop ancien ({self.symbol} {self.tf}): last={last_time}, cur_slot={current_slot} → re-fetch dernières barres")
+                print(f"⚠️ Historique trop ancien ({symbol} {tf}): last={last_time}, cur_slot={current_slot} → re-fetch dernières barres")
                 est_needed = int(self.days_back * 86400 // tf_sec) + 500
                 need = max(200, min(self.depth, est_needed))
-                rates = MT5.copy_rates_from_pos(self.symbol, TIMEFRAMES[self.tf], 0, need)
+                rates = MT5.copy_rates_from_pos(symbol, TIMEFRAMES[tf], 0, need)
+
+        bars = self._rates_to_bars(rates)
+        self._append_stub(bars, tick, current_slot)
+        return bars
+
+    def _load_history(self, symbol: str, tf: str):
+        """Récupère l’historique (cache LRU sinon MT5), ajoute un stub live si nécessaire, seed l’agg."""
+        sub = self._get_sub(symbol, tf)
+        if sub is None:
+            return  # subscription retirée entre-temps (retry obsolète)
+
+        # 0) cache → affichage immédiat, puis on ne rapatrie que le delta
+        cached = self._cache.get((symbol, tf))
+        if cached:
+            sub.set_history(cached)
+            self._cache.put((symbol, tf), sub.history)
+            _dbg(f"⚡ {symbol} {tf} history from cache: {len(sub.history)} bars")
+            self._emit_history(sub, list(sub.history))
+            self._refresh_delta(sub)
+            return
 
-        # 4) toujours rien ? on retente un peu plus tard (début de session, etc.)
-        if rates is None or len(rates) == 0:
-            if self._history_retry < self._max_history_retries:
-                self._history_retry += 1
-                print(f"⏳ Historique indisponible ({self.symbol} {self.tf}), retry {self._history_retry}/{self._max_history_retries}")
-                QTimer.singleShot(1200, self._load_history)
-            else:
-                print(f"⚠️ Historique toujours vide pour {self.symbol} {self.tf}")
+        # 1) dérivation locale depuis un timeframe inférieur déjà en mémoire (zéro I/O)
+        derived_from = self._derivation_source(symbol, tf)
+        if derived_from is not None:
+            low_tf, src, live = derived_from
+            bars = derive_bars(src, TF_SECONDS[tf], BROKER_TZ_OFFSET_SEC)
+            sub.history_retry = 0
+            self._finish_loading(sub, bars)
+            self._cache.put((symbol, tf), sub.history)
+            _dbg(f"🧮 {symbol} {tf} history derived from {low_tf}: {len(bars)} bars")
+            self._emit_history(sub, list(sub.history))
+            if not live:
+                self._refresh_delta(sub)
             return
 
-        # Construction des barres
-        df = pd.DataFrame(rates)
-        vol_col = (
-            "real_volume"
-            if "real_volume" in df.columns
-            else ("tick_volume" if "tick_volume" in df.columns else None)
-        )
+        # 2) téléchargement MT5 dans l'exécuteur ; les ticks sont bufferisés d'ici au handoff
+        sub.begin_loading()
+        if sub.load_inflight:
+            return
+        sub.load_inflight = True
+        self._submit(lambda: self._fetch_history(symbol, tf),
+                     lambda bars: self._on_history_fetched(sub, bars),
+                     PRIORITY_HIGH if self._is_primary(sub) else PRIORITY_NORMAL)
+
+    def _on_history_fetched(self, sub: Subscription, bars: Optional[list[dict]]):
+        """Retour de l'exécuteur: retry, ou handoff (seed + replay des ticks bufferisés) puis émission."""
+        sub.load_inflight = False
+        symbol, tf = sub.symbol, sub.tf
+        if self._get_sub(symbol, tf) is not sub:
+            return  # subscription retirée entre-temps
 
-        bars: list[dict] = []
-        for r in df.itertuples(index=False):
-            bars.append(
-                Bar(
-                    time=int(getattr(r, "time")),
-                    open=float(getattr(r, "open")),
-                    high=float(getattr(r, "high")),
-                    low=float(getattr(r, "low")),
-                    close=float(getattr(r, "close")),
-                    volume=float(getattr(r, vol_col)) if vol_col and hasattr(r, vol_col) else 0.0,
-                ).model_dump()
-            )
+        # 4) toujours rien ? on retente un peu plus tard (début de session, etc.)
+        if not bars:
+            if sub.history_retry < self._max_history_retries:
+                sub.history_retry += 1
+                print(f"⏳ Historique indisponible ({symbol} {tf}), retry {sub.history_retry}/{self._max_history_retries}")
+                QTimer.singleShot(1200, lambda: self._load_history(symbol, tf))
+            else:
+                print(f"⚠️ Historique toujours vide pour {symbol} {tf}")
+                self._finish_loading(sub, [])   # on passe en live pur
+            return
 
         # Optionnel (désactivé) : attendre un minimum de barres en continu
         if ENFORCE_MIN_BARS and len(bars) < MIN_BARS:
-            if self._history_retry < self._max_history_retries:
-                self._history_retry += 1
+            if sub.history_retry < self._max_history_retries:
+                sub.history_retry += 1
                 print(
-                    f"⏳ Historique trop court ({len(bars)}<{MIN_BARS}) pour {self.symbol} {self.tf} — "
-                    f"retry {self._history_retry}/{self._max_history_retries}"
+                    f"⏳ Historique trop court ({len(bars)}<{MIN_BARS}) pour {symbol} {tf} — "
+                    f"retry {sub.history_retry}/{self._max_history_retries}"
                 )
-                QTimer.singleShot(1000, self._load_history)
+                QTimer.singleShot(1000, lambda: self._load_history(symbol, tf))
                 return
             else:
                 print(f"⚠️ Historique court ({len(bars)} barres) — envoi quand même.")
 
-        self._history_retry = 0
-        last_time = bars[-1]["time"]
-
-        # Stub si le tick est déjà dans le slot suivant
-        if tick:
-            if current_slot > last_time:
-                p = tick["price"]
-                bars.append(
-                    Bar(
-                        time=current_slot, open=p, high=p, low=p, close=p, volume=0.0
-                    ).model_dump()
-                )
-                _dbg(f"[HIST] last={last_time}, tick_slot={current_slot} → add stub")
-            else:
-                _dbg(f"[HIST] last={last_time}, tick_slot={current_slot}")
-
-        self._seed_bar = bars[-1]
-        _dbg(f"📦 {self.symbol} {self.tf} history bars: {len(bars)}  (last={self._seed_bar['time']})")
+        sub.history_retry = 0
+        replayed = self._finish_loading(sub, bars)
+        self._cache.put((symbol, tf), sub.history)
+        _dbg(f"📦 {symbol} {tf} history bars: {len(bars)}  (last={bars[-1]['time']}, replayed ticks={replayed})")
+        self._emit_history(sub, list(sub.history))
+
+    def _finish_loading(self, sub: Subscription, bars: list[dict]) -> int:
+        """Handoff historique → live (Subscription.finish_loading) ; un trou du rejeu part en backfill."""
+        replayed = sub.finish_loading(bars)
+        if sub.replay_gap:
+            self._queue_backfill(sub, *sub.replay_gap)
+        return replayed
+
+    def _derivation_source(self, symbol: str, tf: str) -> Optional[tuple[str, list[dict], bool]]:
+        """
+        Timeframe inférieur (diviseur exact) dont l'historique en mémoire couvre la fenêtre
+        days_back: (tf source, barres, source live ?) ou None. Le plus large d'abord (moins de barres).
+        """
+        tf_sec = TF_SECONDS[tf]
+        need_span = self.days_back * 86400 * 0.9
+        for low_tf, low_sec in sorted(TF_SECONDS.items(), key=lambda kv: -kv[1]):
+            if low_sec >= tf_sec or tf_sec % low_sec:
+                continue
+            sub = self._get_sub(symbol, low_tf)
+            live = bool(sub is not None and sub.history)
+            src = sub.history if live else self._cache.peek((symbol, low_tf))
+            if src and len(src) > 1 and int(src[-1]["time"]) - int(src[0]["time"]) >= need_span:
+                return low_tf, src, live
+        return None
+
+    def _refresh_delta(self, sub: Subscription):
+        """Après un hit cache: ne télécharge (dans l'exécuteur) que les barres depuis la dernière en cache."""
+        symbol, tf = sub.symbol, sub.tf
+        last_t = int(sub.history[-1]["time"])
+        sub.begin_loading()
+        if sub.load_inflight:
+            return
+        sub.load_inflight = True
+        self._submit(lambda: self._fetch_delta(symbol, tf, last_t),
+                     lambda delta: self._on_delta(sub, last_t, delta),
+                     PRIORITY_HIGH if self._is_primary(sub) else PRIORITY_NORMAL)
+
+    def _fetch_delta(self, symbol: str, tf: str, last_t: int) -> list[dict]:
+        """(thread exécuteur) barres depuis last_t jusqu'au slot courant, + stub live."""
+        current_slot, tick = self._current_slot(symbol, tf)
+        rates = MT5.copy_rates_range(
+            symbol, TIMEFRAMES[tf],
+            datetime.fromtimestamp(last_t, tz=timezone.utc),
+            datetime.fromtimestamp(current_slot, tz=timezone.utc),
+        )
+        delta = self._rates_to_bars(rates)
+        if delta:
+            self._append_stub(delta, tick, current_slot)
+        elif tick and current_slot > last_t:
+            delta = [Bar(time=current_slot, open=tick["price"], high=tick["price"],
+                         low=tick["price"], close=tick["price"], volume=0.0).model_dump()]
+        return delta
+
+    def _on_delta(self, sub: Subscription, last_t: int, delta: Optional[list[dict]]):
+        sub.load_inflight = False
+        symbol, tf = sub.symbol, sub.tf
+        if self._get_sub(symbol, tf) is not sub:
+            return
+        delta = delta or []
+        first_t = int(delta[0]["time"]) if delta else last_t
+        merged = [b for b in sub.history if int(b["time"]) < first_t] + delta if delta else sub.history
+        replayed = self._finish_loading(sub, merged)
+        self._cache.put((symbol, tf), sub.history)
+        if not delta and not replayed:
+            return
+        _dbg(f"⚡ {symbol} {tf} delta: {len(delta)} bars since {last_t} (replayed ticks={replayed})")
+
+        tail = [b for b in sub.history if int(b["time"]) >= first_t]
+        if len(tail) > HISTORY_DELTA_MAX_UPDATES:
+            self._emit_history(sub, list(sub.history))
+        elif tail:
+            for d in tail[:-1]:
+                self._emit_closed(sub, d)
+            self._emit_current(sub, tail[-1])
+
+    def _fetch_older(self, symbol: str, tf: str, before: int, count: int) -> tuple[Optional[list[dict]], object]:
+        """
+        (thread exécuteur) `count` barres broker strictement avant `before`, et l'erreur MT5:
+        (None, last_error()) si l'appel a échoué, lu sous le même verrou que l'appel (les polls
+        du worker ne peuvent pas l'écraser entre les deux).
+        """
+        with MT5_LOCK:
+            rates = MT5.copy_rates_from(symbol, TIMEFRAMES[tf], datetime.fromtimestamp(before - 1, tz=timezone.utc), count)
+            if rates is None:
+                return None, MT5.last_error()
+        return [b for b in self._rates_to_bars(rates) if int(b["time"]) < before], None
+
+    def _on_older(self, symbol: str, tf: str, before: int, result: Optional[tuple]):
+        bars, error = result or (None, "exception dans l'exécuteur")
+        if bars is None:
+            print(f"⚠️ historique antérieur à {before} indisponible ({symbol} {tf}):", error)
+            self.olderBarsReady.emit(symbol, tf, None)   # échec ≠ début de l'historique
+            return
+        sub = self._get_sub(symbol, tf)
+        if bars and sub is not None and sub.history and int(sub.history[0]["time"]) == before:
+            sub.prepend_history(bars)   # la liste du cache est la même: prochain passage servi en mémoire
+        _dbg(f"⏪ {symbol} {tf}: {len(bars)} bars older than {before}")
+        self.olderBarsReady.emit(symbol, tf, bars)
+
+    def _emit_history(self, sub: Subscription, bars: list[dict]):
+        if self._pending_bars.pop(sub.key, None) is not None:
+            self._bars_coalesced += 1
+        self.subHistoryReady.emit(sub.symbol, sub.tf, bars)
+        if not self._is_primary(sub):
+            return
 
         # ===== FIRST-LOAD ONLY =====
         if not self._first_load_done:
@@ -297,74 +1090,367 @@ class DataWorker(QObject):
         else:
             # Après le premier rendu, on continue en comportement normal
             self.historyReady.emit(bars)
+        self.qualityReady.emit(sub.quality.to_columns())
 
     def _poll_tick(self):
-        """Boucle timer (100ms) — agrège les ticks en bougie courante + ferme la précédente."""
-        tick = MT5.symbol_info_tick(self.symbol)
-        if not tick:
-            return
+        """
+        Cycle de poll unique pour toutes les subscriptions (1 appel MT5 par symbole dû).
+        L'ordonnanceur décide quels symboles sont dus et quand ré-armer le timer.
+        """
+        now = time.monotonic()
+        for sym in self._sched.due(now):
+            feed = self._feeds.get(sym)
+            if not feed or not feed.subs:
+                if self._quotes.has(sym):
+                    self._sched.observe(sym, self._poll_quote(sym))
+                continue
+            self._maybe_refresh_session(feed, now)
+            if TICK_CAPTURE_MODE == "ticks":
+                n, backlog = self._poll_ticks_batch(feed)
+            else:
+                if feed.polled_at and now - feed.polled_at > STALL_POLL_SEC:
+                    _dbg(f"⏸️ {sym}: {now - feed.polled_at:.0f} s sans tick lu → trous à backfiller")
+                    feed.mark_stalled()
+                n, backlog = self._poll_tick_snapshot(feed), False
+                self._maybe_audit_missed(feed, now)
+            self._sched.observe(sym, n, backlog=backlog)
 
-        tf_sec = TF_SECONDS[self.tf]
-        slot = (int(tick.time) // tf_sec) * tf_sec
+        if self._tick_timer:
+            self._tick_timer.start(self._sched.next_delay_ms())
 
-        # ignore tick en retard
-        if self._agg.slot is not None and slot < self._agg.slot:
-            if DEBUG and self._debug_tick_count < 6:
-                _dbg(f"[TICK] skip late tick slot={slot} < agg.slot={self._agg.slot}")
-                self._debug_tick_count += 1
+    def _maybe_refresh_session(self, feed: SymbolFeed, now: float):
+        """Session via symbol_info: trade_mode désactivé → symbole mis en sommeil."""
+        if now - feed.session_checked_at < SESSION_REFRESH_SEC:
             return
-
-        if tick.time == self._last_tick_time:
+        feed.session_checked_at = now
+        info = MT5.symbol_info(feed.symbol)
+        if info is None:
             return
-        self._last_tick_time = tick.time
+        disabled = getattr(MT5, "SYMBOL_TRADE_MODE_DISABLED", 0)
+        self._sched.set_session(feed.symbol, int(getattr(info, "trade_mode", -1)) != disabled)
+
+    def _maybe_audit_missed(self, feed: SymbolFeed, now: float):
+        """
+        Mode snapshot: recompte périodiquement les ticks réels (copy_ticks_range)
+        sur la fenêtre écoulée et compare aux ticks effectivement vus. Un slot qui a
+        des ticks réels mais aucune barre dans l'historique part en backfill.
+        """
+        if now - feed.audit_at < MISSED_AUDIT_SEC or not feed.last_tick_time:
+            return
+        feed.audit_at = now
+        end = int(feed.last_tick_time)
+        if feed.audit_from and end > feed.audit_from:
+            ticks = MT5.copy_ticks_range(
+                feed.symbol,
+                datetime.fromtimestamp(feed.audit_from, tz=timezone.utc),
+                datetime.fromtimestamp(end, tz=timezone.utc),
+                MT5.COPY_TICKS_ALL,
+            )
+            if ticks is not None:
+                self._sched.note_missed(feed.symbol, len(ticks) - feed.audit_seen)
+                if len(ticks):
+                    self._backfill_unseen_slots(feed, ticks["time_msc"].astype(np.int64) // 1000)
+        feed.audit_from = end
+        feed.audit_seen = 0
+
+    def _backfill_unseen_slots(self, feed: SymbolFeed, times: np.ndarray):
+        """Slots (fermés) couverts par des ticks réels mais absents de l'historique → backfill."""
+        for sub in feed.subs.values():
+            h = sub.history
+            if sub.loading or not h:
+                continue
+            off, tf = feed.align_offset, sub.tf_sec
+            slots = np.unique(((times + off) // tf) * tf - off)
+            slots = slots[slots < int(h[-1]["time"])]   # la barre courante est encore en cours
+            if not len(slots):
+                continue
+            i = bisect_left(h, int(slots[0]), key=lambda b: int(b["time"]))
+            seen = np.fromiter((int(b["time"]) for b in h[i:]), dtype=np.int64)
+            missing = slots[~np.isin(slots, seen)]
+            if len(missing):
+                self._queue_backfill(sub, int(missing[0]) - tf, int(missing[-1]) + tf)
+
+    def _poll_tick_snapshot(self, feed: SymbolFeed) -> int:
+        """Mode "snapshot": un seul symbol_info_tick par poll (résolution seconde). Retourne le nb de nouveaux ticks."""
+        tick = MT5.symbol_info_tick(feed.symbol)
+        recv = time.perf_counter()
+        if not tick:
+            return 0
+        feed.polled_at = time.monotonic()
+
+        if tick.time == feed.last_tick_time:
+            return 0
+        feed.last_tick_time = tick.time
+        if not feed.audit_from or tick.time >= feed.audit_from:
+            feed.audit_seen += 1
+
+        self._ingest_snapshot(feed, tick, recv)
+        return 1
 
+    def _ingest_snapshot(self, feed: SymbolFeed, tick, recv: float | None = None):
+        """Un tick symbol_info_tick (namedtuple) → même chemin qu'un batch d'un tick."""
         price = tick.last if tick.last else ((tick.bid or 0) + (tick.ask or 0)) / 2.0
-        vol   = float(getattr(tick, "volume", 0.0) or 0.0)
+        # volume de la dernière transaction, répété par les ticks bid/ask: compté sur un tick de transaction seulement
+        vol   = float(getattr(tick, "volume", 0.0) or 0.0) if int(getattr(tick, "flags", 0) or 0) & DEAL_FLAGS else 0.0
+        spread = tick.ask - tick.bid if tick.bid and tick.ask else np.nan
+        self._ingest_ticks(feed, np.array([int(tick.time)]), np.array([float(price)]),
+                           np.array([vol]), np.array([spread], dtype=np.float64),
+                           np.array([float(tick.bid or 0.0)]), np.array([float(tick.ask or 0.0)]), recv)
+
+    def _poll_ticks_batch(self, feed: SymbolFeed) -> tuple[int, bool]:
+        """
+        Mode "ticks": draine tous les ticks depuis le dernier time_msc vu (copy_ticks_from),
+        les passe dans les agrégateurs du symbole en une passe, puis émet les clôtures +
+        l'état final de chaque barre courante (une seule émission "live" par batch).
+        Retourne (nb de nouveaux ticks, batch tronqué à TICK_BATCH_MAX).
+        """
+        if not feed.last_tick_msc:
+            # Premier poll: on part du tick courant (l'historique couvre le passé)
+            tick = MT5.symbol_info_tick(feed.symbol)
+            if not tick:
+                return 0, False
+            feed.last_tick_msc = int(getattr(tick, "time_msc", 0) or int(tick.time) * 1000)
+            feed.last_msc_seen = 1
+            self._ingest_snapshot(feed, tick, time.perf_counter())
+            return 1, False
+
+        # relecture de la seconde entamée, filtrée au msc (count agrandi si la seconde dépasse le lot)
+        fresh_ticks, full = copy_fresh_ticks(MT5, feed, TICK_BATCH_MAX)
+        recv = time.perf_counter()
+        if fresh_ticks is None:
+            return 0, full
+        fresh = len(fresh_ticks)
+
+        accepted = self._ingest_ticks(feed, *tick_prices(fresh_ticks), tick_spreads(fresh_ticks),
+                                      *tick_quotes(fresh_ticks), recv)
+
+        if DEBUG and self._debug_tick_count < 6 and accepted:
+            _dbg(f"[TICKS] {feed.symbol} batch={fresh} accepted={accepted}")
+            self._debug_tick_count += 1
+        return fresh, full
+
+    def _ingest_ticks(self, feed: SymbolFeed, times: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                      spreads: np.ndarray, bids: np.ndarray, asks: np.ndarray, recv: float | None = None) -> int:
+        """
+        Nouveaux ticks d'un symbole → agrégateurs (+ qualité par barre) → émissions. Retourne le nb acceptés.
+        bids/asks: cotations brutes des ticks (P&L latent et watchlist, après le spike guard).
+        recv: perf_counter à la réception des ticks (latence tick → pixel, cf. app/chart/latency.py).
+        """
+        closed: dict[str, list[Bar]] = {}
+        self._buffer_loading(feed, times, prices, volumes)
+        # gros rattrapage (>= BULK_RESAMPLE_MIN_TICKS): filtrage + réduction groupée vectorisés
+        keep = feed.ingest_mask(times, prices, volumes, spreads, closed, bulk_min=BULK_RESAMPLE_MIN_TICKS)
+        accepted = int(keep.sum())
+        if accepted and (self._portfolio.has(feed.symbol) or self._quotes.has(feed.symbol)):
+            self._mark_last(feed.symbol, times, bids, asks, keep)
+
+        if accepted or closed:
+            self._stamps = (recv, time.perf_counter()) if FEED_LATENCY and recv is not None else None
+            self._emit_feed(feed, closed)
+        return accepted
+
+    def _poll_ring(self):
+        """
+        FEED_MODE=process: consomme les ticks publiés par le process feed.
+        Lecture sans copie dans le segment partagé ; les colonnes utiles sont extraites
+        (tick_prices) puis on vérifie que l'écrivain n'a pas recouvert la vue entre-temps.
+        """
+        ring = self._ring
+        lost = ring.lost
+        for _ in range(4):   # au plus 4 blocs contigus par cycle, le reste au suivant
+            rows = ring.read(TICK_BATCH_MAX)
+            recv = time.perf_counter()
+            if not len(rows):
+                break
+            sym_ids = rows["sym"].copy()
+            times, prices, volumes = tick_prices(rows)
+            spreads = tick_spreads(rows)
+            bids, asks = tick_quotes(rows)
+            torn = ring.torn()
+            if torn:
+                print(f"⚠️ ring de ticks: {torn} ticks écrasés pendant la lecture")
+                sym_ids, times, prices, volumes, spreads, bids, asks = (
+                    sym_ids[torn:], times[torn:], prices[torn:], volumes[torn:], spreads[torn:],
+                    bids[torn:], asks[torn:])
+            if ring.lost != lost:
+                # ticks écrasés avant lecture: on ne sait plus de quels symboles → tous marqués
+                lost = ring.lost
+                for feed in self._feeds.values():
+                    feed.mark_stalled()
+            for sid in np.unique(sym_ids).tolist():
+                name = ring.ring.symbol_name(sid)
+                feed = self._feeds.get(name)
+                if feed is None or not feed.subs:
+                    if self._quotes.has(name):   # symbole de la watchlist seule: dernière cotation
+                        m = sym_ids == sid
+                        self._mark_last(name, times[m], bids[m], asks[m])
+                    continue
+                m = sym_ids == sid
+                self._ingest_ticks(feed, times[m], prices[m], volumes[m], spreads[m], bids[m], asks[m], recv)
+
+        if self._tick_timer:
+            self._tick_timer.start(FEED_RING_POLL_MS)
+
+    def _emit_feed(self, feed: SymbolFeed, closed: dict[str, list[Bar]]):
+        for tf, sub in list(feed.subs.items()):
+            if sub.loading:
+                continue  # ses ticks attendent le handoff (buffer)
+            self._emit_bars(sub, closed.get(tf, []))
+
+    @staticmethod
+    def _buffer_loading(feed: SymbolFeed, times: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        for sub in feed.subs.values():
+            if sub.loading:
+                sub.buffer_ticks(times, prices, volumes)
+
+    def _emit_bars(self, sub: Subscription, closed: list[Bar]):
+        """Émet les clôtures dans l'ordre puis l'état courant de la subscription (coalescé)."""
+        if self._stamps is not None:
+            self._lat[sub.key] = self._stamps
+        else:
+            self._lat.pop(sub.key, None)
+        for b in closed:
+            d = b.model_dump()
+            gap = sub.record(d)
+            if gap:
+                self._queue_backfill(sub, *gap)
+            self._emit_closed(sub, d)
+        cur = sub.agg.current()
+        if cur:
+            d = cur.model_dump()
+            gap = sub.record(d)
+            if gap:
+                self._queue_backfill(sub, *gap)
+            self._emit_current(sub, d)
+
+    # ---------- backfill des trous ----------
+
+    def _queue_backfill(self, sub: Subscription, t_from: int, t_to: int, delay_ms: int = BACKFILL_DELAY_MS):
+        """Plage [t_from, t_to[ à redemander au broker (t_from = dernière barre avant le trou, peut-être partielle)."""
+        for job in self._gap_jobs:
+            if job["key"] == sub.key and job["from"] <= t_to and t_from <= job["to"]:
+                job["from"], job["to"] = min(job["from"], t_from), max(job["to"], t_to)
+                break
+        else:
+            self._gap_jobs.append({"key": sub.key, "from": t_from, "to": t_to, "tries": 0})
+            _dbg(f"🕳️ {sub.symbol} {sub.tf} gap {t_from} → {t_to} ({(t_to - t_from) // sub.tf_sec - 1} slots)")
+        self._arm_backfill(delay_ms)
+
+    def _arm_backfill(self, delay_ms: int):
+        if self._backfill_timer is None:
+            self._backfill_timer = QTimer(self)
+            self._backfill_timer.setSingleShot(True)
+            self._backfill_timer.timeout.connect(self._backfill_step)
+        if not self._backfill_timer.isActive():
+            self._backfill_timer.start(delay_ms)
+
+    def _backfill_step(self):
+        """Un trou par passage (le cycle de poll reprend la main entre deux requêtes)."""
+        if not self._running or not self._gap_jobs:
+            return
+        job = self._gap_jobs.pop(0)
+        sub = self._get_sub(*job["key"])
+        if sub is not None:
+            if sub.loading or (self._is_primary(sub) and not self._first_load_done):
+                self._gap_jobs.append(job)          # historique pas encore posé / premier batch pas parti
+            else:
+                self._run_backfill(sub, job)
+        if self._gap_jobs:
+            self._arm_backfill(0)
+
+    def _run_backfill(self, sub: Subscription, job: dict):
+        t_from, t_to = job["from"], job["to"]
+        self._submit(lambda: self._fetch_range(sub.symbol, sub.tf, t_from, t_to),
+                     lambda patch: self._on_backfill(sub, job, patch))
+
+    def _fetch_range(self, symbol: str, tf: str, t_from: int, t_to: int) -> Optional[list[dict]]:
+        """(thread exécuteur) barres broker de [t_from, t_to[ ; None si l'appel MT5 a échoué."""
+        rates = MT5.copy_rates_range(
+            symbol, TIMEFRAMES[tf],
+            datetime.fromtimestamp(t_from, tz=timezone.utc),
+            datetime.fromtimestamp(t_to - 1, tz=timezone.utc),
+        )
+        if rates is None:
+            return None
+        return [b for b in self._rates_to_bars(rates) if t_from <= int(b["time"]) < t_to]
 
-        # [SPIKE_GUARD] ignore prix 0/négatif ou écart instantané >5% vs. close courant
-        if not price or price <= 0:
+    def _on_backfill(self, sub: Subscription, job: dict, patch: Optional[list[dict]]):
+        if self._get_sub(sub.symbol, sub.tf) is not sub:
             return
-        prev_c = getattr(self._agg, "c", None)
-        if prev_c and prev_c > 0 and abs(price - prev_c) / prev_c > 0.05:
+        t_from, t_to = job["from"], job["to"]
+        if patch is None:
+            job["tries"] += 1
+            if job["tries"] <= BACKFILL_MAX_RETRIES:
+                self._gap_jobs.append(job)
+                self._arm_backfill(BACKFILL_DELAY_MS * 2 ** job["tries"])
+            else:
+                print(f"⚠️ backfill {sub.symbol} {sub.tf} abandonné:", MT5.last_error())
             return
 
-        # si on a sauté >1 slot (veille/réveil, pertes de ticks, etc.)
-        if self._agg.slot is not None and slot > self._agg.slot + tf_sec:
-            closed = Bar(
-                time=self._agg.slot,
-                open=self._agg.o,
-                high=self._agg.h,
-                low=self._agg.l,
-                close=self._agg.c,
-                volume=self._agg.v,
-            )
-            self._emit_or_buffer(closed)
-            seed = Bar(time=slot, open=price, high=price, low=price, close=price, volume=vol)
-            self._agg.seed(seed)
-            self._emit_or_buffer(seed)
-            if DEBUG and self._debug_tick_count < 6:
-                _dbg(f"[TICK] jump → seed @ {slot}")
-                self._debug_tick_count += 1
-            return
-
-        closed, cur = self._agg.push_tick(int(tick.time), float(price), vol)
-        if closed:
-            self._emit_or_buffer(closed)
-        self._emit_or_buffer(cur)
-
-        if DEBUG and self._debug_tick_count < 6:
-            _dbg(f"[TICK] tick_slot={slot} agg.slot={self._agg.slot} price={price}")
-            self._debug_tick_count += 1
+        if not sub.apply_patch(patch):
+            return  # trou réel (pas de cotation) ou déjà à jour
+        self._gaps_filled += 1
+        _dbg(f"🩹 {sub.symbol} {sub.tf} backfill: {len(patch)} bars [{t_from}, {t_to}[")
+        self.subHistoryPatch.emit(sub.symbol, sub.tf, patch)
+        if self._is_primary(sub):
+            self.historyPatch.emit(patch)
+
+    # ---------- émission coalescée ----------
+
+    def _emit_closed(self, sub: Subscription, d: dict):
+        """Clôture: part tout de suite ; une version en attente de la même bougie devient inutile."""
+        pending = self._pending_bars.pop(sub.key, None)
+        if pending is not None:
+            if int(pending[1]["time"]) < int(d["time"]):
+                self._dispatch_bar(sub, pending[1])
+            else:
+                self._bars_coalesced += 1
+        self._dispatch_bar(sub, d)
+
+    def _emit_current(self, sub: Subscription, d: dict):
+        """Bougie courante: on garde la dernière version, flush au prochain intervalle."""
+        if BAR_EMIT_INTERVAL_MS <= 0:
+            self._dispatch_bar(sub, d)
+            return
+        if sub.key in self._pending_bars:
+            self._bars_coalesced += 1
+        self._pending_bars[sub.key] = (sub, d)
+        if self._emit_timer is None:
+            self._emit_timer = QTimer(self)
+            self._emit_timer.setSingleShot(True)
+            self._emit_timer.timeout.connect(self._flush_pending_bars)
+        if not self._emit_timer.isActive():
+            self._emit_timer.start(BAR_EMIT_INTERVAL_MS)
+
+    def _flush_pending_bars(self):
+        pending = self._pending_bars
+        self._pending_bars = {}
+        for sub, d in pending.values():
+            self._dispatch_bar(sub, d)
+
+    def _dispatch_bar(self, sub: Subscription, d: dict):
+        self._bars_emitted += 1
+        self.subBarReady.emit(sub.symbol, sub.tf, d)
+        if self._is_primary(sub):
+            self._emit_or_buffer(d, self._lat.get(sub.key))
+            q = sub.quality.point_at(int(d["time"]))
+            if q is not None:
+                self.qualityUpdated.emit(q)
 
     # ---------- helpers "first-load only" ----------
 
-    def _emit_or_buffer(self, bar: Bar):
-        """Pendant le first-load, on bufferise. Ensuite, on émet en direct."""
+    def _emit_or_buffer(self, bar: dict, stamps: tuple[float, float] | None = None):
+        """
+        Pendant le first-load, on bufferise. Ensuite, on émet en direct, avec les horodatages
+        (recv, agg) du tick dans bar["_lat"] (copie: bar est aussi la barre de l'historique).
+        """
         if not self._first_load_done:
-            self._first_buffer.append(bar.model_dump())
+            self._first_buffer.append(bar)
             self._maybe_flush_first_load()
+        elif stamps is not None:
+            self.barReady.emit({**bar, "_lat": {"recv": stamps[0], "agg": stamps[1]}})
         else:
-            self.barReady.emit(bar.model_dump())
+            self.barReady.emit(bar)
 
     def _maybe_flush_first_load(self):
         if self._first_load_done:
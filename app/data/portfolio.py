@@ -0,0 +1,147 @@
+# app/data/portfolio.py
+from __future__ import annotations
+
+import numpy as np
+
+# Champs suivis pour le diff (price_current/profit exclus: recalculés localement à chaque tick)
+POSITION_FIELDS = ("ticket", "symbol", "type", "volume", "price_open", "sl", "tp", "swap", "magic", "comment", "time")
+ORDER_FIELDS = ("ticket", "symbol", "type", "volume_current", "price_open", "sl", "tp", "magic", "comment", "time_setup")
+ACCOUNT_FIELDS = ("login", "currency", "leverage", "balance", "credit", "equity", "profit",
+                  "margin", "margin_free", "margin_level")
+
+
+def _rows_by_ticket(rows, fields) -> dict[int, tuple]:
+    return {r.ticket: tuple(getattr(r, f) for f in fields) for r in (rows or ())}
+
+
+def _diff(prev: dict[int, tuple], cur: dict[int, tuple], fields) -> dict | None:
+    """Diff par ticket → {"added": [dict], "changed": [dict], "removed": [ticket]} ou None si identique."""
+    if prev == cur:
+        return None
+    added = [dict(zip(fields, v)) for k, v in cur.items() if k not in prev]
+    changed = [dict(zip(fields, v)) for k, v in cur.items() if k in prev and prev[k] != v]
+    removed = [k for k in prev if k not in cur]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+class _SymbolBook:
+    """Positions d'un symbole en colonnes numpy: un tick = une opération vectorisée."""
+
+    __slots__ = ("tickets", "sign", "open", "volume", "tick_value", "tick_size", "profit")
+
+    def __init__(self, rows: list, tick_value: float, tick_size: float):
+        self.tickets = np.array([r.ticket for r in rows], dtype=np.int64)
+        self.sign = np.array([1.0 if r.type == 0 else -1.0 for r in rows])   # POSITION_TYPE_BUY = 0
+        self.open = np.array([r.price_open for r in rows], dtype=np.float64)
+        self.volume = np.array([r.volume for r in rows], dtype=np.float64)
+        self.tick_value = tick_value
+        self.tick_size = tick_size
+        self.profit = np.array([r.profit for r in rows], dtype=np.float64)
+
+
+class PortfolioTracker:
+    """
+    État positions/ordres/compte côté DataWorker.
+      - sync_*(): snapshot MT5 périodique → diff par ticket (None si rien n'a changé)
+      - mark(): dernier prix vu par le flux (coût ~nul si aucune position sur le symbole)
+      - reprice(): P&L latent des symboles marqués, vectorisé par symbole → seuls les tickets modifiés
+    Le P&L local part du tick_value de symbol_info (rafraîchi à chaque sync) ; le profit
+    MT5 fait foi à chaque snapshot.
+    """
+
+    def __init__(self):
+        self._pos: dict[int, tuple] = {}
+        self._ord: dict[int, tuple] = {}
+        self._acc: tuple | None = None
+        self._books: dict[str, _SymbolBook] = {}
+        self._marks: dict[str, tuple[float, float]] = {}   # symbole → (bid, ask) pas encore appliqué
+        self._pending: dict[int, float] = {}               # profits MT5 (symboles sans flux) à émettre
+        self._specs: dict[str, tuple[float, float]] = {}
+        self.balance = 0.0
+
+    def symbols(self) -> set[str]:
+        return set(self._books)
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self._books
+
+    # ---------- snapshots MT5 ----------
+
+    def sync_positions(self, rows, tick_specs: dict[str, tuple[float, float]], live: set[str]) -> dict | None:
+        """
+        rows: positions_get() ; tick_specs: symbole → (trade_tick_value, trade_tick_size) ;
+        live: symboles suivis par le flux (les autres prennent le profit MT5 du snapshot).
+        """
+        rows = rows or ()
+        cur = _rows_by_ticket(rows, POSITION_FIELDS)
+        diff = _diff(self._pos, cur, POSITION_FIELDS)
+        self._pos = cur
+        profits = {r.ticket: r.profit for r in rows}
+
+        if diff is not None or tick_specs != self._specs:
+            by_sym: dict[str, list] = {}
+            for r in rows:
+                by_sym.setdefault(r.symbol, []).append(r)
+            self._books = {sym: _SymbolBook(rs, *tick_specs.get(sym, (0.0, 0.0))) for sym, rs in by_sym.items()}
+            self._specs = dict(tick_specs)
+        if diff is not None:
+            # le profit MT5 des lignes modifiées accompagne le diff (le P&L local reprend ensuite)
+            for row in diff["added"] + diff["changed"]:
+                row["profit"] = profits.get(row["ticket"], 0.0)
+
+        # symboles sans flux live: le snapshot MT5 est la seule source de P&L
+        for sym, b in self._books.items():
+            if sym in live:
+                continue
+            mt5 = np.array([profits[t] for t in b.tickets.tolist()], dtype=np.float64)
+            moved = mt5 != b.profit
+            if moved.any():
+                self._pending.update(zip(b.tickets[moved].tolist(), mt5[moved].tolist()))
+                b.profit = mt5
+        return diff
+
+    def sync_orders(self, rows) -> dict | None:
+        cur = _rows_by_ticket(rows, ORDER_FIELDS)
+        diff = _diff(self._ord, cur, ORDER_FIELDS)
+        self._ord = cur
+        return diff
+
+    def sync_account(self, info) -> dict | None:
+        if info is None:
+            return None
+        cur = tuple(getattr(info, f) for f in ACCOUNT_FIELDS)
+        if cur == self._acc:
+            return None
+        self._acc = cur
+        self.balance = float(info.balance)
+        return dict(zip(ACCOUNT_FIELDS, cur))
+
+    # ---------- P&L par tick ----------
+
+    def mark(self, symbol: str, bid: float, ask: float):
+        if symbol in self._books:
+            self._marks[symbol] = (bid, ask)
+
+    def reprice(self) -> dict | None:
+        """
+        P&L des symboles marqués depuis le dernier appel → {"profits": {ticket: profit},
+        "floating": total, "equity": solde + total} ; None si aucun profit n'a bougé.
+        """
+        if not self._marks and not self._pending:
+            return None
+        marks, self._marks = self._marks, {}
+        changed, self._pending = self._pending, {}
+        for sym, (bid, ask) in marks.items():
+            b = self._books.get(sym)
+            if b is None or not b.tick_size:
+                continue
+            close = np.where(b.sign > 0, bid, ask)   # une position longue se clôture au bid
+            profit = np.round(b.sign * (close - b.open) / b.tick_size * b.tick_value * b.volume, 2)
+            moved = profit != b.profit
+            if moved.any():
+                changed.update(zip(b.tickets[moved].tolist(), profit[moved].tolist()))
+                b.profit = profit
+        if not changed:
+            return None
+        floating = float(sum(b.profit.sum() for b in self._books.values()))
+        return {"profits": changed, "floating": round(floating, 2), "equity": round(self.balance + floating, 2)}
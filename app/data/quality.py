@@ -0,0 +1,137 @@
+# app/data/quality.py
+from __future__ import annotations
+
+import numpy as np
+
+# Colonnes par barre (stockage numpy compact, une ligne par slot du timeframe)
+_FIELDS = (
+    ("time", np.int64),
+    ("spread_min", np.float64), ("spread_max", np.float64), ("spread_sum", np.float64),
+    ("spread_n", np.int32),      # ticks acceptés avec bid ET ask (base du spread moyen)
+    ("ticks", np.int32),         # ticks acceptés
+    ("spikes", np.int32),        # rejetés par le spike guard (ou prix nul)
+    ("late", np.int32),          # rejetés car en retard sur le slot courant
+)
+
+
+class QualitySeries:
+    """
+    Qualité du flux par barre d'une subscription: spread min/moy/max, nb de ticks,
+    ticks rejetés (spike guard, late tick). Alimentée par batch de ticks (vectorisé),
+    uniquement sur la période live: l'historique MT5 ne porte pas ces infos.
+    """
+
+    def __init__(self, tf_sec: int, align_offset: int = 0, max_bars: int = 5000):
+        self.tf = tf_sec
+        self.offset = align_offset
+        self.max_bars = max(1, max_bars)
+        self.n = 0
+        self.cols = {name: np.empty(64, dtype=dt) for name, dt in _FIELDS}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def add(self, times: np.ndarray, spreads: np.ndarray, keep: np.ndarray, late: np.ndarray):
+        """
+        times: secondes, non décroissants (un tick rejeté est daté de son arrivée) ;
+        spreads: ask - bid (NaN si inconnu) ; keep/late: masques du filtre late/spike.
+        """
+        if not len(times):
+            return
+        slots = ((times + self.offset) // self.tf) * self.tf - self.offset
+        if self.n:
+            slots = np.maximum(slots, self.cols["time"][self.n - 1])
+        starts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]])
+
+        valid = keep & ~np.isnan(spreads)
+        sp = np.where(valid, spreads, np.nan)
+        block = {
+            "time": slots[starts],
+            "spread_min": np.fmin.reduceat(sp, starts),
+            "spread_max": np.fmax.reduceat(sp, starts),
+            "spread_sum": np.add.reduceat(np.where(valid, spreads, 0.0), starts),
+            "spread_n": np.add.reduceat(valid.astype(np.int32), starts),
+            "ticks": np.add.reduceat(keep.astype(np.int32), starts),
+            "spikes": np.add.reduceat((~keep & ~late).astype(np.int32), starts),
+            "late": np.add.reduceat(late.astype(np.int32), starts),
+        }
+
+        # première ligne du bloc = barre courante déjà stockée → fusion
+        if self.n and block["time"][0] == self.cols["time"][self.n - 1]:
+            i = self.n - 1
+            c = self.cols
+            c["spread_min"][i] = np.fmin(c["spread_min"][i], block["spread_min"][0])
+            c["spread_max"][i] = np.fmax(c["spread_max"][i], block["spread_max"][0])
+            for k in ("spread_sum", "spread_n", "ticks", "spikes", "late"):
+                c[k][i] += block[k][0]
+            block = {k: v[1:] for k, v in block.items()}
+        self._append(block)
+
+    def _append(self, block: dict):
+        m = len(block["time"])
+        if not m:
+            return
+        cap = len(self.cols["time"])
+        if self.n + m > cap:
+            if self.n + m > 2 * self.max_bars:
+                # on ne garde que la queue (max_bars) → décalage en place, amorti
+                keep = max(0, min(self.n, self.max_bars - m))
+                for k, a in self.cols.items():
+                    a[:keep] = a[self.n - keep:self.n]
+                self.n = keep
+                block = {k: v[-self.max_bars:] for k, v in block.items()}
+                m = len(block["time"])
+            if self.n + m > cap:
+                new_cap = max(self.n + m, min(2 * cap, 2 * self.max_bars))
+                for k, a in self.cols.items():
+                    grown = np.empty(new_cap, dtype=a.dtype)
+                    grown[:self.n] = a[:self.n]
+                    self.cols[k] = grown
+        for k, v in block.items():
+            self.cols[k][self.n:self.n + m] = v
+        self.n += m
+
+    # ---------- lecture ----------
+
+    def point(self, i: int = -1) -> dict:
+        """Une barre au format chart/chat (spread moyen calculé, None si pas de bid/ask)."""
+        i = i % self.n
+        c = self.cols
+        n_sp = int(c["spread_n"][i])
+        return {
+            "time": int(c["time"][i]),
+            "spread_min": float(c["spread_min"][i]) if n_sp else None,
+            "spread_avg": float(c["spread_sum"][i]) / n_sp if n_sp else None,
+            "spread_max": float(c["spread_max"][i]) if n_sp else None,
+            "ticks": int(c["ticks"][i]),
+            "spikes": int(c["spikes"][i]),
+            "late": int(c["late"][i]),
+        }
+
+    def point_at(self, t: int) -> dict | None:
+        if not self.n:
+            return None
+        i = int(np.searchsorted(self.cols["time"][:self.n], t))
+        if i >= self.n or int(self.cols["time"][i]) != t:
+            return None
+        return self.point(i)
+
+    def to_columns(self) -> dict:
+        """Série complète en colonnes (listes JSON-compatibles, None à la place de NaN)."""
+        c = {k: a[:self.n] for k, a in self.cols.items()}
+        has = c["spread_n"] > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = c["spread_sum"] / c["spread_n"]
+
+        def opt(a):
+            return np.where(has, a, None).tolist()
+
+        return {
+            "time": c["time"].tolist(),
+            "spread_min": opt(c["spread_min"]),
+            "spread_avg": opt(avg),
+            "spread_max": opt(c["spread_max"]),
+            "ticks": c["ticks"].tolist(),
+            "spikes": c["spikes"].tolist(),
+            "late": c["late"].tolist(),
+        }
@@ -1,43 +1,442 @@
 # app/data/resample.py
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+import numpy as np
+
 from .models import Bar
 
+# [SPIKE_GUARD] écart instantané max toléré vs. close courant (5%)
+SPIKE_GUARD_PCT = 0.05
+
+# Flags MT5 d'un tick porteur d'une transaction (TICK_FLAG_LAST | TICK_FLAG_VOLUME): les ticks
+# bid/ask seuls répètent le volume de la dernière transaction, il ne doit pas être recompté
+TICK_FLAG_LAST = 8
+TICK_FLAG_VOLUME = 16
+DEAL_FLAGS = TICK_FLAG_LAST | TICK_FLAG_VOLUME
+
+
 class CandleAggregator:
-    def __init__(self, tf_seconds: int):
+    def __init__(self, tf_seconds: int, align_offset: int = 0):
         self.tf = tf_seconds
+        # décalage (s) ajouté avant l'arrondi: 0 pour MT5 (timestamps déjà en heure serveur),
+        # sinon aligne H4/D1 sur le minuit du broker quand les times sont en vrai UTC
+        self.offset = align_offset
         self.slot: int | None = None
         self.o = self.h = self.l = self.c = None
         self.v = 0.0
 
+    def slot_of(self, ts_epoch: int) -> int:
+        return ((ts_epoch + self.offset) // self.tf) * self.tf - self.offset
+
     def seed(self, bar):  # bar: dict ou Bar
         if isinstance(bar, dict):
             t = int(bar["time"]); o=bar["open"]; h=bar["high"]; l=bar["low"]; c=bar["close"]; v=bar.get("volume", 0.0)
         else:
             t = int(bar.time);    o=bar.open;   h=bar.high;   l=bar.low;   c=bar.close;   v=getattr(bar, "volume", 0.0)
         self.slot = t
-        self.o, self.h, self.l, self.c, self.v = float(o), float(h), float(l), float(c), float(v)
+        self.o, self.h, self.l, self.c, self.v = float(o), float(h), float(l), float(c), float(v or 0.0)
 
-    def push_tick(self, ts_epoch: int, price: float, vol: float = 0.0):
-        """Retourne (closed_bar | None, current_bar)."""
-        slot = (ts_epoch // self.tf) * self.tf
+    def current(self) -> Bar | None:
+        """Barre courante (None tant que rien n'a été agrégé)."""
+        if self.slot is None:
+            return None
+        return Bar(time=self.slot, open=self.o, high=self.h, low=self.l, close=self.c, volume=self.v)
+
+    def update(self, ts_epoch: int, price: float, vol: float = 0.0):
+        """Comme push_tick, sans construire la barre courante (chemin batch). Retourne closed_bar | None."""
+        slot = self.slot_of(ts_epoch)
         closed = None
+        p = float(price)
 
         if self.slot is None:
             self.slot = slot
-            p = float(price)
             self.o = self.h = self.l = self.c = p
             self.v = float(vol)
         elif slot > self.slot:
             closed = Bar(time=self.slot, open=self.o, high=self.h, low=self.l, close=self.c, volume=self.v)
             self.slot = slot
-            p = float(price)
             self.o = self.h = self.l = self.c = p
             self.v = float(vol)
         else:
-            p = float(price)
-            self.h = max(self.h, p)
-            self.l = min(self.l, p)
+            if p > self.h: self.h = p
+            if p < self.l: self.l = p
             self.c = p
             self.v += float(vol)
+        return closed
+
+    def push_tick(self, ts_epoch: int, price: float, vol: float = 0.0):
+        """Retourne (closed_bar | None, current_bar)."""
+        closed = self.update(ts_epoch, price, vol)
+        return closed, self.current()
+
+
+class MultiTimeframeAggregator:
+    """
+    Un CandleAggregator par timeframe, tous alimentés par le même flux de ticks
+    (M1, M5, M15, M30, H1, H4, D1...). Le late-tick et le spike guard sont évalués
+    une seule fois, sur le timeframe le plus fin, pour que toutes les bougies restent cohérentes.
+    """
+
+    def __init__(self, align_offset: int = 0):
+        self.offset = align_offset
+        self.aggs: dict[str, CandleAggregator] = {}
+
+    def add(self, tf: str, tf_seconds: int) -> CandleAggregator:
+        agg = self.aggs.get(tf)
+        if agg is None:
+            agg = CandleAggregator(tf_seconds, self.offset)
+            # garde l'ordre du plus fin au plus large
+            items = sorted([*self.aggs.items(), (tf, agg)], key=lambda kv: kv[1].tf)
+            self.aggs = dict(items)
+        return agg
+
+    def reset(self, tf: str) -> CandleAggregator:
+        """Remplace l'agrégateur d'un timeframe (avant un re-seed depuis l'historique)."""
+        old = self.aggs.pop(tf)
+        return self.add(tf, old.tf)
+
+    def remove(self, tf: str):
+        self.aggs.pop(tf, None)
+
+    def reference(self) -> CandleAggregator | None:
+        """Agrégateur de référence (le plus fin déjà amorcé) pour late-tick/spike guard."""
+        for agg in self.aggs.values():
+            if agg.slot is not None:
+                return agg
+        return None
+
+    def update(self, ts_epoch: int, price: float, vol: float, closed: dict[str, list[Bar]]):
+        """Pousse un tick (déjà filtré) dans tous les timeframes ; clôtures ajoutées à closed[tf]."""
+        for tf, agg in self.aggs.items():
+            slot = agg.slot_of(ts_epoch)
+            # si on a sauté >1 slot (veille/réveil, pertes de ticks, etc.)
+            if agg.slot is not None and slot > agg.slot + agg.tf:
+                closed.setdefault(tf, []).append(agg.current())
+                agg.seed(Bar(time=slot, open=price, high=price, low=price, close=price, volume=vol))
+                continue
+            bar = agg.update(ts_epoch, price, vol)
+            if bar:
+                closed.setdefault(tf, []).append(bar)
+
+
+def derive_bars(bars: list[dict], tf_seconds: int, align_offset: int = 0) -> list[dict]:
+    """
+    Reconstruit localement un timeframe supérieur à partir de barres plus fines
+    (ex: H1/H4/D1 depuis M1/M5 en cache), sans aller-retour MT5.
+    Seuls les slots qui contiennent au moins une barre source sont produits:
+    week-ends et fermetures de session ne créent pas de bougies fantômes.
+    """
+    out: list[dict] = []
+    cur: dict | None = None
+    for b in bars:
+        t = int(b["time"])
+        slot = ((t + align_offset) // tf_seconds) * tf_seconds - align_offset
+        if cur is None or slot != cur["time"]:
+            if cur is not None:
+                out.append(cur)
+            cur = {"time": slot, "open": float(b["open"]), "high": float(b["high"]),
+                   "low": float(b["low"]), "close": float(b["close"]),
+                   "volume": float(b.get("volume") or 0.0)}
+        else:
+            h, l = float(b["high"]), float(b["low"])
+            if h > cur["high"]: cur["high"] = h
+            if l < cur["low"]:  cur["low"] = l
+            cur["close"] = float(b["close"])
+            cur["volume"] += float(b.get("volume") or 0.0)
+    if cur is not None:
+        out.append(cur)
+    return out
+
+
+def merge_bars(bars: list[dict], patch: list[dict]) -> list[dict]:
+    """
+    Remplace dans `bars` (triées) toute la plage [patch[0].time, patch[-1].time]
+    par `patch` (triées): backfill d'un trou, correction de barres partielles.
+    """
+    if not patch:
+        return list(bars)
+    lo, hi = int(patch[0]["time"]), int(patch[-1]["time"])
+    i = bisect_left(bars, lo, key=lambda b: int(b["time"]))
+    j = bisect_right(bars, hi, key=lambda b: int(b["time"]))
+    return bars[:i] + list(patch) + bars[j:]
+
+
+# ---------------------------------------------------------------------------
+#  Resampler vectorisé (backfills, rebuild depuis copy_ticks_range / journaux)
+# ---------------------------------------------------------------------------
+
+_FILTER_CHUNK_MIN = 64      # fenêtres vectorisées adaptatives (doublent tant qu'il n'y a pas de rupture)
+_FILTER_CHUNK_MAX = 65536
+_FILTER_SCALAR_RUN = 16     # runs plus courts → zone "hachée" traitée en boucle scalaire
+_FILTER_SCALAR_SPAN = 1024
+
+
+def filter_ticks(slots, prices, ref_slot=None, ref_price=None, spike_pct: float = SPIKE_GUARD_PCT):
+    """
+    Masque des ticks acceptés selon les mêmes règles que le flux live (_poll_tick):
+      - late tick: slot < slot courant de l'agrégateur (max des slots déjà acceptés)
+      - prix nul/négatif
+      - spike guard: écart > spike_pct vs. dernier prix ACCEPTÉ
+    Les règles sont séquentielles (un rejet ne devient pas référence). On alterne deux passes
+    vectorisées: "run accepté" (chaque tick comparé au précédent) jusqu'au premier rejet,
+    puis "run rejeté" (référence figée) jusqu'au premier tick de nouveau acceptable.
+    Retourne (keep, n_late, n_spike).
+    """
+    s = np.asarray(slots, dtype=np.int64)
+    p = np.asarray(prices, dtype=np.float64)
+    n = len(p)
+    keep = np.zeros(n, dtype=bool)
+    n_late = n_spike = 0
+
+    cur_slot = np.iinfo(np.int64).min if ref_slot is None else int(ref_slot)
+    ref = np.nan if not ref_price or ref_price <= 0 else float(ref_price)
+
+    i = 0
+    chunk = _FILTER_CHUNK_MIN
+    choppy = False
+    while i < n:
+        # ----- zone hachée (rejets très fréquents): boucle scalaire, moins chère que numpy ici -----
+        if choppy:
+            end = min(n, i + _FILTER_SCALAR_SPAN)
+            for k, (ts, px) in enumerate(zip(s[i:end].tolist(), p[i:end].tolist())):
+                if ts < cur_slot:
+                    n_late += 1
+                elif not px > 0 or (ref > 0 and abs(px - ref) / ref > spike_pct):
+                    n_spike += 1
+                else:
+                    keep[i + k] = True
+                    cur_slot = max(cur_slot, ts)
+                    ref = px
+            i = end
+            choppy = False
+            chunk = _FILTER_CHUNK_MIN
+            continue
+
+        # ----- run accepté -----
+        end = min(n, i + chunk)
+        seg_s = s[i:end]
+        seg_p = p[i:end]
+
+        prev_slot = np.empty_like(seg_s)
+        prev_slot[0] = cur_slot
+        if len(seg_s) > 1:
+            prev_slot[1:] = np.maximum(np.maximum.accumulate(seg_s[:-1]), cur_slot)
+        prev_p = np.empty_like(seg_p)
+        prev_p[0] = ref
+        prev_p[1:] = seg_p[:-1]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bad = (seg_s < prev_slot) | ~(seg_p > 0) | (
+                (prev_p > 0) & (np.abs(seg_p - prev_p) / prev_p > spike_pct))
+
+        if not bad.any():
+            keep[i:end] = True
+            cur_slot = max(cur_slot, int(seg_s.max()))
+            ref = float(seg_p[-1])
+            i = end
+            chunk = min(_FILTER_CHUNK_MAX, chunk * 2)
+            continue
+
+        j = int(np.argmax(bad))
+        if j > 0:
+            keep[i:i + j] = True
+            cur_slot = max(cur_slot, int(seg_s[:j].max()))
+            ref = float(seg_p[j - 1])
+        i += j
+        chunk = max(_FILTER_CHUNK_MIN, j)
+
+        # ----- run rejeté: référence figée (slot courant + dernier prix accepté) -----
+        rchunk = _FILTER_CHUNK_MIN
+        rejected = 0
+        while i < n:
+            end = min(n, i + rchunk)
+            seg_s = s[i:end]
+            seg_p = p[i:end]
+            late = seg_s < cur_slot
+            with np.errstate(invalid="ignore", divide="ignore"):
+                spike = ~(seg_p > 0) | ((ref > 0) & (np.abs(seg_p - ref) / ref > spike_pct))
+            ok = ~late & ~spike
+            k = int(np.argmax(ok)) if ok.any() else len(ok)
+            nl = int(late[:k].sum())
+            n_late += nl
+            n_spike += k - nl
+            i += k
+            rejected += k
+            if k < len(ok):
+                break
+            rchunk = min(_FILTER_CHUNK_MAX, rchunk * 2)
+        choppy = j + rejected < _FILTER_SCALAR_RUN
+
+    return keep, n_late, n_spike
+
+
+def bars_from_ticks(times, prices, volumes, tf_seconds: int, seed=None, align_offset: int = 0) -> dict:
+    """
+    OHLCV par slot en une réduction groupée (ticks DÉJÀ filtrés et dans l'ordre).
+    `seed` (dict/Bar) = barre courante de l'agrégateur: fusionnée si les ticks tombent dans son slot.
+    Retourne des colonnes numpy: time, open, high, low, close, volume (dernière = barre courante).
+    """
+    t = np.asarray(times, dtype=np.int64)
+    p = np.asarray(prices, dtype=np.float64)
+    v = np.zeros(len(p)) if volumes is None else np.asarray(volumes, dtype=np.float64)
+    slots = ((t + align_offset) // tf_seconds) * tf_seconds - align_offset
+
+    if len(p):
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(slots)) + 1))
+        ends = np.concatenate((starts[1:], [len(p)]))
+        cols = {
+            "time": slots[starts],
+            "open": p[starts],
+            "high": np.maximum.reduceat(p, starts),
+            "low": np.minimum.reduceat(p, starts),
+            "close": p[ends - 1],
+            "volume": np.add.reduceat(v, starts),
+        }
+    else:
+        cols = {k: np.empty(0, dtype=np.int64 if k == "time" else np.float64)
+                for k in ("time", "open", "high", "low", "close", "volume")}
+
+    if seed is not None:
+        if not isinstance(seed, dict):
+            seed = seed.model_dump()
+        st = int(seed["time"])
+        so, sh, sl, sc = (float(seed[k]) for k in ("open", "high", "low", "close"))
+        sv = float(seed.get("volume") or 0.0)
+        if len(cols["time"]) and int(cols["time"][0]) == st:
+            cols["open"][0] = so
+            cols["high"][0] = max(sh, float(cols["high"][0]))
+            cols["low"][0] = min(sl, float(cols["low"][0]))
+            cols["volume"][0] += sv
+        else:
+            cols = {
+                "time": np.concatenate(([st], cols["time"])).astype(np.int64),
+                "open": np.concatenate(([so], cols["open"])),
+                "high": np.concatenate(([sh], cols["high"])),
+                "low": np.concatenate(([sl], cols["low"])),
+                "close": np.concatenate(([sc], cols["close"])),
+                "volume": np.concatenate(([sv], cols["volume"])),
+            }
+    return cols
+
+
+def resample_ticks(times, prices, volumes=None, tf_seconds: int = 60, seed=None,
+                   align_offset: int = 0) -> tuple[dict, dict]:
+    """
+    Resampler bulk: ticks colonnes → OHLCV, mêmes règles (late tick, spike guard) et mêmes
+    barres que CandleAggregator + _poll_tick tick par tick, en quelques passes numpy.
+    Retourne (colonnes, stats) ; stats = ticks, accepted, dropped_late, dropped_spike.
+    """
+    t = np.asarray(times, dtype=np.int64)
+    p = np.asarray(prices, dtype=np.float64)
+    slots = ((t + align_offset) // tf_seconds) * tf_seconds - align_offset
+
+    ref_slot = ref_price = None
+    if seed is not None:
+        sd = seed if isinstance(seed, dict) else seed.model_dump()
+        ref_slot, ref_price = int(sd["time"]), float(sd["close"])
+
+    keep, n_late, n_spike = filter_ticks(slots, p, ref_slot, ref_price)
+    v = None if volumes is None else np.asarray(volumes, dtype=np.float64)[keep]
+    cols = bars_from_ticks(t[keep], p[keep], v, tf_seconds, seed=seed, align_offset=align_offset)
+    stats = {"ticks": int(len(p)), "accepted": int(keep.sum()),
+             "dropped_late": n_late, "dropped_spike": n_spike}
+    return cols, stats
+
+
+def derive_columns(cols: dict, tf_seconds: int, align_offset: int = 0) -> dict:
+    """
+    Version colonnes de derive_bars: OHLCV fins (triés) → timeframe supérieur
+    en une réduction groupée. Même règle: pas de slot sans barre source.
+    """
+    t = np.asarray(cols["time"], dtype=np.int64)
+    if not len(t):
+        return {k: np.asarray(v) for k, v in cols.items()}
+    slots = ((t + align_offset) // tf_seconds) * tf_seconds - align_offset
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(slots)) + 1))
+    return reduce_columns(cols, starts, times=slots[starts])
+
+
+def reduce_columns(cols: dict, starts, times=None) -> dict:
+    """
+    Paquets de barres consécutives [starts[k], starts[k+1]) → une barre OHLCV chacun
+    (open du premier, high/low extrêmes, close du dernier, volumes sommés).
+    times: temps des paquets (défaut: celui de leur première barre).
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    n = len(cols["time"])
+    ends = np.concatenate((starts[1:], [n]))
+    return {
+        "time": np.asarray(cols["time"], dtype=np.int64)[starts] if times is None else times,
+        "open": np.asarray(cols["open"], dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(cols["high"], dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(cols["low"], dtype=np.float64), starts),
+        "close": np.asarray(cols["close"], dtype=np.float64)[ends - 1],
+        "volume": np.add.reduceat(np.asarray(cols["volume"], dtype=np.float64), starts),
+    }
+
+
+def tick_prices(ticks):
+    """
+    Array de ticks MT5 (structuré) → (time s, prix, volume): last si présent, sinon mid bid/ask ;
+    volume compté sur les seuls ticks de transaction (DEAL_FLAGS).
+    """
+    last = ticks["last"].astype(np.float64)
+    mid = (ticks["bid"].astype(np.float64) + ticks["ask"].astype(np.float64)) / 2.0
+    price = np.where(last != 0, last, mid)
+    times = ticks["time_msc"].astype(np.int64) // 1000
+    deal = (ticks["flags"].astype(np.int64) & DEAL_FLAGS) != 0
+    return times, price, np.where(deal, ticks["volume"].astype(np.float64), 0.0)
+
+
+def tick_quotes(ticks):
+    """(bid, ask) de chaque tick en float64 (copies: utilisables après recyclage d'un ring)."""
+    return ticks["bid"].astype(np.float64), ticks["ask"].astype(np.float64)
+
+
+def tick_spreads(ticks):
+    """Spread ask - bid de chaque tick (NaN si l'un des deux manque, ex. flux last-only)."""
+    bid = ticks["bid"].astype(np.float64)
+    ask = ticks["ask"].astype(np.float64)
+    return np.where((bid > 0) & (ask > 0), ask - bid, np.nan)
+
+
+def columns_to_bars(cols: dict) -> list[dict]:
+    """Colonnes numpy → list[dict] (format historyReady)."""
+    return [
+        {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for t, o, h, l, c, v in zip(
+            cols["time"].tolist(), cols["open"].tolist(), cols["high"].tolist(),
+            cols["low"].tolist(), cols["close"].tolist(), cols["volume"].tolist(),
+        )
+    ]
+
+
+class ColumnBars(Sequence):
+    """
+    Historique en colonnes numpy (time int64 + OHLCV float64) vu comme une list[dict] en lecture
+    seule: len, index (une barre → un dict), tranche (vue sans copie), itération. Les consommateurs
+    qui savent lire des colonnes passent par .columns (payload, LOD, indicateurs, bars_before) ;
+    aucun dict n'est construit pour tout l'historique au chargement d'un fichier.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, cols: dict):
+        self.columns = cols
+
+    def __len__(self) -> int:
+        return len(self.columns["time"])
+
+    def __getitem__(self, i):
+        cols = self.columns
+        if isinstance(i, slice):
+            return ColumnBars({k: v[i] for k, v in cols.items()})
+        return {"time": int(cols["time"][i]), "open": float(cols["open"][i]), "high": float(cols["high"][i]),
+                "low": float(cols["low"][i]), "close": float(cols["close"][i]), "volume": float(cols["volume"][i])}
+
+    def __iter__(self):
+        return iter(columns_to_bars(self.columns))
 
-        cur = Bar(time=self.slot, open=self.o, high=self.h, low=self.l, close=self.c, volume=self.v)
-        return closed, cur
+    def tolist(self) -> list[dict]:
+        return columns_to_bars(self.columns)
@@ -0,0 +1,183 @@
+# app/data/scheduler.py
+from __future__ import annotations
+
+import math
+import time
+
+
+class _SymbolPollState:
+    __slots__ = ("interval_ms", "next_due", "last_poll", "last_change",
+                 "tick_rate", "polls", "ticks", "missed", "backlog", "session_open")
+
+    def __init__(self, interval_ms: float, now: float):
+        self.interval_ms = interval_ms
+        self.next_due = now
+        self.last_poll = 0.0
+        self.last_change = now
+        self.tick_rate = 0.0         # EWMA ticks/s
+        self.polls = 0               # compteurs depuis le dernier metrics()
+        self.ticks = 0
+        self.missed = 0              # ticks manqués estimés (mode snapshot)
+        self.backlog = False         # batch plein → il reste des ticks à drainer
+        self.session_open = True     # d'après symbol_info (trade_mode)
+
+
+class PollScheduler:
+    """
+    Ordonnanceur des polls MT5, partagé par tous les symboles du DataWorker.
+
+      - intervalle par symbole adapté au débit de ticks observé (EWMA):
+        ~`target_ticks` ticks par poll, borné entre min_ms et max_ms ;
+        un symbole sans tick recule progressivement vers max_ms (illiquide).
+      - mise en sommeil (dormant_ms) hors session: trade_mode désactivé
+        ou aucun tick depuis `stale_sec` (week-end, fermeture...).
+      - budget global d'appels MT5/s partagé: si la somme des fréquences
+        demandées dépasse le budget, tous les intervalles sont étirés.
+    """
+
+    def __init__(self,
+                 min_ms: int = 20, max_ms: int = 500, dormant_ms: int = 5000,
+                 budget_per_sec: float = 200.0, target_ticks: float = 1.0,
+                 stale_sec: float = 300.0, alpha: float = 0.3):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.dormant_ms = dormant_ms
+        self.budget_per_sec = budget_per_sec
+        self.target_ticks = target_ticks
+        self.stale_sec = stale_sec
+        self.alpha = alpha
+
+        self._states: dict[str, _SymbolPollState] = {}
+        self._scale = 1.0            # étirement dû au budget global
+        self._cycles = 0
+        self._metrics_t0 = time.monotonic()
+
+    # ---------- symboles ----------
+
+    def add(self, symbol: str):
+        if symbol not in self._states:
+            self._states[symbol] = _SymbolPollState(self.min_ms, time.monotonic())
+            self._rebalance()
+
+    def remove(self, symbol: str):
+        if self._states.pop(symbol, None) is not None:
+            self._rebalance()
+
+    def set_session(self, symbol: str, is_open: bool):
+        st = self._states.get(symbol)
+        if st is not None and st.session_open != is_open:
+            st.session_open = is_open
+            self._rebalance()
+
+    def is_dormant(self, symbol: str, now: float | None = None) -> bool:
+        st = self._states.get(symbol)
+        if st is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return self._dormant(st, now)
+
+    # ---------- cycle ----------
+
+    def due(self, now: float | None = None) -> list[str]:
+        """Symboles à poller maintenant."""
+        now = time.monotonic() if now is None else now
+        out = [s for s, st in self._states.items() if st.next_due <= now]
+        if out:
+            self._cycles += 1
+        return out
+
+    def observe(self, symbol: str, new_ticks: int, now: float | None = None, backlog: bool = False):
+        """Résultat d'un poll: nb de nouveaux ticks reçus (et batch tronqué ou non)."""
+        st = self._states.get(symbol)
+        if st is None:
+            return
+        now = time.monotonic() if now is None else now
+        dt = now - st.last_poll if st.last_poll else st.interval_ms / 1000.0
+        st.last_poll = now
+        st.polls += 1
+        st.ticks += new_ticks
+        st.backlog = backlog
+
+        if dt > 0:
+            inst = new_ticks / dt
+            st.tick_rate = self.alpha * inst + (1.0 - self.alpha) * st.tick_rate
+        if new_ticks > 0:
+            st.last_change = now
+
+        st.interval_ms = self._desired_interval(st, now)
+        self._rebalance()
+        st.next_due = now + (0.0 if backlog else self._effective_ms(st, now) / 1000.0)
+
+    def note_missed(self, symbol: str, n: int):
+        st = self._states.get(symbol)
+        if st is not None and n > 0:
+            st.missed += n
+
+    def next_delay_ms(self, now: float | None = None) -> int:
+        """Délai avant la prochaine échéance (pour ré-armer le QTimer single-shot)."""
+        if not self._states:
+            return self.max_ms
+        now = time.monotonic() if now is None else now
+        nxt = min(st.next_due for st in self._states.values())
+        return max(0, math.ceil((nxt - now) * 1000.0))   # arrondi haut: pas de ré-armement à 0 ms avant l'échéance
+
+    # ---------- métriques ----------
+
+    def metrics(self) -> dict:
+        """Débit effectif + estimation des ticks manqués depuis le dernier appel (remet les compteurs à zéro)."""
+        now = time.monotonic()
+        span = max(1e-6, now - self._metrics_t0)
+        symbols = {}
+        total_polls = 0
+        total_missed = 0
+        for sym, st in self._states.items():
+            symbols[sym] = {
+                "interval_ms": round(self._effective_ms(st, now), 1),
+                "poll_hz": round(st.polls / span, 2),
+                "tick_rate": round(st.tick_rate, 2),
+                "ticks": st.ticks,
+                "missed_est": st.missed,
+                "dormant": self._dormant(st, now),
+                "backlog": st.backlog,
+            }
+            total_polls += st.polls
+            total_missed += st.missed
+            st.polls = st.ticks = st.missed = 0
+        out = {
+            "calls_per_sec": round(total_polls / span, 2),
+            "cycles_per_sec": round(self._cycles / span, 2),
+            "budget_scale": round(self._scale, 2),
+            "missed_est": total_missed,
+            "symbols": symbols,
+        }
+        self._cycles = 0
+        self._metrics_t0 = now
+        return out
+
+    # ---------- interne ----------
+
+    def _dormant(self, st: _SymbolPollState, now: float) -> bool:
+        return (not st.session_open) or (now - st.last_change) > self.stale_sec
+
+    def _desired_interval(self, st: _SymbolPollState, now: float) -> float:
+        if self._dormant(st, now):
+            return float(self.dormant_ms)
+        if st.backlog:
+            return float(self.min_ms)
+        if st.tick_rate > 1e-3:
+            ms = 1000.0 * self.target_ticks / st.tick_rate
+        else:
+            # pas de tick récent: on recule doucement (symbole illiquide)
+            ms = st.interval_ms * 1.5
+        return max(float(self.min_ms), min(float(self.max_ms), ms))
+
+    def _effective_ms(self, st: _SymbolPollState, now: float) -> float:
+        if self._dormant(st, now):
+            return float(self.dormant_ms)
+        return st.interval_ms * self._scale
+
+    def _rebalance(self):
+        """Étire les intervalles si la somme des fréquences dépasse le budget global."""
+        demand = sum(1000.0 / st.interval_ms for st in self._states.values()
+                     if st.interval_ms > 0 and st.session_open)
+        self._scale = max(1.0, demand / self.budget_per_sec) if self.budget_per_sec > 0 else 1.0
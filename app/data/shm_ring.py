@@ -0,0 +1,202 @@
+# app/data/shm_ring.py
+"""
+Ring buffer en mémoire partagée (multiprocessing.shared_memory), un écrivain / N lecteurs,
+sans verrou: le process feed publie, le GUI et les autres consommateurs (backtests, alertes,
+screener...) lisent les enregistrements directement dans le segment, sans copie.
+
+Layout du segment:
+  [en-tête 64 o][table des symboles SYMBOL_SLOTS × 16 o][capacity × enregistrement]
+
+Numéros de séquence (0 = rien publié):
+  - reserve_seq : écrit AVANT les enregistrements (« je vais écraser jusqu'à ce seq »)
+  - commit_seq  : écrit APRÈS (« tout jusqu'à ce seq est lisible »)
+  - chaque enregistrement porte aussi son propre champ `seq`
+Le lecteur garde son curseur ; s'il a plus de `capacity` enregistrements de retard il saute
+au plus ancien encore présent et compte les pertes (overrun). Une lecture sans copie reste
+valide tant que reserve_seq - capacity < seq lu: `torn()` le vérifie après coup.
+
+L'ordre des écritures (données puis commit_seq) repose sur le modèle mémoire x86-64 (TSO),
+celui des terminaux MT5.
+"""
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+MAGIC = 0x4D545246            # "MTRF"
+HEADER_BYTES = 64
+SYMBOL_SLOTS = 256
+SYMBOL_BYTES = 16
+
+_HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"), ("record_size", "<u4"), ("capacity", "<u8"),
+    ("reserve_seq", "<u8"), ("commit_seq", "<u8"), ("n_symbols", "<u8"),
+    ("_pad", "V24"),
+])
+
+# Ticks bruts MT5 (mêmes noms de champs que copy_ticks_from → resample.tick_prices s'applique tel quel)
+TICK_RECORD = np.dtype([
+    ("seq", "<u8"), ("sym", "<u4"), ("flags", "<u4"),
+    ("time_msc", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<f8"),
+])
+
+# Barres M1 agrégées par le feed (closed=0: bougie courante, mise à jour à chaque batch)
+BAR_RECORD = np.dtype([
+    ("seq", "<u8"), ("sym", "<u4"), ("closed", "<u4"),
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+
+
+class ShmRing:
+    """Segment partagé + vues numpy (en-tête, table des symboles, enregistrements)."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, dtype: np.dtype, owner: bool):
+        self.shm = shm
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self._hdr = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        if int(self._hdr["magic"]) != MAGIC or int(self._hdr["record_size"]) != self.dtype.itemsize:
+            raise ValueError(f"segment {shm.name}: en-tête invalide ou dtype différent")
+        self.capacity = int(self._hdr["capacity"])
+        self._names = np.ndarray((SYMBOL_SLOTS,), dtype=f"S{SYMBOL_BYTES}", buffer=shm.buf, offset=HEADER_BYTES)
+        self.records = np.ndarray((self.capacity,), dtype=self.dtype, buffer=shm.buf,
+                                  offset=HEADER_BYTES + SYMBOL_SLOTS * SYMBOL_BYTES)
+        self._ids: dict[str, int] = {}
+        self._by_id: dict[int, str] = {}
+
+    @classmethod
+    def create(cls, name: str, dtype: np.dtype, capacity: int) -> "ShmRing":
+        dtype = np.dtype(dtype)
+        size = HEADER_BYTES + SYMBOL_SLOTS * SYMBOL_BYTES + capacity * dtype.itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        hdr = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        hdr[()] = np.zeros((), dtype=_HEADER_DTYPE)
+        hdr["record_size"] = dtype.itemsize
+        hdr["capacity"] = capacity
+        hdr["magic"] = MAGIC
+        return cls(shm, dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, dtype: np.dtype) -> "ShmRing":
+        return cls(shared_memory.SharedMemory(name=name), dtype, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def commit_seq(self) -> int:
+        return int(self._hdr["commit_seq"])
+
+    @property
+    def reserve_seq(self) -> int:
+        return int(self._hdr["reserve_seq"])
+
+    def close(self):
+        # les vues numpy retiennent le buffer: on les lâche avant de fermer le segment
+        self._hdr = self._names = self.records = None
+        try:
+            self.shm.close()
+        except BufferError:
+            print(f"⚠️ {self.shm.name}: vues encore référencées, segment fermé à la fin du process")
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ---------- table des symboles ----------
+
+    def symbol_id(self, symbol: str) -> int:
+        """Côté écrivain: id du symbole (enregistré au premier usage, avant tout enregistrement qui le cite)."""
+        sid = self._ids.get(symbol)
+        if sid is not None:
+            return sid
+        n = int(self._hdr["n_symbols"])
+        for i in range(n):
+            if self._names[i].decode() == symbol:
+                self._ids[symbol] = i
+                return i
+        if n >= SYMBOL_SLOTS:
+            raise OverflowError("table des symboles pleine")
+        self._names[n] = symbol.encode()[:SYMBOL_BYTES]
+        self._hdr["n_symbols"] = n + 1
+        self._ids[symbol] = n
+        return n
+
+    def symbol_name(self, sid: int) -> Optional[str]:
+        """Côté lecteur: nom du symbole d'un id (None si inconnu)."""
+        name = self._by_id.get(sid)
+        if name is None and 0 <= sid < int(self._hdr["n_symbols"]):
+            name = self._by_id[sid] = self._names[sid].decode()
+        return name
+
+    # ---------- écrivain (un seul) ----------
+
+    def publish(self, rows: np.ndarray) -> int:
+        """Publie `rows` (dtype du ring, champ seq ignoré/écrasé). Retourne le nouveau commit_seq."""
+        n = len(rows)
+        seq = int(self._hdr["commit_seq"])
+        if n == 0:
+            return seq
+        if n > self.capacity:        # plus que le ring: seuls les derniers survivraient de toute façon
+            seq += n - self.capacity
+            rows = rows[-self.capacity:]
+            n = self.capacity
+        self._hdr["reserve_seq"] = seq + n
+        pos = seq % self.capacity
+        first = min(n, self.capacity - pos)
+        dst = self.records[pos:pos + first]
+        dst[...] = rows[:first]
+        dst["seq"] = np.arange(seq + 1, seq + first + 1, dtype=np.uint64)
+        if first < n:
+            dst = self.records[:n - first]
+            dst[...] = rows[first:]
+            dst["seq"] = np.arange(seq + first + 1, seq + n + 1, dtype=np.uint64)
+        self._hdr["commit_seq"] = seq + n
+        return seq + n
+
+
+class RingReader:
+    """Curseur de lecture d'un ShmRing (un par consommateur, aucun état partagé)."""
+
+    def __init__(self, ring: ShmRing, from_start: bool = False):
+        self.ring = ring
+        self.next_seq = 1 if from_start else ring.commit_seq + 1
+        self.lost = 0            # enregistrements écrasés avant d'avoir été lus (overruns)
+        self._last_first = 0
+
+    def lag(self) -> int:
+        return max(0, self.ring.commit_seq + 1 - self.next_seq)
+
+    def read(self, max_n: int = 0) -> np.ndarray:
+        """
+        Prochains enregistrements publiés, en VUE sur le segment (aucune copie).
+        Au plus un bloc contigu: après un tour de ring, l'appel suivant lit la suite.
+        La vue peut être écrasée par l'écrivain ensuite → copier ce qu'on garde puis appeler torn().
+        """
+        ring = self.ring
+        commit = ring.commit_seq
+        oldest = max(1, ring.reserve_seq - ring.capacity + 1)
+        if self.next_seq < oldest:
+            self.lost += oldest - self.next_seq
+            self.next_seq = oldest
+        avail = commit + 1 - self.next_seq
+        if avail <= 0:
+            return ring.records[:0]
+        pos = (self.next_seq - 1) % ring.capacity
+        n = min(avail, ring.capacity - pos)
+        if max_n:
+            n = min(n, max_n)
+        self._last_first = self.next_seq
+        self.next_seq += n
+        return ring.records[pos:pos + n]
+
+    def torn(self) -> int:
+        """Nombre d'enregistrements du dernier read() écrasés depuis (à jeter, en tête de vue) ; compté dans lost."""
+        oldest = self.ring.reserve_seq - self.ring.capacity + 1
+        n = max(0, min(oldest, self.next_seq) - self._last_first)
+        self.lost += n
+        return n
@@ -0,0 +1,141 @@
+# app/data/source.py
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from app.config import DATA_SOURCE
+
+
+class _QObjectABCMeta(type(QObject), ABCMeta):
+    """Métaclasse QObject + ABC: une source sans start()/set_params() ne s'instancie pas."""
+
+
+class DataSource(QObject, metaclass=_QObjectABCMeta):
+    """
+    Interface commune des sources de données branchées sur MainWindow
+    (chart, indicateurs, chat). Vit dans son propre QThread:
+      - start()     : connecté à QThread.started (abstrait)
+      - shutdown()  : arrêt propre (QueuedConnection), émet finished
+      - set_params(): changement de symbole/timeframe → nouveau historyReady (abstrait)
+    Les autres slots ont un comportement par défaut (rien à suivre, rien à servir).
+
+    historyReady/barReady concernent le couple principal (le chart) ;
+    subHistoryReady/subBarReady les subscriptions additionnelles.
+    Une source sans flux live (fichiers) n'émet simplement jamais barReady.
+    """
+
+    # Les historiques voyagent en `object` (référence Python, aucune conversion):
+    # un pyqtSignal(list) convertit chaque dict en QVariantMap → ~0,6 s pour 86k barres.
+    historyReady = pyqtSignal(object) # list[dict]
+    barReady     = pyqtSignal(dict)   # dict
+    finished     = pyqtSignal()       # signal d’arrêt propre
+
+    subHistoryReady = pyqtSignal(str, str, object) # symbol, tf, list[dict]
+    subBarReady     = pyqtSignal(str, str, dict)   # symbol, tf, dict
+    metricsReady    = pyqtSignal(dict)             # métriques propres à la source
+
+    # Correctif d'une plage de barres déjà émise (backfill d'un trou): list[dict] triées,
+    # à fusionner par le consommateur (remplace toute la plage [premier.time, dernier.time])
+    historyPatch    = pyqtSignal(object)
+    subHistoryPatch = pyqtSignal(str, str, object)
+
+    # Qualité du flux du couple principal (live uniquement): série complète en colonnes
+    # (dict de listes: time, spread_min/avg/max, ticks, spikes, late) puis un point par barre émise
+    qualityReady    = pyqtSignal(object)
+    qualityUpdated  = pyqtSignal(dict)
+
+    # Carnet d'ordres (DOM): messages BookTracker {"symbol", "seq", "full", "depth", "levels"}
+    # — état complet puis seuls les niveaux modifiés ; "available": False si pas de carnet
+    bookUpdated     = pyqtSignal(object)
+
+    # Positions/ordres/compte: diffs par ticket {"added": [dict], "changed": [dict], "removed": [ticket]},
+    # compte complet quand il change, P&L latent {"profits": {ticket: profit}, "floating", "equity"}
+    positionsChanged = pyqtSignal(object)
+    ordersChanged    = pyqtSignal(object)
+    accountChanged   = pyqtSignal(dict)
+    pnlUpdated       = pyqtSignal(object)
+
+    # Chargement progressif vers le passé (request_older): jusqu'à `count` barres strictement
+    # antérieures à `before`, triées ; liste vide = début de l'historique atteint,
+    # None = lecture échouée (le chart retentera plus tard)
+    olderBarsReady   = pyqtSignal(str, str, object)   # symbol, tf, list[dict] | None
+
+    # Watchlist (set_watchlist): un lot par cycle, seulement les symboles qui ont bougé
+    # {symbole: {"bid", "ask", "spread" (points), "change_pct" (vs clôture D1 de la veille), "rsi" (D1, 14), "time"}}
+    quotesUpdated    = pyqtSignal(object)
+
+    def __init__(self, symbol: str, timeframe: str, depth: int = 5000):
+        super().__init__()
+        self.symbol = symbol
+        self.tf     = timeframe
+        self.depth  = depth
+
+    @pyqtSlot()
+    @abstractmethod
+    def start(self):
+        """Connexion à la source puis premier historyReady du couple (self.symbol, self.tf)."""
+
+    @pyqtSlot()
+    def shutdown(self):
+        self.finished.emit()
+
+    @pyqtSlot(str, str)
+    @abstractmethod
+    def set_params(self, symbol: str, timeframe: str):
+        """Nouveau couple principal: historyReady de (symbol, timeframe), puis son flux live s'il y en a un."""
+
+    # ----- optionnels -----
+
+    @pyqtSlot(list, list)
+    def set_prefetch_universe(self, symbols: list, timeframes: list):
+        pass
+
+    @pyqtSlot(str, str)
+    def subscribe(self, symbol: str, timeframe: str):
+        pass
+
+    @pyqtSlot(str, str)
+    def unsubscribe(self, symbol: str, timeframe: str):
+        pass
+
+    @pyqtSlot(str, str, int, int)
+    def request_older(self, symbol: str, timeframe: str, before: int, count: int):
+        self.olderBarsReady.emit(symbol, timeframe, [])
+
+    @pyqtSlot(str)
+    def book_subscribe(self, symbol: str):
+        pass
+
+    @pyqtSlot(str)
+    def book_unsubscribe(self, symbol: str):
+        pass
+
+    @pyqtSlot(list)
+    def set_watchlist(self, symbols: list):
+        pass
+
+
+def bars_before(bars: list[dict], before: int, count: int) -> list[dict]:
+    """Les `count` dernières barres d'un historique trié dont le time est < before (ColumnBars → tranche ColumnBars)."""
+    cols = getattr(bars, "columns", None)
+    if cols is not None:
+        i = int(np.searchsorted(cols["time"], before, side="left"))
+        return bars[max(0, i - count):i]
+    i = bisect_left(bars, before, key=lambda b: int(b["time"]))
+    return bars[max(0, i - count):i]
+
+
+def create_data_source(symbol: str, timeframe: str, depth: int = 5000, **services) -> DataSource:
+    """
+    Source choisie par DATA_SOURCE ("mt5" ou "file"). Import paresseux: pas de MT5 requis en mode fichier.
+    `services` (book, portfolio, watchlist) règle les services annexes du DataWorker ; ignoré en mode fichier.
+    """
+    if DATA_SOURCE == "file":
+        from .file_source import FileDataSource
+        return FileDataSource(symbol, timeframe, depth=depth)
+    from .mt5_source import DataWorker
+    return DataWorker(symbol, timeframe, depth=depth, **services)
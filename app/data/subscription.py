@@ -0,0 +1,308 @@
+# app/data/subscription.py
+from __future__ import annotations
+
+import numpy as np
+
+from .models import Bar
+from .quality import QualitySeries
+from .resample import (
+    MultiTimeframeAggregator, SPIKE_GUARD_PCT, bars_from_ticks, columns_to_bars, filter_ticks, merge_bars,
+)
+
+# Ticks gardés pendant un chargement d'historique (au-delà, les plus anciens sautent → backfill)
+TICK_REPLAY_MAX = 500_000
+
+# Debug console
+DEBUG = True
+def _dbg(*a):
+    if DEBUG:
+        print(*a)
+
+
+class Subscription:
+    """
+    État live d'un couple (symbole, timeframe) suivi par le DataWorker:
+      - son CandleAggregator (détenu par le MultiTimeframeAggregator du SymbolFeed)
+      - son historique (mis à jour en continu avec les barres live)
+    """
+
+    def __init__(self, feed: "SymbolFeed", tf: str, tf_sec: int, max_bars: int = 5000):
+        self.feed = feed
+        self.symbol = feed.symbol
+        self.tf = tf
+        self.tf_sec = tf_sec
+        # plafond de croissance live (l'historique initial n'est jamais tronqué)
+        self.max_bars = max_bars
+        self._cap = max_bars
+
+        self.agg = feed.mtf.add(tf, tf_sec)
+        self.history: list[dict] = []
+        # spread / ticks / rejets par barre (live uniquement)
+        self.quality = QualitySeries(tf_sec, feed.align_offset, max_bars=max_bars)
+        self.history_retry = 0
+        # des ticks ont pu être perdus depuis la dernière barre posée (poll en retard, ring écrasé,
+        # buffer de chargement plein): seul un trou vu dans cet état part en backfill
+        self.stalled = False
+        self._buf_dropped = False
+        self.replay_gap: tuple[int, int] | None = None   # trou vu pendant le rejeu de finish_loading
+
+        # Handoff avec le HistoryExecutor: tant qu'un historique (ou un delta) est en vol,
+        # les ticks du symbole sont bufferisés, puis rejoués une fois l'agrégateur seedé
+        self.loading = False
+        self.load_inflight = False
+        self._tick_buf: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._tick_buf_len = 0
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.symbol, self.tf)
+
+    # ---------- historique ----------
+
+    def set_history(self, bars: list[dict]):
+        """Remplace l'historique et seed l'agrégateur sur la dernière barre (fermée ou stub)."""
+        self.history = list(bars)
+        self._cap = max(self.max_bars, len(self.history))
+        self.agg = self.feed.mtf.reset(self.tf)
+        self.stalled = False   # l'historique broker couvre ce qui a pu être perdu avant
+        if self.history:
+            self.agg.seed(self.history[-1])
+            _dbg(f"[SEED] {self.symbol} {self.tf} agg.slot={self.agg.slot} (from last history bar)")
+        self.feed._debug_tick_count = 0
+
+    def prepend_history(self, bars: list[dict]):
+        """Barres plus anciennes (chargement progressif) ajoutées en tête, sans re-seed de l'agrégateur."""
+        self.history[:0] = bars   # en place: le cache garde la même liste
+        self._cap = max(self._cap, len(self.history))
+
+    # ---------- handoff historique ----------
+
+    def begin_loading(self):
+        self.loading = True
+
+    def buffer_ticks(self, times: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        self._tick_buf.append((times, prices, volumes))
+        self._tick_buf_len += len(times)
+        while self._tick_buf_len > TICK_REPLAY_MAX and len(self._tick_buf) > 1:
+            self._tick_buf_len -= len(self._tick_buf.pop(0)[0])
+            self._buf_dropped = True
+
+    def finish_loading(self, bars: list[dict]) -> int:
+        """
+        Pose l'historique, seed l'agrégateur sur sa dernière barre, puis rejoue les ticks
+        arrivés pendant le chargement (mêmes règles late/spike). Retourne le nb de ticks rejoués ;
+        si le buffer a perdu des ticks et que le rejeu saute des slots → self.replay_gap.
+        """
+        self.set_history(bars)
+        self.loading = False
+        self.stalled, self._buf_dropped = self._buf_dropped, False
+        self.replay_gap = None
+        buf, self._tick_buf, self._tick_buf_len = self._tick_buf, [], 0
+        if not buf or not self.history:
+            return 0
+
+        times = np.concatenate([b[0] for b in buf]).astype(np.int64)
+        prices = np.concatenate([b[1] for b in buf]).astype(np.float64)
+        volumes = np.concatenate([b[2] for b in buf]).astype(np.float64)
+        agg = self.agg
+        slots = ((times + agg.offset) // agg.tf) * agg.tf - agg.offset
+        keep, _, _ = filter_ticks(slots, prices, agg.slot, agg.c)
+        if not keep.any():
+            return 0
+        cols = bars_from_ticks(times[keep], prices[keep], volumes[keep], agg.tf,
+                               seed=agg.current(), align_offset=agg.offset)
+        rows = columns_to_bars(cols)
+        for d in rows:
+            gap = self.record(d)
+            if gap:
+                self.replay_gap = gap
+        agg.seed(rows[-1])
+        return int(keep.sum())
+
+    def record(self, bar: dict) -> tuple[int, int] | None:
+        """
+        Répercute une barre live (clôture ou courante) dans l'historique.
+        Retourne (dernière barre avant, nouvelle barre) si des slots ont été sautés alors que
+        des ticks ont pu être perdus (self.stalled) → à boucher par un backfill. Sans perte
+        possible, un slot vide est un marché calme (minute sans tick, fermeture, week-end).
+        """
+        h = self.history
+        t = int(bar["time"])
+        gap = None
+        if h and int(h[-1]["time"]) == t:
+            h[-1] = bar
+        elif not h or t > int(h[-1]["time"]):
+            if h and self.stalled and t - int(h[-1]["time"]) > self.tf_sec:
+                gap = (int(h[-1]["time"]), t)
+            self.stalled = False   # première barre après la perte: le trou éventuel est derrière
+            h.append(bar)
+            if len(h) > self._cap:
+                del h[: len(h) - self._cap]
+        return gap
+
+    def apply_patch(self, patch: list[dict]) -> bool:
+        """Fusionne des barres broker (backfill) dans l'historique. True si quelque chose a changé."""
+        if not patch:
+            return False
+        lo, hi = int(patch[0]["time"]), int(patch[-1]["time"])
+        before = [b for b in self.history if lo <= int(b["time"]) <= hi]
+        if before == patch:
+            return False
+        self.history[:] = merge_bars(self.history, patch)   # en place: le cache garde la même liste
+        return True
+
+
+class SymbolFeed:
+    """
+    Curseur de ticks partagé par toutes les subscriptions d'un même symbole:
+    un seul aller-retour MT5 par symbole et par cycle, puis un seul passage
+    dans le MultiTimeframeAggregator qui met à jour tous les timeframes suivis.
+    """
+
+    def __init__(self, symbol: str, align_offset: int = 0):
+        self.symbol = symbol
+        self.align_offset = align_offset
+        self.subs: dict[str, Subscription] = {}
+        self.mtf = MultiTimeframeAggregator(align_offset)
+
+        # Mode "snapshot": dernier tick.time vu (résolution seconde)
+        self.last_tick_time = 0
+        # Mode "ticks": curseur time_msc + nb de ticks déjà consommés à cette milliseconde
+        self.last_tick_msc = 0
+        self.last_msc_seen = 0
+
+        # Session (symbol_info) + audit des ticks manqués en mode snapshot
+        self.session_checked_at = 0.0
+        self.audit_at = 0.0
+        self.audit_from = 0
+        self.audit_seen = 0
+        # Mode snapshot: monotonic du dernier symbol_info_tick abouti (écart trop long = ticks perdus)
+        self.polled_at = 0.0
+
+        self._debug_tick_count = 0
+
+    def add(self, tf: str, tf_sec: int, max_bars: int = 5000) -> Subscription:
+        sub = self.subs.get(tf)
+        if sub is None:
+            sub = self.subs[tf] = Subscription(self, tf, tf_sec, max_bars=max_bars)
+        return sub
+
+    def remove(self, tf: str) -> Subscription | None:
+        self.mtf.remove(tf)
+        return self.subs.pop(tf, None)
+
+    def mark_stalled(self):
+        """Des ticks du symbole ont pu être perdus: le prochain trou de chaque timeframe sera backfillé."""
+        for sub in self.subs.values():
+            sub.stalled = True
+
+    def reset_cursor(self):
+        self.last_tick_time = 0
+        self.last_tick_msc = 0
+        self.last_msc_seen = 0
+
+    # ---------- ticks ----------
+
+    def apply_tick(self, ts: int, price: float, vol: float, closed: dict[str, list[Bar]]) -> bool:
+        """
+        Applique un tick à tous les timeframes du symbole (late-tick, spike guard, saut de slots).
+        Les barres clôturées sont ajoutées à closed[tf]. Retourne True si le tick est accepté.
+        """
+        ref = self.mtf.reference()
+
+        # ignore tick en retard
+        if ref is not None:
+            slot = ref.slot_of(ts)
+            if slot < ref.slot:
+                if DEBUG and self._debug_tick_count < 6:
+                    _dbg(f"[TICK] {self.symbol} skip late tick slot={slot} < agg.slot={ref.slot}")
+                    self._debug_tick_count += 1
+                return False
+
+        # [SPIKE_GUARD] ignore prix 0/négatif ou écart instantané >5% vs. close courant
+        if not price or price <= 0:
+            return False
+        prev_c = ref.c if ref is not None else None
+        if prev_c and prev_c > 0 and abs(price - prev_c) / prev_c > SPIKE_GUARD_PCT:
+            return False
+
+        self.mtf.update(ts, price, vol, closed)
+
+        if DEBUG and self._debug_tick_count < 6:
+            _dbg(f"[TICK] {self.symbol} ts={ts} price={price} closed={ {k: len(v) for k, v in closed.items()} }")
+            self._debug_tick_count += 1
+        return True
+
+    def ingest(self, times, prices, volumes, spreads, closed: dict[str, list[Bar]], bulk_min: int = 256) -> int:
+        """
+        Applique un batch de ticks (boucle tick par tick, ou vectorisé au-delà de bulk_min)
+        puis met à jour la qualité par barre de chaque subscription. Retourne le nb de ticks acceptés.
+        """
+        return int(self.ingest_mask(times, prices, volumes, spreads, closed, bulk_min).sum())
+
+    def ingest_mask(self, times, prices, volumes, spreads, closed: dict[str, list[Bar]],
+                    bulk_min: int = 256) -> np.ndarray:
+        """ingest(), mais retourne le masque des ticks acceptés (late/spike exclus)."""
+        ref = self.mtf.reference()
+        ref_slot = ref.slot if ref is not None else None
+        if len(times) >= bulk_min:
+            keep = self._apply_bulk(times, prices, volumes, closed)
+        else:
+            keep = np.fromiter(
+                (self.apply_tick(ts, price, vol, closed)
+                 for ts, price, vol in zip(times.tolist(), prices.tolist(), volumes.tolist())),
+                dtype=bool, count=len(times),
+            )
+        if self.subs and len(times):
+            self._record_quality(times, spreads, keep, ref, ref_slot)
+        return keep
+
+    def _record_quality(self, times, spreads, keep, ref, ref_slot):
+        """Classe les rejets (late = slot antérieur au dernier accepté, sinon spike) et date chaque tick à son arrivée."""
+        if ref is None:
+            ref = self.mtf.reference()
+        tf, off = ref.tf, ref.offset
+        slots = ((times + off) // tf) * tf - off
+        floor = np.iinfo(np.int64).min if ref_slot is None else int(ref_slot)
+        acc = np.maximum.accumulate(np.where(keep, slots, floor))
+        prev = np.empty_like(acc)
+        prev[0] = floor
+        prev[1:] = np.maximum(acc[:-1], floor)
+        late = ~keep & (slots < prev)
+        arrived = np.maximum(times, prev)
+        for sub in self.subs.values():
+            sub.quality.add(arrived, spreads, keep, late)
+
+    def _apply_bulk(self, times, prices, volumes, closed: dict[str, list[Bar]]) -> np.ndarray:
+        """
+        Variante vectorisée d'apply_tick pour les gros batches (rattrapage, backfill):
+        même filtrage (resample.filter_ticks) puis une réduction groupée par timeframe.
+        Retourne le masque des ticks acceptés.
+        """
+        if not self.mtf.aggs:
+            return prices > 0   # apply_tick sans agrégateur: ni late ni spike, prix > 0 seulement
+        # slots du timeframe le plus fin, même non amorcé: c'est la référence d'apply_tick dès le
+        # premier tick accepté (avant, la référence amorcée plus large donne le même verdict)
+        fine = next(iter(self.mtf.aggs.values()))
+        slots = ((times + fine.offset) // fine.tf) * fine.tf - fine.offset
+        ref = self.mtf.reference()
+        if ref is not None:
+            keep, _, _ = filter_ticks(slots, prices, ref.slot, ref.c)
+        else:
+            keep, _, _ = filter_ticks(slots, prices)
+        if not keep.any():
+            return keep
+
+        t, p, v = times[keep], prices[keep], volumes[keep]
+        for tf, agg in self.mtf.aggs.items():
+            cols = bars_from_ticks(t, p, v, agg.tf, seed=agg.current(), align_offset=agg.offset)
+            n = len(cols["time"])
+            rows = [
+                Bar(time=int(cols["time"][i]), open=float(cols["open"][i]), high=float(cols["high"][i]),
+                    low=float(cols["low"][i]), close=float(cols["close"][i]), volume=float(cols["volume"][i]))
+                for i in range(n)
+            ]
+            if n > 1:
+                closed.setdefault(tf, []).extend(rows[:-1])
+            agg.seed(rows[-1])
+        return keep
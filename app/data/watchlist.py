@@ -0,0 +1,136 @@
+# app/data/watchlist.py
+from __future__ import annotations
+
+from app.indicators.ta import _wilder_at
+
+RSI_PERIOD = 14
+DAILY_BARS = 60   # bougies D1 lues par symbole: clôture de la veille + amorce du RSI de Wilder
+
+
+class _Quote:
+    """Dernière cotation d'un symbole + état D1 (clôture de la veille, moyennes de Wilder à la veille)."""
+
+    __slots__ = ("bid", "ask", "quoted", "time", "msc", "point", "prev_close", "avg_gain", "avg_loss", "daily_at")
+
+    def __init__(self):
+        self.bid = self.ask = 0.0
+        self.quoted = False       # bid/ask d'un vrai tick (sinon clôture D1 en attendant: pas de spread)
+        self.time = 0
+        self.msc = 0              # time_msc du dernier symbol_info_tick (symboles sans flux)
+        self.point = 0.0
+        self.prev_close = 0.0
+        self.avg_gain: float | None = None
+        self.avg_loss: float | None = None
+        self.daily_at = 0.0       # monotonic du dernier chargement D1 (0 = jamais)
+
+
+class QuoteBoard:
+    """
+    Cotations de la watchlist côté DataWorker.
+      - mark(): bid/ask réels vus par le flux (ticks des subscriptions, ring) ou par un
+        symbol_info_tick (symboles sans subscription) → O(1), le symbole passe "sale" ;
+        une cotation à un seul côté (bid ou ask à 0) est ignorée
+      - set_daily(): clôtures D1 → variation du jour et RSI 14 (Wilder) recalculés à chaque
+        cotation à partir de l'état de la veille, sans relire l'historique
+      - take(): lignes des symboles qui ont bougé depuis le dernier appel, un seul lot par cycle
+    """
+
+    def __init__(self):
+        self._quotes: dict[str, _Quote] = {}
+        self._dirty: set[str] = set()
+
+    def symbols(self) -> list[str]:
+        return list(self._quotes)
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self._quotes
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+    def set_symbols(self, symbols: list[str]) -> tuple[list[str], list[str]]:
+        """Nouvelle liste (ordre ignoré ici) → (symboles ajoutés, symboles retirés)."""
+        wanted = list(dict.fromkeys(s for s in symbols if s))
+        added = [s for s in wanted if s not in self._quotes]
+        removed = [s for s in self._quotes if s not in wanted]
+        for s in removed:
+            del self._quotes[s]
+            self._dirty.discard(s)
+        for s in added:
+            self._quotes[s] = _Quote()
+        return added, removed
+
+    # ---------- flux ----------
+
+    def mark(self, symbol: str, bid: float, ask: float, t: int = 0):
+        q = self._quotes.get(symbol)
+        if q is None or bid <= 0 or ask <= 0 or (bid == q.bid and ask == q.ask and q.quoted):
+            return
+        q.bid, q.ask = bid, ask
+        q.quoted = True
+        if t:
+            q.time = t
+        self._dirty.add(symbol)
+
+    def mark_tick(self, symbol: str, tick) -> int:
+        """symbol_info_tick d'un symbole sans flux → 1 si c'est une nouvelle cotation, sinon 0."""
+        q = self._quotes.get(symbol)
+        if q is None or not tick:
+            return 0
+        msc = int(getattr(tick, "time_msc", 0) or int(tick.time) * 1000)
+        if msc == q.msc:
+            return 0
+        q.msc = msc
+        self.mark(symbol, float(tick.bid), float(tick.ask), int(tick.time))
+        return 1
+
+    # ---------- D1 ----------
+
+    def daily_due(self, now: float, max_age: float) -> list[str]:
+        """Symboles sans état D1, puis ceux dont l'état a plus de max_age secondes."""
+        never = [s for s, q in self._quotes.items() if not q.daily_at]
+        stale = [s for s, q in self._quotes.items() if q.daily_at and now - q.daily_at >= max_age]
+        return never + stale
+
+    def set_daily(self, symbol: str, closes: list[float], point: float, now: float):
+        """
+        closes: clôtures D1 triées, la dernière = jour en cours (remplacée en live par le mid).
+        RSI: moyennes de Wilder arrêtées à la veille, le jour en cours est recalculé à chaque cotation.
+        """
+        q = self._quotes.get(symbol)
+        if q is None:
+            return
+        q.daily_at = now   # même en échec (symbole inconnu...): pas de relecture avant max_age
+        q.point = point or q.point
+        if len(closes) >= 2:
+            q.prev_close = float(closes[-2])
+            last = len(closes) - 2
+            state = _wilder_at(closes[:-1], RSI_PERIOD, (last,)).get(last)
+            q.avg_gain, q.avg_loss = state if state else (None, None)
+        if not q.bid and closes:
+            q.bid = q.ask = float(closes[-1])   # pas encore de tick: dernier cours connu
+        self._dirty.add(symbol)
+
+    # ---------- sortie ----------
+
+    def take(self) -> dict[str, dict]:
+        """{symbole: {"bid", "ask", "spread", "change_pct", "rsi", "time"}} des symboles modifiés."""
+        if not self._dirty:
+            return {}
+        out = {s: self._row(self._quotes[s]) for s in self._dirty}
+        self._dirty.clear()
+        return out
+
+    @staticmethod
+    def _row(q: _Quote) -> dict:
+        mid = (q.bid + q.ask) / 2.0
+        change = (mid / q.prev_close - 1.0) * 100.0 if q.prev_close and mid else None
+        rsi = None
+        if q.avg_gain is not None and q.prev_close and mid:
+            ch = mid - q.prev_close
+            n = RSI_PERIOD
+            gain = (q.avg_gain * (n - 1) + max(ch, 0.0)) / n
+            loss = (q.avg_loss * (n - 1) + max(-ch, 0.0)) / n
+            rsi = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        spread = (q.ask - q.bid) / q.point if q.point and q.quoted else None
+        return {"bid": q.bid, "ask": q.ask, "spread": spread, "change_pct": change, "rsi": rsi, "time": q.time}
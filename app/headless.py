@@ -0,0 +1,277 @@
+# app/headless.py
+"""
+Mode headless: source de données + IndicatorEngine sans widgets ni WebEngine.
+
+    python main.py --headless --symbols EURUSD,GBPUSD --tf M1 [--out DIR] [--duration 60]
+
+Même chaîne que la GUI (DataSource dans son QThread, agrégation des ticks dans les
+CandleAggregator de la source, IndicatorEngine par couple) sur une simple QCoreApplication,
+sans les services annexes du DataWorker (carnet DOM, positions/compte, watchlist).
+Sortie en lignes compactes (une par événement), sur stdout ou en fichiers tournants:
+
+    H <sym> <tf> <n> <t_first> <t_last>                    historique chargé
+    B <sym> <tf> <t> <open> <high> <low> <close> <volume>  barre clôturée
+    U <sym> <tf> <t> <open> <high> <low> <close> <volume>  barre courante (--updates)
+    S <sym> <tf> <t> <label> <price>                       signal (TR↑, TR↓, VBO↑, VBO↓)
+    I <sym> <tf> <t> <ema20> <rsi14> <macd> <signal> <hist> indicateurs à la clôture
+    M <json>                                               métriques de la source (--metrics)
+
+Valeur absente = "-". --format jsonl écrit les mêmes événements en JSON (clé "k" = type).
+Les logs de diagnostic (print) partent sur stderr: stdout ne porte que les données.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from PyQt6.QtCore import QCoreApplication, QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+
+from app.config import (
+    DEFAULT_SYMBOL, DEFAULT_TIMEFRAME,
+    HEADLESS_OUT, HEADLESS_FORMAT, HEADLESS_ROTATE_MB, HEADLESS_BACKUPS,
+)
+from app.data.source import create_data_source
+from app.indicators.ta import IndicatorEngine
+
+
+def _num(v) -> str:
+    return "-" if v is None else f"{v:.10g}"
+
+
+def _rss_mb() -> float | None:
+    """Pic de mémoire résidente du process (Mo) ; None si indisponible (Windows sans resource)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024.0 if sys.platform != "darwin" else kb / 1024.0 / 1024.0
+
+
+class LineWriter:
+    """Événements → lignes compactes (ou JSONL), sur un flux ou des fichiers tournants."""
+
+    def __init__(self, out: str = "-", fmt: str = "line", rotate_mb: float = 50, backups: int = 10,
+                 stream=None):
+        self.fmt = fmt
+        self.lines = 0
+        self._log = logging.getLogger("app.headless.out")
+        self._log.propagate = False
+        self._log.setLevel(logging.INFO)
+        for h in list(self._log.handlers):
+            self._log.removeHandler(h)
+        if out == "-":
+            handler = logging.StreamHandler(stream or sys.stdout)
+        else:
+            Path(out).mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(Path(out) / "feed.log", maxBytes=int(rotate_mb * 1024 * 1024),
+                                          backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._log.addHandler(handler)
+
+    def write(self, kind: str, fields: dict):
+        if self.fmt == "jsonl":
+            line = json.dumps({"k": kind, **fields}, separators=(",", ":"), ensure_ascii=False)
+        elif kind == "M":
+            line = "M " + json.dumps(fields, separators=(",", ":"))
+        else:
+            line = kind + " " + " ".join(v if isinstance(v, str) else _num(v) for v in fields.values())
+        self._log.info(line)
+        self.lines += 1
+
+    def close(self):
+        for h in list(self._log.handlers):
+            h.flush()
+            h.close()
+            self._log.removeHandler(h)
+
+
+class _Pair:
+    """État d'un couple suivi: moteur d'indicateurs + dernière version de la barre courante."""
+
+    def __init__(self, symbol: str, tf: str):
+        self.symbol = symbol
+        self.tf = tf
+        self.indic = IndicatorEngine()
+        self.last: dict | None = None
+        self.loaded = False
+
+
+class HeadlessRunner(QObject):
+    """
+    Branche une DataSource (dans son QThread, comme MainWindow) sur un IndicatorEngine par couple
+    et écrit barres clôturées, signaux et snapshots d'indicateurs via un LineWriter.
+    """
+
+    subscribeRequested = pyqtSignal(str, str)
+    requestShutdown = pyqtSignal()
+
+    def __init__(self, pairs: list[tuple[str, str]], writer: LineWriter,
+                 updates: bool = False, metrics: bool = False, t0: float | None = None):
+        super().__init__()
+        self.writer = writer
+        self.updates = updates
+        self.t0 = t0 or time.perf_counter()
+        self.ready_ms: float | None = None
+        self.pairs = {p: _Pair(*p) for p in pairs}
+        self.primary = pairs[0]
+
+        self.thread = QThread()
+        # ni carnet, ni positions/compte, ni watchlist: rien ici ne lit ces signaux
+        self.source = create_data_source(*self.primary, depth=5000,
+                                         book=False, portfolio=False, watchlist=False)
+        self.source.moveToThread(self.thread)
+        self.thread.started.connect(self.source.start)
+        self.source.finished.connect(self.thread.quit)
+
+        self.source.historyReady.connect(self._on_history)
+        self.source.barReady.connect(self._on_bar)
+        self.source.historyPatch.connect(self._on_patch)
+        self.source.subHistoryReady.connect(self._on_sub_history)
+        self.source.subBarReady.connect(self._on_sub_bar)
+        self.source.subHistoryPatch.connect(self._on_sub_patch)
+        if metrics:
+            self.source.metricsReady.connect(lambda m: self.writer.write("M", m))
+        self.subscribeRequested.connect(self.source.subscribe)
+        self.requestShutdown.connect(self.source.shutdown)
+
+    def start(self):
+        self.thread.start()
+        for sym, tf in list(self.pairs)[1:]:
+            self.subscribeRequested.emit(sym, tf)
+
+    def stop(self, timeout_ms: int = 5000):
+        if self.thread.isRunning():
+            self.requestShutdown.emit()
+            if not self.thread.wait(timeout_ms):
+                self.thread.quit()
+                self.thread.wait(2000)
+        self.writer.close()
+
+    # ---------- routage (le primaire passe par historyReady/barReady, les autres par sub*) ----------
+
+    @pyqtSlot(object)
+    def _on_history(self, bars: list):
+        self._history(self.pairs[self.primary], bars)
+
+    @pyqtSlot(dict)
+    def _on_bar(self, bar: dict):
+        self._bar(self.pairs[self.primary], bar)
+
+    @pyqtSlot(object)
+    def _on_patch(self, patch: list):
+        self.pairs[self.primary].indic.merge_history(patch)
+
+    @pyqtSlot(str, str, object)
+    def _on_sub_history(self, symbol: str, tf: str, bars: list):
+        if (symbol, tf) != self.primary and (symbol, tf) in self.pairs:
+            self._history(self.pairs[(symbol, tf)], bars)
+
+    @pyqtSlot(str, str, dict)
+    def _on_sub_bar(self, symbol: str, tf: str, bar: dict):
+        if (symbol, tf) != self.primary and (symbol, tf) in self.pairs:
+            self._bar(self.pairs[(symbol, tf)], bar)
+
+    @pyqtSlot(str, str, object)
+    def _on_sub_patch(self, symbol: str, tf: str, patch: list):
+        if (symbol, tf) != self.primary and (symbol, tf) in self.pairs:
+            self.pairs[(symbol, tf)].indic.merge_history(patch)
+
+    # ---------- traitement ----------
+
+    def _history(self, p: _Pair, bars: list):
+        p.indic.set_history(bars)
+        p.last = dict(bars[-1]) if bars else None
+        p.loaded = True
+        self.writer.write("H", {"s": p.symbol, "tf": p.tf, "n": len(bars),
+                                "from": bars[0]["time"] if bars else None,
+                                "to": bars[-1]["time"] if bars else None})
+        if self.ready_ms is None and all(x.loaded for x in self.pairs.values()):
+            self.ready_ms = (time.perf_counter() - self.t0) * 1000.0
+            rss = _rss_mb()
+            print(f"⏱ headless prêt en {self.ready_ms:.0f} ms" + (f" · RSS {rss:.0f} Mo" if rss else ""),
+                  file=sys.stderr)
+
+    def _bar(self, p: _Pair, bar: dict):
+        if not p.loaded:
+            return
+        if p.last is not None and int(bar["time"]) > int(p.last["time"]):
+            # nouvelle barre → la précédente (dernière version reçue) est close
+            self._write_bar("B", p, p.last)
+            snap = p.indic.latest_snapshot()
+            self.writer.write("I", {"s": p.symbol, "tf": p.tf, "t": p.last["time"], "ema20": snap.ema20,
+                                    "rsi14": snap.rsi14, "macd": snap.macd, "signal": snap.macd_signal,
+                                    "hist": snap.macd_hist})
+        p.last = dict(bar)
+        pts = p.indic.on_bar(bar)
+        if self.updates:
+            self._write_bar("U", p, bar)
+        markers = (pts or {}).get("markers") or {}
+        for m in (markers.get("trendRider") or []) + (markers.get("volBreakout") or []):
+            self.writer.write("S", {"s": p.symbol, "tf": p.tf, "t": m["time"], "label": m["text"],
+                                    "price": m["price"]})
+
+    def _write_bar(self, kind: str, p: _Pair, b: dict):
+        self.writer.write(kind, {"s": p.symbol, "tf": p.tf, "t": b["time"], "o": b["open"], "h": b["high"],
+                                 "l": b["low"], "c": b["close"], "v": b.get("volume")})
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="main.py --headless", description="Feed + indicateurs + signaux sans GUI")
+    ap.add_argument("--symbols", default=DEFAULT_SYMBOL, help="liste séparée par des virgules (le 1er = principal)")
+    ap.add_argument("--tf", default=DEFAULT_TIMEFRAME, help="timeframe(s), séparés par des virgules")
+    ap.add_argument("--out", default=HEADLESS_OUT, help='"-" = stdout, sinon dossier de fichiers tournants')
+    ap.add_argument("--format", choices=("line", "jsonl"), default=HEADLESS_FORMAT)
+    ap.add_argument("--rotate-mb", type=float, default=HEADLESS_ROTATE_MB)
+    ap.add_argument("--backups", type=int, default=HEADLESS_BACKUPS)
+    ap.add_argument("--updates", action="store_true", help="écrit aussi chaque mise à jour de la barre courante")
+    ap.add_argument("--metrics", action="store_true", help="écrit les métriques de la source (lignes M)")
+    ap.add_argument("--duration", type=float, default=0, help="arrêt après N secondes (benchs) ; 0 = jusqu'à Ctrl+C")
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None, t0: float | None = None, stream=None) -> int:
+    """stream: flux des données (défaut: stdout) ; les print() de diagnostic partent sur stderr."""
+    t0 = t0 or time.perf_counter()
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    pairs = [(s.strip(), tf.strip()) for s in args.symbols.split(",") if s.strip()
+             for tf in args.tf.split(",") if tf.strip()]
+    if not pairs:
+        print("❌ aucun couple symbole/timeframe", file=sys.stderr)
+        return 2
+
+    real_stdout = sys.stdout
+    data_out = stream or real_stdout
+    sys.stdout = sys.stderr   # les print() de la source ne doivent pas se mêler aux données
+    app = QCoreApplication(sys.argv[:1])
+    writer = LineWriter(args.out, args.format, args.rotate_mb, args.backups, stream=data_out)
+    runner = HeadlessRunner(pairs, writer, updates=args.updates, metrics=args.metrics, t0=t0)
+
+    # Ctrl+C / SIGTERM: Python ne traite les signaux qu'entre deux instructions → petit timer de réveil
+    for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)):
+        if sig is not None:
+            signal.signal(sig, lambda *_: app.quit())
+    wake = QTimer()
+    wake.timeout.connect(lambda: None)
+    wake.start(250)
+    if args.duration > 0:
+        QTimer.singleShot(int(args.duration * 1000), app.quit)
+
+    runner.start()
+    code = app.exec()
+    runner.stop()
+    rss = _rss_mb()
+    print(f"🛑 headless arrêté · {writer.lines} lignes" + (f" · RSS max {rss:.0f} Mo" if rss else ""),
+          file=sys.stderr)
+    sys.stdout = real_stdout
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,17 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
-from math import isfinite
+from math import isfinite, sqrt
+from bisect import bisect_left, bisect_right
+
+from app.data.resample import merge_bars
 
 MAX_MARKERS = 600
 BB_PERIOD = 20
 BB_DEV = 2.0
 TR_COOLDOWN = 20      # barres min entre deux signaux Trend Rider
 VBO_COOLDOWN = 10     # barres min entre deux signaux VBO
+STEP_MIN_BARS = 128   # en dessous, on_bar recalcule tout (EMA100 pas encore amorcée)
 
 # ----------------- helpers -----------------
 def _ema_next(prev_ema: float, price: float, period: int) -> float:
@@ -79,6 +83,24 @@ def _rsi_wilder(values: List[float], period: int = 14) -> List[Optional[float]]:
         out[i] = rsi
     return out
 
+def _wilder_at(values: List[float], period: int, idxs: Tuple[int, ...]) -> Dict[int, Tuple[float, float]]:
+    """(moyenne des hausses, moyenne des baisses) de Wilder aux index demandés (ceux >= period)."""
+    n = len(values)
+    out: Dict[int, Tuple[float, float]] = {}
+    if n < period + 1:
+        return out
+    avg_gain = sum(max(values[i] - values[i - 1], 0.0) for i in range(1, period + 1)) / period
+    avg_loss = sum(max(values[i - 1] - values[i], 0.0) for i in range(1, period + 1)) / period
+    if period in idxs:
+        out[period] = (avg_gain, avg_loss)
+    for i in range(period + 1, n):
+        ch = values[i] - values[i - 1]
+        avg_gain = (avg_gain * (period - 1) + max(ch, 0.0)) / period
+        avg_loss = (avg_loss * (period - 1) + max(-ch, 0.0)) / period
+        if i in idxs:
+            out[i] = (avg_gain, avg_loss)
+    return out
+
 # ----------------- snapshot -----------------
 @dataclass
 class IndicatorSnapshot:
@@ -95,7 +117,9 @@ class IndicatorEngine:
                  ema_period: int = 20,
                  macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
                  rsi_period: int = 14):
-        self._bars: List[Dict[str, Any]] = []
+        self._bars: List[Dict[str, Any]] = []   # list[dict], ou ColumnBars tant qu'aucun tick ne l'a modifié
+        self._times: List[int] = []              # time/close de chaque barre, tenus à jour avec _bars
+        self._closes: List[float] = []
         self.ema_p = ema_period
         self.macd_fast = macd_fast
         self.macd_slow = macd_slow
@@ -114,6 +138,12 @@ class IndicatorEngine:
         self._bb_dn:  List[Optional[float]] = []
         self._bb_width: List[Optional[float]] = []
 
+        # états des récurrences aux deux dernières barres ([avant-dernière, dernière]):
+        # on_bar ne recalcule que la dernière barre à partir de l'avant-dernière
+        self._fast: List[Optional[float]] = [None, None]
+        self._slow: List[Optional[float]] = [None, None]
+        self._rsi_st: List[Optional[Tuple[float, float]]] = [None, None]
+
         self._markers_trend: List[Dict[str, Any]] = []
         self._markers_vbo:   List[Dict[str, Any]] = []
         self._last_tr_index: Optional[int] = None
@@ -131,9 +161,26 @@ class IndicatorEngine:
         return L[-cap:] if len(L) > cap else L
 
     # --------- batch ---------
+    @property
+    def bars(self) -> List[Dict[str, Any]]:
+        """Barres courantes du moteur (historique + live), en lecture seule."""
+        return self._bars
+
     def set_history(self, bars: List[Dict[str, Any]]) -> None:
-        self._bars = list(bars)
-        closes = [float(b["close"]) for b in self._bars]
+        # ColumnBars (source fichier): gardé tel quel, en lecture seule ; copié en list au premier tick
+        self._bars = bars if hasattr(bars, "columns") else list(bars)
+        self._compute()
+        self._rebuild_markers()
+
+    def _compute(self) -> None:
+        """Toutes les séries (hors markers) sur self._bars, plus l'état des récurrences en fin de série."""
+        cols = getattr(self._bars, "columns", None)
+        if cols is not None:
+            self._times, closes = cols["time"].tolist(), cols["close"].tolist()
+        else:
+            self._times = [int(b["time"]) for b in self._bars]
+            closes = [float(b["close"]) for b in self._bars]
+        self._closes = closes
 
         self._ema20  = _ema_series(closes, 20)
         self._ema100 = _ema_series(closes, 100)
@@ -161,7 +208,48 @@ class IndicatorEngine:
                 width[i] = (up[i] - dn[i]) / mid[i] if mid[i] else None
         self._bb_mid, self._bb_up, self._bb_dn, self._bb_width = mid, up, dn, width
 
-        # Rebuild markers
+        n = len(closes)
+        tail = (n - 2, n - 1)
+        self._fast = [ema_fast[i] if i >= 0 else None for i in tail]
+        self._slow = [ema_slow[i] if i >= 0 else None for i in tail]
+        st = _wilder_at(closes, self.rsi_p, tail)
+        self._rsi_st = [st.get(i) for i in tail]
+
+    def _step_last(self, appended: bool) -> None:
+        """Recalcule la seule dernière barre à partir de l'avant-dernière (O(1) par tick)."""
+        if appended:
+            self._fast[0], self._slow[0], self._rsi_st[0] = self._fast[1], self._slow[1], self._rsi_st[1]
+            for vs in (self._ema20, self._ema100, self._rsi14, self._macd, self._macd_sig, self._macd_hist,
+                       self._bb_mid, self._bb_up, self._bb_dn, self._bb_width):
+                vs.append(None)
+        i = len(self._bars) - 1
+        c = self._closes[i]
+        ch = c - self._closes[i - 1]
+
+        self._ema20[i]  = _ema_next(self._ema20[i - 1], c, 20)
+        self._ema100[i] = _ema_next(self._ema100[i - 1], c, 100)
+        self._fast[1] = _ema_next(self._fast[0], c, self.macd_fast)
+        self._slow[1] = _ema_next(self._slow[0], c, self.macd_slow)
+        self._macd[i] = self._fast[1] - self._slow[1]
+        self._macd_sig[i] = _ema_next(self._macd_sig[i - 1], self._macd[i], self.macd_signal)
+        self._macd_hist[i] = self._macd[i] - self._macd_sig[i]
+
+        p = self.rsi_p
+        avg_gain, avg_loss = self._rsi_st[0]
+        avg_gain = (avg_gain * (p - 1) + max(ch, 0.0)) / p
+        avg_loss = (avg_loss * (p - 1) + max(-ch, 0.0)) / p
+        self._rsi_st[1] = (avg_gain, avg_loss)
+        self._rsi14[i] = 100.0 if avg_loss == 0 else 100.0 - (100.0 / (1.0 + (avg_gain / avg_loss)))
+
+        w = self._closes[i - BB_PERIOD + 1:i + 1]
+        mid = sum(w) / BB_PERIOD
+        std = sqrt(max(0.0, sum(v * v for v in w) / BB_PERIOD - mid * mid))
+        self._bb_mid[i] = mid
+        self._bb_up[i] = mid + BB_DEV * std
+        self._bb_dn[i] = mid - BB_DEV * std
+        self._bb_width[i] = (self._bb_up[i] - self._bb_dn[i]) / mid if mid else None
+
+    def _rebuild_markers(self) -> None:
         self._markers_trend.clear()
         self._markers_vbo.clear()
         self._last_tr_index = self._last_vbo_index = None
@@ -172,47 +260,44 @@ class IndicatorEngine:
         self._markers_trend = self._cap(self._markers_trend)
         self._markers_vbo   = self._cap(self._markers_vbo)
 
+    def prepend_history(self, bars: List[Dict[str, Any]]) -> None:
+        """Ajoute des barres plus anciennes (chargement progressif du chart) puis recalcule tout."""
+        first = self._times[0] if self._times else None
+        older = [b for b in bars if first is None or int(b["time"]) < first]
+        if older:
+            self.set_history(older + self._bar_list())
+
+    def merge_history(self, patch: List[Dict[str, Any]]) -> None:
+        """Fusionne une plage de barres corrigées (backfill) puis recalcule tout."""
+        self.set_history(merge_bars(self._bar_list(), patch))
+
+    def _bar_list(self) -> List[Dict[str, Any]]:
+        """_bars modifiable: un ColumnBars devient une list[dict] (une fois)."""
+        if not isinstance(self._bars, list):
+            self._bars = list(self._bars)
+        return self._bars
+
     # --------- tick ---------
     def on_bar(self, bar: Dict[str, Any]) -> Dict[str, Any]:
         if not self._bars:
             return {}
-        if int(bar["time"]) == int(self._bars[-1]["time"]):
-            self._bars[-1] = dict(bar)
+        bars = self._bar_list()
+        t_prev = self._times[-1]
+        t = int(bar["time"])
+        if t == t_prev:
+            bars[-1] = dict(bar)
+            self._closes[-1] = float(bar["close"])
         else:
-            self._bars.append(dict(bar))
-
-        closes = [float(b["close"]) for b in self._bars]
-        t = int(self._bars[-1]["time"])
-
-        self._ema20   = _ema_series(closes, 20)
-        self._ema100  = _ema_series(closes, 100)
-        ema_fast      = _ema_series(closes, self.macd_fast)
-        ema_slow      = _ema_series(closes, self.macd_slow)
-        self._rsi14   = _rsi_wilder(closes, self.rsi_p)
-
-        macd_line = None
-        if ema_fast[-1] is not None and ema_slow[-1] is not None:
-            macd_line = ema_fast[-1] - ema_slow[-1]
-        if len(self._macd) != len(self._bars):
-            self._macd = [None] * len(self._bars)
-        self._macd[-1] = macd_line
-        self._macd_sig = _ema_series([m if m is not None else 0.0 for m in self._macd], self.macd_signal)
-        macd_hist_v = None
-        if macd_line is not None and self._macd_sig[-1] is not None:
-            macd_hist_v = macd_line - self._macd_sig[-1]
-        if len(self._macd_hist) != len(self._bars):
-            self._macd_hist = [None] * len(self._bars)
-        self._macd_hist[-1] = macd_hist_v
+            bars.append(dict(bar))
+            self._times.append(t)
+            self._closes.append(float(bar["close"]))
 
-        mid = _sma_series(closes, BB_PERIOD)
-        std = _std_window(closes, BB_PERIOD)
-        up, dn, width = [None]*len(closes), [None]*len(closes), [None]*len(closes)
-        for i in range(len(closes)):
-            if mid[i] is not None and std[i] is not None:
-                up[i] = mid[i] + BB_DEV*std[i]
-                dn[i] = mid[i] - BB_DEV*std[i]
-                width[i] = (up[i] - dn[i]) / mid[i] if mid[i] else None
-        self._bb_mid, self._bb_up, self._bb_dn, self._bb_width = mid, up, dn, width
+        # barre courante ou nouvelle barre: seule la dernière valeur de chaque série bouge
+        if len(self._bars) >= STEP_MIN_BARS and t >= t_prev and self._rsi_st[0] is not None:
+            self._step_last(appended=t > t_prev)
+        else:
+            self._compute()
+        macd_line, macd_hist_v = self._macd[-1], self._macd_hist[-1]
 
         # new signals for last index
         tr, vbo = self._signals_for_index(len(self._bars)-1)
@@ -231,38 +316,78 @@ class IndicatorEngine:
         }
 
     # --------- séries ---------
-    def series_for_chart(self) -> Dict[str, Any]:
-        times = [int(b["time"]) for b in self._bars]
+    def series_for_chart(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Séries complètes pour le chart ; since=t → seulement les points/markers de time >= t
+        (delta après on_bar ou merge_history: seules les barres >= t ont pu changer).
+        """
+        lo = 0 if since is None else bisect_left(self._times, int(since))
+        times = self._times[lo:]   # times[i - lo] = temps de la barre i
 
         def line(vs: List[Optional[float]]) -> List[Dict[str, float]]:
-            start = self._first_valid_index(vs)
+            start = max(lo, self._first_valid_index(vs))
             out: List[Dict[str, float]] = []
             for i in range(start, len(vs)):
                 v = vs[i]
                 if v is None or not isfinite(v): continue
-                out.append({"time": times[i], "value": float(v)})
+                out.append({"time": times[i - lo], "value": float(v)})
             return out
 
         def hist(vs: List[Optional[float]]) -> List[Dict[str, float]]:
-            start = self._first_valid_index(vs)
+            start = max(lo, self._first_valid_index(vs))
             out: List[Dict[str, float]] = []
             for i in range(start, len(vs)):
                 v = vs[i]
                 if v is None or not isfinite(v): continue
-                out.append({"time": times[i], "value": float(v),
+                out.append({"time": times[i - lo], "value": float(v),
                             "color": "#22c55e" if v >= 0 else "#ef4444"})
             return out
 
+        def markers(ms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            ms = self._cap(ms[:])
+            return ms if since is None else [m for m in ms if int(m["time"]) >= since]
+
         return {
             "ema20": line(self._ema20),
             "rsi14": line(self._rsi14),
             "macd": { "line": line(self._macd), "signal": line(self._macd_sig), "hist": hist(self._macd_hist) },
             "markers": {
-                "trendRider": self._cap(self._markers_trend[:]),
-                "volBreakout": self._cap(self._markers_vbo[:])
+                "trendRider": markers(self._markers_trend),
+                "volBreakout": markers(self._markers_vbo)
             }
         }
 
+    def series_at(self, idx: List[int], times: List[int]) -> Dict[str, Any]:
+        """
+        Séries échantillonnées (fenêtre décimée du chart): point k = valeur à la barre idx[k],
+        daté times[k] ; markers de la fenêtre ramenés au paquet qui les contient.
+        """
+        def line(vs: List[Optional[float]], colored: bool = False) -> List[Dict[str, Any]]:
+            out: List[Dict[str, Any]] = []
+            for i, t in zip(idx, times):
+                v = vs[i]
+                if v is None or not isfinite(v): continue
+                pt: Dict[str, Any] = {"time": t, "value": float(v)}
+                if colored:
+                    pt["color"] = "#22c55e" if v >= 0 else "#ef4444"
+                out.append(pt)
+            return out
+
+        t_end = self._times[idx[-1]] if idx else 0
+
+        def markers(ms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if not times:
+                return []
+            return [dict(m, time=times[bisect_right(times, int(m["time"])) - 1])
+                    for m in self._cap(ms[:]) if times[0] <= int(m["time"]) <= t_end]
+
+        return {
+            "ema20": line(self._ema20),
+            "rsi14": line(self._rsi14),
+            "macd": {"line": line(self._macd), "signal": line(self._macd_sig), "hist": line(self._macd_hist, True)},
+            "markers": {"trendRider": markers(self._markers_trend), "volBreakout": markers(self._markers_vbo)},
+        }
+
     def latest_snapshot(self) -> IndicatorSnapshot:
         def last(vs):
             for v in reversed(vs):
@@ -291,9 +416,9 @@ class IndicatorEngine:
     def _signals_for_index(self, i: int) -> Tuple[List[Dict[str,Any]], List[Dict[str,Any]]]:
         if i <= 0 or i >= len(self._bars):
             return [], []
-        t = int(self._bars[i]["time"])
-        c = float(self._bars[i]["close"])
-        c_prev = float(self._bars[i-1]["close"])
+        t = self._times[i]
+        c = self._closes[i]
+        c_prev = self._closes[i-1]
 
         tr_m, vbo_m = [], []
 
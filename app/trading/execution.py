@@ -0,0 +1,190 @@
+# app/trading/execution.py
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from app.config import (
+    MT5_PATH,
+    ORDER_DEVIATION_POINTS, ORDER_MAGIC, ORDER_DEDUP_MS, ORDER_QUEUE_MAX, ORDER_PRECHECK,
+)
+
+from app.data.mt5_api import MT5
+
+SIDES = ("buy", "sell")
+KINDS = ("market", "limit")
+
+# TRADE_RETCODE_* considérés comme un succès
+_OK_RETCODES = {10008, 10009, 10010}   # PLACED, DONE, DONE_PARTIAL
+
+
+class OrderExecutor(QObject):
+    """
+    Thread d'exécution des ordres: order_check/order_send (bloquants, aller-retour
+    serveur) ne tournent jamais dans le thread GUI ni dans celui du feed.
+
+    Protocole:
+      - submit(...) depuis le thread GUI (thread-safe) → dict ordre, status "queued",
+        "duplicate" (même ordre re-cliqué < ORDER_DEDUP_MS ou encore en vol) ou "busy" (file pleine)
+      - les ordres sortent de la file dans l'ordre des clics, un à la fois
+      - orderDone(dict) revient au GUI avec retcode, prix, et les horodatages
+        perf_counter de chaque étape (clicked, dequeued, checked, sent, acked)
+    """
+
+    ready     = pyqtSignal(bool, str)   # terminal prêt à trader ?, message
+    orderDone = pyqtSignal(object)      # dict ordre complété
+    _wake     = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._queue: deque[dict] = deque()
+        self._ids = itertools.count(1)
+        self._recent: dict[tuple, float] = {}   # clé ordre → dernier clic accepté (monotonic)
+        self._inflight: set[tuple] = set()
+        self._filling: dict[str, int] = {}      # symbole → ORDER_FILLING_* accepté
+        self._ok = False
+        self._wake.connect(self._drain)
+
+    # ---------- lifecycle ----------
+
+    @pyqtSlot()
+    def start(self):
+        """Connecté à QThread.started: connexion au terminal depuis le thread d'exécution."""
+        self._ok = bool(MT5.initialize() or MT5.initialize(path=MT5_PATH))
+        if self._ok:
+            print("✅ MT5 initialized (exécution)")
+            self.ready.emit(True, "")
+        else:
+            print("❌ MT5 init failed (exécution):", MT5.last_error())
+            self.ready.emit(False, str(MT5.last_error()))
+
+    @pyqtSlot()
+    def cancel_all(self):
+        """Vide la file: les ordres abandonnés libèrent leur clé (sinon « doublon » à jamais)."""
+        with self._lock:
+            for order in self._queue:
+                self._inflight.discard(order["key"])
+            self._queue.clear()
+
+    # ---------- API (thread GUI) ----------
+
+    def submit(self, symbol: str, side: str, kind: str, volume: float,
+               price: float | None = None, clicked_at: float | None = None) -> dict:
+        order = {
+            "id": next(self._ids), "symbol": symbol, "side": side, "kind": kind,
+            "volume": round(float(volume), 2), "price": price,
+            "stamps": {"clicked": clicked_at or time.perf_counter()},
+        }
+        if side not in SIDES or kind not in KINDS or (kind == "limit" and not price):
+            order.update(status="invalid", ok=False, comment="ordre incomplet")
+            return order
+        key = (symbol, side, kind, order["volume"], None if price is None else round(price, 8))
+        now = time.monotonic()
+        with self._lock:
+            if key in self._inflight or now - self._recent.get(key, -1e9) < ORDER_DEDUP_MS / 1000.0:
+                order.update(status="duplicate", ok=False, comment="doublon ignoré")
+                return order
+            if len(self._queue) >= ORDER_QUEUE_MAX:
+                order.update(status="busy", ok=False, comment="file d'ordres pleine")
+                return order
+            if len(self._recent) > 256:
+                self._recent = {k: t for k, t in self._recent.items() if now - t < ORDER_DEDUP_MS / 1000.0}
+            self._recent[key] = now
+            self._inflight.add(key)
+            order["key"] = key
+            order["status"] = "queued"
+            self._queue.append(order)
+        self._wake.emit()
+        return dict(order, stamps=dict(order["stamps"]))   # copie: l'original vit dans le thread d'exécution
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    # ---------- thread d'exécution ----------
+
+    @pyqtSlot()
+    def _drain(self):
+        with self._lock:
+            if not self._queue:
+                return
+            order = self._queue.popleft()
+        st = order["stamps"]
+        st["dequeued"] = time.perf_counter()
+        try:
+            self._execute(order)
+        except Exception as e:   # remonté au GUI, jamais avalé ici
+            order.update(ok=False, retcode=None, comment=f"{type(e).__name__}: {e}")
+        order["status"] = "done"
+        with self._lock:
+            self._inflight.discard(order.pop("key"))
+        self.orderDone.emit(order)
+
+    def _execute(self, order: dict):
+        st = order["stamps"]
+        if not self._ok:
+            order.update(ok=False, retcode=None, comment="terminal non connecté")
+            return
+        request = self._build_request(order)
+        if request is None:
+            order.update(ok=False, retcode=None, comment=f"symbole indisponible: {MT5.last_error()}")
+            return
+        if ORDER_PRECHECK:
+            check = MT5.order_check(request)
+            st["checked"] = time.perf_counter()
+            if check is None or check.retcode != 0:
+                order.update(ok=False, retcode=getattr(check, "retcode", None),
+                             comment=getattr(check, "comment", None) or str(MT5.last_error()))
+                return
+        st["sent"] = time.perf_counter()
+        res = MT5.order_send(request)
+        st["acked"] = time.perf_counter()
+        if res is None:
+            order.update(ok=False, retcode=None, comment=str(MT5.last_error()))
+            return
+        order.update(ok=res.retcode in _OK_RETCODES, retcode=res.retcode, comment=res.comment,
+                     deal=res.deal, ticket=res.order, fill_price=res.price, fill_volume=res.volume)
+
+    def _build_request(self, order: dict) -> dict | None:
+        sym = order["symbol"]
+        info = MT5.symbol_info(sym)
+        if info is None:
+            return None
+        buy = order["side"] == "buy"
+        req = {
+            "symbol": sym, "volume": order["volume"], "magic": ORDER_MAGIC,
+            "comment": f"ticket #{order['id']}", "type_time": MT5.ORDER_TIME_GTC,
+        }
+        if order["kind"] == "market":
+            tick = MT5.symbol_info_tick(sym)
+            if tick is None:
+                return None
+            req.update(action=MT5.TRADE_ACTION_DEAL, deviation=ORDER_DEVIATION_POINTS,
+                       type=MT5.ORDER_TYPE_BUY if buy else MT5.ORDER_TYPE_SELL,
+                       price=tick.ask if buy else tick.bid,
+                       type_filling=self._filling_for(sym, info.filling_mode))
+        else:
+            req.update(action=MT5.TRADE_ACTION_PENDING,
+                       type=MT5.ORDER_TYPE_BUY_LIMIT if buy else MT5.ORDER_TYPE_SELL_LIMIT,
+                       price=round(float(order["price"]), info.digits),
+                       type_filling=MT5.ORDER_FILLING_RETURN)
+        order["request_price"] = req["price"]
+        return req
+
+    def _filling_for(self, symbol: str, filling_mode: int) -> int:
+        """Mode de remplissage accepté par le symbole (bitmask SYMBOL_FILLING_*), mémorisé."""
+        mode = self._filling.get(symbol)
+        if mode is None:
+            if filling_mode & MT5.SYMBOL_FILLING_IOC:
+                mode = MT5.ORDER_FILLING_IOC
+            elif filling_mode & MT5.SYMBOL_FILLING_FOK:
+                mode = MT5.ORDER_FILLING_FOK
+            else:
+                mode = MT5.ORDER_FILLING_RETURN
+            self._filling[symbol] = mode
+        return mode
@@ -0,0 +1,78 @@
+# app/trading/latency.py
+from __future__ import annotations
+
+import json
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# Bornes hautes des cases (ms) ; la dernière case compte tout ce qui dépasse 5 s
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Étapes d'un ordre, dans l'ordre du pipeline:
+#   queue: clic → début de l'order_send (attente dans la file + order_check)
+#   check: order_check seul
+#   send : order_send → ack du broker (aller-retour serveur)
+#   ui   : ack → résultat affiché dans le thread GUI
+#   total: clic → résultat affiché
+STAGES = ("queue", "check", "send", "ui", "total")
+
+
+class LatencyHistogram:
+    """Histogramme à cases log + fenêtre des derniers échantillons (percentiles exacts)."""
+
+    def __init__(self, keep: int = 1000):
+        self.counts = np.zeros(len(BUCKETS_MS) + 1, dtype=np.int64)
+        self.samples: deque[float] = deque(maxlen=keep)
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def add(self, ms: float):
+        self.counts[np.searchsorted(BUCKETS_MS, ms, side="left")] += 1
+        self.samples.append(ms)
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"n": 0}
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, dtype=np.float64), (50, 95, 99))
+        return {"n": len(self), "p50": float(p50), "p95": float(p95), "p99": float(p99),
+                "max": max(self.samples)}
+
+
+class StageLatencies:
+    """
+    Un histogramme par étape, alimenté par les horodatages (perf_counter, s) d'un événement.
+    STAGES / SPANS (étape → horodatages de début et de fin) sont redéfinis par les pipelines
+    autres que celui des ordres.
+    """
+
+    STAGES: tuple[str, ...] = STAGES
+    SPANS: dict[str, tuple[str, str]] = {
+        "queue": ("clicked", "sent"),
+        "check": ("dequeued", "checked"),
+        "send": ("sent", "acked"),
+        "ui": ("acked", "shown"),
+        "total": ("clicked", "shown"),
+    }
+
+    def __init__(self, keep: int = 1000):
+        self.hist = {s: LatencyHistogram(keep) for s in self.STAGES}
+
+    def add(self, stamps: dict):
+        for stage, (a, b) in self.SPANS.items():
+            if stamps.get(a) is not None and stamps.get(b) is not None:
+                self.hist[stage].add((stamps[b] - stamps[a]) * 1000.0)
+
+    def summary(self) -> dict:
+        return {s: h.summary() for s, h in self.hist.items()}
+
+    def dump(self, path: str) -> Path:
+        """Percentiles + cases de chaque étape → fichier JSON (écrase le précédent)."""
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        data = {"buckets_ms": list(BUCKETS_MS),
+                "stages": {s: dict(h.summary(), counts=h.counts.tolist()) for s, h in self.hist.items()}}
+        out.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        return out
@@ -0,0 +1,184 @@
+# app/ui/dom_ladder.py
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from PyQt6.QtCore import Qt, QRectF, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QWidget
+
+FRAME_MS = 16          # repaint max ~60 fps, uniquement si le carnet a changé
+FLASH_MS = 450         # surbrillance d'un niveau modifié (fondu)
+
+_BG = QColor("#0f131a")
+_GRID = QColor("#1f2937")
+_TEXT = QColor("#e5e7eb")
+_MUTED = QColor("#9aa4b2")
+_BID = QColor("#22c55e")
+_ASK = QColor("#ef4444")
+_FLASH = QColor("#facc15")
+
+
+class DomLadder(QWidget):
+    """
+    Échelle de profondeur (DOM) du symbole courant, à côté du ChartView.
+    apply_update() ne fait que patcher les tableaux numpy (niveaux modifiés seulement) ;
+    le dessin est cadencé par un timer de frame et saute tant que rien n'a bougé.
+    """
+
+    priceClicked = pyqtSignal(float)   # prix de la ligne cliquée (→ prix limit du ticket)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumWidth(220)
+        self.symbol = ""
+        self.depth = 0
+        self.px = np.empty((2, 0))
+        self.vol = np.empty((2, 0))
+        self.changed_at = np.empty((2, 0))
+        self.available = True
+        self._seq = 0
+        self._digits = 5
+        self._dirty = True
+
+        self._font = QFont("Consolas")
+        self._font.setStyleHint(QFont.StyleHint.Monospace)
+        self._font.setPointSize(9)
+
+        self._frame = QTimer(self)
+        self._frame.setInterval(FRAME_MS)
+        self._frame.timeout.connect(self._on_frame)
+        self._frame.start()
+
+    # ---------- API ----------
+
+    @pyqtSlot(str, str)
+    def set_symbol(self, symbol: str, _timeframe: str = ""):
+        if symbol == self.symbol:
+            return
+        self.symbol = symbol
+        self._reset(self.depth)
+        self._dirty = True
+
+    @pyqtSlot(object)
+    def apply_update(self, msg: dict):
+        """Message BookTracker: full (état complet) ou diff [side, niveau, prix, volume]."""
+        if msg.get("symbol") != self.symbol:
+            return
+        if msg.get("full") or msg.get("depth") != self.depth:
+            self._reset(int(msg.get("depth") or 0))
+        elif msg.get("seq", 0) != self._seq + 1:
+            pass  # diff perdu: le prochain full (resubscribe) resynchronisera ; on applique quand même
+        self._seq = msg.get("seq", 0)
+        self.available = msg.get("available", True)
+
+        levels = msg.get("levels") or []
+        if levels:
+            side, lvl = zip(*((s, i) for s, i, _, _ in levels))
+            side, lvl = np.array(side), np.array(lvl)
+            self.px[side, lvl] = [np.nan if p is None else p for _, _, p, _ in levels]
+            self.vol[side, lvl] = [np.nan if v is None else v for _, _, _, v in levels]
+            if not msg.get("full"):
+                self.changed_at[side, lvl] = time.monotonic()
+            self._digits = _digits_of(self.px)
+        self._dirty = True
+
+    # ---------- interne ----------
+
+    def _reset(self, depth: int):
+        self.depth = depth
+        self.px = np.full((2, depth), np.nan)
+        self.vol = np.full((2, depth), np.nan)
+        self.changed_at = np.zeros((2, depth))
+        self._seq = 0
+
+    def _on_frame(self):
+        flashing = self.depth and (time.monotonic() - self.changed_at.max()) * 1000.0 < FLASH_MS
+        if self._dirty or flashing:
+            self._dirty = False
+            self.update()
+
+    def _geometry(self) -> tuple[float, float]:
+        """(hauteur de ligne, y de la première ligne): asks, ligne spread, bids."""
+        rows = 2 * self.depth + 1
+        rh = max(12.0, min(22.0, self.height() / rows))
+        return rh, max(0.0, (self.height() - rows * rh) / 2.0)
+
+    def mousePressEvent(self, e):
+        if not self.depth or e.button() != Qt.MouseButton.LeftButton:
+            return super().mousePressEvent(e)
+        rh, top = self._geometry()
+        k = int((e.position().y() - top) // rh)
+        if 0 <= k < self.depth:
+            price = self.px[1, self.depth - 1 - k]
+        elif self.depth < k <= 2 * self.depth:
+            price = self.px[0, k - self.depth - 1]
+        else:
+            return
+        if price == price:
+            self.priceClicked.emit(float(price))
+
+    def paintEvent(self, _e):
+        p = QPainter(self)
+        p.fillRect(self.rect(), _BG)
+        p.setFont(self._font)
+        w, h = self.width(), self.height()
+
+        if not self.available or not self.depth:
+            p.setPen(_MUTED)
+            txt = f"{self.symbol}: carnet indisponible" if not self.available else f"{self.symbol}: carnet…"
+            p.drawText(QRectF(0, 0, w, h), Qt.AlignmentFlag.AlignCenter, txt)
+            p.end()
+            return
+
+        rh, top = self._geometry()
+        col = w / 3.0
+        vmax = np.nanmax(self.vol) if np.isfinite(self.vol).any() else 1.0
+        now = time.monotonic()
+
+        def row(y, side, i):
+            price, vol = self.px[side, i], self.vol[side, i]
+            age = (now - self.changed_at[side, i]) * 1000.0
+            if age < FLASH_MS:
+                c = QColor(_FLASH)
+                c.setAlphaF(0.25 * (1.0 - age / FLASH_MS))
+                p.fillRect(QRectF(0, y, w, rh), c)
+            if vol == vol:   # pas NaN
+                c = QColor(_BID if side == 0 else _ASK)
+                c.setAlphaF(0.25)
+                bw = col * float(vol) / vmax
+                x = col - bw if side == 0 else 2 * col
+                p.fillRect(QRectF(x, y + 1, bw, rh - 2), c)
+                p.setPen(_TEXT)
+                vx = 0 if side == 0 else 2 * col
+                p.drawText(QRectF(vx + 4, y, col - 8, rh),
+                           (Qt.AlignmentFlag.AlignRight if side == 0 else Qt.AlignmentFlag.AlignLeft)
+                           | Qt.AlignmentFlag.AlignVCenter, f"{vol:g}")
+            if price == price:
+                p.setPen(_BID if side == 0 else _ASK)
+                p.drawText(QRectF(col, y, col, rh), Qt.AlignmentFlag.AlignCenter, f"{price:.{self._digits}f}")
+            p.setPen(_GRID)
+            p.drawLine(0, int(y + rh), w, int(y + rh))
+
+        # asks en haut (le meilleur juste au-dessus du spread), bids en dessous
+        for k in range(self.depth):
+            row(top + k * rh, 1, self.depth - 1 - k)
+        y_mid = top + self.depth * rh
+        best_bid, best_ask = self.px[0, 0], self.px[1, 0]
+        if best_bid == best_bid and best_ask == best_ask:
+            p.setPen(_MUTED)
+            p.drawText(QRectF(0, y_mid, w, rh), Qt.AlignmentFlag.AlignCenter,
+                       f"{self.symbol} · spread {best_ask - best_bid:.{self._digits}f}")
+        for k in range(self.depth):
+            row(y_mid + (k + 1) * rh, 0, k)
+        p.end()
+
+
+def _digits_of(px: np.ndarray) -> int:
+    """Nb de décimales utiles des prix du carnet (2 à 6)."""
+    vals = px[np.isfinite(px)]
+    for d in range(2, 7):
+        if np.allclose(vals, np.round(vals, d), rtol=0, atol=10.0 ** -(d + 2)):
+            return d
+    return 6
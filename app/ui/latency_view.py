@@ -0,0 +1,103 @@
+# app/ui/latency_view.py
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt, QRectF, QTimer, pyqtSlot
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+
+from app.trading.latency import BUCKETS_MS, StageLatencies
+
+
+class LatencyView(QWidget):
+    """Histogramme du total (cases log) + p50/p95/p99 par étape du pipeline (stats.STAGES)."""
+
+    def __init__(self, stats: StageLatencies, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setMinimumHeight(160)
+        self._font = QFont("Consolas")
+        self._font.setStyleHint(QFont.StyleHint.Monospace)
+        self._font.setPointSize(8)
+
+    def paintEvent(self, _e):
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor("#0f131a"))
+        p.setFont(self._font)
+        w, h = self.width(), self.height()
+        summary = self.stats.summary()
+        lw = max(5, max(len(s) for s in self.stats.STAGES))
+
+        # lignes p50/p95/p99 par étape (en haut)
+        y = 2.0
+        lh = 13.0
+        p.setPen(QColor("#6b7280"))
+        p.drawText(QRectF(6, y, w - 12, lh), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                   f"{'ms':<{lw}} {'p50':>7} {'p95':>7} {'p99':>7}")
+        y += lh
+        for stage in self.stats.STAGES:
+            s = summary[stage]
+            txt = (f"{stage:<{lw}} {s['p50']:7.1f} {s['p95']:7.1f} {s['p99']:7.1f}"
+                   if s["n"] else f"{stage:<{lw}} {'—':>7}")
+            p.setPen(QColor("#e5e7eb" if stage == "total" else "#9aa4b2"))
+            p.drawText(QRectF(6, y, w - 12, lh), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, txt)
+            y += lh
+
+        # histogramme du total
+        counts = self.stats.hist["total"].counts
+        top, bottom = y + 6, h - 14.0
+        if bottom - top < 10:
+            p.end()
+            return
+        n = len(counts)
+        bw = (w - 12) / n
+        cmax = max(1, int(counts.max()))
+        for i, c in enumerate(counts.tolist()):
+            bh = (bottom - top) * c / cmax
+            p.fillRect(QRectF(6 + i * bw + 1, bottom - bh, bw - 2, bh), QColor("#3b82f6"))
+        p.setPen(QColor("#6b7280"))
+        for i in range(0, n, 2):
+            label = f"{BUCKETS_MS[i]}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"
+            p.drawText(QRectF(6 + i * bw, bottom + 1, bw * 2, 12), Qt.AlignmentFlag.AlignLeft, label)
+        p.end()
+
+
+class FeedLatencyPanel(QWidget):
+    """
+    Onglet "Latence": tick → pixel par étape (cf. app/chart/latency.py), repeint à intervalle
+    fixe (les échantillons arrivent à chaque frame du chart), export JSON à la demande.
+    """
+
+    def __init__(self, stats: StageLatencies, dump_path: str, refresh_ms: int = 500, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.dump_path = dump_path
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(6, 6, 6, 6)
+        self.view = LatencyView(stats)
+        lay.addWidget(self.view, 1)
+
+        row = QHBoxLayout()
+        self.lblInfo = QLabel("")
+        self.lblInfo.setStyleSheet("color:#9aa4b2;")
+        self.btnDump = QPushButton("Exporter")
+        self.btnDump.clicked.connect(self.dump)
+        row.addWidget(self.lblInfo, 1); row.addWidget(self.btnDump)
+        lay.addLayout(row)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._refresh)
+        self._timer.start(refresh_ms)
+
+    @pyqtSlot()
+    def dump(self):
+        try:
+            path = self.stats.dump(self.dump_path)
+        except OSError as e:
+            self.lblInfo.setText(f"⚠️ export impossible: {e}")
+            return
+        self.lblInfo.setText(f"💾 {path}")
+
+    def _refresh(self):
+        if self.isVisible():
+            self.view.update()
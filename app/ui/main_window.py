@@ -5,17 +5,27 @@ from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QPixmap
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QSplitter, QToolBar,
-    QComboBox, QSizePolicy, QToolButton, QMenu, QLabel, QHBoxLayout
+    QComboBox, QSizePolicy, QToolButton, QMenu, QLabel, QHBoxLayout, QVBoxLayout, QStackedWidget
 )
 
 from PyQt6.QtWidgets import QStatusBar
 
+from app.config import (
+    PARAMS_DEBOUNCE_MS, BOOK_ENABLED, TRADING_ENABLED, FEED_LATENCY_FILE, FEED_LATENCY_DUMP_ON_EXIT,
+    WATCHLIST_SYMBOLS,
+)
 from app.chart.chart_view import ChartView
-from app.data.mt5_source import DataWorker
+from app.chart.dispatch import ChartDispatcher
+from app.chart.grid import GridHub
+from app.ui.dom_ladder import DomLadder
+from app.ui.latency_view import FeedLatencyPanel
+from app.ui.order_ticket import OrderTicket
+from app.ui.portfolio_panel import PortfolioPanel
+from app.ui.watchlist_panel import WatchlistPanel
+from app.data.source import create_data_source
 from app.chat.chat_panel import ChatPanel
 from app.chat.chat_controller import ChatController
 from app.news.news_service import NewsService
-from app.indicators.ta import IndicatorEngine
 
 DARK_QSS = """
     /* --------- Global --------- */
@@ -72,12 +82,13 @@ DARK_QSS = """
     .Badge--err { background:#1f0a0a; border-color:#7a1f1f; color:#ff9a9a; }
 """
 
-def _flags(ema: bool, rsi: bool, macd: bool, show_tr: bool, show_vbo: bool) -> dict:
-    return {"ema20": ema, "rsi": rsi, "macd": macd, "showTR": show_tr, "showVB": show_vbo}
+def _flags(ema: bool, rsi: bool, macd: bool, show_tr: bool, show_vbo: bool, quality: bool = False) -> dict:
+    return {"ema20": ema, "rsi": rsi, "macd": macd, "showTR": show_tr, "showVB": show_vbo, "quality": quality}
 
 class MainWindow(QMainWindow):
     paramsChanged = pyqtSignal(str, str)
     requestShutdown = pyqtSignal()
+    olderRequested = pyqtSignal(str, str, int, int)   # symbol, tf, before, count → worker.request_older
 
     def __init__(self):
         super().__init__()
@@ -88,6 +99,15 @@ class MainWindow(QMainWindow):
         self.chart = ChartView()
         self.side  = ChatPanel()
         self.side.setMinimumWidth(420)
+        self.dom   = DomLadder()
+        self.dom.setVisible(BOOK_ENABLED)
+        self.ticket = OrderTicket()
+        self.ticket.setVisible(TRADING_ENABLED)
+        # colonne trading à droite du chart: ticket d'ordres au-dessus de l'échelle DOM
+        self.trade_col = QWidget()
+        tcl = QVBoxLayout(self.trade_col); tcl.setContentsMargins(0, 0, 0, 0); tcl.setSpacing(4)
+        tcl.addWidget(self.ticket); tcl.addWidget(self.dom, 1)
+        self.trade_col.setVisible(BOOK_ENABLED or TRADING_ENABLED)
 
         # News
         self.news_service = NewsService(self)
@@ -96,8 +116,22 @@ class MainWindow(QMainWindow):
             self.news_service.itemsReady.connect(self._on_news_items)
         self.news_service.start(interval_ms=180_000)
 
+        # chart seul (page 0) ou grille multi-charts (page 1, GridView créé au premier usage)
+        self.chart_stack = QStackedWidget()
+        self.chart_stack.addWidget(self.chart)
+        self.grid_view = None
+        self.grid: GridHub | None = None
+
+        # chart + échelle DOM côte à côte, dans la partie gauche du splitter principal
+        chart_split = QSplitter(Qt.Orientation.Horizontal)
+        chart_split.addWidget(self.chart_stack)
+        chart_split.addWidget(self.trade_col)
+        chart_split.setStretchFactor(0, 4)
+        chart_split.setStretchFactor(1, 0)
+        chart_split.setCollapsible(0, False)
+
         splitter = QSplitter(Qt.Orientation.Horizontal)
-        splitter.addWidget(self.chart)
+        splitter.addWidget(chart_split)
         splitter.addWidget(self.side)
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 1)
@@ -118,7 +152,7 @@ class MainWindow(QMainWindow):
         tb.addWidget(logo_wrap)
 
         self.sym = QComboBox(); self.sym.addItems(["EURUSD","GBPUSD","USDJPY","USDCAD","AUDUSD"])
-        self.tf  = QComboBox(); self.tf.addItems(["M1","M5","M30"])
+        self.tf  = QComboBox(); self.tf.addItems(["M1","M5","M15","M30","H1","H4","D1"])
 
         self.indBtn = QToolButton(); self.indBtn.setText("Indicateurs ▾")
         self.indBtn.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
@@ -128,12 +162,13 @@ class MainWindow(QMainWindow):
         self.actEMA  = QAction("EMA 20", self, checkable=True); self.actEMA.setChecked(False)
         self.actRSI  = QAction("RSI 14", self, checkable=True); self.actRSI.setChecked(False)
         self.actMACD = QAction("MACD (12,26,9)", self, checkable=True); self.actMACD.setChecked(False)
+        self.actQual = QAction("Qualité du feed (spread, rejets)", self, checkable=True); self.actQual.setChecked(False)
 
         # Flèches OFF
         self.actSigTR  = QAction("Flèches Trend Rider", self, checkable=True); self.actSigTR.setChecked(False)
         self.actSigVBO = QAction("Flèches Vol. Breakout", self, checkable=True); self.actSigVBO.setChecked(False)
 
-        for a in (self.actEMA, self.actRSI, self.actMACD, self.actSigTR, self.actSigVBO):
+        for a in (self.actEMA, self.actRSI, self.actMACD, self.actQual, self.actSigTR, self.actSigVBO):
             menu.addAction(a)
 
         menu.addSeparator()
@@ -144,7 +179,10 @@ class MainWindow(QMainWindow):
         self.indBtn.setMenu(menu)
         self.indBtn.setStyleSheet("QToolButton::menu-indicator{image:none;width:0px;height:0px;} QToolButton{padding-right:12px;}")
 
-        tb.addWidget(self.sym); tb.addWidget(self.tf); tb.addWidget(self.indBtn)
+        self.layoutCombo = QComboBox(); self.layoutCombo.addItems(["1×1", "2×2", "3×3"])
+        self.layoutCombo.setToolTip("Grille de charts (un seul flux, une seule page web)")
+
+        tb.addWidget(self.sym); tb.addWidget(self.tf); tb.addWidget(self.indBtn); tb.addWidget(self.layoutCombo)
 
         spacer = QWidget(); spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred); tb.addWidget(spacer)
 
@@ -153,6 +191,20 @@ class MainWindow(QMainWindow):
         self.toggle_side_act.toggled.connect(self._toggle_side_panel)
         tb.addAction(self.toggle_side_act)
 
+        self.toggle_dom_act = QAction("📊 DOM", self, checkable=True)
+        self.toggle_dom_act.setChecked(BOOK_ENABLED)
+        self.toggle_dom_act.setEnabled(BOOK_ENABLED)
+        self.toggle_dom_act.toggled.connect(self.dom.setVisible)
+        self.toggle_dom_act.toggled.connect(self._sync_trade_col)
+        tb.addAction(self.toggle_dom_act)
+
+        self.toggle_ticket_act = QAction("🧾 Ticket", self, checkable=True)
+        self.toggle_ticket_act.setChecked(TRADING_ENABLED)
+        self.toggle_ticket_act.setEnabled(TRADING_ENABLED)
+        self.toggle_ticket_act.toggled.connect(self.ticket.setVisible)
+        self.toggle_ticket_act.toggled.connect(self._sync_trade_col)
+        tb.addAction(self.toggle_ticket_act)
+
         if hasattr(self.news_service, "set_params"):
             self.paramsChanged.connect(self.news_service.set_params)
         elif hasattr(self.news_service, "set_symbol"):
@@ -160,21 +212,27 @@ class MainWindow(QMainWindow):
 
         # Worker / data
         self.thread = QThread(self)
-        self.worker = DataWorker(self.sym.currentText(), self.tf.currentText(), depth=5000)
+        self.worker = create_data_source(self.sym.currentText(), self.tf.currentText(), depth=5000)
         # après avoir créé:
         # self.chart = ChartView()
-        # self.worker = DataWorker(...)
+        # self.worker = create_data_source(...)  (DataWorker MT5 ou FileDataSource)
 
-        # batch initial -> JS (seriesLoaded)
-        self.worker.historyReady.connect(self.chart.bridge.send_bars_batch)
-        # updates live -> JS (barUpdated)
-        self.worker.barReady.connect(self.chart.bridge.send_bar_update)
+        # Univers de prefetch (cache historique du worker) = contenu de la toolbar, puis la watchlist
+        toolbar_syms = [self.sym.itemText(i) for i in range(self.sym.count())]
+        self.worker.set_prefetch_universe(
+            toolbar_syms + [s for s in WATCHLIST_SYMBOLS if s not in toolbar_syms],
+            [self.tf.itemText(i) for i in range(self.tf.count())],
+        )
+        # Watchlist: cotée par le même worker (ticks du flux ou symbol_info_tick dans le même cycle de poll)
+        self.worker.set_watchlist(WATCHLIST_SYMBOLS)
 
         self.worker.moveToThread(self.thread)
         self.thread.finished.connect(self.worker.deleteLater)
         self.thread.started.connect(self.worker.start)
 
-        self.indic = IndicatorEngine()
+        # bougies + indicateurs → chart par un seul chemin (historique envoyé une fois, deltas versionnés)
+        self.dispatch = ChartDispatcher(self.chart, parent=self)
+        self.indic = self.dispatch.indic
 
         self.worker.historyReady.connect(self._on_history_ready)
         self.worker.barReady.connect(self._on_bar)
@@ -182,6 +240,72 @@ class MainWindow(QMainWindow):
         self._chat = ChatController(self.side)
         self.worker.historyReady.connect(self._chat.on_history)
 
+        # chargement progressif: le chart demande le passé par tranches, le worker le sert
+        self._older_before = 0
+        # couple demandé au worker (_emit_params) / couple affiché par le chart (dernier historyReady):
+        # le combo change tout de suite, le chart garde l'ancien historique jusqu'au suivant
+        self._params_pair = (self.sym.currentText(), self.tf.currentText())
+        self._chart_pair = self._params_pair
+        self.chart.bridge.olderRequested.connect(self._on_older_requested)
+        self.olderRequested.connect(self.worker.request_older, Qt.ConnectionType.QueuedConnection)
+        self.worker.olderBarsReady.connect(self._on_older_bars)
+
+        # trous du flux live comblés par le worker → un seul patch
+        self.worker.historyPatch.connect(self._on_history_patch)
+
+        # qualité du flux par barre (spread, rejets) → pane chart + contexte du chat
+        self.worker.qualityReady.connect(self.chart.load_quality)
+        self.worker.qualityReady.connect(self._chat.on_quality)
+        self.worker.qualityUpdated.connect(self.chart.update_quality)
+        self.worker.qualityUpdated.connect(self._chat.on_quality_point)
+
+        # carnet d'ordres du symbole courant → échelle DOM (diffs, repaint à la frame)
+        self.worker.bookUpdated.connect(self.dom.apply_update)
+        self.paramsChanged.connect(self.dom.set_symbol)
+
+        # positions/ordres/compte (diffs par ticket + P&L par tick) → onglet du panneau latéral
+        self.portfolio = PortfolioPanel()
+        self.side.tabs.addTab(self.portfolio, "Positions")
+        self.worker.positionsChanged.connect(self.portfolio.on_positions)
+        self.worker.ordersChanged.connect(self.portfolio.on_orders)
+        self.worker.accountChanged.connect(self.portfolio.on_account)
+        self.worker.pnlUpdated.connect(self.portfolio.on_pnl)
+
+        # watchlist (un lot de cotations par cycle) → onglet ; clic sur une ligne → symbole du chart
+        self.watchlist = WatchlistPanel(WATCHLIST_SYMBOLS)
+        self.side.tabs.addTab(self.watchlist, "Watchlist")
+        self.worker.quotesUpdated.connect(self.watchlist.on_quotes)
+        self.watchlist.symbolActivated.connect(self._on_watchlist_symbol)
+        self.paramsChanged.connect(self.watchlist.set_current)
+
+        # latence tick → pixel (horodatée du worker jusqu'au rendu JS) → onglet du panneau latéral
+        self.latency_panel: FeedLatencyPanel | None = None
+        if self.chart.bridge.latency is not None:
+            self.latency_panel = FeedLatencyPanel(self.chart.bridge.latency, FEED_LATENCY_FILE)
+            self.side.tabs.addTab(self.latency_panel, "Latence")
+
+        # Ticket d'ordres → thread d'exécution (order_check/order_send), jamais dans le GUI ni le feed
+        self.exec_thread: QThread | None = None
+        self.executor = None
+        if TRADING_ENABLED:
+            from app.trading.execution import OrderExecutor
+            self.exec_thread = QThread(self)
+            self.executor = OrderExecutor()
+            self.executor.moveToThread(self.exec_thread)
+            self.exec_thread.started.connect(self.executor.start)
+            self.exec_thread.finished.connect(self.executor.deleteLater)
+            self.executor.ready.connect(self.ticket.set_enabled)
+            self.executor.orderDone.connect(self.ticket.on_order_done)
+            self.ticket.orderRequested.connect(self._on_order_requested)
+            self.dom.priceClicked.connect(self.ticket.set_limit_price)
+            self.worker.barReady.connect(self.ticket.on_bar)
+            self.paramsChanged.connect(self.ticket.set_symbol)
+            self.exec_thread.start()
+
+        # Métriques du feed (ordonnanceur de polls) → barre d'état
+        self.setStatusBar(QStatusBar(self))
+        self.worker.metricsReady.connect(self._on_feed_metrics)
+
         self.paramsChanged.connect(self.worker.set_params, Qt.ConnectionType.QueuedConnection)
         self.paramsChanged.connect(self._chat.set_params)
         self.requestShutdown.connect(self.worker.shutdown, Qt.ConnectionType.QueuedConnection)
@@ -193,15 +317,16 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(0, lambda: self.paramsChanged.emit(self.sym.currentText(), self.tf.currentText()))
 
         # debounce
-        self._debounce = QTimer(self); self._debounce.setSingleShot(True); self._debounce.setInterval(400)
+        self._debounce = QTimer(self); self._debounce.setSingleShot(True); self._debounce.setInterval(PARAMS_DEBOUNCE_MS)
         self._debounce.timeout.connect(self._emit_params)
         self.sym.currentIndexChanged.connect(lambda *_: self._debounce.start())
         self.tf.currentIndexChanged.connect(lambda *_: self._debounce.start())
 
-        for a in (self.actEMA, self.actRSI, self.actMACD, self.actSigTR, self.actSigVBO):
+        for a in (self.actEMA, self.actRSI, self.actMACD, self.actQual, self.actSigTR, self.actSigVBO):
             a.toggled.connect(self._on_menu_toggled)
         self.actALL.triggered.connect(self._on_all)
         self.actOFF.triggered.connect(self._on_off)
+        self.layoutCombo.currentIndexChanged.connect(self._on_layout_changed)
 
         if hasattr(self.chart, "bridge") and self.chart.bridge:
             self.chart.bridge.indicatorClosed.connect(self._on_indicator_closed_from_js)
@@ -215,7 +340,7 @@ class MainWindow(QMainWindow):
     # ---------- helpers ----------
     def _current_flags(self) -> dict:
         return _flags(self.actEMA.isChecked(), self.actRSI.isChecked(), self.actMACD.isChecked(),
-                      self.actSigTR.isChecked(), self.actSigVBO.isChecked())
+                      self.actSigTR.isChecked(), self.actSigVBO.isChecked(), self.actQual.isChecked())
 
     def _apply_flags(self, flags: dict):
         try:
@@ -227,12 +352,12 @@ class MainWindow(QMainWindow):
         self._apply_flags(self._current_flags())
 
     def _on_all(self):
-        for act in (self.actEMA, self.actRSI, self.actMACD, self.actSigTR, self.actSigVBO):
+        for act in (self.actEMA, self.actRSI, self.actMACD, self.actQual, self.actSigTR, self.actSigVBO):
             act.blockSignals(True); act.setChecked(True); act.blockSignals(False)
         self._apply_flags(self._current_flags())
 
     def _on_off(self):
-        for act in (self.actEMA, self.actRSI, self.actMACD, self.actSigTR, self.actSigVBO):
+        for act in (self.actEMA, self.actRSI, self.actMACD, self.actQual, self.actSigTR, self.actSigVBO):
             act.blockSignals(True); act.setChecked(False); act.blockSignals(False)
         self._apply_flags(self._current_flags())
 
@@ -241,6 +366,7 @@ class MainWindow(QMainWindow):
         if   which == "rsi":   target = self.actRSI
         elif which == "macd":  target = self.actMACD
         elif which == "ema20": target = self.actEMA
+        elif which == "quality": target = self.actQual
         else: return
         target.blockSignals(True); target.setChecked(False); target.blockSignals(False)
         self._apply_flags(self._current_flags())
@@ -248,13 +374,13 @@ class MainWindow(QMainWindow):
     # ---------- data ----------
     def _emit_params(self):
         self.chart.show_loading()
-        self.paramsChanged.emit(self.sym.currentText(), self.tf.currentText())
+        self._params_pair = (self.sym.currentText(), self.tf.currentText())
+        self.paramsChanged.emit(*self._params_pair)
 
     def _on_history_ready(self, bars: list[dict]):
-        self.chart.load_series(bars)
-        self.indic.set_history(bars)
+        self._chart_pair = self._params_pair
+        self.dispatch.on_history(bars)
         try:
-            self.chart.load_indicators(self.indic.series_for_chart())
             self._apply_flags(self._current_flags())
         except Exception:
             pass
@@ -262,18 +388,90 @@ class MainWindow(QMainWindow):
             self._chat.set_indicator_snapshot(self.indic.latest_snapshot().__dict__)
         QTimer.singleShot(0, self.chart.hide_loading)
 
+    def _on_older_requested(self, before: int, count: int):
+        self._older_before = before
+        self.olderRequested.emit(*self._chart_pair, before, count)   # le passé du couple affiché
+
+    def _on_older_bars(self, symbol: str, tf: str, bars: list[dict] | None):
+        if (symbol, tf) != self._chart_pair:
+            return  # réponse d'un couple quitté entre-temps
+        if self._older_before != self.chart.bridge.first_time:
+            return  # le chart a été rechargé depuis la demande
+        self.dispatch.on_older(bars)
+
+    def _on_history_patch(self, patch: list[dict]):
+        self.dispatch.on_patch(patch)
+        self._chat.on_history_patch(patch)
+        if hasattr(self._chat, "set_indicator_snapshot"):
+            self._chat.set_indicator_snapshot(self.indic.latest_snapshot().__dict__)
+
     def _on_bar(self, bar: dict):
-        self.chart.update_bar(bar)
-        pts = self.indic.on_bar(bar)
-        if pts:
-            try:
-                self.chart.update_indicator_points(pts)
-            except Exception:
-                pass
+        self.dispatch.on_bar(bar)
         self._chat.on_bar(bar)
         if hasattr(self._chat, "set_indicator_snapshot"):
             self._chat.set_indicator_snapshot(self.indic.latest_snapshot().__dict__)
 
+    def _on_feed_metrics(self, m: dict):
+        if m.get("source") == "file":
+            self.statusBar().showMessage(
+                f"Fichier {m.get('file')} · {m.get('rows', 0)} lignes → {m.get('bars', 0)} barres "
+                f"en {m.get('load_ms', 0):.0f} ms")
+            return
+        sym = (m.get("symbols") or {}).get(self.sym.currentText()) or {}
+        txt = (f"Feed {m.get('calls_per_sec', 0):.0f} appels/s · "
+               f"{sym.get('tick_rate', 0):.1f} ticks/s · poll {sym.get('interval_ms', 0):.0f} ms")
+        if m.get("missed_est"):
+            txt += f" · ~{m['missed_est']} ticks manqués"
+        if sym.get("dormant"):
+            txt += " · 💤 hors session"
+        if m.get("budget_scale", 1.0) > 1.0:
+            txt += f" · budget ×{m['budget_scale']}"
+        if m.get("bars_coalesced"):
+            txt += f" · {m['bars_emitted']} barres émises ({m['bars_coalesced']} fusionnées)"
+        if m.get("book_deferred"):
+            txt += f" · DOM {m['book_deferred']} lectures reportées"
+        self.statusBar().showMessage(txt)
+
+    # ---------- grille ----------
+    def _on_layout_changed(self, index: int):
+        n = index + 1
+        if n == 1:
+            self.chart_stack.setCurrentWidget(self.chart)
+            if self.grid is not None:
+                self.grid.clear()   # plus de panes → plus de subscriptions à tenir
+            return
+        if self.grid is None:
+            from app.chart.grid_view import GridView
+            self.grid_view = GridView()
+            self.chart_stack.addWidget(self.grid_view)
+            self.grid = GridHub(self.grid_view.bridge,
+                                [self.sym.itemText(i) for i in range(self.sym.count())],
+                                [self.tf.itemText(i) for i in range(self.tf.count())], parent=self)
+            self.grid.connect_source(self.worker)
+            self.grid.pairActivated.connect(self._on_grid_pair_activated)
+        self.grid.set_layout(n, n, self.sym.currentText(), self.tf.currentText())
+        self.chart_stack.setCurrentWidget(self.grid_view)
+
+    def _on_grid_pair_activated(self, symbol: str, tf: str):
+        """Double-clic sur une pane: ce couple dans le chart principal, retour au chart seul."""
+        self.sym.setCurrentText(symbol)
+        self.tf.setCurrentText(tf)
+        self.layoutCombo.setCurrentIndex(0)
+
+    # ---------- watchlist ----------
+    def _on_watchlist_symbol(self, symbol: str):
+        """Clic dans la watchlist: le chart passe sur ce symbole (debounce → set_params, historique du cache)."""
+        if self.sym.findText(symbol) < 0:
+            self.sym.addItem(symbol)
+        if self.layoutCombo.currentIndex() != 0:
+            self.layoutCombo.setCurrentIndex(0)
+        self.sym.setCurrentText(symbol)
+
+    # ---------- ordres ----------
+    def _on_order_requested(self, req: dict):
+        # submit() est thread-safe: pas d'aller-retour par la boucle d'événements avant la file
+        self.ticket.on_submitted(self.executor.submit(**req))
+
     # ---------- news ----------
     def _on_news_items(self, json_str: str):
         try:
@@ -291,6 +489,9 @@ class MainWindow(QMainWindow):
         left = int(total * 0.72); right = max(360, total - left)
         self._splitter.setSizes([left, right])
 
+    def _sync_trade_col(self, _checked: bool = False):
+        self.trade_col.setVisible(self.toggle_dom_act.isChecked() or self.toggle_ticket_act.isChecked())
+
     def _toggle_side_panel(self, checked: bool):
         sizes = self._splitter.sizes()
         if checked:
@@ -312,6 +513,9 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
         self.stop_feed()
+        self.stop_execution()
+        if FEED_LATENCY_DUMP_ON_EXIT and self.latency_panel is not None:
+            self.latency_panel.dump()
         super().closeEvent(e)
 
     def stop_feed(self):
@@ -332,3 +536,12 @@ class MainWindow(QMainWindow):
         try: self.thread.deleteLater()
         except Exception: pass
         self.worker = None; self.thread = None
+
+    def stop_execution(self):
+        if not self.exec_thread:
+            return
+        self.executor.cancel_all()   # les ordres pas encore partis sont abandonnés
+        self.exec_thread.quit()
+        if not self.exec_thread.wait(5000):   # laisse revenir l'order_send en cours
+            self.exec_thread.terminate(); self.exec_thread.wait(1000)
+        self.executor = None; self.exec_thread = None
@@ -0,0 +1,146 @@
+# app/ui/order_ticket.py
+from __future__ import annotations
+
+import time
+
+from PyQt6.QtCore import pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton, QDoubleSpinBox,
+)
+
+from app.config import ORDER_DEFAULT_VOLUME
+from app.trading.latency import StageLatencies
+from app.ui.latency_view import LatencyView
+
+_BUY_QSS = "QPushButton{background:#0a1f16;border-color:#1f7a4f;color:#8ff0b8;} QPushButton:hover{background:#0d2b1e;}"
+_SELL_QSS = "QPushButton{background:#1f0a0a;border-color:#7a1f1f;color:#ff9a9a;} QPushButton:hover{background:#2b0d0d;}"
+
+
+class OrderTicket(QWidget):
+    """
+    Ticket d'ordres du symbole du chart: achat/vente au marché en un clic, ordres limit
+    au prix saisi (ou cliqué dans l'échelle DOM). N'exécute rien lui-même: émet
+    orderRequested(dict) avec l'horodatage du clic, le résultat revient par on_order_done.
+    """
+
+    orderRequested = pyqtSignal(dict)   # symbol, side, kind, volume, price, clicked_at
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.symbol = ""
+        self.stats = StageLatencies()
+        self._price_touched = False
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(6, 6, 6, 6)
+        lay.setSpacing(6)
+
+        head = QHBoxLayout()
+        self.lblSymbol = QLabel("—")
+        self.lblSymbol.setStyleSheet("font-weight:600;")
+        self.spinVol = QDoubleSpinBox()
+        self.spinVol.setDecimals(2); self.spinVol.setRange(0.01, 100.0); self.spinVol.setSingleStep(0.01)
+        self.spinVol.setValue(ORDER_DEFAULT_VOLUME)
+        self.spinVol.setSuffix(" lot")
+        head.addWidget(self.lblSymbol, 1); head.addWidget(self.spinVol)
+        lay.addLayout(head)
+
+        grid = QGridLayout()
+        self.btnSell = QPushButton("Vendre"); self.btnSell.setStyleSheet(_SELL_QSS)
+        self.btnBuy = QPushButton("Acheter"); self.btnBuy.setStyleSheet(_BUY_QSS)
+        self.spinPrice = QDoubleSpinBox()
+        self.spinPrice.setDecimals(5); self.spinPrice.setRange(0.0, 1e7); self.spinPrice.setSingleStep(0.0001)
+        self.spinPrice.valueChanged.connect(self._on_price_edited)
+        self.btnSellLmt = QPushButton("Limit vente"); self.btnSellLmt.setStyleSheet(_SELL_QSS)
+        self.btnBuyLmt = QPushButton("Limit achat"); self.btnBuyLmt.setStyleSheet(_BUY_QSS)
+        grid.addWidget(self.btnSell, 0, 0); grid.addWidget(self.btnBuy, 0, 1)
+        grid.addWidget(self.spinPrice, 1, 0, 1, 2)
+        grid.addWidget(self.btnSellLmt, 2, 0); grid.addWidget(self.btnBuyLmt, 2, 1)
+        lay.addLayout(grid)
+
+        self.lblStatus = QLabel("")
+        self.lblStatus.setWordWrap(True)
+        self.lblStatus.setStyleSheet("color:#9aa4b2;")
+        lay.addWidget(self.lblStatus)
+
+        self.latency = LatencyView(self.stats)
+        lay.addWidget(self.latency)
+
+        # pressed (et pas clicked): l'horodatage part au plus tôt
+        self.btnBuy.pressed.connect(lambda: self._request("buy", "market"))
+        self.btnSell.pressed.connect(lambda: self._request("sell", "market"))
+        self.btnBuyLmt.pressed.connect(lambda: self._request("buy", "limit"))
+        self.btnSellLmt.pressed.connect(lambda: self._request("sell", "limit"))
+        self.set_enabled(False, "connexion au terminal…")
+
+    # ---------- API ----------
+
+    @pyqtSlot(bool, str)
+    def set_enabled(self, ok: bool, msg: str = ""):
+        for b in (self.btnBuy, self.btnSell, self.btnBuyLmt, self.btnSellLmt):
+            b.setEnabled(ok)
+        self.lblStatus.setText(msg if not ok else "")
+
+    @pyqtSlot(str, str)
+    def set_symbol(self, symbol: str, _timeframe: str = ""):
+        if symbol == self.symbol:
+            return
+        self.symbol = symbol
+        self.lblSymbol.setText(symbol)
+        self._price_touched = False
+
+    @pyqtSlot(dict)
+    def on_bar(self, bar: dict):
+        """Préremplit le prix limit avec le dernier cours tant que l'utilisateur n'y a pas touché."""
+        if self._price_touched or not bar.get("close"):
+            return
+        self._set_price(float(bar["close"]))
+
+    @pyqtSlot(float)
+    def set_limit_price(self, price: float):
+        self._set_price(price)
+        self._price_touched = True
+
+    def on_submitted(self, order: dict):
+        """Retour immédiat de OrderExecutor.submit (file, doublon, file pleine)."""
+        if order["status"] == "queued":
+            self.lblStatus.setText(f"⏳ #{order['id']} {order['side']} {order['volume']} {order['symbol']} envoyé…")
+        else:
+            self.lblStatus.setText(f"⚠️ {order.get('comment', order['status'])}")
+
+    @pyqtSlot(object)
+    def on_order_done(self, order: dict):
+        order["stamps"]["shown"] = time.perf_counter()
+        self.stats.add(order["stamps"])
+        total = (order["stamps"]["shown"] - order["stamps"]["clicked"]) * 1000.0
+        if order.get("ok"):
+            px = order.get("fill_price") or order.get("request_price")
+            self.lblStatus.setText(
+                f"✅ #{order['id']} {order['side']} {order['volume']} {order['symbol']} @ {px} · {total:.0f} ms")
+        else:
+            self.lblStatus.setText(
+                f"❌ #{order['id']} {order.get('retcode')} {order.get('comment', '')} · {total:.0f} ms")
+        self.latency.update()
+
+    # ---------- interne ----------
+
+    def _request(self, side: str, kind: str):
+        clicked_at = time.perf_counter()
+        if not self.symbol:
+            return
+        price = self.spinPrice.value() if kind == "limit" else None
+        self.orderRequested.emit({
+            "symbol": self.symbol, "side": side, "kind": kind,
+            "volume": self.spinVol.value(), "price": price, "clicked_at": clicked_at,
+        })
+
+    def _set_price(self, price: float):
+        digits = 3 if price >= 20 else 5
+        self.spinPrice.blockSignals(True)
+        self.spinPrice.setDecimals(digits)
+        self.spinPrice.setSingleStep(10.0 ** -(digits - 1))
+        self.spinPrice.setValue(price)
+        self.spinPrice.blockSignals(False)
+
+    def _on_price_edited(self, _v: float):
+        self._price_touched = True
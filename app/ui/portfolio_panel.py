@@ -0,0 +1,219 @@
+# app/ui/portfolio_panel.py
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSlot
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QHeaderView, QSplitter, QAbstractItemView
+
+_TYPES = {0: "Buy", 1: "Sell", 2: "Buy Limit", 3: "Sell Limit", 4: "Buy Stop", 5: "Sell Stop"}
+_POS = QColor("#8ff0b8")
+_NEG = QColor("#ff9a9a")
+
+
+def _fmt_price(v) -> str:
+    if not v:
+        return ""
+    return f"{v:.3f}" if v >= 20 else f"{v:.5f}"
+
+
+def _fmt_time(ts) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%d/%m %H:%M:%S") if ts else ""
+
+
+class _TicketModel(QAbstractTableModel):
+    """
+    Lignes indexées par ticket, mises à jour par diff: seules les lignes ajoutées/retirées/modifiées
+    (et les cellules P&L qui bougent) émettent des signaux → la vue ne repeint que celles-là.
+    """
+
+    COLUMNS: tuple[tuple[str, str], ...] = ()   # (clé, en-tête)
+    FORMATS: dict = {}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+        self._index: dict[int, int] = {}   # ticket → ligne
+        self._keys = [k for k, _ in self.COLUMNS]
+
+    # ---------- Qt ----------
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self._keys[index.column()]
+        v = self._rows[index.row()].get(key)
+        if role == Qt.ItemDataRole.DisplayRole:
+            fmt = self.FORMATS.get(key)
+            return fmt(v) if fmt else ("" if v is None else str(v))
+        if role == Qt.ItemDataRole.ForegroundRole and key == "profit" and v:
+            return _POS if v > 0 else _NEG
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(v, (int, float)) and key != "ticket":
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    # ---------- mises à jour ----------
+
+    def apply_diff(self, diff: dict):
+        removed = sorted((self._index[t] for t in diff.get("removed", ()) if t in self._index), reverse=True)
+        for r in removed:
+            self.beginRemoveRows(QModelIndex(), r, r)
+            del self._rows[r]
+            self.endRemoveRows()
+        if removed:
+            self._index = {row["ticket"]: i for i, row in enumerate(self._rows)}
+
+        changed_rows = []
+        for row in diff.get("changed", ()):
+            i = self._index.get(row["ticket"])
+            if i is not None:
+                self._rows[i].update(row)
+                changed_rows.append(i)
+        self._emit_runs(changed_rows, 0, len(self.COLUMNS) - 1)
+
+        added = [r for r in diff.get("added", ()) if r["ticket"] not in self._index]
+        if added:
+            n = len(self._rows)
+            self.beginInsertRows(QModelIndex(), n, n + len(added) - 1)
+            for k, row in enumerate(added):
+                self._rows.append(dict(row))
+                self._index[row["ticket"]] = n + k
+            self.endInsertRows()
+
+    def apply_values(self, key: str, values: dict[int, float]):
+        """Une colonne (ex. profit) pour quelques tickets → dataChanged sur ces seules cellules."""
+        col = self._keys.index(key)
+        lo, hi = len(self._rows), -1
+        for ticket, v in values.items():
+            i = self._index.get(ticket)
+            if i is not None:
+                self._rows[i][key] = v
+                lo, hi = min(lo, i), max(hi, i)
+        if hi >= 0:
+            # une seule colonne: une plage englobante coûte moins qu'une émission par trou
+            self.dataChanged.emit(self.index(lo, col), self.index(hi, col))
+
+    def _emit_runs(self, rows: list[int], c0: int, c1: int):
+        """dataChanged par plage de lignes contiguës (une émission par paquet, pas par ligne)."""
+        if not rows:
+            return
+        rows.sort()
+        start = prev = rows[0]
+        for r in rows[1:] + [None]:
+            if r is not None and r == prev + 1:
+                prev = r
+                continue
+            self.dataChanged.emit(self.index(start, c0), self.index(prev, c1))
+            if r is not None:
+                start = prev = r
+
+
+class PositionsModel(_TicketModel):
+    COLUMNS = (("ticket", "Ticket"), ("symbol", "Symbole"), ("type", "Type"), ("volume", "Lots"),
+               ("price_open", "Ouverture"), ("sl", "SL"), ("tp", "TP"), ("swap", "Swap"),
+               ("profit", "P&L"), ("time", "Heure"))
+    FORMATS = {"type": lambda v: _TYPES.get(v, str(v)), "price_open": _fmt_price, "sl": _fmt_price,
+               "tp": _fmt_price, "volume": lambda v: f"{v:.2f}", "swap": lambda v: f"{v:.2f}",
+               "profit": lambda v: f"{v:+.2f}" if v is not None else "", "time": _fmt_time}
+
+
+class OrdersModel(_TicketModel):
+    COLUMNS = (("ticket", "Ticket"), ("symbol", "Symbole"), ("type", "Type"), ("volume_current", "Lots"),
+               ("price_open", "Prix"), ("sl", "SL"), ("tp", "TP"), ("time_setup", "Heure"))
+    FORMATS = {"type": lambda v: _TYPES.get(v, str(v)), "price_open": _fmt_price, "sl": _fmt_price,
+               "tp": _fmt_price, "volume_current": lambda v: f"{v:.2f}", "time_setup": _fmt_time}
+
+
+class PortfolioPanel(QWidget):
+    """Compte (bandeau) + positions ouvertes + ordres en attente, alimentés par les diffs du worker."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.positions = PositionsModel(self)
+        self.orders = OrdersModel(self)
+        self._account: dict = {}
+        self._floating: float | None = None
+        self._views: dict[int, QTableView] = {}
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(6, 6, 6, 6)
+        self.lblAccount = QLabel("Compte: —")
+        self.lblAccount.setWordWrap(True)
+        lay.addWidget(self.lblAccount)
+
+        split = QSplitter(Qt.Orientation.Vertical)
+        self.lblPositions = QLabel("Positions (0)")
+        self.lblOrders = QLabel("Ordres en attente (0)")
+        for title, model in ((self.lblPositions, self.positions), (self.lblOrders, self.orders)):
+            box = QWidget()
+            bl = QVBoxLayout(box); bl.setContentsMargins(0, 0, 0, 0)
+            view = QTableView()
+            view.setModel(model)
+            view.verticalHeader().setVisible(False)
+            view.verticalHeader().setDefaultSectionSize(22)
+            # pas de ResizeToContents: il remesure toutes les lignes à chaque dataChanged
+            view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+            view.horizontalHeader().setStretchLastSection(True)
+            view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            bl.addWidget(title); bl.addWidget(view, 1)
+            self._views[id(model)] = view
+            split.addWidget(box)
+        split.setStretchFactor(0, 3)
+        split.setStretchFactor(1, 1)
+        lay.addWidget(split, 1)
+
+    # ---------- slots (signaux du worker) ----------
+
+    @pyqtSlot(object)
+    def on_positions(self, diff: dict):
+        self._apply(self.positions, diff)
+        self.lblPositions.setText(f"Positions ({self.positions.rowCount()})")
+
+    @pyqtSlot(object)
+    def on_orders(self, diff: dict):
+        self._apply(self.orders, diff)
+        self.lblOrders.setText(f"Ordres en attente ({self.orders.rowCount()})")
+
+    @pyqtSlot(dict)
+    def on_account(self, acc: dict):
+        self._account = acc
+        self._floating = None   # le snapshot MT5 fait foi jusqu'au prochain tick
+        self._render_account()
+
+    @pyqtSlot(object)
+    def on_pnl(self, upd: dict):
+        self.positions.apply_values("profit", upd["profits"])
+        self._floating = upd["floating"]
+        self._render_account()
+
+    def _apply(self, model: _TicketModel, diff: dict):
+        first = model.rowCount() == 0
+        model.apply_diff(diff)
+        if first and model.rowCount():
+            self._views[id(model)].resizeColumnsToContents()   # largeurs calées une fois, au premier remplissage
+
+    def _render_account(self):
+        a = self._account
+        if not a:
+            return
+        cur = a.get("currency", "")
+        profit = a["profit"] if self._floating is None else self._floating
+        equity = a["equity"] if self._floating is None else a["balance"] + self._floating
+        level = f"{a['margin_level']:.0f} %" if a.get("margin") else "—"
+        self.lblAccount.setText(
+            f"Solde {a['balance']:,.2f} {cur} · Équité {equity:,.2f} · P&L {profit:+,.2f} · "
+            f"Marge {a['margin']:,.2f} · Libre {a['margin_free']:,.2f} · Niveau {level}"
+        )
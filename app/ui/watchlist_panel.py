@@ -0,0 +1,154 @@
+# app/ui/watchlist_panel.py
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QHeaderView, QAbstractItemView
+
+from app.ui.portfolio_panel import _POS, _NEG, _fmt_price
+
+
+def _fmt_pct(v) -> str:
+    return "" if v is None else f"{v:+.2f} %"
+
+
+class WatchlistModel(QAbstractTableModel):
+    """
+    Une ligne par symbole, dans l'ordre de la watchlist. Le worker envoie un lot par cycle
+    (quotesUpdated, seuls les symboles qui ont bougé) → apply_quotes() met tout à jour puis
+    émet un seul dataChanged englobant: la vue ne repeint que les lignes visibles, une fois.
+    """
+
+    COLUMNS = (("symbol", "Symbole"), ("bid", "Bid"), ("ask", "Ask"), ("spread", "Spread"),
+               ("change_pct", "Var. %"), ("rsi", "RSI"))
+    FORMATS = {"bid": _fmt_price, "ask": _fmt_price, "spread": lambda v: "" if v is None else f"{v:.0f}",
+               "change_pct": _fmt_pct, "rsi": lambda v: "" if v is None else f"{v:.1f}"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+        self._index: dict[str, int] = {}   # symbole → ligne
+        self._keys = [k for k, _ in self.COLUMNS]
+
+    def set_symbols(self, symbols: list[str]):
+        old = {r["symbol"]: r for r in self._rows}
+        self.beginResetModel()
+        self._rows = [old.get(s) or {"symbol": s, "dir": 0} for s in dict.fromkeys(symbols)]
+        self._index = {r["symbol"]: i for i, r in enumerate(self._rows)}
+        self.endResetModel()
+
+    def symbols(self) -> list[str]:
+        return [r["symbol"] for r in self._rows]
+
+    def symbol_at(self, row: int) -> str | None:
+        return self._rows[row]["symbol"] if 0 <= row < len(self._rows) else None
+
+    def row_of(self, symbol: str) -> int:
+        return self._index.get(symbol, -1)
+
+    # ---------- Qt ----------
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self._keys[index.column()]
+        row = self._rows[index.row()]
+        v = row.get(key)
+        if role == Qt.ItemDataRole.DisplayRole:
+            fmt = self.FORMATS.get(key)
+            return fmt(v) if fmt else ("" if v is None else str(v))
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if key in ("bid", "ask") and row["dir"]:
+                return _POS if row["dir"] > 0 else _NEG   # sens du dernier mouvement du bid
+            if key == "change_pct" and v:
+                return _POS if v > 0 else _NEG
+            if key == "rsi" and v is not None and (v >= 70 or v <= 30):
+                return _NEG if v >= 70 else _POS
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole and key != "symbol":
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    # ---------- mises à jour ----------
+
+    def apply_quotes(self, quotes: dict[str, dict]):
+        """Lot du worker {symbole: cotation} → un seul dataChanged (plage englobante des lignes touchées)."""
+        lo, hi = len(self._rows), -1
+        for sym, q in quotes.items():
+            i = self._index.get(sym)
+            if i is None:
+                continue
+            row = self._rows[i]
+            prev = row.get("bid")
+            if prev and q["bid"] != prev:
+                row["dir"] = 1 if q["bid"] > prev else -1
+            row.update(q)
+            lo, hi = min(lo, i), max(hi, i)
+        if hi >= 0:
+            self.dataChanged.emit(self.index(lo, 1), self.index(hi, len(self.COLUMNS) - 1))
+
+
+class WatchlistPanel(QWidget):
+    """Watchlist du panneau latéral: cotations par lots du worker ; clic sur une ligne → symbole du chart."""
+
+    symbolActivated = pyqtSignal(str)
+
+    def __init__(self, symbols: list[str], parent=None):
+        super().__init__(parent)
+        self.model = WatchlistModel(self)
+        self.model.set_symbols(symbols)
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(6, 6, 6, 6)
+        self.lblTitle = QLabel(f"Watchlist ({self.model.rowCount()} symboles) · clic = ouvrir dans le chart")
+        lay.addWidget(self.lblTitle)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.verticalHeader().setVisible(False)
+        self.view.verticalHeader().setDefaultSectionSize(22)
+        # pas de ResizeToContents: il remesure toutes les lignes à chaque dataChanged
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.view.clicked.connect(self._on_clicked)
+        lay.addWidget(self.view, 1)
+        self._sized = False
+
+    def symbols(self) -> list[str]:
+        return self.model.symbols()
+
+    # ---------- slots ----------
+
+    @pyqtSlot(object)
+    def on_quotes(self, quotes: dict):
+        self.model.apply_quotes(quotes)
+        if not self._sized:
+            self._sized = True
+            self.view.resizeColumnsToContents()   # largeurs calées une fois, au premier lot
+
+    @pyqtSlot(str, str)
+    def set_current(self, symbol: str, _tf: str = ""):
+        """Symbole du chart surligné (sélection seule: aucun symbolActivated)."""
+        row = self.model.row_of(symbol)
+        if row >= 0:
+            self.view.selectRow(row)
+        else:
+            self.view.clearSelection()
+
+    def _on_clicked(self, index: QModelIndex):
+        sym = self.model.symbol_at(index.row())
+        if sym:
+            self.symbolActivated.emit(sym)
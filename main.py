@@ -4,7 +4,6 @@ import os, sys
 from PyQt6.QtCore import QCoreApplication, Qt
 QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts, True)
 
-from app.ui.main_window import MainWindow
 os.environ.setdefault("QTWEBENGINE_REMOTE_DEBUGGING", "9222")
 os.environ.setdefault("QTWEBENGINE_CHROMIUM_FLAGS", "--remote-allow-origins=*")
 
@@ -71,4 +70,13 @@ def main():
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()   # FEED_MODE=process (exécutable packagé)
+    if "--headless" in sys.argv:
+        # pas de QApplication/WebEngine: QCoreApplication + source + indicateurs (app/headless.py)
+        import time
+        t0 = time.perf_counter()
+        data_out, sys.stdout = sys.stdout, sys.stderr   # stdout réservé aux données, dès l'import de app
+        from app.headless import main as headless_main
+        sys.exit(headless_main([a for a in sys.argv[1:] if a != "--headless"], t0=t0, stream=data_out))
     main()
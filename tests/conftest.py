@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import sys
+
+# Simulateur MT5 (app/data/mt5_sim.py): pas de terminal requis. Fixé avant tout import de app.config.
+os.environ.setdefault("MT5_BACKEND", "sim")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
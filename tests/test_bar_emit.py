@@ -0,0 +1,83 @@
+# tests/test_bar_emit.py
+import random
+
+import pytest
+
+from app.data import mt5_source
+from app.data.mt5_source import DataWorker
+from app.data.subscription import SymbolFeed
+
+T0 = 1_700_000_040
+
+
+class _Timer:
+    """Timer d'émission toujours armé: le test appelle _flush_pending_bars lui-même."""
+
+    def isActive(self):
+        return True
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(mt5_source, "BAR_EMIT_INTERVAL_MS", 10_000)
+    w = DataWorker("EURUSD", "M1")
+    w._first_load_done = True
+    feed = w._feeds["EURUSD"] = SymbolFeed("EURUSD")
+    sub = feed.add("M1", 60)
+    w._emit_timer = _Timer()
+    sent = []
+    w.subBarReady.connect(lambda sym, tf, d: sent.append(dict(d)))
+    live = []
+    w.barReady.connect(lambda d: live.append(dict(d)))
+    return w, sub, sent, live
+
+
+def _bar(i: int, v: int, closed: bool = False) -> dict:
+    return {"time": T0 + 60 * i, "open": 1.0, "high": 1.0 + v, "low": 1.0, "close": 1.0 + v,
+            "volume": float(v), "closed": closed}
+
+
+def test_current_versions_coalesce_but_closes_go_out_at_once(worker):
+    w, sub, sent, live = worker
+    w._emit_current(sub, _bar(0, 1))
+    w._emit_current(sub, _bar(0, 2))
+    assert sent == []                                     # en attente du flush
+    w._emit_closed(sub, _bar(0, 3, True))                 # la version en attente devient inutile
+    assert [(b["time"], b["volume"]) for b in sent] == [(T0, 3.0)]
+
+    w._emit_current(sub, _bar(1, 1))
+    w._emit_closed(sub, _bar(2, 5, True))                 # pending plus ancienne: émise d'abord
+    w._emit_current(sub, _bar(3, 1))
+    w._emit_current(sub, _bar(3, 2))
+    w._flush_pending_bars()
+    assert [(b["time"], b["volume"]) for b in sent] == [(T0, 3.0), (T0 + 60, 1.0), (T0 + 120, 5.0), (T0 + 180, 2.0)]
+    assert live == sent                                   # couple principal: même flux côté chart
+    assert w._bars_coalesced == 3 and w._bars_emitted == 4
+
+
+def test_random_interleaving_never_drops_or_reorders_a_close(worker):
+    w, sub, sent, _ = worker
+    rng = random.Random(11)
+    closes, last = [], {}
+    for i in range(300):
+        for v in range(rng.randint(0, 4)):
+            w._emit_current(sub, _bar(i, v))
+            last[i] = v
+            if rng.random() < 0.2:
+                w._flush_pending_bars()
+        if i < 299:                                       # la dernière reste la bougie courante
+            w._emit_closed(sub, _bar(i, 10, True))
+            closes.append(T0 + 60 * i)
+            last[i] = 10
+    w._flush_pending_bars()
+
+    times = [b["time"] for b in sent]
+    assert times == sorted(times)                         # jamais de retour en arrière
+    assert [b["time"] for b in sent if b["closed"]] == closes
+    final = {}
+    for b in sent:
+        final[b["time"]] = b["volume"]
+    assert final == {T0 + 60 * i: float(v) for i, v in last.items()}   # la dernière version gagne
@@ -0,0 +1,63 @@
+# tests/test_bulk_ingest.py
+import numpy as np
+import pytest
+
+from app.data.subscription import SymbolFeed
+
+TFS = (("M1", 60), ("M5", 300), ("H1", 3600))
+
+
+def _feed(seeded: bool, rng) -> SymbolFeed:
+    feed = SymbolFeed("EURUSD", 0)
+    for tf, sec in TFS:
+        feed.add(tf, sec)
+    if seeded:
+        t0 = 1_700_000_000 - 120
+        for tf, sec in TFS:
+            slot = (t0 // sec) * sec
+            px = 1.10 + rng.normal(0, 0.001)
+            feed.subs[tf].agg.seed({"time": slot, "open": px, "high": px + 0.0005, "low": px - 0.0005,
+                                    "close": 1.10, "volume": 5.0})
+    return feed
+
+
+def _ticks(rng, n: int = 600):
+    """Marche aléatoire avec ticks en retard (dans la barre et sur des barres passées), spikes et prix nuls."""
+    times = 1_700_000_000 + np.cumsum(rng.integers(0, 4, n)).astype(np.int64)
+    late = rng.random(n) < 0.08
+    times[late] -= rng.integers(1, 200, int(late.sum()))
+    prices = 1.10 + np.cumsum(rng.normal(0, 0.0002, n))
+    spikes = rng.random(n) < 0.03
+    prices[spikes] *= 1.0 + rng.choice([-1.0, 1.0], int(spikes.sum())) * 0.1
+    prices[rng.random(n) < 0.01] = 0.0
+    volumes = rng.integers(0, 3, n).astype(np.float64)
+    return times, prices, volumes, np.full(n, 0.0002)
+
+
+def _state(feed: SymbolFeed, closed: dict):
+    bars = {tf: [(b.time, b.open, b.high, b.low, b.close, b.volume) for b in v] for tf, v in closed.items()}
+    cur = {tf: tuple(sorted(agg.current().model_dump().items())) if agg.slot is not None else None
+           for tf, agg in feed.mtf.aggs.items()}
+    return bars, cur
+
+
+@pytest.mark.parametrize("seeded", [False, True])
+def test_bulk_matches_per_tick(seeded):
+    for trial in range(60):
+        ticks = _ticks(np.random.default_rng(trial))
+        out = []
+        for bulk_min in (1, 10**9):   # vectorisé / tick par tick
+            feed = _feed(seeded, np.random.default_rng(1000 + trial))
+            closed: dict = {}
+            accepted = feed.ingest(*ticks, closed, bulk_min=bulk_min)
+            out.append((accepted, _state(feed, closed)))
+        bulk, per_tick = out
+        assert bulk[0] == per_tick[0], f"trial {trial}: accepted"
+        for tf in set(bulk[1][0]) | set(per_tick[1][0]):
+            np.testing.assert_allclose(bulk[1][0].get(tf, []), per_tick[1][0].get(tf, []),
+                                       err_msg=f"trial {trial} {tf}")
+        assert bulk[1][1].keys() == per_tick[1][1].keys()
+        for tf in bulk[1][1]:
+            b, p = bulk[1][1][tf], per_tick[1][1][tf]
+            assert [k for k, _ in b] == [k for k, _ in p]
+            np.testing.assert_allclose([v for _, v in b], [v for _, v in p], err_msg=f"trial {trial} {tf}")
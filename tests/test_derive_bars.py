@@ -0,0 +1,63 @@
+# tests/test_derive_bars.py
+import numpy as np
+import pytest
+
+from app.data.resample import MultiTimeframeAggregator, derive_bars, derive_columns
+
+DAY = 86400
+T0 = 1_700_006_400 - 1_700_006_400 % DAY      # minuit UTC
+
+
+def _ticks(seed: int = 5):
+    """~3 jours de ticks avec un trou de 5 h (fermeture): aucune bougie ne doit y apparaître."""
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.integers(T0, T0 + 3 * DAY, 40_000))
+    times = times[(times < T0 + DAY + 3600) | (times >= T0 + DAY + 6 * 3600)]
+    prices = 1.08 + np.cumsum(rng.normal(0, 5e-5, len(times)))
+    volumes = rng.integers(1, 5, len(times)).astype(float)
+    return times, prices, volumes
+
+
+def _aggregate(times, prices, volumes, tfs: dict, offset: int) -> dict:
+    mtf = MultiTimeframeAggregator(offset)
+    for tf, sec in tfs.items():
+        mtf.add(tf, sec)
+    closed: dict = {}
+    for t, p, v in zip(times.tolist(), prices.tolist(), volumes.tolist()):
+        mtf.update(t, p, v, closed)
+    out = {}
+    for tf, agg in mtf.aggs.items():
+        out[tf] = [b.model_dump() for b in closed.get(tf, [])] + [agg.current().model_dump()]
+    return out
+
+
+def _rows(bars):
+    return [(int(b["time"]), b["open"], b["high"], b["low"], b["close"], b["volume"]) for b in bars]
+
+
+@pytest.mark.parametrize("offset", [0, 7200])
+def test_derived_history_equals_aggregating_the_same_ticks(offset):
+    tfs = {"M1": 60, "M5": 300, "H1": 3600, "H4": 14400, "D1": DAY}
+    live = _aggregate(*_ticks(), tfs, offset)
+    m1 = live["M1"]
+    for tf, sec in tfs.items():
+        derived = derive_bars(m1, sec, offset)
+        assert len(derived) == len(live[tf]), tf
+        np.testing.assert_allclose(_rows(derived), _rows(live[tf]), rtol=0, atol=1e-9, err_msg=tf)
+
+    times = [int(b["time"]) for b in derive_bars(m1, 3600, offset)]
+    gap = (T0 + DAY + 3600, T0 + DAY + 6 * 3600)
+    assert not [t for t in times if gap[0] <= t < gap[1]]        # pas de bougie fantôme dans le trou
+    assert all((t + offset) % 3600 == 0 for t in times)
+
+
+def test_derive_columns_matches_derive_bars():
+    m1 = _aggregate(*_ticks(seed=9), {"M1": 60}, 0)["M1"]
+    cols = {k: np.array([b[k] for b in m1]) for k in ("time", "open", "high", "low", "close", "volume")}
+    for sec in (300, 3600, DAY):
+        got = derive_columns(cols, sec)
+        want = derive_bars(m1, sec)
+        assert got["time"].tolist() == [b["time"] for b in want]
+        for k in ("open", "high", "low", "close", "volume"):
+            np.testing.assert_allclose(got[k], [b[k] for b in want], rtol=0, atol=1e-12, err_msg=k)
+    assert derive_bars([], 3600) == [] and len(derive_columns({k: v[:0] for k, v in cols.items()}, 3600)["time"]) == 0
@@ -0,0 +1,106 @@
+# tests/test_execution.py
+import time
+
+import pytest
+from PyQt6.QtCore import QCoreApplication, QThread
+
+from app.data import mt5_sim
+from app.trading import execution
+from app.trading.execution import OrderExecutor
+
+LATENCY_MS = 5
+
+
+@pytest.fixture
+def sim():
+    before = mt5_sim._config["order_latency_ms"]
+    mt5_sim.configure(order_latency_ms=LATENCY_MS)
+    yield mt5_sim
+    mt5_sim.configure(order_latency_ms=before)
+
+
+@pytest.fixture
+def held(sim):
+    """Exécuteur dans le thread du test, file retenue: _drain() appelé à la main."""
+    ex = OrderExecutor()
+    ex._wake.disconnect(ex._drain)
+    ex.start()
+    done = []
+    ex.orderDone.connect(done.append)
+    return ex, done
+
+
+def test_queued_order_completes_with_latency_stamps(held):
+    ex, done = held
+    order = ex.submit("EURUSD", "buy", "market", 0.1)
+    assert order["status"] == "queued" and ex.pending() == 1
+
+    ex._drain()
+    assert ex.pending() == 0 and len(done) == 1
+    out = done[0]
+    assert out["id"] == order["id"] and out["status"] == "done" and out["ok"], out.get("comment")
+    assert out["retcode"] == mt5_sim.TRADE_RETCODE_DONE and out["fill_volume"] == pytest.approx(0.1)
+    st = out["stamps"]
+    assert st["clicked"] <= st["dequeued"] <= st["checked"] <= st["sent"] <= st["acked"]
+    assert st["acked"] - st["sent"] >= LATENCY_MS / 1000.0 * 0.9   # aller-retour order_send
+    assert "key" not in out
+
+
+def test_duplicate_while_in_flight_and_within_dedup_window(held, monkeypatch):
+    ex, done = held
+    first = ex.submit("EURUSD", "sell", "market", 0.2)
+    again = ex.submit("EURUSD", "sell", "market", 0.2)
+    other = ex.submit("EURUSD", "sell", "market", 0.3)   # autre volume: autre ordre
+    assert (first["status"], again["status"], other["status"]) == ("queued", "duplicate", "queued")
+    assert not again["ok"]
+
+    ex._drain()
+    ex._drain()
+    assert [o["id"] for o in done] == [first["id"], other["id"]]   # ordre des clics
+    assert ex.submit("EURUSD", "sell", "market", 0.2)["status"] == "duplicate"   # < ORDER_DEDUP_MS
+
+    monkeypatch.setattr(execution, "ORDER_DEDUP_MS", 0)
+    assert ex.submit("EURUSD", "sell", "market", 0.2)["status"] == "queued"
+
+
+def test_busy_when_queue_is_full(held, monkeypatch):
+    ex, _ = held
+    monkeypatch.setattr(execution, "ORDER_QUEUE_MAX", 3)
+    statuses = [ex.submit("EURUSD", "buy", "market", 0.01 * (k + 1))["status"] for k in range(4)]
+    assert statuses == ["queued"] * 3 + ["busy"]
+    ex._drain()
+    assert ex.submit("EURUSD", "buy", "market", 0.5)["status"] == "queued"
+
+
+def test_orders_run_in_the_executor_thread(sim):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    ex = OrderExecutor()
+    th = QThread()
+    ex.moveToThread(th)
+    th.started.connect(ex.start)
+    done = []
+    ex.orderDone.connect(done.append)
+    th.start()
+    try:
+        orders = [ex.submit("EURUSD", "buy", "market", v) for v in (0.1, 0.2, 0.3)]
+        deadline = time.monotonic() + 5.0
+        while len(done) < 3 and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+    finally:
+        th.quit()
+        th.wait(2000)
+    assert [o["status"] for o in orders] == ["queued"] * 3
+    assert [o["id"] for o in done] == [o["id"] for o in orders]
+    assert all(o["ok"] and o["stamps"]["acked"] > o["stamps"]["clicked"] for o in done)
+
+
+def test_cancel_all_releases_the_dropped_orders(held, monkeypatch):
+    ex, done = held
+    monkeypatch.setattr(execution, "ORDER_DEDUP_MS", 0)
+    assert ex.submit("EURUSD", "buy", "market", 0.1)["status"] == "queued"
+    ex.cancel_all()
+    assert ex.pending() == 0
+    assert ex.submit("EURUSD", "buy", "market", 0.1)["status"] == "queued"
+    ex._drain()
+    assert len(done) == 1 and done[0]["ok"]
@@ -0,0 +1,43 @@
+# tests/test_file_source.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.file_source import _epoch_seconds
+
+T0 = 1_700_000_000   # 2023-11-14, epoch secondes
+
+
+@pytest.mark.parametrize("scale", [1, 1_000, 1_000_000, 1_000_000_000])
+def test_epoch_seconds_numeric_units(scale):
+    frame = pd.DataFrame({"t": np.array([T0, T0 + 60], dtype=np.int64) * scale})
+    assert _epoch_seconds(frame, ["t"]).tolist() == [T0, T0 + 60]
+
+
+def _write_m1(path, n):
+    t = T0 - T0 % 300 + np.arange(n, dtype=np.int64) * 60
+    c = 1.1 + np.cumsum(np.random.default_rng(3).normal(0, 1e-4, n))
+    pd.DataFrame({"time": t, "open": c, "high": c + 1e-4, "low": c - 1e-4, "close": c,
+                  "tick_volume": np.arange(n) % 7}).to_csv(path, index=False)
+
+
+def test_file_history_stays_columnar(tmp_path):
+    from app.chart.payload import bars_payload
+    from app.data.file_source import FileDataSource
+    from app.data.resample import ColumnBars
+    from app.data.source import bars_before
+
+    _write_m1(tmp_path / "EURUSD_M1.csv", 500)
+    src = FileDataSource("EURUSD", "M5", data_dir=str(tmp_path))
+    bars = src._load("EURUSD", "M5")
+    assert isinstance(bars, ColumnBars) and len(bars) == 100
+    assert src._load("EURUSD", "M5") is bars   # cache partagé, sans copie
+
+    as_dicts = bars.tolist()
+    assert bars[-1] == as_dicts[-1] and list(bars[10:20]) == as_dicts[10:20]
+    for fmt in ("json", "columns", "b64"):
+        assert bars_payload(bars, fmt) == bars_payload(as_dicts, fmt)
+
+    before = as_dicts[40]["time"]
+    assert list(bars_before(bars, before, 15)) == bars_before(as_dicts, before, 15)
+    assert list(bars_before(bars, 0, 15)) == []
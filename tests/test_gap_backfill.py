@@ -0,0 +1,63 @@
+# tests/test_gap_backfill.py
+import numpy as np
+
+from app.data.subscription import SymbolFeed
+
+T0 = 1_700_000_040   # début de minute
+
+
+def _bar(t, c=1.1):
+    return {"time": t, "open": c, "high": c, "low": c, "close": c, "volume": 1.0}
+
+
+def _sub(n=3):
+    feed = SymbolFeed("EURUSD")
+    sub = feed.add("M1", 60)
+    sub.set_history([_bar(T0 + 60 * i) for i in range(n)])
+    return feed, sub
+
+
+def test_quiet_minutes_are_not_backfilled():
+    _, sub = _sub()
+    last = sub.history[-1]["time"]
+    assert sub.record(_bar(last + 10 * 60)) is None   # minutes sans tick, week-end...
+    assert sub.history[-1]["time"] == last + 10 * 60
+
+
+def test_gap_after_stall_is_backfilled_once():
+    feed, sub = _sub()
+    last = sub.history[-1]["time"]
+    sub.record(_bar(last))                             # barre courante: pas de trou
+    feed.mark_stalled()
+    assert sub.record(_bar(last)) is None              # même slot: l'état reste "perdu"
+    assert sub.record(_bar(last + 5 * 60)) == (last, last + 5 * 60)
+    assert sub.record(_bar(last + 9 * 60)) is None     # le marquage ne vaut que pour le trou suivant
+
+
+def test_stall_without_skipped_slot_is_cleared():
+    feed, sub = _sub()
+    last = sub.history[-1]["time"]
+    feed.mark_stalled()
+    assert sub.record(_bar(last + 60)) is None
+    assert sub.record(_bar(last + 5 * 60)) is None
+
+
+def test_dropped_replay_ticks_mark_the_subscription(monkeypatch):
+    monkeypatch.setattr("app.data.subscription.TICK_REPLAY_MAX", 4)
+    feed, sub = _sub()
+    last = sub.history[-1]["time"]
+    sub.begin_loading()
+    for k in range(3):
+        t = np.full(3, last + 600 + k, dtype=np.int64)
+        sub.buffer_ticks(t, np.full(3, 1.1), np.zeros(3))
+    sub.finish_loading([_bar(last - 60), _bar(last)])
+    assert sub.replay_gap == (last, last + 600)
+
+
+def test_replay_without_dropped_ticks_has_no_gap():
+    _, sub = _sub()
+    last = sub.history[-1]["time"]
+    sub.begin_loading()
+    sub.buffer_ticks(np.full(3, last + 600, dtype=np.int64), np.full(3, 1.1), np.zeros(3))
+    sub.finish_loading([_bar(last - 60), _bar(last)])
+    assert sub.replay_gap is None and sub.history[-1]["time"] == last + 600
@@ -0,0 +1,51 @@
+# tests/test_history_cache.py
+import time
+
+from app.data import mt5_sim
+from app.data.history_cache import HistoryCache
+from app.data.mt5_source import DataWorker
+
+CACHE_HIT_MAX_MS = 50
+
+
+def _bars(n: int) -> list[dict]:
+    return [{"time": 60 * i, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 0.0} for i in range(n)]
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    c = HistoryCache(max_entries=3, max_bars=10_000)
+    for tf in ("M1", "M5", "H1"):
+        c.put(("EURUSD", tf), _bars(10))
+    assert c.get(("EURUSD", "M1")) is not None        # M1 redevient le plus récent
+    assert c.peek(("EURUSD", "M5")) is not None        # peek ne touche pas à l'ordre
+    c.put(("GBPUSD", "M1"), _bars(10))
+    assert ("EURUSD", "M5") not in c and len(c) == 3
+    assert c.get(("EURUSD", "M5")) is None
+    assert (c.hits, c.misses) == (1, 1)
+    c.put(("EURUSD", "H4"), [])                        # historique vide: pas mis en cache
+    assert ("EURUSD", "H4") not in c
+
+
+def test_total_bar_budget_evicts_oldest_but_keeps_the_newest():
+    c = HistoryCache(max_entries=10, max_bars=250)
+    c.put(("A", "M1"), _bars(100))
+    c.put(("B", "M1"), _bars(100))
+    c.put(("C", "M1"), _bars(100))
+    assert ("A", "M1") not in c and c.total_bars() == 200
+    c.put(("D", "M1"), _bars(1000))                    # plus gros que le budget: seul, mais gardé
+    assert list(c._data) == [("D", "M1")]
+
+
+def test_cache_hit_reaches_history_ready_quickly():
+    mt5_sim.initialize()
+    w = DataWorker("EURUSD", "M1")
+    w._first_load_done = True
+    bars = w._fetch_history("EURUSD", "M1")             # days_back de M1 du simulateur
+    assert len(bars) > 10_000
+    w._cache.put(("EURUSD", "M1"), bars)
+    got = []
+    w.historyReady.connect(lambda b: got.append((time.perf_counter(), len(b))))
+    t0 = time.perf_counter()
+    w._add_subscription("EURUSD", "M1")
+    assert got and got[0][1] == len(bars)
+    assert (got[0][0] - t0) * 1000.0 < CACHE_HIT_MAX_MS
@@ -0,0 +1,124 @@
+# tests/test_indicator_deltas.py
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app.chart.chart_bridge import FrameOutbox
+from app.chart.payload import merge_indicator_deltas
+
+T0 = 1_700_000_040
+LINES = ("ema20", "rsi14")
+MACD = ("line", "signal", "hist")
+MARKERS = ("trendRider", "volBreakout")
+CHART_HTML = Path(__file__).resolve().parents[1] / "app" / "chart" / "chart.html"
+
+
+def _pts(i0: int, i1: int, bias: float = 0.0) -> list[dict]:
+    return [{"time": T0 + 60 * i, "value": round(i * 0.1 + bias, 6)} for i in range(i0, i1)]
+
+
+def _delta(v: int, base: int, i_from: int, i_to: int, bias: float) -> dict:
+    mk = {"time": T0 + 60 * i_from, "position": "belowBar", "text": f"v{v}"}
+    return {"v": v, "base": base, "from": T0 + 60 * i_from,
+            "ema20": _pts(i_from, i_to, bias), "rsi14": _pts(i_from, i_to, bias + 50),
+            "macd": {k: _pts(i_from, i_to, bias + j) for j, k in enumerate(MACD)},
+            "markers": {"trendRider": [mk], "volBreakout": []}}
+
+
+def _state() -> dict:
+    return {"v": 0, "ema20": _pts(0, 10), "rsi14": _pts(0, 10, 50),
+            "macd": {k: _pts(0, 10, j) for j, k in enumerate(MACD)},
+            "markers": {"trendRider": [{"time": T0, "position": "aboveBar", "text": "old"}], "volBreakout": []}}
+
+
+def _apply(state: dict, d: dict) -> bool:
+    """Référence Python de applyIndicatorDelta (chart.html): False si la version ne suit pas."""
+    if d["base"] != state["v"]:
+        return False
+    state["v"] = d["v"]
+
+    def splice(cur, pts):
+        return [p for p in cur if p["time"] < d["from"]] + list(pts or [])
+
+    for k in LINES:
+        state[k] = splice(state[k], d.get(k))
+    for k in MACD:
+        state["macd"][k] = splice(state["macd"][k], (d.get("macd") or {}).get(k))
+    for k in MARKERS:
+        state["markers"][k] = splice(state["markers"][k], (d.get("markers") or {}).get(k))
+    return True
+
+
+# a réécrit la fin à partir de la barre 6, b à partir de la barre 8 (recouvrement) ou 3 (b plus large)
+CASES = [(_delta(1, 0, 6, 11, 1.0), _delta(2, 1, 8, 12, 2.0)),
+         (_delta(1, 0, 6, 11, 1.0), _delta(2, 1, 3, 12, 2.0)),
+         (_delta(1, 0, 9, 10, 1.0), _delta(2, 1, 10, 11, 2.0))]
+
+
+@pytest.mark.parametrize("a, b", CASES)
+def test_merged_delta_equals_applying_both(a, b):
+    one_by_one, merged = _state(), _state()
+    assert _apply(one_by_one, a) and _apply(one_by_one, b)
+    m = merge_indicator_deltas(a, b)
+    assert (m["v"], m["base"], m["from"]) == (2, 0, min(a["from"], b["from"]))
+    assert _apply(merged, m)
+    assert merged == one_by_one
+
+
+def test_outbox_merges_the_deltas_of_a_frame():
+    a, b = CASES[0]
+    box = FrameOutbox()
+    box.add_indicators(a)
+    box.add_indicators(b)
+    assert box.ind == merge_indicator_deltas(a, b) and box.items == 2
+
+
+_JS = """
+const MAX_MARKERS = 600;
+let IND_V = 0, IND_RESYNC = false, resyncs = 0, refreshed = 0;
+let ema20Series = null, rsiSeries = null, macdLineSeries = null, macdSignalSeries = null, macdHistSeries = null;
+const BRIDGE = { requestIndicatorResync(){ resyncs++; } };
+function cap(a){ return a.length>MAX_MARKERS ? a.slice(-MAX_MARKERS) : a; }
+function refreshMarkers(){ refreshed++; }
+let indCache;
+%s
+const [state, a, b, merged, gap] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const clone = (x) => JSON.parse(JSON.stringify(x));
+function run(deltas){
+  IND_V = state.v; IND_RESYNC = false; resyncs = 0;
+  indCache = clone({ ema20: state.ema20, rsi14: state.rsi14, macd: state.macd, markers: state.markers });
+  deltas.forEach(applyIndicatorDelta);
+  return { v: IND_V, resyncs, ind: indCache };
+}
+console.log(JSON.stringify({ oneByOne: run([a, b]), merged: run([merged]), gap: run([gap, gap]), gapThenOk: run([gap, a]) }));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node absent")
+def test_chart_html_applies_deltas_and_requests_a_resync_on_a_version_gap(tmp_path):
+    html = CHART_HTML.read_text(encoding="utf-8")
+    i0, i1 = html.find("function spliceFrom("), html.find("function applyQualityPoint(")
+    assert 0 < i0 < i1, "fonctions de delta introuvables dans chart.html"
+    script = tmp_path / "deltas.js"
+    script.write_text(_JS % html[i0:i1], encoding="utf-8")
+
+    a, b = CASES[0]
+    gap = _delta(4, 3, 7, 11, 9.0)          # base 3 alors que le chart est en version 0
+    data = json.dumps([_state(), a, b, merge_indicator_deltas(a, b), gap])
+    out = json.loads(subprocess.run(["node", str(script)], input=data, capture_output=True,
+                                    text=True, check=True, timeout=60).stdout)
+
+    assert out["oneByOne"] == out["merged"] and out["merged"]["v"] == 2
+    expected = _state()
+    _apply(expected, a)
+    _apply(expected, b)
+    assert out["merged"]["ind"]["ema20"] == expected["ema20"]
+    assert out["merged"]["ind"]["markers"] == expected["markers"]
+
+    start = _state()
+    assert out["gap"]["v"] == 0 and out["gap"]["resyncs"] == 1            # une seule demande par trou
+    assert out["gap"]["ind"]["ema20"] == start["ema20"]                    # delta ignoré
+    assert out["gapThenOk"]["v"] == 1 and out["gapThenOk"]["resyncs"] == 1
@@ -0,0 +1,67 @@
+# tests/test_indicators.py
+import numpy as np
+import pytest
+
+from app.indicators.ta import STEP_MIN_BARS, IndicatorEngine
+
+T0 = 1_700_000_000 - 1_700_000_000 % 60
+SERIES = ("_ema20", "_ema100", "_rsi14", "_macd", "_macd_sig", "_macd_hist",
+          "_bb_mid", "_bb_up", "_bb_dn", "_bb_width")
+
+
+def _bars(n: int, seed: int = 3) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    close = 1.08 + np.cumsum(rng.normal(0, 3e-4, n))
+    return [{"time": T0 + 60 * i, "open": float(c), "high": float(c + 2e-4), "low": float(c - 2e-4),
+             "close": float(c), "volume": 1.0} for i, c in enumerate(close)]
+
+
+def _assert_same_series(a: IndicatorEngine, b: IndicatorEngine):
+    assert a._times == b._times and a._closes == b._closes
+    for name in SERIES:
+        got, want = getattr(a, name), getattr(b, name)
+        assert [v is None for v in got] == [v is None for v in want], name
+        # _std_window cumule ses sommes sur toute la série, _step_last relit la fenêtre:
+        # écart d'arrondi ~1e-11 sur la largeur des bandes
+        atol = 1e-9 if name == "_bb_width" else 1e-12
+        np.testing.assert_allclose([v for v in got if v is not None], [v for v in want if v is not None],
+                                   rtol=1e-9, atol=atol, err_msg=name)
+
+
+def test_streaming_on_bar_matches_a_full_recompute():
+    bars = _bars(600)
+    live = IndicatorEngine()
+    live.set_history(bars[:STEP_MIN_BARS + 2])
+    for b in bars[STEP_MIN_BARS + 2:]:
+        first = b["close"] + 5e-4
+        live.on_bar(dict(b, close=first, high=max(b["high"], first)))   # premier tick de la barre
+        live.on_bar(b)                                                   # puis sa version finale
+
+    full = IndicatorEngine()
+    full.set_history(bars)
+    _assert_same_series(live, full)
+    assert live.series_for_chart(bars[-50]["time"])["ema20"] == full.series_for_chart(bars[-50]["time"])["ema20"]
+
+
+def test_streaming_markers_match_without_rewrites():
+    bars = _bars(800, seed=7)
+    live = IndicatorEngine()
+    live.set_history(bars[:STEP_MIN_BARS + 2])
+    for b in bars[STEP_MIN_BARS + 2:]:
+        live.on_bar(b)
+    full = IndicatorEngine()
+    full.set_history(bars)
+    _assert_same_series(live, full)
+    assert live._markers_trend == full._markers_trend and live._markers_vbo == full._markers_vbo
+
+
+def test_short_history_falls_back_to_a_full_recompute():
+    bars = _bars(60)
+    live = IndicatorEngine()
+    live.set_history(bars[:20])
+    for b in bars[20:]:
+        live.on_bar(b)
+    full = IndicatorEngine()
+    full.set_history(bars)
+    _assert_same_series(live, full)
+    assert live.latest_snapshot() == full.latest_snapshot()
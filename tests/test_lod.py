@@ -0,0 +1,73 @@
+# tests/test_lod.py
+import numpy as np
+import pytest
+
+from app.chart.lod import FIELDS, LodPyramid
+
+T0 = 1_700_000_000 - 1_700_000_000 % 60
+
+
+def _bars(n: int, seed: int = 1) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    close = 1.08 + np.cumsum(rng.normal(0, 1e-4, n))
+    return [{"time": T0 + 60 * i, "open": float(c - 5e-5), "high": float(c + rng.uniform(0, 3e-4)),
+             "low": float(c - rng.uniform(0, 3e-4)), "close": float(c), "volume": float(i % 13 + 1)}
+            for i, c in enumerate(close)]
+
+
+def test_incremental_update_matches_a_fresh_build_at_every_level():
+    bars = _bars(1500)
+    lod = LodPyramid(bars[:500], top_bars=16)
+    for i, b in enumerate(bars[500:], start=500):
+        partial = dict(b, high=b["open"], low=b["open"], close=b["open"], volume=1.0)
+        assert lod.update(partial) == i          # nouvelle barre...
+        assert lod.update(b) == i                # ...puis réécrite par la barre courante
+    assert lod.update(dict(bars[10])) == -1      # barre plus ancienne: ignorée
+
+    fresh = LodPyramid(bars, top_bars=16)
+    assert lod.n == fresh.n == len(bars)
+    for level in range(len(lod.levels)):         # la pyramide live garde ses niveaux d'origine
+        assert lod.size(level) == fresh.size(level) == -(-len(bars) >> level)
+        got, want = lod.columns(level, 0, lod.size(level)), fresh.columns(level, 0, fresh.size(level))
+        for f in FIELDS:
+            np.testing.assert_allclose(got[f], want[f], rtol=0, atol=1e-12, err_msg=f"niveau {level} {f}")
+
+
+def test_level_for_keeps_the_current_level_near_the_boundary():
+    lod = LodPyramid(_bars(4000), top_bars=16)
+    assert lod.level_for(1000, 1000) == 0
+    assert lod.level_for(1001, 1000) == 1
+    assert lod.level_for(1001, 1000, current=1) == 1
+    # retour sous la frontière: le niveau 1 tient encore et n'est pas trop grossier → gardé
+    assert lod.level_for(990, 1000, current=1) == 1
+    # zoom franc: le niveau courant devient trop grossier (≤ max_bars/4 bougies) → on redescend
+    assert lod.level_for(400, 1000, current=1) == 0
+    # le niveau courant ne tient plus → on monte
+    assert lod.level_for(2500, 1000, current=1) == 2
+    assert lod.level_for(10 ** 9, 10) == len(lod.levels) - 1
+
+
+def test_window_and_covers_at_the_edges():
+    lod = LodPyramid(_bars(1000), top_bars=16)
+    n = lod.n
+    assert lod.window(0, 0, 100) == (0, 200)               # bord gauche: pas de marge négative
+    assert lod.window(0, 900, n) == (800, n)                # bord droit: borné à la série
+    assert lod.window(2, 900, n) == (200, lod.size(2))
+    assert lod.window(3, 500, 501) == (62, 63)              # largeur minimale d'une barre
+
+    assert lod.covers(0, 0, 200, 0, 100)                    # collé au début: pas de marge exigée
+    assert lod.covers(0, 800, n, 900, n)                    # collé à la fin
+    assert not lod.covers(0, 100, 300, 120, 280)            # moins d'un quart de vue de marge
+    assert lod.covers(0, 100, 400, 200, 300)
+    b0, b1 = lod.window(2, 400, 600)
+    assert lod.covers(2, b0, b1, 400, 600)
+
+    assert lod.index_range(T0 + 60 * 10, T0 + 60 * 19) == (10, 20)
+    assert lod.index_range(T0 + 60 * 5000, T0 + 60 * 6000) == (n - 1, n)
+
+
+@pytest.mark.parametrize("n", [0, 1, 3])
+def test_tiny_series(n):
+    lod = LodPyramid(_bars(n))
+    assert lod.n == n and len(lod.levels) == 1
+    assert lod.update(_bars(n + 1)[-1]) == n
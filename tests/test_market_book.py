@@ -0,0 +1,38 @@
+# tests/test_market_book.py
+from app.data.market_book import ASK, BID, BookTracker, book_levels
+from app.data.mt5_sim import BOOK_TYPE_BUY, BOOK_TYPE_SELL, BookInfo
+
+
+def _book(bids, asks):
+    """[(prix, volume)] par côté → entrées market_book_get (ordre MT5: asks décroissants puis bids)."""
+    out = [BookInfo(BOOK_TYPE_SELL, p, int(v), float(v)) for p, v in sorted(asks, reverse=True)]
+    return tuple(out + [BookInfo(BOOK_TYPE_BUY, p, int(v), float(v)) for p, v in bids])
+
+
+BIDS = [(1.1000, 5), (1.0999, 3), (1.0998, 7)]
+ASKS = [(1.1002, 4), (1.1003, 6)]            # un niveau de moins que la profondeur: NaN
+
+
+def test_levels_sorted_best_first_with_nan_padding():
+    px, vol = book_levels(_book(BIDS, ASKS), depth=3)
+    assert px[BID].tolist() == [1.1000, 1.0999, 1.0998] and vol[BID].tolist() == [5, 3, 7]
+    assert px[ASK][:2].tolist() == [1.1002, 1.1003] and px[ASK][2] != px[ASK][2]
+
+
+def test_diff_sends_only_the_changed_levels():
+    bt = BookTracker("EURUSD", depth=3)
+    first = bt.update(_book(BIDS, ASKS))
+    assert first["full"] and len(first["levels"]) == 6 and first["seq"] == 1
+    assert [ASK, 2, None, None] in first["levels"]          # niveau absent → None
+
+    assert bt.update(_book(BIDS, ASKS)) is None             # identique, NaN compris: rien à envoyer
+    assert bt.seq == 1
+
+    msg = bt.update(_book([(1.1000, 9)] + BIDS[1:], ASKS))   # volume du meilleur bid
+    assert not msg["full"] and msg["seq"] == 2 and msg["levels"] == [[BID, 0, 1.1000, 9.0]]
+
+    msg = bt.update(_book([(1.1000, 9)] + BIDS[1:2], ASKS + [(1.1004, 2)]))   # un bid disparaît, un ask apparaît
+    assert msg["levels"] == [[BID, 2, None, None], [ASK, 2, 1.1004, 2.0]]
+
+    assert bt.take_stats() == {"reads": 4, "updates": 3, "levels_sent": 9}
+    assert bt.unavailable()["available"] is False
@@ -0,0 +1,29 @@
+# tests/test_mt5_api.py
+import threading
+import time
+import types
+
+from app.data.mt5_api import _LockedModule
+
+
+def test_calls_are_serialised_across_threads():
+    active, peak = [0], [0]
+
+    def copy_rates_from(*_a):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        active[0] -= 1
+        return 42
+
+    fake = types.SimpleNamespace(TIMEFRAME_M1=1, copy_rates_from=copy_rates_from, Tick=tuple)
+    mt5 = _LockedModule(fake, threading.RLock())
+    threads = [threading.Thread(target=mt5.copy_rates_from, args=("EURUSD",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 1
+    assert mt5.copy_rates_from("EURUSD") == 42
+    assert mt5.TIMEFRAME_M1 == 1 and mt5.Tick is tuple   # constantes et types tels quels
@@ -0,0 +1,61 @@
+# tests/test_older_bars.py
+import time
+
+from app.chart.chart_bridge import ChartBridge
+from app.data import mt5_sim
+from app.chart.dispatch import ChartDispatcher
+from app.data.mt5_source import DataWorker
+
+T0 = 1_700_000_040
+
+
+class _Chart:
+    """Même relais que ChartView, sans WebEngine."""
+
+    def __init__(self):
+        self.bridge = ChartBridge(frame_ms=0)
+
+    def prepend_series(self, bars):
+        self.bridge.send_bars_prepend(bars)
+
+    def older_failed(self):
+        self.bridge.send_older_failed()
+
+
+def test_failed_read_is_not_the_start_of_history():
+    w = DataWorker("EURUSD", "M1")
+    got = []
+    w.olderBarsReady.connect(lambda *a: got.append(a))
+    w._on_older("EURUSD", "M1", T0, (None, (-10004, "No IPC connection")))
+    assert got == [("EURUSD", "M1", None)]
+
+    chart = _Chart()
+    prepended, failed = [], []
+    chart.bridge.barsPrepended.connect(prepended.append)
+    chart.bridge.olderFailed.connect(lambda: failed.append(True))
+    d = ChartDispatcher(chart, lod_min_bars=0)
+    d.on_older(None)
+    assert failed == [True] and prepended == []   # pas de tranche vide → HISTORY_START intact
+
+    d.on_older([])
+    assert len(prepended) == 1 and failed == [True]   # vraie fin: tranche vide
+
+
+def test_fetch_error_is_read_with_the_failed_call():
+    w = DataWorker("EURUSD", "M1")
+    was = mt5_sim._initialized
+    mt5_sim.shutdown()
+    try:
+        bars, error = w._fetch_older("EURUSD", "M1", T0, 10)
+        assert bars is None and error == (mt5_sim.RES_E_NO_CONNECTION, "No IPC connection")
+    finally:
+        if was:
+            mt5_sim.initialize()
+    mt5_sim.initialize()
+    before = int(time.time()) // 60 * 60 - 3600
+    try:
+        bars, error = w._fetch_older("EURUSD", "M1", before, 10)
+        assert error is None and bars and bars[-1]["time"] < before
+    finally:
+        if not was:
+            mt5_sim.shutdown()
@@ -0,0 +1,72 @@
+# tests/test_quality.py
+import numpy as np
+
+from app.data.quality import QualitySeries
+
+T0 = 1_700_000_040
+
+
+def _reference_add(ref: dict, batch, tf: int):
+    """Même agrégation, tick par tick en Python: slot → [min, max, sum, n, ticks, spikes, late]."""
+    times, spreads, keep, late = batch
+    last = next(reversed(ref), None)
+    for t, s, k, lt in zip(times.tolist(), spreads.tolist(), keep.tolist(), late.tolist()):
+        slot = t // tf * tf
+        last = slot if last is None else max(last, slot)
+        r = ref.setdefault(last, [np.nan, np.nan, 0.0, 0, 0, 0, 0])
+        if k and s == s:
+            r[0], r[1] = np.fmin(r[0], s), np.fmax(r[1], s)
+            r[2] += s
+            r[3] += 1
+        r[4] += int(k)
+        r[5] += int(not k and not lt)
+        r[6] += int(lt)
+
+
+def _rows(q: QualitySeries) -> dict:
+    c = {k: a[:q.n] for k, a in q.cols.items()}
+    return {int(t): [c["spread_min"][i], c["spread_max"][i], c["spread_sum"][i], int(c["spread_n"][i]),
+                     int(c["ticks"][i]), int(c["spikes"][i]), int(c["late"][i])]
+            for i, t in enumerate(c["time"].tolist())}
+
+
+def _batch(rng, t_start: int, n: int, span: int):
+    times = np.sort(rng.integers(t_start, t_start + span, n))
+    spreads = np.where(rng.random(n) < 0.1, np.nan, rng.uniform(1e-5, 3e-4, n))
+    late = rng.random(n) < 0.05
+    keep = ~late & (rng.random(n) > 0.05)
+    return times, spreads, keep, late
+
+
+def test_batches_match_the_reference_and_truncate_to_the_tail():
+    rng = np.random.default_rng(4)
+    q = QualitySeries(60, max_bars=50)
+    ref, t = {}, T0
+    for k in range(120):
+        # lots de quelques secondes à plusieurs heures: fusion de la barre courante, croissance,
+        # troncature (n + m > 2 * max_bars) et un lot à lui seul plus long que 2 * max_bars
+        span = 3 * 3600 * 60 if k == 60 else int(rng.choice([5, 90, 600, 3600 * 3]))
+        b = _batch(rng, t, int(rng.integers(1, 400)), span)
+        _reference_add(ref, b, 60)
+        q.add(*b)
+        t = int(b[0][-1])
+        assert min(len(ref), 50) <= q.n <= 100, k
+        want = {s: ref[s] for s in list(ref)[-q.n:]}      # toujours la queue de la série complète
+        got = _rows(q)
+        assert list(got) == list(want), k
+        np.testing.assert_allclose(np.array(list(got.values()), dtype=float),
+                                   np.array(list(want.values()), dtype=float), rtol=1e-12, equal_nan=True)
+
+
+def test_late_tick_is_counted_on_the_current_bar_and_points_read_back():
+    q = QualitySeries(60)
+    q.add(np.array([T0 + 61, T0 + 62]), np.array([2e-4, np.nan]), np.array([True, True]), np.array([False, False]))
+    # tick en retard daté de la barre précédente: rattaché à la barre courante, pas de retour en arrière
+    q.add(np.array([T0 + 5]), np.array([1e-4]), np.array([False]), np.array([True]))
+    assert len(q) == 1
+    p = q.point_at(T0 + 60)
+    assert p == {"time": T0 + 60, "spread_min": 2e-4, "spread_avg": 2e-4, "spread_max": 2e-4,
+                 "ticks": 2, "spikes": 0, "late": 1}
+    assert q.point_at(T0) is None
+    cols = q.to_columns()
+    assert cols["time"] == [T0 + 60] and cols["spread_avg"] == [2e-4]
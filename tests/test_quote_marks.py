@@ -0,0 +1,67 @@
+# tests/test_quote_marks.py
+import numpy as np
+import pytest
+
+from app.data.mt5_source import DataWorker
+from app.data.subscription import SymbolFeed
+
+T0 = 1_700_000_040
+
+
+class _Marks:
+    def __init__(self):
+        self.marks = []
+
+    def has(self, symbol):
+        return True
+
+    def mark(self, symbol, bid, ask, t=0):
+        self.marks.append((symbol, bid, ask))
+
+
+@pytest.fixture
+def worker():
+    w = DataWorker("EURUSD", "M1")
+    w._portfolio = _Marks()
+    return w
+
+
+def _ticks(bids, asks, last=None):
+    bids, asks = np.array(bids, dtype=np.float64), np.array(asks, dtype=np.float64)
+    n = len(bids)
+    prices = np.array(last, dtype=np.float64) if last is not None else (bids + asks) / 2.0
+    spreads = np.where((bids > 0) & (asks > 0), asks - bids, np.nan)
+    return np.arange(T0, T0 + n, dtype=np.int64), prices, np.zeros(n), spreads, bids, asks
+
+
+def _seeded_feed():
+    feed = SymbolFeed("EURUSD")
+    feed.add("M1", 60).set_history([{"time": T0 - 60, "open": 1.1, "high": 1.1, "low": 1.1,
+                                     "close": 1.1, "volume": 1.0}])
+    return feed
+
+
+def test_marks_use_the_real_bid_ask_even_with_a_last_price(worker):
+    feed = _seeded_feed()
+    worker._ingest_ticks(feed, *_ticks([1.1000, 1.1002], [1.1004, 1.1010], last=[1.1001, 1.1009]))
+    assert worker._portfolio.marks[-1] == ("EURUSD", 1.1002, 1.1010)
+
+
+def test_spike_and_one_sided_ticks_do_not_mark(worker):
+    feed = _seeded_feed()
+    # 2e tick: spike (> 5 %), 3e: ask manquant (flux last-only)
+    worker._ingest_ticks(feed, *_ticks([1.1000, 1.3000, 1.1003], [1.1002, 1.3002, 0.0],
+                                       last=[1.1001, 1.3001, 1.1003]))
+    assert worker._portfolio.marks == [("EURUSD", 1.1000, 1.1002)]
+
+
+def test_all_rejected_batch_marks_nothing(worker):
+    feed = _seeded_feed()
+    worker._ingest_ticks(feed, *_ticks([1.5000], [1.5002]))
+    assert worker._portfolio.marks == []
+
+
+def test_headless_services_can_be_turned_off():
+    w = DataWorker("EURUSD", "M1", book=False, portfolio=False, watchlist=False)
+    w.set_watchlist(["GBPUSD"])
+    assert not w._book_on and not w._portfolio_on and len(w._quotes) == 0
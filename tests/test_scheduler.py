@@ -0,0 +1,91 @@
+# tests/test_scheduler.py
+import time
+
+import pytest
+
+from app.data.scheduler import PollScheduler
+
+
+def _sched(**kw) -> PollScheduler:
+    opts = dict(min_ms=20, max_ms=500, dormant_ms=5000, budget_per_sec=1000.0,
+                target_ticks=1.0, stale_sec=300.0, alpha=0.3)
+    opts.update(kw)
+    return PollScheduler(**opts)
+
+
+def test_interval_follows_the_ewma_tick_rate():
+    s = _sched()
+    s.add("EURUSD")
+    now = time.monotonic()
+    s.observe("EURUSD", 0, now=now)           # premier poll: référence de temps
+    s.observe("EURUSD", 10, now=now + 0.1)    # 100 ticks/s instantanés
+    st = s._states["EURUSD"]
+    assert st.tick_rate == pytest.approx(0.3 * 100.0)
+    assert st.interval_ms == pytest.approx(1000.0 / 30.0)       # ~target_ticks par poll
+    assert st.next_due == pytest.approx(now + 0.1 + 1 / 30.0)
+
+    s.observe("EURUSD", 10, now=now + 0.2)
+    assert st.tick_rate == pytest.approx(0.3 * 100.0 + 0.7 * 30.0)
+
+    s.observe("EURUSD", 1000, now=now + 0.3)  # rafale: borné à min_ms
+    assert st.interval_ms == 20.0
+
+
+def test_quiet_symbol_backs_off_to_max_and_backlog_polls_at_once():
+    s = _sched()
+    s.add("XAUUSD")
+    st = s._states["XAUUSD"]
+    now = time.monotonic()
+    intervals = []
+    for k in range(12):
+        s.observe("XAUUSD", 0, now=now + k)
+        intervals.append(st.interval_ms)
+    assert intervals[:3] == pytest.approx([30.0, 45.0, 67.5])   # recul ×1.5 sans tick
+    assert intervals[-1] == 500.0
+
+    s.observe("XAUUSD", 5000, now=now + 13, backlog=True)        # batch plein: on redraine tout de suite
+    assert st.interval_ms == 20.0 and st.next_due == now + 13
+    assert s.due(now + 13) == ["XAUUSD"]
+    assert s.metrics()["symbols"]["XAUUSD"]["backlog"] is True
+
+
+def test_closed_session_and_stale_symbol_go_dormant_then_wake():
+    s = _sched(stale_sec=60.0)
+    s.add("EURUSD")
+    s.add("US500")
+    now = time.monotonic()
+    s.set_session("US500", False)
+    assert s.is_dormant("US500", now) and not s.is_dormant("EURUSD", now)
+    s.observe("US500", 0, now=now)
+    assert s._states["US500"].next_due == pytest.approx(now + 5.0)    # dormant_ms
+
+    s.observe("EURUSD", 0, now=now + 61)        # aucun tick depuis stale_sec
+    assert s.is_dormant("EURUSD", now + 61)
+    assert s._states["EURUSD"].interval_ms == 5000.0
+    s.observe("EURUSD", 3, now=now + 66)        # un tick le réveille
+    assert not s.is_dormant("EURUSD", now + 66) and s._states["EURUSD"].interval_ms == 500.0
+
+    s.set_session("US500", True)
+    assert not s.is_dormant("US500", now)
+    assert s.metrics()["symbols"]["EURUSD"]["dormant"] is False
+
+
+def test_global_budget_stretches_every_interval():
+    s = _sched(budget_per_sec=100.0)
+    for k in range(10):
+        s.add(f"S{k}")                           # 10 × 50 Hz demandés pour 100 appels/s
+    assert s._scale == pytest.approx(5.0)
+    now = time.monotonic()
+    s.observe("S0", 1, now=now)
+    st = s._states["S0"]
+    assert 1.0 < s._scale < 5.0                  # S0 ralentit (15 ticks/s) → demande moindre
+    assert st.next_due == pytest.approx(now + s._scale * st.interval_ms / 1000.0, abs=1e-9)
+    assert s.metrics()["budget_scale"] == round(s._scale, 2)
+
+    s.set_session("S1", False)                   # une session fermée ne compte plus dans la demande
+    assert s._scale < 5.0
+    for k in range(2, 10):
+        s.remove(f"S{k}")
+    assert s._scale == 1.0
+    assert s.due(now) == ["S1"]                  # S0 vient d'être pollé, S1 attend depuis l'ajout
+    assert s.next_delay_ms(now) == 0
@@ -0,0 +1,90 @@
+# tests/test_shm_ring.py
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from app.data.shm_ring import ShmRing, RingReader, TICK_RECORD
+
+CAPACITY = 8
+_names = itertools.count()
+
+
+@pytest.fixture
+def ring():
+    r = ShmRing.create(f"test_ring_{os.getpid()}_{next(_names)}", TICK_RECORD, CAPACITY)
+    yield r
+    r.close()
+
+
+def _ticks(first: int, n: int) -> np.ndarray:
+    """n ticks dont le time_msc vaut first, first+1... (pour reconnaître chaque enregistrement)."""
+    rows = np.zeros(n, dtype=TICK_RECORD)
+    rows["time_msc"] = np.arange(first, first + n)
+    rows["bid"] = rows["time_msc"] / 1000.0
+    return rows
+
+
+def test_wraparound_reads_in_order_across_the_end_of_the_ring(ring):
+    reader = RingReader(ring)
+    ring.publish(_ticks(1, 5))
+    assert reader.read()["time_msc"].tolist() == [1, 2, 3, 4, 5]
+
+    assert ring.publish(_ticks(6, 6)) == 11          # slots 5,6,7 puis 0,1,2
+    head = reader.read().copy()                       # un seul bloc contigu par appel
+    tail = reader.read().copy()
+    assert head["time_msc"].tolist() == [6, 7, 8] and tail["time_msc"].tolist() == [9, 10, 11]
+    assert np.concatenate([head, tail])["seq"].tolist() == list(range(6, 12))
+    assert reader.torn() == 0 and reader.lost == 0 and reader.lag() == 0
+    assert len(reader.read()) == 0
+
+
+def test_reader_more_than_one_ring_behind_skips_to_the_oldest_and_counts_the_loss(ring):
+    reader = RingReader(ring)
+    ring.publish(_ticks(1, 3))
+    for k in range(4):                                # 20 de plus: le lecteur a > 2 tours de retard
+        ring.publish(_ticks(4 + 5 * k, 5))
+    assert reader.lag() == 23
+
+    got = np.concatenate([reader.read().copy(), reader.read().copy()])
+    assert reader.lost == 23 - CAPACITY
+    assert got["seq"].tolist() == list(range(16, 24))   # les CAPACITY derniers, dans l'ordre
+    assert got["time_msc"].tolist() == list(range(16, 24))
+    assert reader.torn() == 0
+
+
+def test_oversized_publish_keeps_only_the_last_capacity_records(ring):
+    reader = RingReader(ring)
+    assert ring.publish(_ticks(1, 3 * CAPACITY)) == 3 * CAPACITY
+    got = reader.read()
+    assert got["time_msc"].tolist() == list(range(2 * CAPACITY + 1, 3 * CAPACITY + 1))
+    assert reader.lost == 2 * CAPACITY
+
+
+def test_slot_overwritten_during_the_copy_is_reported_torn(ring):
+    reader = RingReader(ring)
+    ring.publish(_ticks(1, 4))
+    view = reader.read()                              # vue sans copie sur les slots 0..3
+    ring.publish(_ticks(5, CAPACITY - 4 + 2))         # l'écrivain fait le tour: slots 0 et 1 écrasés
+    assert view["seq"].tolist() == [9, 10, 3, 4]      # seq changé sous le lecteur
+    n = reader.torn()
+    assert n == 2 and reader.lost == 2
+    assert view[n:]["time_msc"].tolist() == [3, 4]    # le reste de la vue est intact
+
+    # réservation en cours (reserve_seq avancé, commit pas encore): les slots visés sont déjà perdus
+    view = reader.read()
+    assert view["seq"].tolist() == [5, 6, 7, 8]
+    ring._hdr["reserve_seq"] = ring.commit_seq + 3    # seq 11..13 → slots 2, 3, 4 (celui du seq 5)
+    assert reader.torn() == 1 and view[1:]["seq"].tolist() == [6, 7, 8] and reader.lost == 3
+
+
+def test_symbol_table_is_shared_with_attached_readers(ring):
+    assert [ring.symbol_id(s) for s in ("EURUSD", "GBPUSD", "EURUSD")] == [0, 1, 0]
+    other = ShmRing.attach(ring.name, TICK_RECORD)
+    try:
+        assert other.symbol_name(1) == "GBPUSD" and other.symbol_name(7) is None
+        ring.publish(_ticks(1, 2))
+        assert RingReader(other, from_start=True).read()["time_msc"].tolist() == [1, 2]
+    finally:
+        other.close()
@@ -0,0 +1,68 @@
+# tests/test_tick_cursor.py
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.data.feed_process import copy_fresh_ticks
+from app.data.resample import DEAL_FLAGS, tick_prices
+from app.data.shm_ring import TICK_RECORD
+
+
+class _FakeMT5:
+    """copy_ticks_from à la seconde (comme MT5): renvoie les `count` premiers ticks de la seconde demandée."""
+
+    COPY_TICKS_ALL = -1
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.calls = 0
+
+    def copy_ticks_from(self, symbol, since, count, flags):
+        self.calls += 1
+        start = np.searchsorted(self.ticks["time_msc"], int(since.timestamp()) * 1000, "left")
+        return self.ticks[start:start + int(count)]
+
+
+def _ticks(msc):
+    t = np.zeros(len(msc), dtype=TICK_RECORD)
+    t["time_msc"] = msc
+    t["bid"], t["ask"] = 1.1, 1.1002
+    return t
+
+
+def _feed(last_msc, seen):
+    return SimpleNamespace(symbol="EURUSD", last_tick_msc=last_msc, last_msc_seen=seen)
+
+
+def test_cursor_moves_past_a_second_larger_than_the_batch():
+    # 12 000 ticks dans la même seconde, lot de 5 000: le curseur doit avancer à chaque appel
+    ticks = _ticks(np.repeat(np.arange(1_000_000, 1_001_000), 12))
+    mt5 = _FakeMT5(ticks)
+    feed = _feed(int(ticks["time_msc"][0]), 1)
+    seen = 1
+    for _ in range(10):
+        rows, _full = copy_fresh_ticks(mt5, feed, 5000)
+        if rows is None:
+            break
+        seen += len(rows)
+    assert seen == len(ticks)
+    assert feed.last_tick_msc == int(ticks["time_msc"][-1])
+
+
+def test_cursor_skips_already_seen_ticks_at_same_msc():
+    ticks = _ticks([1_000_000, 1_000_500, 1_000_500, 1_000_900])
+    feed = _feed(1_000_500, 1)   # un seul des deux ticks à 1_000_500 consommé
+    rows, full = copy_fresh_ticks(_FakeMT5(ticks), feed, 5000)
+    assert list(rows["time_msc"]) == [1_000_500, 1_000_900]
+    assert not full
+    assert (feed.last_tick_msc, feed.last_msc_seen) == (1_000_900, 1)
+
+
+def test_volume_counted_on_deal_ticks_only():
+    ticks = _ticks([1_000_000, 1_000_100, 1_000_200])
+    ticks["volume"] = 3.0                        # bid/ask seuls: volume de la dernière transaction répété
+    ticks["flags"] = [6, 6 | DEAL_FLAGS, 6]
+    ticks["last"] = [0.0, 1.1001, 0.0]
+    _, prices, volumes = tick_prices(ticks)
+    assert list(volumes) == [0.0, 3.0, 0.0]
+    assert prices[1] == 1.1001
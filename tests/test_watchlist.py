@@ -0,0 +1,48 @@
+# tests/test_watchlist.py
+import numpy as np
+
+from app.data.watchlist import QuoteBoard
+
+T0 = 1_700_000_040
+
+
+def _board():
+    qb = QuoteBoard()
+    qb.set_symbols(["EURUSD"])
+    return qb
+
+
+def test_spread_comes_from_the_real_bid_ask():
+    qb = _board()
+    qb.set_daily("EURUSD", [1.0950, 1.1000], 0.00001, now=1.0)
+    row = qb.take()["EURUSD"]
+    assert row["bid"] == row["ask"] == 1.1 and row["spread"] is None   # clôture D1 en attendant un tick
+
+    qb.mark("EURUSD", 1.1000, 1.1000, T0)   # même prix que la clôture, mais vrai tick: marqué
+    assert qb.take()["EURUSD"]["spread"] == 0.0
+    qb.mark("EURUSD", 1.1000, 1.1003, T0 + 1)
+    row = qb.take()["EURUSD"]
+    assert (row["bid"], row["ask"], row["time"]) == (1.1000, 1.1003, T0 + 1)
+    assert round(row["spread"]) == 30
+
+
+def test_one_sided_quotes_are_ignored():
+    qb = _board()
+    qb.mark("EURUSD", 1.1000, 1.1002, T0)
+    qb.take()
+    qb.mark("EURUSD", 1.1005, 0.0, T0 + 1)   # flux last-only / ask manquant
+    qb.mark("EURUSD", 0.0, 1.1006, T0 + 2)
+    assert qb.take() == {}
+
+
+def test_watch_only_ring_ticks_mark_the_last_two_sided_quote():
+    from app.data.mt5_source import DataWorker
+
+    w = DataWorker("EURUSD", "M1")
+    w._quotes.set_symbols(["GBPUSD"])
+    w._quotes.set_daily("GBPUSD", [1.27, 1.27], 0.00001, now=1.0)
+    w._quotes.take()
+    times = np.array([T0, T0 + 1, T0 + 2], dtype=np.int64)
+    w._mark_last("GBPUSD", times, np.array([1.2700, 1.2702, 1.2705]), np.array([1.2702, 1.2704, 0.0]))
+    row = w._quotes.take()["GBPUSD"]
+    assert (row["bid"], row["ask"], row["time"]) == (1.2702, 1.2704, T0 + 1)